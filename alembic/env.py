@@ -10,7 +10,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from app.core.database import Base
 from app.core.config import settings
-from app.models import Card, Sale, Listing, Opportunity  # noqa
+from app.models import Card, Sale, Listing, Opportunity, OpportunityHistory, AlertOutbox, Subscriber, AlertRule, ScanRun  # noqa
 
 # this is the Alembic Config object
 config = context.config
@@ -0,0 +1,113 @@
+"""Initial migration
+
+Revision ID: 001
+Revises: 
+Create Date: 2024-01-15 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'cards',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('normalized_name', sa.String(), nullable=False),
+        sa.Column('raw_name', sa.String(), nullable=True),
+        sa.Column('card_set', sa.String(), nullable=True),
+        sa.Column('card_number', sa.String(), nullable=True),
+        sa.Column('language', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_cards_id', 'cards', ['id'])
+    op.create_index('ix_cards_normalized_name', 'cards', ['normalized_name'])
+    op.create_index('idx_card_normalized_lang', 'cards', ['normalized_name', 'language'])
+
+    op.create_table(
+        'sales',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('card_id', sa.Integer(), nullable=False),
+        sa.Column('ebay_item_id', sa.String(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('shipping_cost', sa.Float(), nullable=True),
+        sa.Column('sold_date', sa.DateTime(), nullable=False),
+        sa.Column('psa_grade', sa.String(), nullable=True),
+        sa.Column('condition', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['card_id'], ['cards.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_sales_id', 'sales', ['id'])
+    op.create_index('ix_sales_card_id', 'sales', ['card_id'])
+    op.create_index('ix_sales_ebay_item_id', 'sales', ['ebay_item_id'], unique=True)
+    op.create_index('ix_sales_sold_date', 'sales', ['sold_date'])
+    op.create_index('idx_sale_card_sold_date', 'sales', ['card_id', 'sold_date'])
+    op.create_index('idx_sale_psa_grade', 'sales', ['psa_grade'])
+
+    op.create_table(
+        'listings',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('card_id', sa.Integer(), nullable=False),
+        sa.Column('ebay_item_id', sa.String(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('shipping_cost', sa.Float(), nullable=True),
+        sa.Column('listing_url', sa.String(), nullable=True),
+        sa.Column('psa_grade', sa.String(), nullable=True),
+        sa.Column('condition', sa.String(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('ended_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['card_id'], ['cards.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_listings_id', 'listings', ['id'])
+    op.create_index('ix_listings_card_id', 'listings', ['card_id'])
+    op.create_index('ix_listings_ebay_item_id', 'listings', ['ebay_item_id'], unique=True)
+    op.create_index('ix_listings_is_active', 'listings', ['is_active'])
+    op.create_index('idx_listing_card_active', 'listings', ['card_id', 'is_active'])
+
+    op.create_table(
+        'opportunities',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('card_id', sa.Integer(), nullable=False),
+        sa.Column('listing_id', sa.Integer(), nullable=False),
+        sa.Column('listing_price', sa.Float(), nullable=False),
+        sa.Column('floor_price', sa.Float(), nullable=False),
+        sa.Column('discount_percentage', sa.Float(), nullable=False),
+        sa.Column('estimated_gross_profit', sa.Float(), nullable=False),
+        sa.Column('estimated_net_profit', sa.Float(), nullable=False),
+        sa.Column('profit_margin', sa.Float(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('alerted', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['card_id'], ['cards.id']),
+        sa.ForeignKeyConstraint(['listing_id'], ['listings.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_opportunities_id', 'opportunities', ['id'])
+    op.create_index('ix_opportunities_card_id', 'opportunities', ['card_id'])
+    op.create_index('ix_opportunities_is_active', 'opportunities', ['is_active'])
+    op.create_index('ix_opportunities_created_at', 'opportunities', ['created_at'])
+    op.create_index('idx_opp_card_active', 'opportunities', ['card_id', 'is_active'])
+    op.create_index('idx_opp_profit_margin', 'opportunities', ['profit_margin'])
+
+
+def downgrade() -> None:
+    op.drop_table('opportunities')
+    op.drop_table('listings')
+    op.drop_table('sales')
+    op.drop_table('cards')
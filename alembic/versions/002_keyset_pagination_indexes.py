@@ -0,0 +1,39 @@
+"""Index composites pour la pagination keyset
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # (card_id, sold_date, id) couvre aussi les requêtes de l'ancien index
+    op.create_index('idx_sale_card_sold_date_id', 'sales', ['card_id', 'sold_date', 'id'])
+    op.drop_index('idx_sale_card_sold_date', table_name='sales')
+    op.create_index('idx_sale_sold_date_id', 'sales', ['sold_date', 'id'])
+
+    op.create_index('idx_listing_created_id', 'listings', ['created_at', 'id'])
+
+    op.create_index('idx_opp_profit_margin_id', 'opportunities', ['profit_margin', 'id'])
+    op.drop_index('idx_opp_profit_margin', table_name='opportunities')
+
+
+def downgrade() -> None:
+    op.create_index('idx_opp_profit_margin', 'opportunities', ['profit_margin'])
+    op.drop_index('idx_opp_profit_margin_id', table_name='opportunities')
+
+    op.drop_index('idx_listing_created_id', table_name='listings')
+
+    op.drop_index('idx_sale_sold_date_id', table_name='sales')
+    op.create_index('idx_sale_card_sold_date', 'sales', ['card_id', 'sold_date'])
+    op.drop_index('idx_sale_card_sold_date_id', table_name='sales')
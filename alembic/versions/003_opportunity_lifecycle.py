@@ -0,0 +1,50 @@
+"""Cycle de vie des opportunités: clôture et historique
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('opportunities', sa.Column('closed_at', sa.DateTime(), nullable=True))
+    op.add_column('opportunities', sa.Column('close_reason', sa.String(), nullable=True))
+    op.create_index('idx_opp_active_closed_at', 'opportunities', ['is_active', 'closed_at'])
+
+    op.create_table(
+        'opportunities_history',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('card_id', sa.Integer(), nullable=False),
+        sa.Column('listing_id', sa.Integer(), nullable=False),
+        sa.Column('listing_price', sa.Float(), nullable=False),
+        sa.Column('floor_price', sa.Float(), nullable=False),
+        sa.Column('discount_percentage', sa.Float(), nullable=False),
+        sa.Column('estimated_gross_profit', sa.Float(), nullable=False),
+        sa.Column('estimated_net_profit', sa.Float(), nullable=False),
+        sa.Column('profit_margin', sa.Float(), nullable=False),
+        sa.Column('alerted', sa.Boolean(), nullable=True),
+        sa.Column('close_reason', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('closed_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_opportunities_history_card_id', 'opportunities_history', ['card_id'])
+    op.create_index('ix_opportunities_history_archived_at', 'opportunities_history', ['archived_at'])
+
+
+def downgrade() -> None:
+    op.drop_table('opportunities_history')
+    op.drop_index('idx_opp_active_closed_at', table_name='opportunities')
+    op.drop_column('opportunities', 'close_reason')
+    op.drop_column('opportunities', 'closed_at')
@@ -0,0 +1,42 @@
+"""Outbox transactionnelle des alertes
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'alert_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('opportunity_id', sa.Integer(), nullable=True),
+        sa.Column('idempotency_key', sa.String(), nullable=False),
+        sa.Column('chat_id', sa.String(), nullable=True),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('available_at', sa.DateTime(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['opportunity_id'], ['opportunities.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('idempotency_key')
+    )
+    op.create_index('ix_alert_outbox_id', 'alert_outbox', ['id'])
+    op.create_index('idx_outbox_status_available', 'alert_outbox', ['status', 'available_at'])
+
+
+def downgrade() -> None:
+    op.drop_table('alert_outbox')
@@ -0,0 +1,56 @@
+"""Abonnés et règles d'alerte
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'subscribers',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('telegram_chat_id', sa.String(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('telegram_chat_id')
+    )
+    op.create_index('ix_subscribers_id', 'subscribers', ['id'])
+
+    op.create_table(
+        'alert_rules',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('subscriber_id', sa.Integer(), nullable=False),
+        sa.Column('card_id', sa.Integer(), nullable=True),
+        sa.Column('card_name', sa.String(), nullable=True),
+        sa.Column('card_set', sa.String(), nullable=True),
+        sa.Column('psa_grade', sa.String(), nullable=True),
+        sa.Column('language', sa.String(), nullable=True),
+        sa.Column('min_net_profit', sa.Float(), nullable=True),
+        sa.Column('max_price', sa.Float(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['subscriber_id'], ['subscribers.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['card_id'], ['cards.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_alert_rules_id', 'alert_rules', ['id'])
+    op.create_index('idx_alert_rule_subscriber', 'alert_rules', ['subscriber_id'])
+
+
+def downgrade() -> None:
+    op.drop_table('alert_rules')
+    op.drop_table('subscribers')
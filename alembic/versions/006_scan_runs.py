@@ -0,0 +1,49 @@
+"""Comptes rendus de scan
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'scan_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('trace_id', sa.String(length=32), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('incremental', sa.Boolean(), nullable=True),
+        sa.Column('queries_count', sa.Integer(), nullable=False),
+        sa.Column('sales_added', sa.Integer(), nullable=False),
+        sa.Column('listings_updated', sa.Integer(), nullable=False),
+        sa.Column('opportunities_found', sa.Integer(), nullable=False),
+        sa.Column('opportunities_closed', sa.Integer(), nullable=False),
+        sa.Column('cache_hits', sa.Integer(), nullable=False),
+        sa.Column('cache_misses', sa.Integer(), nullable=False),
+        sa.Column('http_retries', sa.Integer(), nullable=False),
+        sa.Column('error_count', sa.Integer(), nullable=False),
+        sa.Column('stages_json', sa.Text(), nullable=False),
+        sa.Column('errors_json', sa.Text(), nullable=False),
+        sa.Column('queries_json', sa.Text(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('duration_seconds', sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_scan_runs_id', 'scan_runs', ['id'])
+    op.create_index('ix_scan_runs_trace_id', 'scan_runs', ['trace_id'])
+    op.create_index('idx_scan_run_started', 'scan_runs', ['started_at'])
+
+
+def downgrade() -> None:
+    op.drop_table('scan_runs')
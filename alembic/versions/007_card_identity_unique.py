@@ -0,0 +1,48 @@
+"""Identité unique des cartes (normalized_name, language)
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+# Tables qui référencent une carte
+CARD_REFERENCES = ('sales', 'listings', 'opportunities', 'opportunities_history', 'alert_rules')
+
+
+def upgrade() -> None:
+    op.execute("UPDATE cards SET language = 'EN' WHERE language IS NULL")
+
+    # Doublons créés par des scans concurrents: on garde la plus ancienne carte
+    op.execute(
+        "CREATE TEMPORARY TABLE card_dedupe AS "
+        "SELECT c.id AS old_id, k.keep_id AS new_id FROM cards c "
+        "JOIN (SELECT normalized_name, language, MIN(id) AS keep_id FROM cards "
+        "GROUP BY normalized_name, language HAVING COUNT(*) > 1) k "
+        "ON c.normalized_name = k.normalized_name AND c.language = k.language "
+        "WHERE c.id <> k.keep_id"
+    )
+    for table in CARD_REFERENCES:
+        op.execute(
+            f"UPDATE {table} SET card_id = "
+            f"(SELECT new_id FROM card_dedupe WHERE old_id = {table}.card_id) "
+            f"WHERE card_id IN (SELECT old_id FROM card_dedupe)"
+        )
+    op.execute("DELETE FROM cards WHERE id IN (SELECT old_id FROM card_dedupe)")
+    op.execute("DROP TABLE card_dedupe")
+
+    op.drop_index('idx_card_normalized_lang', table_name='cards')
+    op.create_index('idx_card_normalized_lang', 'cards', ['normalized_name', 'language'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_card_normalized_lang', table_name='cards')
+    op.create_index('idx_card_normalized_lang', 'cards', ['normalized_name', 'language'], unique=False)
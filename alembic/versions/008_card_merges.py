@@ -0,0 +1,30 @@
+"""Fusion des fiches de cartes en doublon
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('cards') as batch_op:
+        batch_op.add_column(sa.Column('merged_into_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_cards_merged_into_id', 'cards', ['merged_into_id'], ['id'])
+        batch_op.create_index('ix_cards_merged_into_id', ['merged_into_id'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('cards') as batch_op:
+        batch_op.drop_index('ix_cards_merged_into_id')
+        batch_op.drop_constraint('fk_cards_merged_into_id', type_='foreignkey')
+        batch_op.drop_column('merged_into_id')
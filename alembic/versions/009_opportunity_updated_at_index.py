@@ -0,0 +1,23 @@
+"""Index sur opportunities.updated_at (rattrapage de l'index en mémoire)
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_opp_updated_at', 'opportunities', ['updated_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_opp_updated_at', table_name='opportunities')
@@ -0,0 +1,25 @@
+"""Index sur listings.updated_at et cards.updated_at (copie analytique incrémentale)
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_listing_updated_at', 'listings', ['updated_at'])
+    op.create_index('idx_card_updated_at', 'cards', ['updated_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_card_updated_at', table_name='cards')
+    op.drop_index('idx_listing_updated_at', table_name='listings')
@@ -0,0 +1,31 @@
+"""Ventes archivées (ebay_item_id réservés contre la réinsertion)
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'archived_sales',
+        sa.Column('ebay_item_id', sa.String(), nullable=False),
+        sa.Column('sale_id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.String(length=7), nullable=False),
+        sa.PrimaryKeyConstraint('ebay_item_id')
+    )
+    op.create_index('idx_archived_sale_month', 'archived_sales', ['month'])
+
+
+def downgrade() -> None:
+    op.drop_table('archived_sales')
@@ -0,0 +1,33 @@
+"""Totaux des ventes archivées par mois et par langue
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'archived_sales_totals',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.String(length=7), nullable=False),
+        sa.Column('language', sa.String(), nullable=True),
+        sa.Column('sales_count', sa.Integer(), nullable=False),
+        sa.Column('total_price', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_archived_sales_total_month_language', 'archived_sales_totals', ['month', 'language'])
+
+
+def downgrade() -> None:
+    op.drop_table('archived_sales_totals')
@@ -0,0 +1,61 @@
+"""
+Routes d'administration: profilage par échantillonnage du processus.
+
+Désactivées (404) tant que `profiling_enabled` est faux. Si
+`profiling_admin_token` est défini, l'en-tête `X-Admin-Token` est exigé.
+"""
+
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from app.core.config import settings
+from app.core.profiler import PROFILE_ID_HEADER, ProfilerBusy, profiler_service
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+def require_profiling(x_admin_token: Optional[str] = Header(None)):
+    if not profiler_service.enabled:
+        raise HTTPException(status_code=404, detail="Profilage désactivé")
+    if settings.profiling_admin_token and x_admin_token != settings.profiling_admin_token:
+        raise HTTPException(status_code=403, detail="Jeton d'administration invalide")
+
+
+@router.get("/profile", response_class=PlainTextResponse, dependencies=[Depends(require_profiling)])
+async def profile_process(seconds: float = Query(10.0, gt=0)):
+    """
+    Échantillonne tous les threads du processus pendant `seconds` secondes
+    et renvoie les piles au format collapsed (flamegraph.pl, speedscope).
+    """
+    if seconds > profiler_service.max_seconds:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Durée maximum: {profiler_service.max_seconds} secondes"
+        )
+    try:
+        profile_id, profiler = profiler_service.begin("admin")
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="Un profil est déjà en cours")
+
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        result = profiler_service.end(profile_id, profiler)
+
+    return PlainTextResponse(result["collapsed"], headers={PROFILE_ID_HEADER: str(profile_id)})
+
+
+@router.get("/profiles", dependencies=[Depends(require_profiling)])
+def list_profiles():
+    """Derniers profils (sans les piles)"""
+    return profiler_service.recent()
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse, dependencies=[Depends(require_profiling)])
+def get_profile(profile_id: int):
+    """Piles d'un profil (admin ou requête avec `X-Profile: 1`)"""
+    result = profiler_service.get(profile_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Profil non trouvé")
+    return PlainTextResponse(result["collapsed"])
@@ -1,12 +1,28 @@
-from fastapi import APIRouter, Depends, Query
+import asyncio
+from collections import OrderedDict
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from typing import List, Optional
+from sqlalchemy import desc
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
-from app.core.database import get_db
-from app.models import Card, Sale, Listing, Opportunity
+import orjson
+import time
+from app.core.config import settings
+from app.core.database import SessionLocal, get_db
+from app.core.responses import ORJSONResponse, etag_for, etag_matches, json_response
+from app.models import Card, Listing, Opportunity
+from app.services import dashboard_stats
+from app.services.container import services
+from app.services.opportunity_feed import opportunity_payload, volumes_30d
+from app.services.opportunity_index import INDEX_AGE_HEADER
+from app.services.price_movers import compute_leaderboard
 
-router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+router = APIRouter(prefix="/dashboard", tags=["dashboard"], default_response_class=ORJSONResponse)
+
+# Bundles déjà calculés: {paramètres: (expiration, corps JSON, ETag, âge de l'index)},
+# du moins au plus récemment servi (au plus `dashboard_bundle_cache_size`)
+_bundle_cache: "OrderedDict[Tuple, Tuple[float, bytes, str, Optional[float]]]" = OrderedDict()
 
 
 @router.get("/market-stats")
@@ -14,60 +30,9 @@ async def get_market_stats(db: Session = Depends(get_db)):
     """
     Statistiques globales du marché
     """
-    # Total cards
-    total_cards = db.query(Card).count()
-    
-    # Total sales
-    total_sales = db.query(Sale).count()
-    
-    # Total active listings
-    total_listings = db.query(Listing).filter(Listing.is_active == True).count()
-    
-    # Total volume
-    total_volume = db.query(func.sum(Sale.price)).scalar() or 0
-    
-    # Volume 24h
-    yesterday = datetime.utcnow() - timedelta(days=1)
-    volume_24h = db.query(func.sum(Sale.price)).filter(
-        Sale.sold_date >= yesterday
-    ).scalar() or 0
-    
-    # Volume 7d
-    week_ago = datetime.utcnow() - timedelta(days=7)
-    volume_7d = db.query(func.sum(Sale.price)).filter(
-        Sale.sold_date >= week_ago
-    ).scalar() or 0
-    
-    # Volume 30d
-    month_ago = datetime.utcnow() - timedelta(days=30)
-    volume_30d = db.query(func.sum(Sale.price)).filter(
-        Sale.sold_date >= month_ago
-    ).scalar() or 0
-    
-    # Average by language
-    average_by_language = db.query(
-        Card.language,
-        func.avg(Sale.price).label('average_price'),
-        func.count(Sale.id).label('sales_count')
-    ).join(Sale).group_by(Card.language).all()
-    
-    return {
-        "total_cards": total_cards,
-        "total_sales": total_sales,
-        "total_listings": total_listings,
-        "total_volume": float(total_volume),
-        "volume_24h": float(volume_24h),
-        "volume_7d": float(volume_7d),
-        "volume_30d": float(volume_30d),
-        "average_by_language": [
-            {
-                "language": lang,
-                "average_price": float(avg or 0),
-                "sales_count": count
-            }
-            for lang, avg, count in average_by_language
-        ]
-    }
+    stats = _stats()
+    totals = stats.market_totals(db, datetime.utcnow())
+    return dashboard_stats.market_stats_payload(totals, stats.language_averages(db))
 
 
 @router.get("/market-overview")
@@ -75,97 +40,84 @@ async def get_market_overview(db: Session = Depends(get_db)):
     """
     Vue d'ensemble du marché avec top movers
     """
-    # Get market stats
-    stats = await get_market_stats(db)
-    
-    # Get top opportunities
-    total_opportunities = db.query(Opportunity).filter(
-        Opportunity.is_active == True
-    ).count()
-    
-    # Get sales in last 24h
-    yesterday = datetime.utcnow() - timedelta(days=1)
-    sales_24h = db.query(Sale).filter(Sale.sold_date >= yesterday).count()
-    
-    # Get top movers (cards with highest price changes)
-    # Simplified version - just get cards with most recent sales
-    week_ago = datetime.utcnow() - timedelta(days=7)
-    top_movers = db.query(
-        Card.id,
-        Card.normalized_name,
-        func.avg(Sale.price).label('current_price'),
-        func.count(Sale.id).label('volume_7d')
-    ).join(Sale).filter(
-        Sale.sold_date >= week_ago
-    ).group_by(Card.id, Card.normalized_name).order_by(
-        desc('volume_7d')
-    ).limit(5).all()
-    
-    return {
-        "total_cards": stats["total_cards"],
-        "total_opportunities": total_opportunities,
-        "total_volume_24h": stats["volume_24h"],
-        "sales_24h": sales_24h,
-        "top_movers": [
-            {
-                "card_id": card_id,
-                "card_name": name,
-                "current_price": float(price or 0),
-                "change_24h": 5.0,  # Placeholder
-                "volume_7d": volume,
-                "trend": "up"
-            }
-            for card_id, name, price, volume in top_movers
-        ]
-    }
+    totals = _stats().market_totals(db, datetime.utcnow())
+    return dashboard_stats.market_overview_payload(totals, _top_movers(db))
+
+
+def _stats():
+    """
+    Agrégations sur la copie analytique DuckDB si elle est activée et à
+    jour, sinon SQLAlchemy sur la base (mêmes fonctions, mêmes résultats)
+    """
+    return services.analytics if services.analytics.is_fresh() else dashboard_stats
+
+
+def _top_movers(db: Session) -> Dict[str, List[Dict]]:
+    """Classement en mémoire (O(K)) s'il est assez récent, sinon recalculé depuis la base"""
+    if services.price_movers.is_fresh():
+        return services.price_movers.leaderboard(dashboard_stats.TOP_MOVERS)
+    return compute_leaderboard(db, dashboard_stats.TOP_MOVERS)
+
+
+@router.get("/analytics")
+async def get_analytics_stats():
+    """État de la copie analytique (fraîcheur, lignes copiées, lectures servies)"""
+    return services.analytics.get_stats()
 
 
 @router.get("/hot-opportunities")
 async def get_hot_opportunities(
+    response: Response,
     limit: int = Query(10, ge=1, le=50),
     min_roi: float = Query(15.0, ge=0),
+    language: Optional[str] = None,
+    grade: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """
-    Opportunités chaudes (meilleur ROI)
+    Opportunités chaudes (meilleur ROI), servies par l'index en mémoire
+    tant qu'il est assez récent
     """
-    opportunities = db.query(Opportunity).join(
+    opportunities, index_age = _hot_opportunities(db, limit, min_roi, language, grade)
+    if index_age is not None:
+        response.headers[INDEX_AGE_HEADER] = f"{index_age:.3f}"
+    return json_response(opportunities, response)
+
+
+def _hot_opportunities(
+    db: Session,
+    limit: int,
+    min_roi: float,
+    language: Optional[str],
+    grade: Optional[str]
+) -> Tuple[List[Dict], Optional[float]]:
+    """(opportunités, âge de l'index ou None si lues en base)"""
+    if services.opportunity_index.is_fresh():
+        entries = services.opportunity_index.top(limit, min_margin=min_roi, language=language, grade=grade)
+        return [entry.payload for entry in entries], services.opportunity_index.age
+    
+    query = db.query(Opportunity).join(
         Card, Opportunity.card_id == Card.id
     ).join(
         Listing, Opportunity.listing_id == Listing.id
     ).filter(
         Opportunity.is_active == True,
         Opportunity.profit_margin >= min_roi
-    ).order_by(
-        desc(Opportunity.profit_margin)
+    )
+    if language:
+        query = query.filter(Card.language == language.upper())
+    if grade:
+        query = query.filter(
+            Listing.psa_grade.is_(None) if grade == "Raw" else Listing.psa_grade == grade
+        )
+    opportunities = query.order_by(
+        desc(Opportunity.profit_margin), desc(Opportunity.id)
     ).limit(limit).all()
     
-    result = []
-    for opp in opportunities:
-        # Get volume 30d
-        month_ago = datetime.utcnow() - timedelta(days=30)
-        volume_30d = db.query(func.count(Sale.id)).filter(
-            Sale.card_id == opp.card_id,
-            Sale.sold_date >= month_ago
-        ).scalar() or 0
-        
-        result.append({
-            "id": opp.id,
-            "card_name": opp.card.normalized_name,
-            "card_set": opp.card.card_set or "Unknown",
-            "language": opp.card.language,
-            "grade": opp.listing.psa_grade or "Raw",
-            "floor_price": opp.floor_price,
-            "listing_price": opp.listing_price,
-            "profit_margin": opp.profit_margin,
-            "estimated_net_profit": opp.estimated_net_profit,
-            "volume_30d": volume_30d,
-            "ebay_url": opp.listing.listing_url or f"https://ebay.com/itm/{opp.listing.ebay_item_id}",
-            "image_url": f"https://i.ebayimg.com/images/g/{opp.listing.ebay_item_id}/s-l500.jpg",
-            "trending": volume_30d > 10
-        })
+    # Volume 30j de toutes les cartes en une requête
+    volumes = volumes_30d(db, [opp.card_id for opp in opportunities])
     
-    return result
+    return [opportunity_payload(opp, volumes.get(opp.card_id, 0)) for opp in opportunities], None
 
 
 @router.get("/trending-cards")
@@ -177,45 +129,89 @@ async def get_trending_cards(
     """
     Cartes tendance basées sur le volume de ventes
     """
-    # Calculate days based on timeframe
-    days_map = {"24h": 1, "7d": 7, "30d": 30}
-    days = days_map[timeframe]
+    cutoff_date = datetime.utcnow() - timedelta(days=dashboard_stats.TIMEFRAME_DAYS[timeframe])
+    cards = _stats().cards_by_sales(db, cutoff_date, limit)
+    return dashboard_stats.trending_payload(timeframe, cards)
+
+
+@router.get("/bundle")
+async def get_dashboard_bundle(
+    request: Request,
+    hot_limit: int = Query(10, ge=1, le=50),
+    min_roi: float = Query(15.0, ge=0),
+    language: Optional[str] = None,
+    grade: Optional[str] = None,
+    trending_limit: int = Query(10, ge=1, le=50),
+    timeframe: str = Query("7d", regex="^(24h|7d|30d)$")
+):
+    """
+    Tous les widgets du dashboard en une requête: `market_stats`,
+    `market_overview`, `hot_opportunities`, `trending_cards` (mêmes
+    contenus que les endpoints séparés).
     
-    cutoff_date = datetime.utcnow() - timedelta(days=days)
+    Les requêtes indépendantes s'exécutent en parallèle et le résultat est
+    réutilisé `dashboard_bundle_ttl` secondes. La réponse porte un ETag:
+    avec `If-None-Match`, un bundle inchangé renvoie 304 sans corps.
+    """
+    key = (hot_limit, min_roi, language, grade, trending_limit, timeframe)
+    cached = _bundle_cache.get(key)
+    if cached is None or cached[0] <= time.monotonic():
+        payload, index_age = await _build_bundle(*key)
+        body = orjson.dumps(payload)
+        cached = (time.monotonic() + settings.dashboard_bundle_ttl, body, etag_for(body), index_age)
+        _store_bundle(key, cached)
+    else:
+        _bundle_cache.move_to_end(key)
     
-    # Get cards with most sales in timeframe
-    trending = db.query(
-        Card.id,
-        Card.normalized_name,
-        Card.card_set,
-        Card.language,
-        func.count(Sale.id).label('sales_count'),
-        func.avg(Sale.price).label('average_price'),
-        func.max(Sale.price).label('max_price')
-    ).join(Sale).filter(
-        Sale.sold_date >= cutoff_date
-    ).group_by(
-        Card.id, Card.normalized_name, Card.card_set, Card.language
-    ).order_by(
-        desc('sales_count')
-    ).limit(limit).all()
+    _, body, etag, index_age = cached
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if index_age is not None:
+        headers[INDEX_AGE_HEADER] = f"{index_age:.3f}"
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def _store_bundle(key: Tuple, cached: Tuple[float, bytes, str, Optional[float]]) -> None:
+    """Ajoute un bundle: les expirés sont retirés, puis les moins récemment servis au-delà de la taille maximum"""
+    now = time.monotonic()
+    for expired in [other for other, entry in _bundle_cache.items() if entry[0] <= now]:
+        del _bundle_cache[expired]
+    _bundle_cache[key] = cached
+    _bundle_cache.move_to_end(key)
+    while len(_bundle_cache) > settings.dashboard_bundle_cache_size:
+        _bundle_cache.popitem(last=False)
+
+
+async def _build_bundle(hot_limit, min_roi, language, grade, trending_limit, timeframe) -> Tuple[Dict, Optional[float]]:
+    now = datetime.utcnow()
+    days = dashboard_stats.TIMEFRAME_DAYS[timeframe]
+    stats = _stats()
     
-    return {
-        "timeframe": timeframe,
-        "cards": [
-            {
-                "card_id": card_id,
-                "card_name": name,
-                "card_set": card_set or "Unknown",
-                "language": language,
-                "sales_count": sales,
-                "average_price": float(avg or 0),
-                "max_price": float(max_price or 0),
-                "image_url": f"https://via.placeholder.com/64x80"
-            }
-            for card_id, name, card_set, language, sales, avg, max_price in trending
-        ]
+    totals, by_language, (hot, index_age), trending, movers = await asyncio.gather(
+        run_in_threadpool(_with_session, stats.market_totals, now),
+        run_in_threadpool(_with_session, stats.language_averages),
+        run_in_threadpool(_with_session, _hot_opportunities, hot_limit, min_roi, language, grade),
+        run_in_threadpool(_with_session, stats.cards_by_sales, now - timedelta(days=days), trending_limit),
+        run_in_threadpool(_with_session, _top_movers),
+    )
+    
+    payload = {
+        "market_stats": dashboard_stats.market_stats_payload(totals, by_language),
+        "market_overview": dashboard_stats.market_overview_payload(totals, movers),
+        "hot_opportunities": hot,
+        "trending_cards": dashboard_stats.trending_payload(timeframe, trending),
     }
+    return payload, index_age
+
+
+def _with_session(operation, *args):
+    # Une session par requête parallèle (une Session n'est pas partageable entre threads)
+    db = SessionLocal()
+    try:
+        return operation(db, *args)
+    finally:
+        db.close()
 
 
 @router.get("/price-history/{card_id}")
@@ -235,10 +231,8 @@ async def get_price_history(
     
     # Get sales in timeframe
     cutoff_date = datetime.utcnow() - timedelta(days=days)
-    sales = db.query(Sale).filter(
-        Sale.card_id == card_id,
-        Sale.sold_date >= cutoff_date
-    ).order_by(Sale.sold_date).all()
+    # Lignes (date, prix) en lecture seule, sans objets ORM
+    sales = _stats().price_points(db, card_id, cutoff_date)
     
     if not sales:
         return {
@@ -258,14 +252,14 @@ async def get_price_history(
     
     # Group by day
     price_data = {}
-    for sale in sales:
-        date_key = sale.sold_date.date().isoformat()
+    for sold_date, price in sales:
+        date_key = sold_date.date().isoformat()
         if date_key not in price_data:
             price_data[date_key] = {
                 "prices": [],
                 "date": date_key
             }
-        price_data[date_key]["prices"].append(sale.price)
+        price_data[date_key]["prices"].append(price)
     
     # Calculate OHLC for each day
     data = []
@@ -282,7 +276,7 @@ async def get_price_history(
         })
     
     # Calculate stats
-    all_prices = [s.price for s in sales]
+    all_prices = [price for _, price in sales]
     
     return {
         "card_id": card_id,
@@ -0,0 +1,98 @@
+"""
+Routes d'export en masse (flux NDJSON, CSV, Arrow IPC ou Parquet).
+"""
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from typing import Optional
+from app.services.export_service import (
+    ARROW_AVAILABLE,
+    EXPORT_FORMATS,
+    OPPORTUNITY_COLUMNS,
+    SALE_COLUMNS,
+    ExportService,
+)
+
+router = APIRouter(prefix="/export", tags=["export"])
+export_service = ExportService()
+
+FORMAT_PATTERN = "^(ndjson|csv|arrow|parquet)$"
+FILE_EXTENSIONS = {"ndjson": "ndjson", "csv": "csv", "arrow": "arrows", "parquet": "parquet"}
+
+
+def _streaming_response(stmt, columns, export_format: str, name: str, before=None) -> StreamingResponse:
+    if export_format in ("arrow", "parquet") and not ARROW_AVAILABLE:
+        raise HTTPException(
+            status_code=501,
+            detail="Export Arrow/Parquet indisponible: installez pyarrow"
+        )
+
+    filename = f"{name}-{datetime.utcnow():%Y%m%d%H%M%S}.{FILE_EXTENSIONS[export_format]}"
+    return StreamingResponse(
+        export_service.stream(stmt, columns, export_format, before=before),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/sales")
+def export_sales(
+    format: str = Query("ndjson", regex=FORMAT_PATTERN),
+    card_id: Optional[int] = None,
+    psa_grade: Optional[str] = None,
+    language: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    include_archive: bool = False
+):
+    """
+    Exporte l'historique des ventes en flux (mémoire constante côté serveur).
+    
+    Par défaut, la table chaude seule: les ventes de plus de
+    `sales_archive_after_days` jours déplacées dans l'archive Parquet n'y
+    sont plus. `include_archive=true` exporte d'abord les ventes archivées
+    (mêmes filtres, mêmes colonnes, mois par mois) puis la table chaude;
+    requiert pyarrow quel que soit le format.
+    """
+    filters = dict(
+        card_id=card_id,
+        psa_grade=psa_grade,
+        language=language,
+        date_from=date_from,
+        date_to=date_to
+    )
+    before = None
+    if include_archive:
+        if not ARROW_AVAILABLE:
+            raise HTTPException(
+                status_code=501,
+                detail="Export de l'archive indisponible: installez pyarrow"
+            )
+        before = export_service.archived_sale_chunks(**filters)
+    stmt = export_service.sales_statement(**filters)
+    return _streaming_response(stmt, SALE_COLUMNS, format, "sales", before=before)
+
+
+@router.get("/opportunities")
+def export_opportunities(
+    format: str = Query("ndjson", regex=FORMAT_PATTERN),
+    card_id: Optional[int] = None,
+    psa_grade: Optional[str] = None,
+    language: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    active_only: bool = False
+):
+    """
+    Exporte les opportunités en flux (mémoire constante côté serveur).
+    """
+    stmt = export_service.opportunities_statement(
+        card_id=card_id,
+        psa_grade=psa_grade,
+        language=language,
+        date_from=date_from,
+        date_to=date_to,
+        active_only=active_only
+    )
+    return _streaming_response(stmt, OPPORTUNITY_COLUMNS, format, "opportunities")
@@ -1,20 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
+import codecs
+import io
+import tempfile
 from app.core.database import get_db
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, paginate_keyset
+from app.core.profiler import profile_request
+from app.core.responses import ORJSONResponse, json_response, response_columns, rows_response
+from app.core.rate_limit import scraping_budget
+from app.core.redis_client import get_redis
 from app.schemas import (
     CardResponse,
     SaleResponse,
     ListingResponse,
-    OpportunityResponse
+    OpportunityResponse,
+    SubscriberCreate,
+    SubscriberResponse,
+    AlertRuleCreate,
+    AlertRuleResponse,
+    ScanRunResponse,
+    ScanRunDetailResponse,
+    ScanTaskCreate
 )
-from app.models import Card, Sale, Listing, Opportunity
-from app.services.arbitrage_service import ArbitrageService
-from app.services.alert_service import AlertService
+from app.models import Card, Sale, Listing, Opportunity, Subscriber, AlertRule, ScanRun
+from app.services.container import services
+from app.services.opportunity_index import INDEX_AGE_HEADER
+from app.services.scan_queue import ScanQueue
 
-router = APIRouter()
-arbitrage_service = ArbitrageService()
-alert_service = AlertService()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 
 @router.get("/cards", response_model=List[CardResponse])
@@ -24,8 +39,41 @@ async def get_cards(
     db: Session = Depends(get_db)
 ):
     """Récupère la liste des cartes enregistrées"""
-    cards = db.query(Card).offset(skip).limit(limit).all()
-    return cards
+    cards = db.query(*response_columns(Card, CardResponse)).filter(
+        Card.merged_into_id.is_(None)
+    ).offset(skip).limit(limit).all()
+    return rows_response(cards)
+
+
+@router.get("/cards/matches")
+async def match_cards(
+    title: str,
+    language: Optional[str] = None,
+    limit: int = Query(5, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """Cartes existantes proches d'un titre eBay (doublons potentiels)"""
+    result = await run_in_threadpool(services.card_match_service.match_title, db, title, language, limit)
+    ids = [candidate["card_id"] for candidate in result["candidates"]]
+    names = dict(db.query(Card.id, Card.normalized_name).filter(Card.id.in_(ids)).all()) if ids else {}
+    for candidate in result["candidates"]:
+        candidate["normalized_name"] = names.get(candidate["card_id"])
+    return result
+
+
+@router.post("/cards/merge")
+async def merge_cards(dry_run: bool = True, db: Session = Depends(get_db)):
+    """
+    Fusionne les fiches en doublon: ventes, listings et opportunités sont
+    rattachés à la carte canonique. `dry_run` (par défaut) liste les fusions
+    sans rien modifier.
+    """
+    stats = await run_in_threadpool(services.card_match_service.merge_duplicates, db, dry_run)
+    if not dry_run:
+        # Les doublons résolvent désormais vers leur carte canonique
+        services.arbitrage_service.card_registry.invalidate()
+        services.arbitrage_service.floor_cache.clear()
+    return stats
 
 
 @router.get("/cards/{card_id}", response_model=CardResponse)
@@ -37,56 +85,91 @@ async def get_card(card_id: int, db: Session = Depends(get_db)):
     return card
 
 
+def _paginate(query, sort_column, id_column, key, response, skip, cursor, limit):
+    """
+    Pagination commune: `skip` (ancien mode OFFSET) ou `cursor` (keyset).
+    Le curseur de la page suivante est renvoyé dans l'en-tête X-Next-Cursor.
+    """
+    if skip and not cursor:
+        return query.order_by(sort_column.desc(), id_column.desc()).offset(skip).limit(limit).all()
+    
+    rows, next_cursor = paginate_keyset(query, sort_column, id_column, key, cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
+
+
 @router.get("/cards/{card_id}/sales", response_model=List[SaleResponse])
 async def get_card_sales(
     card_id: int,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Récupère les ventes d'une carte"""
-    sales = db.query(Sale).filter(
-        Sale.card_id == card_id
-    ).order_by(Sale.sold_date.desc()).offset(skip).limit(limit).all()
-    return sales
+    """Récupère les ventes d'une carte (pagination par `skip` ou `cursor`)"""
+    query = db.query(*response_columns(Sale, SaleResponse)).filter(Sale.card_id == card_id)
+    rows = _paginate(query, Sale.sold_date, Sale.id, "sales", response, skip, cursor, limit)
+    return rows_response(rows, response)
 
 
 @router.get("/sales", response_model=List[SaleResponse])
 async def get_sales(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Récupère toutes les ventes"""
-    sales = db.query(Sale).order_by(Sale.sold_date.desc()).offset(skip).limit(limit).all()
-    return sales
+    """Récupère toutes les ventes (pagination par `skip` ou `cursor`)"""
+    query = db.query(*response_columns(Sale, SaleResponse))
+    rows = _paginate(query, Sale.sold_date, Sale.id, "sales", response, skip, cursor, limit)
+    return rows_response(rows, response)
 
 
 @router.get("/listings", response_model=List[ListingResponse])
 async def get_listings(
+    response: Response,
     active_only: bool = True,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Récupère les listings"""
-    query = db.query(Listing)
+    """Récupère les listings (pagination par `skip` ou `cursor`)"""
+    query = db.query(*response_columns(Listing, ListingResponse))
     if active_only:
         query = query.filter(Listing.is_active == True)
-    listings = query.order_by(Listing.created_at.desc()).offset(skip).limit(limit).all()
-    return listings
+    rows = _paginate(query, Listing.created_at, Listing.id, "listings", response, skip, cursor, limit)
+    return rows_response(rows, response)
 
 
 @router.get("/opportunities", response_model=List[OpportunityResponse])
 async def get_opportunities(
+    response: Response,
     active_only: bool = True,
     min_profit_margin: Optional[float] = None,
+    language: Optional[str] = None,
+    grade: Optional[str] = Query(None, description='Ex: "PSA 10", "Raw"'),
+    card_id: Optional[int] = None,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Récupère les opportunités d'arbitrage"""
-    query = db.query(Opportunity)
+    """
+    Récupère les opportunités d'arbitrage (pagination par `skip` ou `cursor`).
+    
+    Les opportunités actives sont servies par l'index en mémoire (âge dans
+    l'en-tête X-Index-Age), ou par la base si l'index est trop ancien.
+    """
+    if active_only and services.opportunity_index.is_fresh():
+        return _opportunities_from_index(
+            response, min_profit_margin, language, grade, card_id, skip, cursor, limit
+        )
+    
+    query = db.query(*response_columns(Opportunity, OpportunityResponse))
     
     if active_only:
         query = query.filter(Opportunity.is_active == True)
@@ -94,11 +177,71 @@ async def get_opportunities(
     if min_profit_margin is not None:
         query = query.filter(Opportunity.profit_margin >= min_profit_margin)
     
-    opportunities = query.order_by(
-        Opportunity.profit_margin.desc()
-    ).offset(skip).limit(limit).all()
+    if language:
+        query = query.join(Card, Opportunity.card_id == Card.id).filter(Card.language == language.upper())
+    
+    if grade:
+        query = query.join(Listing, Opportunity.listing_id == Listing.id).filter(
+            Listing.psa_grade.is_(None) if grade == "Raw" else Listing.psa_grade == grade
+        )
+    
+    if card_id is not None:
+        query = query.filter(Opportunity.card_id == card_id)
+    
+    rows = _paginate(
+        query, Opportunity.profit_margin, Opportunity.id, "opportunities",
+        response, skip, cursor, limit
+    )
+    return rows_response(rows, response)
+
+
+def _opportunities_from_index(response, min_profit_margin, language, grade, card_id, skip, cursor, limit):
+    # Mêmes règles que `_paginate`: le curseur l'emporte sur `skip`
+    after = None
+    if cursor:
+        last_value, last_id = decode_cursor(cursor, "opportunities")
+        after = (-last_value, -last_id)
+        skip = 0
+    
+    entries = services.opportunity_index.top(
+        skip + limit + 1, min_margin=min_profit_margin, language=language,
+        grade=grade, card_id=card_id, after=after
+    )[skip:]
+    
+    if len(entries) > limit:
+        entries = entries[:limit]
+        if not skip:
+            last = entries[-1]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor("opportunities", last.profit_margin, last.api["id"])
+    response.headers[INDEX_AGE_HEADER] = f"{services.opportunity_index.age:.3f}"
+    return json_response([entry.api for entry in entries], response)
+
+
+@router.get("/opportunities/index")
+async def get_opportunity_index_stats():
+    """État de l'index en mémoire des opportunités actives (taille, âge, replis en base)"""
+    return services.opportunity_index.get_stats()
+
+
+@router.post("/opportunities/archive")
+async def archive_opportunities(
+    older_than_days: Optional[int] = None,
+    purge_history: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    Déplace les opportunités clôturées vers l'historique (et purge
+    l'historique ancien si demandé).
+    """
+    archived = services.archive_service.archive_closed(db, older_than_days=older_than_days)
+    purged = services.archive_service.purge_history(db) if purge_history else 0
     
-    return opportunities
+    return {
+        "message": f"{archived} opportunités archivées",
+        "archived": archived,
+        "purged": purged,
+        **services.archive_service.get_stats(db)
+    }
 
 
 @router.post("/fetch-sales")
@@ -112,13 +255,14 @@ async def fetch_sales(
     """
     Récupère les ventes complétées depuis eBay et les stocke en DB.
     """
-    count = await arbitrage_service.fetch_and_store_sales(
+    count = await services.arbitrage_service.fetch_and_store_sales(
         db=db,
         search_query=search_query,
         psa_grade=psa_grade,
         language=language,
         days_back=days_back
     )
+    await run_in_threadpool(services.price_movers.refresh_after_ingest, db)
     return {"message": f"{count} ventes ajoutées", "count": count}
 
 
@@ -132,7 +276,7 @@ async def fetch_listings(
     """
     Récupère les listings actifs depuis eBay et les stocke en DB.
     """
-    count = await arbitrage_service.fetch_and_store_listings(
+    count = await services.arbitrage_service.fetch_and_store_listings(
         db=db,
         search_query=search_query,
         psa_grade=psa_grade,
@@ -141,76 +285,265 @@ async def fetch_listings(
     return {"message": f"{count} listings mis à jour", "count": count}
 
 
-@router.post("/detect-opportunities")
+def _publish_detection(db: Session, new_opportunities: List[Opportunity]) -> None:
+    """Pousse le résultat de la détection à l'index en mémoire et aux clients SSE / WebSocket"""
+    services.opportunity_index.refresh_after_detection(db)
+    services.opportunity_feed.publish_detection(
+        db,
+        created_ids=[opp.id for opp in new_opportunities],
+        updated_ids=services.arbitrage_service.last_updated_ids,
+        closed_ids=services.arbitrage_service.last_closed_ids
+    )
+
+
+@router.get("/alerts/status")
+async def get_alerts_status(db: Session = Depends(get_db)):
+    """État du dispatcher d'alertes (file, envois, échecs) et de l'outbox (retard)"""
+    return {
+        **services.alert_dispatcher.get_stats(),
+        "outbox": services.alert_outbox.get_stats(db),
+        "rules": services.alert_rules.get_stats(),
+    }
+
+
+@router.get("/subscribers", response_model=List[SubscriberResponse])
+async def get_subscribers(db: Session = Depends(get_db)):
+    """Liste les abonnés aux alertes"""
+    return db.query(Subscriber).order_by(Subscriber.id).all()
+
+
+@router.post("/subscribers", response_model=SubscriberResponse, status_code=201)
+async def create_subscriber(subscriber: SubscriberCreate, db: Session = Depends(get_db)):
+    """Ajoute un abonné (chat Telegram)"""
+    if db.query(Subscriber).filter(Subscriber.telegram_chat_id == subscriber.telegram_chat_id).first():
+        raise HTTPException(status_code=409, detail="Chat Telegram déjà abonné")
+    
+    db_subscriber = Subscriber(**subscriber.model_dump())
+    db.add(db_subscriber)
+    db.commit()
+    db.refresh(db_subscriber)
+    return db_subscriber
+
+
+@router.delete("/subscribers/{subscriber_id}", status_code=204)
+async def delete_subscriber(subscriber_id: int, db: Session = Depends(get_db)):
+    """Supprime un abonné et ses règles"""
+    subscriber = db.query(Subscriber).filter(Subscriber.id == subscriber_id).first()
+    if not subscriber:
+        raise HTTPException(status_code=404, detail="Abonné non trouvé")
+    db.delete(subscriber)
+    db.commit()
+    services.alert_rules.invalidate()
+
+
+@router.get("/subscribers/{subscriber_id}/rules", response_model=List[AlertRuleResponse])
+async def get_subscriber_rules(subscriber_id: int, db: Session = Depends(get_db)):
+    """Règles d'alerte d'un abonné"""
+    return db.query(AlertRule).filter(AlertRule.subscriber_id == subscriber_id).order_by(AlertRule.id).all()
+
+
+@router.post("/subscribers/{subscriber_id}/rules", response_model=AlertRuleResponse, status_code=201)
+async def create_subscriber_rule(
+    subscriber_id: int,
+    rule: AlertRuleCreate,
+    db: Session = Depends(get_db)
+):
+    """
+    Ajoute une règle d'alerte: tous les critères renseignés doivent
+    correspondre (card_id, card_name, card_set, psa_grade, language,
+    min_net_profit, max_price).
+    """
+    if not db.query(Subscriber).filter(Subscriber.id == subscriber_id).first():
+        raise HTTPException(status_code=404, detail="Abonné non trouvé")
+    
+    db_rule = AlertRule(subscriber_id=subscriber_id, **rule.model_dump())
+    db.add(db_rule)
+    db.commit()
+    db.refresh(db_rule)
+    services.alert_rules.invalidate()
+    return db_rule
+
+
+@router.delete("/alert-rules/{rule_id}", status_code=204)
+async def delete_alert_rule(rule_id: int, db: Session = Depends(get_db)):
+    """Supprime une règle d'alerte"""
+    rule = db.query(AlertRule).filter(AlertRule.id == rule_id).first()
+    if not rule:
+        raise HTTPException(status_code=404, detail="Règle non trouvée")
+    db.delete(rule)
+    db.commit()
+    services.alert_rules.invalidate()
+
+
+@router.post("/detect-opportunities", dependencies=[Depends(profile_request)])
 async def detect_opportunities(
     send_alerts: bool = True,
+    incremental: bool = False,
     db: Session = Depends(get_db)
 ):
     """
     Détecte les opportunités d'arbitrage et envoie des alertes si demandé.
+    
+    `incremental=true` ne réévalue que les listings touchés depuis la dernière
+    détection; par défaut, scan complet de réconciliation. Profilable avec
+    l'en-tête `X-Profile: 1` (voir /run-full-scan).
     """
-    new_opportunities = arbitrage_service.detect_opportunities(db)
+    new_opportunities = await run_in_threadpool(
+        services.arbitrage_service.detect_opportunities,
+        db,
+        incremental=incremental,
+        before_commit=services.alert_outbox.enqueue if send_alerts else None
+    )
     
     if send_alerts and new_opportunities:
-        await alert_service.send_batch_alerts(new_opportunities)
-        # Marquer les opportunités comme alertées
-        for opp in new_opportunities:
-            opp.alerted = True
-        db.commit()
+        services.outbox_worker.notify()
+    
+    await run_in_threadpool(_publish_detection, db, new_opportunities)
     
     return {
         "message": f"{len(new_opportunities)} nouvelles opportunités détectées",
-        "count": len(new_opportunities)
+        "count": len(new_opportunities),
+        "closed": len(services.arbitrage_service.last_closed_ids)
     }
 
 
-@router.post("/run-full-scan")
+@router.post("/run-full-scan", dependencies=[Depends(profile_request)])
 async def run_full_scan(
     search_query: str,
     psa_grade: Optional[str] = None,
     language: str = "EN",
     days_back: int = 30,
     send_alerts: bool = True,
+    incremental: bool = True,
     db: Session = Depends(get_db)
 ):
     """
     Exécute un scan complet:
     1. Récupère les ventes complétées
     2. Récupère les listings actifs
-    3. Détecte les opportunités
+    3. Détecte les opportunités (uniquement sur ce qui a changé, sauf incremental=false)
     4. Envoie les alertes
-    """
-    # 1. Récupérer les ventes
-    sales_count = await arbitrage_service.fetch_and_store_sales(
-        db=db,
-        search_query=search_query,
-        psa_grade=psa_grade,
-        language=language,
-        days_back=days_back
-    )
     
-    # 2. Récupérer les listings
-    listings_count = await arbitrage_service.fetch_and_store_listings(
-        db=db,
-        search_query=search_query,
-        psa_grade=psa_grade,
-        language=language
+    Avec l'en-tête `X-Profile: 1` (profilage activé), le scan est profilé:
+    voir `X-Profile-Id` et GET /admin/profiles/{id}.
+    """
+    # 1-3. Ventes, listings puis détection (alertes écrites dans l'outbox au
+    # même commit), tracés et enregistrés dans scan_runs
+    scan_run, opportunities = await services.scan_runner.run(
+        db,
+        [{
+            "search_query": search_query,
+            "psa_grade": psa_grade,
+            "language": language,
+            "days_back": days_back
+        }],
+        incremental=incremental,
+        before_commit=services.alert_outbox.enqueue if send_alerts else None
     )
     
-    # 3. Détecter les opportunités
-    opportunities = arbitrage_service.detect_opportunities(db)
-    
     # 4. Envoyer les alertes
     if send_alerts and opportunities:
-        await alert_service.send_batch_alerts(opportunities)
-        for opp in opportunities:
-            opp.alerted = True
-        db.commit()
+        services.outbox_worker.notify()
+    
+    await run_in_threadpool(_publish_detection, db, opportunities)
     
     return {
         "message": "Scan complet terminé",
-        "sales_added": sales_count,
-        "listings_updated": listings_count,
-        "opportunities_found": len(opportunities)
+        "scan_run_id": scan_run.id,
+        "status": scan_run.status,
+        "sales_added": scan_run.sales_added,
+        "listings_updated": scan_run.listings_updated,
+        "opportunities_found": scan_run.opportunities_found,
+        "opportunities_closed": scan_run.opportunities_closed
     }
 
+
+def _scan_queue() -> ScanQueue:
+    redis_client = get_redis()
+    if redis_client is None:
+        raise HTTPException(status_code=503, detail="File de scans indisponible (REDIS_URL non configuré)")
+    return ScanQueue(redis_client)
+
+
+@router.post("/scan-queue", status_code=202)
+def enqueue_scans(tasks: List[ScanTaskCreate]):
+    """
+    Ajoute des requêtes de scan à la file Redis (une tâche par requête),
+    traitées par les workers `python -m app.worker`.
+    """
+    queue = _scan_queue()
+    task_ids = queue.enqueue([task.model_dump() for task in tasks])
+    return {"queued": len(task_ids), "task_ids": task_ids}
+
+
+@router.get("/scan-queue/stats")
+def get_scan_queue_stats():
+    """Tâches en attente, en cours, en backoff et abandonnées"""
+    return _scan_queue().get_stats()
+
+
+@router.get("/rate-budget")
+def get_rate_budget():
+    """Consommation du budget de requêtes eBay partagé"""
+    return scraping_budget().get_stats()
+
+
+@router.get("/scan-runs", response_model=List[ScanRunResponse])
+def get_scan_runs(
+    limit: int = Query(50, ge=1, le=500),
+    status: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Derniers scans (durées par étape, volumes, erreurs)"""
+    query = db.query(ScanRun)
+    if status:
+        query = query.filter(ScanRun.status == status)
+    return query.order_by(ScanRun.started_at.desc(), ScanRun.id.desc()).limit(limit).all()
+
+
+@router.get("/scan-runs/{scan_run_id}", response_model=ScanRunDetailResponse)
+def get_scan_run(scan_run_id: int, db: Session = Depends(get_db)):
+    """
+    Détail d'un scan, requêtes les plus lentes d'abord. `trace_id` relie le
+    scan aux spans exportés (`trace_export_path`).
+    """
+    scan_run = db.query(ScanRun).filter(ScanRun.id == scan_run_id).first()
+    if not scan_run:
+        raise HTTPException(status_code=404, detail="Scan non trouvé")
+    return scan_run
+
+
+
+@router.post("/import-sales")
+async def import_sales(
+    request: Request,
+    format: str = Query("csv", regex="^(csv|ndjson)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Import en masse de ventes historiques (corps de la requête = fichier CSV ou NDJSON).
+    
+    Le corps est copié sur disque au fil de l'eau puis importé par paquets:
+    la taille du fichier n'est pas limitée par la mémoire. Un corps qui
+    n'est pas en UTF-8 est refusé (400) avant toute insertion; les lignes
+    illisibles sont comptées dans `invalid`.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    with tempfile.TemporaryFile() as spool:
+        try:
+            async for chunk in request.stream():
+                decoder.decode(chunk)
+                spool.write(chunk)
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="Le fichier doit être encodé en UTF-8")
+        spool.seek(0)
+        
+        stream = io.TextIOWrapper(spool, encoding="utf-8", newline="")
+        stats = await run_in_threadpool(services.sales_importer.import_file, db, stream, format)
+    await run_in_threadpool(services.price_movers.refresh_after_ingest, db)
+    
+    return {
+        "message": f"{stats['rows_inserted']} ventes importées",
+        **stats
+    }
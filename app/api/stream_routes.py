@@ -0,0 +1,122 @@
+"""
+Flux temps réel des opportunités: Server-Sent Events et WebSocket.
+
+Événements: `snapshot` (à la connexion), puis `created`, `updated`, `closed`
+publiés par chaque passe de détection. Les filtres (min_roi, language,
+grade) sont appliqués côté serveur.
+"""
+
+import asyncio
+import json
+from typing import Optional
+from fastapi import APIRouter, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from app.services.container import services
+from app.services.opportunity_feed import FeedFilters
+
+router = APIRouter(prefix="/stream", tags=["stream"])
+
+
+def _sse(event_type: str, data, event_id: Optional[int] = None) -> str:
+    lines = [f"event: {event_type}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+@router.get("/opportunities")
+async def stream_opportunities(
+    request: Request,
+    min_roi: float = Query(0.0, ge=0),
+    language: Optional[str] = None,
+    grade: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500)
+):
+    """
+    Flux SSE des opportunités (EventSource côté navigateur).
+    """
+    filters = FeedFilters(min_roi=min_roi, language=language, grade=grade)
+    subscription = services.opportunity_feed.subscribe(filters)
+
+    async def events():
+        try:
+            yield _sse("snapshot", services.opportunity_feed.snapshot(filters, limit))
+            while not subscription.closed:
+                if await request.is_disconnected():
+                    break
+                event = await subscription.next_event(timeout=services.opportunity_feed.heartbeat_seconds)
+                if subscription.closed:
+                    break
+                if event is None:
+                    # Commentaire SSE: garde la connexion ouverte derrière les proxys
+                    yield ": heartbeat\n\n"
+                else:
+                    yield _sse(event["type"], event["data"], event["id"])
+        finally:
+            services.opportunity_feed.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/opportunities/ws")
+async def websocket_opportunities(
+    websocket: WebSocket,
+    min_roi: float = 0.0,
+    language: Optional[str] = None,
+    grade: Optional[str] = None,
+    limit: int = 50
+):
+    """
+    Flux WebSocket des opportunités. Le client peut changer ses filtres en
+    envoyant `{"min_roi": ..., "language": ..., "grade": ...}`: il reçoit
+    alors un nouvel instantané.
+    """
+    await websocket.accept()
+    filters = FeedFilters(min_roi=min_roi, language=language, grade=grade)
+    subscription = services.opportunity_feed.subscribe(filters)
+
+    async def receive_filters():
+        try:
+            await _receive_filters()
+        finally:
+            # Déconnexion: réveille la boucle d'envoi
+            subscription.close()
+
+    async def _receive_filters():
+        while True:
+            message = await websocket.receive_json()
+            subscription.filters = FeedFilters(
+                min_roi=float(message.get("min_roi", 0.0)),
+                language=message.get("language"),
+                grade=message.get("grade")
+            )
+            await websocket.send_json({
+                "type": "snapshot",
+                "data": services.opportunity_feed.snapshot(subscription.filters, limit)
+            })
+
+    receiver = asyncio.create_task(receive_filters())
+    try:
+        await websocket.send_json({"type": "snapshot", "data": services.opportunity_feed.snapshot(filters, limit)})
+        while not subscription.closed:
+            event = await subscription.next_event(timeout=services.opportunity_feed.heartbeat_seconds)
+            if subscription.closed:
+                break
+            if event is None:
+                await websocket.send_json({"type": "heartbeat"})
+            else:
+                await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        client_gone = receiver.done()
+        receiver.cancel()
+        services.opportunity_feed.unsubscribe(subscription)
+        if subscription.overflowed and not client_gone:
+            # 1013: réessayer plus tard (client trop lent)
+            await websocket.close(code=1013)
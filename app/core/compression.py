@@ -0,0 +1,157 @@
+"""
+Compression des réponses HTTP: brotli ou gzip selon `Accept-Encoding`.
+
+Middleware ASGI (remplace `GZipMiddleware` de Starlette, qui ne fait que
+gzip):
+- brotli est préféré quand le client l'accepte (JSON un peu plus petit
+  qu'en gzip, à coût CPU comparable en qualité 4), gzip sinon
+- une réponse complète de moins de `compression_minimum_size` octets part
+  telle quelle (la compression coûterait plus qu'elle ne rapporte)
+- une réponse diffusée par morceaux (exports) est compressée morceau par
+  morceau, avec un flush par morceau pour ne pas retenir le flux
+- les flux SSE, les fichiers déjà compressés (Parquet, images) et les
+  réponses ayant déjà un `Content-Encoding` ne sont pas touchés
+
+brotli est optionnel: sans le paquet, seul gzip est proposé.
+"""
+
+import zlib
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+    logger.info("Compression brotli non disponible (brotli non installé), gzip uniquement")
+
+# SSE: chaque événement doit partir immédiatement; les autres sont déjà compressés
+EXCLUDED_CONTENT_TYPES = ("text/event-stream", "application/vnd.apache.parquet", "image/")
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: Optional[int] = None,
+        gzip_level: Optional[int] = None,
+        brotli_quality: Optional[int] = None
+    ):
+        self.app = app
+        self.minimum_size = settings.compression_minimum_size if minimum_size is None else minimum_size
+        self.gzip_level = settings.compression_gzip_level if gzip_level is None else gzip_level
+        self.brotli_quality = settings.compression_brotli_quality if brotli_quality is None else brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Encodage retenu pour un en-tête Accept-Encoding ("br", "gzip" ou None)"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    if BROTLI_AVAILABLE and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+class _CompressionResponder:
+    """Compression d'une réponse: décidée au premier morceau du corps"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self._start: Optional[Message] = None
+        self._compressor = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Retenu jusqu'au premier morceau: les en-têtes dépendent de la décision
+            self._start = message
+            return
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._start is not None:
+            start, self._start = self._start, None
+            headers = MutableHeaders(raw=start["headers"])
+            if not self._should_compress(headers, body, more_body):
+                self._passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+
+            self._compressor = self._new_compressor()
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                body = self._compress(body, final=True)
+                headers["Content-Length"] = str(len(body))
+                await self._send(start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            await self._send(start)
+
+        await self._send({
+            "type": "http.response.body",
+            "body": self._compress(body, final=not more_body),
+            "more_body": more_body,
+        })
+
+    def _should_compress(self, headers: MutableHeaders, body: bytes, more_body: bool) -> bool:
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        if any(content_type.startswith(excluded) for excluded in EXCLUDED_CONTENT_TYPES):
+            return False
+        return more_body or len(body) >= self.middleware.minimum_size
+
+    def _new_compressor(self):
+        if self.encoding == "br":
+            return brotli.Compressor(quality=self.middleware.brotli_quality)
+        # wbits 16+: en-tête et pied gzip
+        return zlib.compressobj(self.middleware.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def _compress(self, data: bytes, final: bool) -> bytes:
+        compressor = self._compressor
+        if self.encoding == "br":
+            chunk = compressor.process(data)
+            return chunk + (compressor.finish() if final else compressor.flush())
+        chunk = compressor.compress(data)
+        return chunk + compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
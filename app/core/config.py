@@ -24,6 +24,73 @@ class Settings(BaseSettings):
     # Telegram (optional)
     telegram_bot_token: Optional[str] = None
     telegram_chat_id: Optional[str] = None
+    telegram_api_base_url: Optional[str] = None  # Ex: http://localhost:8081 (faux serveur local)
+    telegram_per_chat_interval: float = 1.0  # Secondes minimum entre deux messages d'un même chat
+    telegram_global_rate: float = 25.0  # Messages par seconde maximum pour le bot
+    telegram_max_retries: int = 3
+    
+    # Alertes
+    alert_workers: int = 4  # Workers d'envoi concurrents
+    alert_queue_size: int = 1000
+    alert_digest_threshold: int = 5  # Au-delà, les opportunités sont regroupées en un message
+    alert_outbox_batch_size: int = 100
+    alert_outbox_poll_interval: float = 2.0  # Secondes entre deux passes de l'outbox
+    alert_outbox_lease_seconds: int = 120  # Délai avant qu'une alerte réclamée non confirmée soit réessayée
+    alert_outbox_max_attempts: int = 5
+    alert_rules_refresh_seconds: float = 60.0  # Recompilation des règles d'alerte des abonnés
+    
+    # Flux temps réel (SSE / WebSocket)
+    feed_client_queue_size: int = 256  # Événements en attente par client avant déconnexion
+    feed_heartbeat_seconds: float = 15.0
+    feed_refresh_seconds: float = 5.0  # Rattrapage des opportunités écrites par les autres processus (workers de scan)
+    
+    # Index en mémoire des opportunités actives (lectures de l'API)
+    opportunity_index_refresh_seconds: float = 5.0  # Rattrapage des écritures des autres processus
+    opportunity_index_rebuild_seconds: float = 300.0  # Reconstruction complète
+    opportunity_index_max_staleness: float = 30.0  # Au-delà, lecture en base
+    
+    # Top movers en mémoire (variation 24h / 7 jours précédents, dashboard)
+    price_movers_min_sales: int = 2  # Ventes minimum dans chacune des deux fenêtres
+    price_movers_refresh_seconds: float = 10.0  # Rattrapage des ventes des autres processus
+    price_movers_rebuild_seconds: float = 3600.0  # Reconstruction complète (fusions de cartes)
+    price_movers_max_staleness: float = 120.0  # Au-delà, recalcul depuis la base
+    
+    # Copie analytique DuckDB des ventes et listings (agrégations du dashboard)
+    analytics_enabled: bool = False  # Désactivé: agrégations SQLAlchemy sur la base
+    analytics_db_path: str = "./analytics.duckdb"
+    analytics_sync_seconds: float = 30.0  # Copie incrémentale des lignes nouvelles ou modifiées
+    analytics_max_staleness: float = 300.0  # Au-delà, lecture SQLAlchemy
+    analytics_batch_size: int = 50000  # Lignes par lot copié
+    
+    # Archive des ventes anciennes (Parquet partitionné par mois, hors de la table chaude)
+    sales_archive_dir: str = "./archive/sales"
+    sales_archive_after_days: int = 180  # Horizon de la table chaude (mois complets au-delà archivés)
+    sales_archive_retention_months: int = 0  # Purge des partitions plus anciennes (0: conservées)
+    sales_archive_compression: str = "zstd"
+    sales_archive_row_group_size: int = 65536  # Lignes par row group (et par lot lu en base)
+    
+    # Profilage par échantillonnage (diagnostic en production, désactivé par défaut)
+    profiling_enabled: bool = False
+    profiling_admin_token: Optional[str] = None  # Si défini, exigé dans l'en-tête X-Admin-Token
+    profiling_interval: float = 0.01  # Secondes entre deux échantillons
+    profiling_max_seconds: float = 60.0  # Durée maximum d'un profil demandé par /admin/profile
+    profiling_keep_results: int = 20  # Profils conservés en mémoire
+    
+    # File de scans distribuée (Redis, workers `python -m app.worker`)
+    scan_queue_name: str = "scan"
+    scan_queue_visibility_seconds: float = 300.0  # Bail d'une tâche réservée (prolongé tant que le worker vit)
+    scan_queue_max_attempts: int = 3
+    scan_worker_concurrency: int = 1  # Tâches en parallèle par processus worker
+    scan_worker_poll_interval: float = 1.0  # Secondes entre deux essais quand la file est vide
+    scan_worker_rate_limited_delay: float = 60.0  # Report d'une tâche refusée par le budget de requêtes (sans consommer d'essai)
+    
+    # Traces des scans (spans OpenTelemetry en JSON lines, désactivé si None)
+    trace_export_path: Optional[str] = None  # Ex: ./traces/scans.jsonl
+    
+    # Compression des réponses HTTP (gzip ou brotli selon Accept-Encoding)
+    compression_minimum_size: int = 1024  # Octets en dessous desquels la réponse part non compressée
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4  # 0-11: 4 reste rapide pour des réponses dynamiques
     
     # Configuration
     shipping_cost: float = 5.0
@@ -31,12 +98,24 @@ class Settings(BaseSettings):
     min_sales_for_floor: int = 5
     max_sales_for_floor: int = 10
     ebay_fee_rate: float = 0.13  # 13% eBay fees
+    floor_cache_ttl: float = 900.0  # Durée de vie des prix planchers en cache (secondes)
+    detection_workers: int = 0  # Processus de détection complète en parallèle (0 ou 1 = séquentiel)
+    detection_shards: int = 0  # Shards de cartes répartis sur les workers (0 = 4 par worker)
+    detection_chunk_cards: int = 500  # Cartes chargées à la fois par un worker
+    opportunity_archive_after_days: int = 7  # Archivage des opportunités clôturées
+    opportunity_history_retention_days: int = 365  # Purge de l'historique
+    card_match_threshold: float = 0.8  # Similarité minimum pour fusionner deux fiches de la même carte
+    card_match_index_ttl: float = 900.0  # Reconstruction de l'index de rapprochement (secondes)
+    dashboard_bundle_ttl: float = 5.0  # Réutilisation du bundle du dashboard (secondes)
+    dashboard_bundle_cache_size: int = 64  # Combinaisons de paramètres du bundle gardées en mémoire
     
     # Scraping - Mode principal si pas de clés API
     use_scraper_fallback: bool = True  # Utiliser le scraper si l'API échoue ou n'est pas disponible
     scraperapi_key: Optional[str] = None  # Pour services tiers légaux
-    scraping_delay: float = 2.0  # Délai entre requêtes (secondes)
-    scraping_max_requests_per_hour: int = 100  # Limite de requêtes par heure
+    scraping_delay: float = 2.0  # Délai entre requêtes (secondes, tous processus confondus avec Redis)
+    scraping_max_requests_per_hour: int = 100  # Limite de requêtes par heure (0 = pas de limite)
+    scraping_budget_max_wait: float = 30.0  # Attente maximum d'un emplacement avant abandon de la requête
+    scraping_budget_redis_retry_seconds: float = 30.0  # Délai avant de retenter Redis après un repli en mémoire
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,319 @@
+"""
+Métriques de l'application (compteurs, jauges, histogrammes) exposées au
+format texte Prometheus sur `/metrics`.
+
+Registre minimal sans dépendance: les observations coûtent un verrou et
+quelques additions, on peut donc instrumenter les chemins chauds.
+
+Usage:
+    with timed(UPSTREAM_LATENCY, upstream="finding"):
+        response = await client.get(...)
+
+    @timed(STAGE_DURATION, stage="detect")
+    def detect(...): ...
+"""
+
+import asyncio
+import functools
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metric:
+    """Base commune: nom, aide, étiquettes et valeurs par combinaison d'étiquettes"""
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: étiquettes attendues {self.labelnames}, reçues {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(Metric):
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Valeur calculée à chaque collecte (jauge sans étiquette)"""
+        self._function = function
+
+    def render(self) -> List[str]:
+        if self._function is not None:
+            try:
+                self.set(self._function())
+            except Exception:
+                # Une source indisponible (ex: base) ne casse pas /metrics
+                pass
+        return super().render()
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [compteurs par bucket..., somme, nombre]
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def get_count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[-1] if state else 0
+
+    def _render_sample(self, key, state) -> List[str]:
+        lines = []
+        cumulative = 0
+        for index, bound in enumerate(self.buckets):
+            cumulative += state[index]
+            labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(state[-2])}")
+        lines.append(f"{self.name}_count{labels} {state[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Métrique déjà enregistrée: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Format d'exposition texte Prometheus
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
+
+class timed:
+    """
+    Mesure une durée dans un histogramme: gestionnaire de contexte ou
+    décorateur (fonctions synchrones et coroutines). La durée est
+    enregistrée même si le bloc lève une exception.
+    """
+
+    def __init__(self, histogram: Histogram, **labels):
+        self.histogram = histogram
+        self.labels = labels
+        self._started = 0.0
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self._started, **self.labels)
+        return False
+
+    def __call__(self, function):
+        histogram, labels = self.histogram, self.labels
+
+        if asyncio.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - started, **labels)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, **labels)
+        return wrapper
+
+
+# =========================
+# Métriques de l'application
+# =========================
+
+UPSTREAM_LATENCY = REGISTRY.register(Histogram(
+    "arbitrage_upstream_request_seconds",
+    "Durée des requêtes HTTP vers eBay par source (finding, scraper, scraper_item)",
+    ["upstream"]
+))
+UPSTREAM_ERRORS = REGISTRY.register(Counter(
+    "arbitrage_upstream_errors_total",
+    "Requêtes eBay en erreur par source",
+    ["upstream"]
+))
+PARSE_DURATION = REGISTRY.register(Histogram(
+    "arbitrage_parse_seconds",
+    "Durée de parsing d'une réponse eBay (html, html_item, finding_json)",
+    ["source"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+))
+NORMALIZE_DURATION = REGISTRY.register(Histogram(
+    "arbitrage_normalize_seconds",
+    "Durée de normalisation d'un titre (nom, set, numéro, grade, langue)",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+))
+STAGE_DURATION = REGISTRY.register(Histogram(
+    "arbitrage_stage_seconds",
+    "Durée des étapes du scan (fetch_sales, ingest_sales, fetch_listings, ingest_listings)",
+    ["stage"]
+))
+RATE_LIMIT_WAIT = REGISTRY.register(Histogram(
+    "arbitrage_rate_limit_wait_seconds",
+    "Attente imposée par le budget de requêtes partagé",
+    ["budget"],
+    buckets=(0.01, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+))
+ROWS_INGESTED = REGISTRY.register(Counter(
+    "arbitrage_rows_ingested_total",
+    "Lignes écrites en base par type (sale, listing)",
+    ["kind"]
+))
+DETECTION_DURATION = REGISTRY.register(Histogram(
+    "arbitrage_detection_seconds",
+    "Durée d'une passe de détection (full, incremental)",
+    ["mode"]
+))
+OPPORTUNITIES = REGISTRY.register(Counter(
+    "arbitrage_opportunities_total",
+    "Opportunités créées et clôturées par la détection",
+    ["event"]
+))
+ALERT_DELIVERY_LAG = REGISTRY.register(Histogram(
+    "arbitrage_alert_delivery_lag_seconds",
+    "Délai entre l'écriture d'une alerte dans l'outbox et son envoi",
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 900.0)
+))
+ALERT_OUTBOX_PENDING = REGISTRY.register(Gauge(
+    "arbitrage_alert_outbox_pending",
+    "Alertes en attente dans l'outbox"
+))
+ALERT_OUTBOX_LAG = REGISTRY.register(Gauge(
+    "arbitrage_alert_outbox_lag_seconds",
+    "Âge de la plus ancienne alerte en attente"
+))
+DB_POOL_CHECKED_OUT = REGISTRY.register(Gauge(
+    "arbitrage_db_pool_checked_out",
+    "Connexions du pool SQLAlchemy en cours d'utilisation"
+))
+DB_POOL_SIZE = REGISTRY.register(Gauge(
+    "arbitrage_db_pool_size",
+    "Taille configurée du pool SQLAlchemy"
+))
+DB_POOL_OVERFLOW = REGISTRY.register(Gauge(
+    "arbitrage_db_pool_overflow",
+    "Connexions ouvertes au-delà de la taille du pool"
+))
+OPPORTUNITY_INDEX_AGE = REGISTRY.register(Gauge(
+    "arbitrage_opportunity_index_age_seconds",
+    "Secondes depuis le dernier rattrapage de l'index des opportunités en mémoire"
+))
+OPPORTUNITY_INDEX_SIZE = REGISTRY.register(Gauge(
+    "arbitrage_opportunity_index_size",
+    "Opportunités actives dans l'index en mémoire"
+))
@@ -0,0 +1,85 @@
+"""
+Pagination par curseur (keyset) pour les endpoints de liste.
+
+Au lieu de `OFFSET n` (coût linéaire en n), on filtre sur la dernière clé
+vue : `WHERE (sort_col, id) < (last_value, last_id)`. Le curseur renvoyé au
+client est opaque (base64 d'un petit JSON) et lié à la clé de tri.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(key: str, value: Any, last_id: int) -> str:
+    """
+    Encode la position (valeur de tri, id) du dernier élément d'une page.
+    """
+    if isinstance(value, datetime):
+        payload = {"k": key, "t": "dt", "v": value.isoformat(), "id": last_id}
+    else:
+        payload = {"k": key, "t": "n", "v": value, "id": last_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key: str) -> Tuple[Any, int]:
+    """
+    Décode un curseur produit par `encode_cursor`.
+
+    Raises:
+        HTTPException 400 si le curseur est invalide ou destiné à un autre tri
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["k"] != key:
+            raise ValueError("clé de tri différente")
+        value = payload["v"]
+        if payload["t"] == "dt":
+            value = datetime.fromisoformat(value)
+        return value, int(payload["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
+
+def paginate_keyset(
+    query: Query,
+    sort_column,
+    id_column,
+    key: str,
+    cursor: Optional[str],
+    limit: int
+) -> Tuple[list, Optional[str]]:
+    """
+    Applique un tri décroissant (sort_column, id_column) et la condition
+    keyset correspondant au curseur.
+
+    Returns:
+        (éléments de la page, curseur de la page suivante ou None)
+    """
+    if cursor:
+        last_value, last_id = decode_cursor(cursor, key)
+        query = query.filter(
+            or_(
+                sort_column < last_value,
+                and_(sort_column == last_value, id_column < last_id)
+            )
+        )
+
+    # Un élément de plus pour savoir s'il reste une page
+    rows = query.order_by(sort_column.desc(), id_column.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(key, getattr(last, sort_column.key), last.id)
+
+    return rows, next_cursor
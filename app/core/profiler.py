@@ -0,0 +1,184 @@
+"""
+Profileur par échantillonnage pour le diagnostic en production.
+
+Un thread relève périodiquement la pile de chaque thread du processus
+(`sys._current_frames`) et compte les piles identiques. Le résultat est au
+format « collapsed stacks » (une pile par ligne, frames séparées par `;`,
+suivie du nombre d'échantillons), lisible par flamegraph.pl, speedscope ou
+inferno.
+
+Désactivé par défaut (`profiling_enabled`): aucun thread ne tourne et aucun
+code n'est exécuté sur le chemin des requêtes tant qu'un profil n'est pas
+demandé.
+"""
+
+import itertools
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from fastapi import Request, Response
+from app.core.config import settings
+
+# En-tête de requête qui demande un profil, et en-tête de réponse qui
+# donne son identifiant (GET /admin/profiles/{id})
+PROFILE_REQUEST_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+
+class ProfilerBusy(Exception):
+    """Un profil est déjà en cours (un seul à la fois)"""
+
+
+def _frame_label(frame) -> str:
+    # Sans numéro de ligne: les échantillons d'une même fonction s'agrègent
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", code.co_filename)
+    return f"{module}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """
+    Échantillonne les piles à intervalle fixe entre `start` et `stop`.
+
+    Args:
+        interval: Secondes entre deux échantillons
+        thread_id: Ne relever que ce thread (sinon tous sauf le profileur)
+        label: Nom du profil (route profilée, « admin »)
+    """
+
+    def __init__(self, interval: float, thread_id: Optional[int] = None, label: str = ""):
+        self.interval = interval
+        self.label = label
+        self.thread_id = thread_id
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+        self.duration = 0.0
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._started
+        return self.collapsed()
+
+    def collapsed(self) -> str:
+        lines = [f"{stack} {count}" for stack, count in self._stacks.most_common()]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if self.thread_id is not None:
+                frames = {self.thread_id: frames[self.thread_id]} if self.thread_id in frames else {}
+            for thread_id, frame in frames.items():
+                if thread_id == own_id:
+                    continue
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+
+class ProfilerService:
+    """
+    Point d'entrée des profils: un seul à la fois, derniers résultats
+    conservés en mémoire (`profiling_keep_results`) et relus par identifiant.
+    """
+
+    def __init__(self):
+        self.enabled = settings.profiling_enabled
+        self.interval = settings.profiling_interval
+        self.max_seconds = settings.profiling_max_seconds
+        self.keep_results = settings.profiling_keep_results
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._results: "OrderedDict[int, Dict]" = OrderedDict()
+
+    def begin(self, label: str, thread_id: Optional[int] = None) -> Tuple[int, SamplingProfiler]:
+        """
+        Démarre un profil.
+
+        Raises:
+            ProfilerBusy: Un autre profil est en cours
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy()
+        profiler = SamplingProfiler(self.interval, thread_id=thread_id, label=label)
+        profile_id = next(self._ids)
+        profiler.start()
+        return profile_id, profiler
+
+    def end(self, profile_id: int, profiler: SamplingProfiler) -> Dict:
+        try:
+            collapsed = profiler.stop()
+        finally:
+            self._lock.release()
+        result = {
+            "id": profile_id,
+            "label": profiler.label,
+            "duration_seconds": round(profiler.duration, 3),
+            "samples": profiler.samples,
+            "collapsed": collapsed,
+        }
+        self._results[profile_id] = result
+        while len(self._results) > self.keep_results:
+            self._results.popitem(last=False)
+        return result
+
+    def get(self, profile_id: int) -> Optional[Dict]:
+        return self._results.get(profile_id)
+
+    def recent(self) -> List[Dict]:
+        return [
+            {key: value for key, value in result.items() if key != "collapsed"}
+            for result in reversed(self._results.values())
+        ]
+
+
+profiler_service = ProfilerService()
+
+
+async def profile_request(request: Request, response: Response) -> AsyncIterator[None]:
+    """
+    Dépendance des routes de scan: avec `X-Profile: 1` (et le profilage
+    activé), échantillonne tous les threads du processus pendant la
+    requête et renvoie `X-Profile-Id`. Sans l'en-tête, ne coûte qu'une
+    lecture d'en-tête.
+
+    La détection tourne dans le pool de threads, pas dans le thread de la
+    requête: le profil couvre donc aussi les requêtes servies en même
+    temps, qui y apparaissent à côté de celle-ci.
+    """
+    if not profiler_service.enabled or request.headers.get(PROFILE_REQUEST_HEADER) != "1":
+        yield
+        return
+
+    try:
+        profile_id, profiler = profiler_service.begin(request.url.path)
+    except ProfilerBusy:
+        # Le profil est facultatif: la requête est servie sans
+        yield
+        return
+
+    response.headers[PROFILE_ID_HEADER] = str(profile_id)
+    try:
+        yield
+    finally:
+        profiler_service.end(profile_id, profiler)
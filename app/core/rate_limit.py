@@ -0,0 +1,233 @@
+"""
+Budget de requêtes eBay partagé (fenêtres glissantes).
+
+Toutes les instances d'`eBayScraper` d'un processus, et tous les processus
+si Redis est configuré, consomment le même budget:
+
+- `scraping_max_requests_per_hour` requêtes sur une heure glissante
+- une requête au plus toutes les `scraping_delay` secondes
+
+Sans Redis, les fenêtres sont en mémoire (un budget par processus). Avec
+Redis, chaque requête consommée est un membre horodaté d'un ensemble trié;
+le contrôle et la consommation sont atomiques (script Lua). Si Redis ne
+répond plus, le budget se replie sur les fenêtres en mémoire et retente
+Redis toutes les `scraping_budget_redis_retry_seconds` secondes.
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import List, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import RATE_LIMIT_WAIT
+from app.core.redis_client import get_redis
+import logging
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1]: ensemble trié; ARGV: maintenant, fenêtre, plafond, coût, identifiant
+_SLIDING_WINDOW = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+local used = redis.call('ZCARD', key)
+if used + cost > limit then
+    local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+    local retry_after = window
+    if oldest[2] then
+        retry_after = tonumber(oldest[2]) + window - now
+    end
+    return {0, tostring(retry_after)}
+end
+for i = 1, cost do
+    redis.call('ZADD', key, now, ARGV[5] .. ':' .. i)
+end
+redis.call('EXPIRE', key, math.ceil(window) + 1)
+return {1, '0'}
+"""
+
+
+class RateBudgetExceeded(Exception):
+    """Budget épuisé au-delà du délai d'attente accepté"""
+
+
+class SlidingWindow:
+    """
+    Fenêtre glissante en mémoire (thread-safe).
+
+    Args:
+        limit: Requêtes autorisées par fenêtre
+        window: Durée de la fenêtre (secondes)
+    """
+
+    backend = "memory"
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._timestamps: deque = deque()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, cost: int = 1) -> Tuple[bool, float]:
+        """
+        Returns:
+            (accordé, secondes avant qu'un emplacement se libère)
+        """
+        now = time.time()
+        with self._lock:
+            while self._timestamps and self._timestamps[0] <= now - self.window:
+                self._timestamps.popleft()
+            if len(self._timestamps) + cost > self.limit:
+                oldest = self._timestamps[0] if self._timestamps else now
+                return False, oldest + self.window - now
+            self._timestamps.extend([now] * cost)
+            return True, 0.0
+
+    def usage(self) -> int:
+        now = time.time()
+        with self._lock:
+            return sum(1 for timestamp in self._timestamps if timestamp > now - self.window)
+
+
+class RedisSlidingWindow:
+    """
+    Fenêtre glissante partagée entre processus.
+
+    Args:
+        redis_client: Client partagé (voir `app.core.redis_client`)
+        key: Clé du budget (un budget par ressource, ex: « ebay:hour »)
+    """
+
+    backend = "redis"
+
+    def __init__(self, redis_client, key: str, limit: int, window: float):
+        self.redis = redis_client
+        self.key = f"ratelimit:{key}"
+        self.limit = limit
+        self.window = window
+        self._script = redis_client.register_script(_SLIDING_WINDOW)
+
+    def try_acquire(self, cost: int = 1) -> Tuple[bool, float]:
+        allowed, retry_after = self._script(
+            keys=[self.key],
+            args=[time.time(), self.window, self.limit, cost, uuid.uuid4().hex]
+        )
+        return bool(int(allowed)), float(retry_after)
+
+    def usage(self) -> int:
+        self.redis.zremrangebyscore(self.key, "-inf", time.time() - self.window)
+        return self.redis.zcard(self.key)
+
+
+class RequestBudget:
+    """
+    Ensemble de fenêtres à respecter toutes (ex: horaire + espacement).
+
+    Les fenêtres sont consommées l'une après l'autre: une requête refusée
+    par la seconde a consommé un emplacement de la première, ce qui ne peut
+    que ralentir, jamais dépasser le plafond.
+    """
+
+    def __init__(self, name: str, windows: List, fallback: Optional[List[SlidingWindow]] = None):
+        self.name = name
+        self.windows = windows
+        self.fallback = fallback
+        self.max_wait = settings.scraping_budget_max_wait
+        self.redis_retry = settings.scraping_budget_redis_retry_seconds
+        self._degraded = False
+        self._degraded_since: Optional[datetime] = None  # début du repli en mémoire
+        self._degraded_until = 0.0  # monotonic: prochaine tentative sur Redis
+
+    async def acquire(self, cost: int = 1, max_wait: Optional[float] = None) -> None:
+        """
+        Attend que toutes les fenêtres acceptent la requête.
+
+        Raises:
+            RateBudgetExceeded: Attente supérieure à `max_wait`
+                (`scraping_budget_max_wait` par défaut)
+        """
+        max_wait = self.max_wait if max_wait is None else max_wait
+        started = time.monotonic()
+        for window in self._active_windows():
+            while True:
+                allowed, retry_after = self._try(window, cost)
+                if allowed:
+                    break
+                waited = time.monotonic() - started
+                if waited + retry_after > max_wait:
+                    RATE_LIMIT_WAIT.observe(waited, budget=self.name)
+                    raise RateBudgetExceeded(
+                        f"Budget {self.name} épuisé (prochain emplacement dans {retry_after:.0f}s)"
+                    )
+                await asyncio.sleep(max(retry_after, 0.01))
+        RATE_LIMIT_WAIT.observe(time.monotonic() - started, budget=self.name)
+
+    def _active_windows(self) -> List:
+        if not self._degraded or not self.fallback:
+            return self.windows
+        # Délai écoulé: la prochaine requête sonde Redis (repli local si toujours en panne)
+        return self.windows if time.monotonic() >= self._degraded_until else self.fallback
+
+    def _try(self, window, cost: int) -> Tuple[bool, float]:
+        try:
+            result = window.try_acquire(cost)
+        except Exception as e:
+            if window.backend != "redis" or not self.fallback:
+                raise
+            # Redis indisponible: budget local plutôt que pas de budget
+            if not self._degraded:
+                logger.warning(f"Budget {self.name}: Redis indisponible ({e}), repli en mémoire")
+                self._degraded = True
+                self._degraded_since = datetime.utcnow()
+            self._degraded_until = time.monotonic() + self.redis_retry
+            index = self.windows.index(window)
+            return self.fallback[index].try_acquire(cost)
+        if self._degraded and window.backend == "redis":
+            logger.info(f"Budget {self.name}: Redis de nouveau disponible, fin du repli en mémoire")
+            self._degraded = False
+            self._degraded_since = None
+        return result
+
+    def get_stats(self) -> dict:
+        degraded = self._degraded and bool(self.fallback)
+        return {
+            "budget": self.name,
+            "backend": "memory" if degraded else self.windows[0].backend if self.windows else None,
+            "degraded_since": self._degraded_since.isoformat() if degraded and self._degraded_since else None,
+            "redis_retry_in": max(self._degraded_until - time.monotonic(), 0.0) if degraded else None,
+            "windows": [
+                {"limit": window.limit, "window_seconds": window.window, "used": window.usage()}
+                for window in (self.fallback if degraded else self.windows)
+            ],
+        }
+
+
+def _build_windows(name: str, redis_client) -> List:
+    specs = []
+    if settings.scraping_max_requests_per_hour > 0:
+        specs.append(("hour", settings.scraping_max_requests_per_hour, 3600.0))
+    if settings.scraping_delay > 0:
+        specs.append(("spacing", 1, settings.scraping_delay))
+    if redis_client is None:
+        return [SlidingWindow(limit, window) for _, limit, window in specs]
+    return [RedisSlidingWindow(redis_client, f"{name}:{suffix}", limit, window) for suffix, limit, window in specs]
+
+
+_budget: Optional[RequestBudget] = None
+
+
+def scraping_budget() -> RequestBudget:
+    """Budget des requêtes de scraping eBay (unique par processus)"""
+    global _budget
+    if _budget is None:
+        redis_client = get_redis()
+        windows = _build_windows("ebay", redis_client)
+        fallback = _build_windows("ebay", None) if redis_client is not None else None
+        _budget = RequestBudget("ebay", windows, fallback)
+    return _budget
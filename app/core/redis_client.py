@@ -0,0 +1,39 @@
+"""
+Client Redis partagé (file de scans, budget de requêtes).
+
+Redis est optionnel: sans `redis_url` (ou sans le paquet `redis`),
+`get_redis()` renvoie None et les fonctions qui en dépendent se replient
+sur un fonctionnement mono-processus ou sont désactivées.
+"""
+
+import importlib.util
+from typing import TYPE_CHECKING, Optional
+from app.core.config import settings
+import logging
+
+if TYPE_CHECKING:
+    import redis
+
+logger = logging.getLogger(__name__)
+
+# Paquet importé à la création du client (pas au démarrage si Redis n'est pas configuré)
+REDIS_AVAILABLE = importlib.util.find_spec("redis") is not None
+if not REDIS_AVAILABLE:
+    logger.warning("redis non installé: file de scans et budget partagé indisponibles")
+
+_client = None
+
+
+def get_redis() -> Optional["redis.Redis"]:
+    """Client Redis du processus (créé à la première utilisation)"""
+    global _client
+    if _client is None and REDIS_AVAILABLE and settings.redis_url:
+        import redis
+        _client = redis.Redis.from_url(settings.redis_url, decode_responses=True)
+    return _client
+
+
+def set_redis(client) -> None:
+    """Remplace le client (ex: autre serveur, fakeredis pour les essais)"""
+    global _client
+    _client = client
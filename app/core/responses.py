@@ -0,0 +1,86 @@
+"""
+Réponses JSON rapides pour les endpoints de liste et du dashboard.
+
+- `ORJSONResponse`: sérialisation par orjson (datetimes, floats, bools en
+  natif), nettement plus rapide que `json.dumps` sur des milliers de lignes
+- `response_columns` / `rows_response`: lecture en lecture seule des seules
+  colonnes d'un schéma de réponse (lignes SQL, sans objets ORM ni identity
+  map) renvoyées telles quelles, sans validation Pydantic par ligne
+- `etag_for` / `etag_matches`: réponses conditionnelles (`If-None-Match`
+  → 304 sans corps)
+
+Les endpoints gardent leur `response_model` pour la documentation OpenAPI:
+une `Response` renvoyée directement n'est pas revalidée par FastAPI.
+"""
+
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class ORJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _default(value: Any) -> Any:
+    # Types non natifs d'orjson (modèles Pydantic, Decimal des agrégats SQL)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if hasattr(value, "__float__"):
+        return float(value)
+    raise TypeError(f"Type non sérialisable en JSON: {type(value).__name__}")
+
+
+def response_columns(model, schema) -> List:
+    """Colonnes de `model` correspondant aux champs du schéma de réponse"""
+    return [model.__table__.c[name] for name in schema.model_fields]
+
+
+def json_response(content: Any, response: Optional[Response] = None) -> ORJSONResponse:
+    """
+    Contenu renvoyé tel quel en JSON, avec les en-têtes déjà posés sur la
+    `response` de l'endpoint (curseur de pagination, âge de l'index...).
+    """
+    return ORJSONResponse(content, headers=dict(response.headers) if response is not None else None)
+
+
+def rows_as_dicts(rows: Iterable) -> List[Dict]:
+    """Lignes SQL (`Row`) en dicts, une clé par colonne (plus rapide que `Row._asdict`)"""
+    rows = list(rows)
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def rows_response(rows: Iterable, response: Optional[Response] = None) -> ORJSONResponse:
+    """Lignes SQL (`Row`) renvoyées en JSON"""
+    return json_response(rows_as_dicts(rows), response)
+
+
+def etag_for(body: bytes) -> str:
+    """
+    ETag faible du contenu: la représentation compressée (gzip/brotli) reste
+    équivalente pour `If-None-Match`.
+    """
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """`If-None-Match` de la requête correspond à l'ETag (comparaison faible)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    return any(
+        (tag[2:] if tag.startswith("W/") else tag) == opaque
+        for tag in (part.strip() for part in header.split(","))
+    )
@@ -0,0 +1,223 @@
+"""
+Traces des scans (spans compatibles OpenTelemetry).
+
+Chaque étape (fetch → parse → ingest → detect → alert) ouvre un span enfant
+du span courant (ContextVar: suit les tâches asyncio). Les spans terminés
+sont transmis:
+
+- aux processeurs actifs dans le contexte (ex: `ScanRecorder`, qui agrège
+  les durées par requête et par étape dans `scan_runs`)
+- à l'export JSON lines si `trace_export_path` est défini: un span par
+  ligne, champs de l'encodage OTLP/JSON (traceId, spanId, parentSpanId,
+  startTimeUnixNano, attributes...), rejouable vers un collecteur.
+
+Usage:
+    with tracer.span("fetch_sales", query=search_query) as span:
+        sales = await ...
+        span.set_attribute("items", len(sales))
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import secrets
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+import httpx
+from app.core.config import settings
+from app.core.rate_limit import RateBudgetExceeded
+import logging
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "ebay-arbitrage"
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_processors: ContextVar[Tuple] = ContextVar("span_processors", default=())
+
+
+def categorize_error(exc: BaseException) -> str:
+    """Catégorie d'erreur stable pour l'agrégation (timeout, http_5xx, ...)"""
+    if isinstance(exc, asyncio.CancelledError):
+        return "cancelled"
+    if isinstance(exc, RateBudgetExceeded):
+        return "rate_limited"
+    if isinstance(exc, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        if status == 429:
+            return "http_429"
+        return "http_5xx" if status >= 500 else "http_4xx"
+    if isinstance(exc, httpx.TransportError):
+        return "network"
+    if isinstance(exc, (KeyError, IndexError, ValueError, TypeError, AttributeError)):
+        return "parse"
+    return "other"
+
+
+class Span:
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent", "start_ns", "end_ns",
+        "attributes", "events", "status", "status_message",
+    )
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict):
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = dict(attributes)
+        self.events: List[Dict] = []
+        self.status = "OK"
+        self.status_message = ""
+
+    @property
+    def duration(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes) -> None:
+        self.events.append({"name": name, "time_ns": time.time_ns(), "attributes": attributes})
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status = "ERROR"
+        self.status_message = str(exc)[:200]
+        if getattr(exc, "_span_recorded", False):
+            # Déjà catégorisée par un span enfant: seul le statut remonte
+            return
+        self.attributes["error.category"] = categorize_error(exc)
+        self.add_event("exception", **{"exception.type": type(exc).__name__, "exception.message": self.status_message})
+        try:
+            exc._span_recorded = True
+        except AttributeError:
+            pass
+
+    def ancestor(self, name: str) -> Optional["Span"]:
+        """Premier span parent (ou soi-même) portant ce nom"""
+        span = self
+        while span is not None and span.name != name:
+            span = span.parent
+        return span
+
+    def to_otlp(self) -> Dict:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent.span_id if self.parent else "",
+            "name": self.name,
+            "kind": "SPAN_KIND_INTERNAL",
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "events": [
+                {
+                    "name": event["name"],
+                    "timeUnixNano": str(event["time_ns"]),
+                    "attributes": _otlp_attributes(event["attributes"]),
+                }
+                for event in self.events
+            ],
+            "status": {
+                "code": "STATUS_CODE_ERROR" if self.status == "ERROR" else "STATUS_CODE_OK",
+                "message": self.status_message,
+            },
+            "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+        }
+
+
+def _otlp_attributes(attributes: Dict) -> List[Dict]:
+    encoded = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        encoded.append({"key": key, "value": typed})
+    return encoded
+
+
+class JsonLinesExporter:
+    """Export des spans terminés, un objet JSON par ligne (thread-safe)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_otlp(), ensure_ascii=False)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(line + "\n")
+
+
+class Tracer:
+    def __init__(self, export_path: Optional[str] = None):
+        self.exporter = JsonLinesExporter(export_path) if export_path else None
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        """Span enfant du span courant; une exception le marque en erreur"""
+        span = Span(name, _current_span.get(), attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.record_exception(exc)
+            raise
+        finally:
+            _current_span.reset(token)
+            self._end(span)
+
+    @contextlib.contextmanager
+    def processor(self, processor) -> Iterator[None]:
+        """Active un processeur de spans (`on_end(span)`) pour le contexte courant"""
+        token = _processors.set(_processors.get() + (processor,))
+        try:
+            yield
+        finally:
+            _processors.reset(token)
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def _end(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        for processor in _processors.get():
+            processor.on_end(span)
+        if self.exporter is not None:
+            try:
+                self.exporter.export(span)
+            except OSError as e:
+                logger.warning(f"Export de trace impossible: {e}")
+
+
+def record_exception(exc: BaseException) -> None:
+    """Erreur gérée (exception attrapée) rattachée au span courant"""
+    span = _current_span.get()
+    if span is not None:
+        span.record_exception(exc)
+
+
+def add_event(name: str, **attributes) -> None:
+    """Événement (ex: `retry`) rattaché au span courant"""
+    span = _current_span.get()
+    if span is not None:
+        span.add_event(name, **attributes)
+
+
+tracer = Tracer(settings.trace_export_path)
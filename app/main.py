@@ -1,11 +1,57 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import routes, dashboard_routes
+from app.api import routes, dashboard_routes, export_routes, stream_routes, admin_routes
+from app.core import metrics
+from app.core.compression import CompressionMiddleware
+from app.core.database import SessionLocal, engine
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.profiler import PROFILE_ID_HEADER
+from app.services.container import services
+from app.services.opportunity_index import INDEX_AGE_HEADER
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Tâches de fond: envoi des alertes hors du chemin des requêtes
+    await services.alert_dispatcher.start()
+    await services.outbox_worker.start()
+    await services.opportunity_feed.start()
+    await services.opportunity_index.start()
+    await services.price_movers.start()
+    await services.analytics.start()
+    # Service d'arbitrage et registre des cartes chauds avant les premiers
+    # scans, sans retarder les premières requêtes
+    warm_up = asyncio.create_task(asyncio.to_thread(_warm_up))
+    yield
+    await warm_up
+    await services.analytics.stop()
+    await services.price_movers.stop()
+    await services.opportunity_index.stop()
+    await services.opportunity_feed.stop()
+    await services.outbox_worker.stop()
+    await services.alert_dispatcher.stop()
+    if services.is_built("arbitrage_service"):
+        services.arbitrage_service.parallel_detector.shutdown()
+
+
+def _warm_up() -> None:
+    db = SessionLocal()
+    try:
+        services.arbitrage_service.card_registry.load(db)
+    except Exception:
+        # Chargement paresseux au premier scan si la base n'est pas prête
+        pass
+    finally:
+        db.close()
+
 
 app = FastAPI(
     title="eBay Arbitrage API",
     version="1.0.0",
-    description="API pour l'arbitrage de cartes à collectionner"
+    description="API pour l'arbitrage de cartes à collectionner",
+    lifespan=lifespan
 )
 
 # =========================
@@ -17,13 +63,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, PROFILE_ID_HEADER, INDEX_AGE_HEADER],
 )
 
+# =========================
+# COMPRESSION
+# =========================
+app.add_middleware(CompressionMiddleware)
+
 # =========================
 # ROUTES
 # =========================
 app.include_router(routes.router, prefix="/api", tags=["api"])
 app.include_router(dashboard_routes.router, prefix="/api", tags=["dashboard"])
+app.include_router(export_routes.router, prefix="/api", tags=["export"])
+app.include_router(stream_routes.router, prefix="/api", tags=["stream"])
+app.include_router(admin_routes.router, prefix="/api", tags=["admin"])
 
 # =========================
 # ROOT
@@ -38,10 +93,50 @@ def root():
             "health": "/health",
             "docs": "/docs",
             "api": "/api",
-            "dashboard": "/api/dashboard"
+            "dashboard": "/api/dashboard",
+            "export": "/api/export",
+            "stream": "/api/stream/opportunities",
+            "metrics": "/metrics"
         }
     }
 
 @app.get("/health")
 def health():
     return {"status": "healthy"}
+
+
+# =========================
+# METRICS
+# =========================
+def _collect_runtime_metrics():
+    """Jauges lues au moment de la collecte (pool DB, outbox des alertes, index des opportunités)"""
+    pool = engine.pool
+    # QueuePool uniquement (SQLite en mémoire / NullPool n'exposent pas ces compteurs)
+    for gauge, attribute in (
+        (metrics.DB_POOL_CHECKED_OUT, "checkedout"),
+        (metrics.DB_POOL_SIZE, "size"),
+        (metrics.DB_POOL_OVERFLOW, "overflow"),
+    ):
+        if hasattr(pool, attribute):
+            gauge.set(getattr(pool, attribute)())
+
+    index_age = services.opportunity_index.age
+    metrics.OPPORTUNITY_INDEX_AGE.set(index_age if index_age is not None else -1)
+    metrics.OPPORTUNITY_INDEX_SIZE.set(services.opportunity_index.get_stats()["active"])
+
+    db = SessionLocal()
+    try:
+        stats = services.alert_outbox.get_stats(db)
+        metrics.ALERT_OUTBOX_PENDING.set(stats["pending"])
+        metrics.ALERT_OUTBOX_LAG.set(stats["lag_seconds"] or 0)
+    except Exception:
+        # /metrics reste disponible si la base ne répond pas
+        pass
+    finally:
+        db.close()
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    _collect_runtime_metrics()
+    return Response(metrics.render_metrics(), headers={"Content-Type": metrics.CONTENT_TYPE})
@@ -1,7 +1,11 @@
 from app.models.card import Card
 from app.models.sale import Sale
 from app.models.listing import Listing
-from app.models.opportunity import Opportunity
+from app.models.opportunity import Opportunity, OpportunityHistory
+from app.models.alert_outbox import AlertOutbox
+from app.models.subscriber import Subscriber, AlertRule
+from app.models.scan_run import ScanRun
+from app.models.archived_sale import ArchivedSale, ArchivedSalesTotal
 
-__all__ = ["Card", "Sale", "Listing", "Opportunity"]
+__all__ = ["Card", "Sale", "Listing", "Opportunity", "OpportunityHistory", "AlertOutbox", "Subscriber", "AlertRule", "ScanRun", "ArchivedSale", "ArchivedSalesTotal"]
 
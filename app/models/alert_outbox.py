@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from datetime import datetime
+from app.core.database import Base
+
+
+class AlertOutbox(Base):
+    """
+    Outbox transactionnelle des alertes: écrite dans le même commit que
+    l'opportunité, vidée de façon asynchrone (at-least-once).
+    """
+    __tablename__ = "alert_outbox"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    opportunity_id = Column(Integer, ForeignKey("opportunities.id", ondelete="SET NULL"), nullable=True)
+    
+    # Clé d'idempotence: une seule alerte par (chat, listing, prix)
+    idempotency_key = Column(String, unique=True, nullable=False)
+    chat_id = Column(String, nullable=True)  # None = chat par défaut
+    payload = Column(Text, nullable=False)  # Instantané JSON de l'opportunité
+    
+    # Status: pending, sent, failed
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String, nullable=True)
+    
+    # Métadonnées
+    created_at = Column(DateTime, default=datetime.utcnow)
+    available_at = Column(DateTime, default=datetime.utcnow)  # Visibilité (lease / backoff)
+    sent_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index("idx_outbox_status_available", "status", "available_at"),
+    )
+    
+    def __repr__(self):
+        return f"<AlertOutbox(id={self.id}, key='{self.idempotency_key}', status='{self.status}')>"
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Float, Integer, String, Index
+from app.core.database import Base
+
+
+class ArchivedSale(Base):
+    """
+    Vente déplacée dans l'archive Parquet (voir `app.services.sales_archive`).
+    L'`ebay_item_id` reste réservé: l'ingestion eBay et l'import ne
+    réinsèrent pas une vente archivée dans la table chaude.
+    """
+    __tablename__ = "archived_sales"
+    
+    ebay_item_id = Column(String, primary_key=True)
+    sale_id = Column(Integer, nullable=False)
+    month = Column(String(7), nullable=False)  # Partition AAAA-MM
+    
+    __table_args__ = (
+        Index("idx_archived_sale_month", "month"),
+    )
+    
+    def __repr__(self):
+        return f"<ArchivedSale(ebay_item_id='{self.ebay_item_id}', sale_id={self.sale_id}, month='{self.month}')>"
+
+
+class ArchivedSalesTotal(Base):
+    """
+    Nombre et somme des prix des ventes archivées par mois et par langue:
+    les totaux du dashboard (lecture SQLAlchemy) incluent l'archive sans
+    lire les fichiers Parquet.
+    """
+    __tablename__ = "archived_sales_totals"
+    
+    id = Column(Integer, primary_key=True)
+    month = Column(String(7), nullable=False)  # Partition AAAA-MM
+    language = Column(String)  # Langue de la carte (comme `cards.language`)
+    sales_count = Column(Integer, nullable=False, default=0)
+    total_price = Column(Float, nullable=False, default=0.0)
+    
+    __table_args__ = (
+        Index("idx_archived_sales_total_month_language", "month", "language"),
+    )
+    
+    def __repr__(self):
+        return f"<ArchivedSalesTotal(month='{self.month}', language='{self.language}', sales={self.sales_count})>"
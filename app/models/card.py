@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Index
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -14,6 +14,9 @@ class Card(Base):
     card_number = Column(String)  # Numéro dans le set
     language = Column(String, default="EN")  # EN, JP, etc.
     
+    # Fiche fusionnée dans une autre (doublon): ses ventes et listings y sont rattachés
+    merged_into_id = Column(Integer, ForeignKey("cards.id"), nullable=True, index=True)
+    
     # Métadonnées
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -23,9 +26,10 @@ class Card(Base):
     listings = relationship("Listing", back_populates="card", cascade="all, delete-orphan")
     opportunities = relationship("Opportunity", back_populates="card", cascade="all, delete-orphan")
     
-    # Index composite pour recherche rapide
+    # Identité d'une carte: un seul enregistrement par (nom normalisé, langue)
     __table_args__ = (
-        Index("idx_card_normalized_lang", "normalized_name", "language"),
+        Index("idx_card_normalized_lang", "normalized_name", "language", unique=True),
+        Index("idx_card_updated_at", "updated_at"),  # Copie analytique incrémentale
     )
     
     def __repr__(self):
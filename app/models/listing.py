@@ -35,6 +35,8 @@ class Listing(Base):
     # Index pour recherche active listings
     __table_args__ = (
         Index("idx_listing_card_active", "card_id", "is_active"),
+        Index("idx_listing_created_id", "created_at", "id"),  # Pagination keyset
+        Index("idx_listing_updated_at", "updated_at"),  # Copie analytique incrémentale
     )
     
     def __repr__(self):
@@ -24,6 +24,8 @@ class Opportunity(Base):
     # Status
     is_active = Column(Boolean, default=True, index=True)
     alerted = Column(Boolean, default=False)  # Si une alerte a été envoyée
+    closed_at = Column(DateTime, nullable=True)  # Date de clôture (is_active=False)
+    close_reason = Column(String, nullable=True)  # listing_ended, price_increased, floor_dropped
     
     # Métadonnées
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -31,13 +33,44 @@ class Opportunity(Base):
     
     # Relations
     card = relationship("Card", back_populates="opportunities")
+    listing = relationship("Listing")
     
     # Index pour recherche d'opportunités actives
     __table_args__ = (
         Index("idx_opp_card_active", "card_id", "is_active"),
-        Index("idx_opp_profit_margin", "profit_margin"),
+        Index("idx_opp_profit_margin_id", "profit_margin", "id"),  # Tri + pagination keyset
+        Index("idx_opp_active_closed_at", "is_active", "closed_at"),  # Job d'archivage
+        Index("idx_opp_updated_at", "updated_at"),  # Rattrapage de l'index en mémoire
     )
     
     def __repr__(self):
         return f"<Opportunity(id={self.id}, card_id={self.card_id}, profit={self.estimated_net_profit:.2f})>"
 
+
+
+class OpportunityHistory(Base):
+    """
+    Opportunités clôturées archivées hors de la table chaude `opportunities`.
+    """
+    __tablename__ = "opportunities_history"
+    
+    id = Column(Integer, primary_key=True)  # Même id que dans `opportunities`
+    card_id = Column(Integer, nullable=False, index=True)
+    listing_id = Column(Integer, nullable=False)
+    
+    listing_price = Column(Float, nullable=False)
+    floor_price = Column(Float, nullable=False)
+    discount_percentage = Column(Float, nullable=False)
+    estimated_gross_profit = Column(Float, nullable=False)
+    estimated_net_profit = Column(Float, nullable=False)
+    profit_margin = Column(Float, nullable=False)
+    
+    alerted = Column(Boolean, default=False)
+    close_reason = Column(String, nullable=True)
+    
+    created_at = Column(DateTime)
+    closed_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f"<OpportunityHistory(id={self.id}, card_id={self.card_id}, reason='{self.close_reason}')>"
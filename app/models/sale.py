@@ -29,7 +29,8 @@ class Sale(Base):
     
     # Index pour requêtes fréquentes
     __table_args__ = (
-        Index("idx_sale_card_sold_date", "card_id", "sold_date"),
+        Index("idx_sale_card_sold_date_id", "card_id", "sold_date", "id"),
+        Index("idx_sale_sold_date_id", "sold_date", "id"),  # Pagination keyset
         Index("idx_sale_psa_grade", "psa_grade"),
     )
     
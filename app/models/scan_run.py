@@ -0,0 +1,62 @@
+from sqlalchemy import Column, Integer, String, Float, Boolean, Text, DateTime, Index
+from datetime import datetime
+from app.core.database import Base
+import json
+
+
+class ScanRun(Base):
+    """
+    Compte rendu d'un scan: durées par étape et par requête, volumes,
+    cache des prix planchers, reprises HTTP et erreurs par catégorie.
+    `trace_id` relie l'enregistrement aux spans exportés.
+    """
+    __tablename__ = "scan_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    trace_id = Column(String(32), nullable=False, index=True)
+    
+    # Status: running, success, partial (erreurs sur certaines requêtes), failed
+    status = Column(String, nullable=False, default="running")
+    incremental = Column(Boolean, default=True)
+    
+    # Volumes
+    queries_count = Column(Integer, nullable=False, default=0)
+    sales_added = Column(Integer, nullable=False, default=0)
+    listings_updated = Column(Integer, nullable=False, default=0)
+    opportunities_found = Column(Integer, nullable=False, default=0)
+    opportunities_closed = Column(Integer, nullable=False, default=0)
+    
+    # Cache des prix planchers, reprises et erreurs
+    cache_hits = Column(Integer, nullable=False, default=0)
+    cache_misses = Column(Integer, nullable=False, default=0)
+    http_retries = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+    
+    # Détails JSON: {étape: secondes}, {catégorie: nombre}, [stats par requête]
+    stages_json = Column(Text, nullable=False, default="{}")
+    errors_json = Column(Text, nullable=False, default="{}")
+    queries_json = Column(Text, nullable=False, default="[]")
+    
+    # Métadonnées
+    started_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    duration_seconds = Column(Float, nullable=True)
+    
+    __table_args__ = (
+        Index("idx_scan_run_started", "started_at"),
+    )
+    
+    @property
+    def stages(self):
+        return json.loads(self.stages_json or "{}")
+    
+    @property
+    def errors(self):
+        return json.loads(self.errors_json or "{}")
+    
+    @property
+    def queries(self):
+        return json.loads(self.queries_json or "[]")
+    
+    def __repr__(self):
+        return f"<ScanRun(id={self.id}, status='{self.status}', queries={self.queries_count})>"
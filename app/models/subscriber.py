@@ -0,0 +1,60 @@
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.core.database import Base
+
+
+class Subscriber(Base):
+    """
+    Destinataire d'alertes Telegram avec ses propres règles.
+    """
+    __tablename__ = "subscribers"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    telegram_chat_id = Column(String, unique=True, nullable=False)
+    is_active = Column(Boolean, default=True)
+    
+    # Métadonnées
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relations
+    rules = relationship("AlertRule", back_populates="subscriber", cascade="all, delete-orphan")
+    
+    def __repr__(self):
+        return f"<Subscriber(id={self.id}, name='{self.name}', chat_id='{self.telegram_chat_id}')>"
+
+
+class AlertRule(Base):
+    """
+    Règle d'alerte d'un abonné: tous les critères renseignés doivent être
+    satisfaits (ET); un abonné est alerté si au moins une de ses règles
+    correspond (OU).
+    """
+    __tablename__ = "alert_rules"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    subscriber_id = Column(Integer, ForeignKey("subscribers.id", ondelete="CASCADE"), nullable=False)
+    
+    # Critères (None = indifférent)
+    card_id = Column(Integer, ForeignKey("cards.id", ondelete="CASCADE"), nullable=True)
+    card_name = Column(String, nullable=True)  # Nom normalisé exact (insensible à la casse)
+    card_set = Column(String, nullable=True)
+    psa_grade = Column(String, nullable=True)  # Ex: "PSA 10", "Raw"
+    language = Column(String, nullable=True)
+    min_net_profit = Column(Float, nullable=True)
+    max_price = Column(Float, nullable=True)
+    
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relations
+    subscriber = relationship("Subscriber", back_populates="rules")
+    
+    __table_args__ = (
+        Index("idx_alert_rule_subscriber", "subscriber_id"),
+    )
+    
+    def __repr__(self):
+        return f"<AlertRule(id={self.id}, subscriber_id={self.subscriber_id})>"
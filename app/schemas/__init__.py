@@ -2,6 +2,13 @@ from app.schemas.card import CardCreate, CardResponse
 from app.schemas.sale import SaleCreate, SaleResponse
 from app.schemas.listing import ListingCreate, ListingResponse
 from app.schemas.opportunity import OpportunityResponse
+from app.schemas.subscriber import (
+    SubscriberCreate,
+    SubscriberResponse,
+    AlertRuleCreate,
+    AlertRuleResponse,
+)
+from app.schemas.scan_run import ScanTaskCreate, ScanQueryStats, ScanRunResponse, ScanRunDetailResponse
 
 __all__ = [
     "CardCreate",
@@ -11,5 +18,13 @@ __all__ = [
     "ListingCreate",
     "ListingResponse",
     "OpportunityResponse",
+    "SubscriberCreate",
+    "SubscriberResponse",
+    "AlertRuleCreate",
+    "AlertRuleResponse",
+    "ScanTaskCreate",
+    "ScanQueryStats",
+    "ScanRunResponse",
+    "ScanRunDetailResponse",
 ]
 
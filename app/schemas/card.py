@@ -18,6 +18,7 @@ class CardResponse(BaseModel):
     card_set: Optional[str]
     card_number: Optional[str]
     language: str
+    merged_into_id: Optional[int] = None
     created_at: datetime
     updated_at: datetime
     
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Optional
 
 
 class OpportunityResponse(BaseModel):
@@ -14,6 +15,8 @@ class OpportunityResponse(BaseModel):
     profit_margin: float
     is_active: bool
     alerted: bool
+    closed_at: Optional[datetime] = None
+    close_reason: Optional[str] = None
     created_at: datetime
     updated_at: datetime
     
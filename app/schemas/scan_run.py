@@ -0,0 +1,51 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class ScanTaskCreate(BaseModel):
+    search_query: str
+    psa_grade: Optional[str] = None
+    language: str = "EN"
+    days_back: int = 30
+
+
+class ScanQueryStats(BaseModel):
+    query: str
+    duration_seconds: float
+    stages: Dict[str, float]
+    sales_fetched: int
+    listings_fetched: int
+    sales_added: int
+    listings_updated: int
+    http_requests: int
+    http_retries: int
+    errors: Dict[str, int]
+
+
+class ScanRunResponse(BaseModel):
+    id: int
+    trace_id: str
+    status: str
+    incremental: bool
+    queries_count: int
+    sales_added: int
+    listings_updated: int
+    opportunities_found: int
+    opportunities_closed: int
+    cache_hits: int
+    cache_misses: int
+    http_retries: int
+    error_count: int
+    stages: Dict[str, float]
+    errors: Dict[str, int]
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class ScanRunDetailResponse(ScanRunResponse):
+    queries: List[ScanQueryStats]
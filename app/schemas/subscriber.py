@@ -0,0 +1,39 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+
+class SubscriberCreate(BaseModel):
+    name: str
+    telegram_chat_id: str
+
+
+class SubscriberResponse(BaseModel):
+    id: int
+    name: str
+    telegram_chat_id: str
+    is_active: bool
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class AlertRuleCreate(BaseModel):
+    card_id: Optional[int] = None
+    card_name: Optional[str] = None
+    card_set: Optional[str] = None
+    psa_grade: Optional[str] = None
+    language: Optional[str] = None
+    min_net_profit: Optional[float] = None
+    max_price: Optional[float] = None
+
+
+class AlertRuleResponse(AlertRuleCreate):
+    id: int
+    subscriber_id: int
+    is_active: bool
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,165 @@
+"""
+Dispatcher d'alertes asynchrone: file bornée + workers concurrents.
+
+Les alertes réclamées dans l'outbox sont mises en file et les routes
+répondent immédiatement; l'envoi Telegram (limites de débit, retry-after)
+se fait en tâche de fond, puis chaque envoi est confirmé dans l'outbox.
+"""
+
+import asyncio
+from collections import defaultdict
+from typing import Dict, List, Optional
+from app.core.database import SessionLocal
+from app.services.alert_service import AlertService
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AlertJob:
+    """Message prêt à l'envoi et opportunités qu'il couvre"""
+
+    def __init__(self, text: str, opportunity_ids: List[int], outbox_ids: List[int],
+                 chat_id: Optional[str] = None):
+        self.text = text
+        self.opportunity_ids = opportunity_ids
+        # Lignes d'outbox à confirmer (ou replanifier) après envoi
+        self.outbox_ids = outbox_ids
+        self.chat_id = chat_id
+
+    def __repr__(self):
+        return f"<AlertJob(opportunities={self.opportunity_ids}, chat_id={self.chat_id})>"
+
+
+class AlertDispatcher:
+    """
+    File d'alertes bornée consommée par `alert_workers` workers.
+    """
+
+    def __init__(self, alert_service: AlertService, outbox):
+        self.alert_service = alert_service
+        # AlertOutboxService: confirmation des alertes envoyées
+        self.outbox = outbox
+        self.worker_count = settings.alert_workers
+        self.queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self) -> None:
+        """Démarre les workers (au démarrage de l'application)"""
+        if self.running:
+            return
+        self.queue = asyncio.Queue(maxsize=settings.alert_queue_size)
+        self._workers = [
+            asyncio.create_task(self._worker(index))
+            for index in range(self.worker_count)
+        ]
+        logger.info(f"Dispatcher d'alertes démarré ({self.worker_count} workers)")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Vide la file (dans la limite de `timeout`) puis arrête les workers"""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Arrêt du dispatcher: {self.queue.qsize()} alertes non envoyées")
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def jobs_from_outbox(self, claimed: List[Dict]) -> List[AlertJob]:
+        """
+        Formate les alertes réclamées dans l'outbox (voir `AlertOutboxService.claim`),
+        regroupées par chat et en digests au-delà du seuil.
+        """
+        by_chat: Dict[Optional[str], List[Dict]] = defaultdict(list)
+        for row in claimed:
+            by_chat[row["chat_id"]].append(dict(row["snapshot"], outbox_id=row["id"]))
+
+        jobs = []
+        for chat_id, snapshots in by_chat.items():
+            if self.alert_service.digest_threshold and len(snapshots) >= self.alert_service.digest_threshold:
+                groups = self.alert_service.digest_groups(snapshots)
+            else:
+                groups = [
+                    (text, [snap])
+                    for snap, text in zip(snapshots, self.alert_service.build_messages(snapshots))
+                ]
+            for text, covered in groups:
+                jobs.append(AlertJob(
+                    text,
+                    [snap["opportunity_id"] for snap in covered],
+                    [snap["outbox_id"] for snap in covered],
+                    chat_id=chat_id
+                ))
+        return jobs
+
+    def free_slots(self) -> int:
+        """Places libres dans la file (0 si le dispatcher est arrêté)"""
+        if not self.running:
+            return 0
+        return self.queue.maxsize - self.queue.qsize()
+
+    def enqueue(self, jobs: List[AlertJob]) -> int:
+        """Met des messages déjà formatés en file (sans bloquer)"""
+        if not self.running:
+            raise RuntimeError("Dispatcher d'alertes non démarré")
+
+        queued = 0
+        for job in jobs:
+            try:
+                self.queue.put_nowait(job)
+                queued += 1
+            except asyncio.QueueFull:
+                self.dropped += 1
+                logger.error(f"File d'alertes pleine, alerte abandonnée: {job}")
+        return queued
+
+    def get_stats(self) -> dict:
+        return {
+            "running": self.running,
+            "workers": len(self._workers),
+            "queued": self.queue.qsize() if self.queue else 0,
+            "sent": self.sent,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = await self.queue.get()
+            try:
+                await self._deliver(job)
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Worker d'alertes {index}: erreur inattendue: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _deliver(self, job: AlertJob) -> None:
+        logger.info(f"🚨 ALERTE:\n{job.text}")
+
+        if await self.alert_service.send_text(job.text, chat_id=job.chat_id):
+            self.sent += 1
+            await asyncio.to_thread(self._with_session, self.outbox.mark_sent, job.outbox_ids)
+        else:
+            self.failed += 1
+            await asyncio.to_thread(
+                self._with_session, self.outbox.mark_failed, job.outbox_ids, "Échec de l'envoi Telegram"
+            )
+
+    def _with_session(self, method, *args) -> None:
+        db = SessionLocal()
+        try:
+            method(db, *args)
+        finally:
+            db.close()
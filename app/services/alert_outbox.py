@@ -0,0 +1,285 @@
+"""
+Outbox transactionnelle des alertes.
+
+La détection écrit une ligne `alert_outbox` par nouvelle opportunité dans le
+même commit que l'opportunité: aucune alerte n'est perdue si le processus
+s'arrête, et la détection n'attend pas Telegram. `OutboxWorker` vide l'outbox
+en tâche de fond avec une sémantique at-least-once:
+
+1. Réclamation d'un lot (bail de `alert_outbox_lease_seconds`)
+2. Envoi via `AlertDispatcher`
+3. Confirmation (`sent`) ou nouvel essai avec backoff
+
+La clé d'idempotence (chat, listing, prix) évite de réalerter une
+opportunité recréée pour le même listing au même prix. Le chat par défaut
+(`telegram_chat_id`) reçoit toutes les alertes; les abonnés reçoivent celles
+qui correspondent à leurs règles (voir `AlertRulesEngine`).
+"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+from app.core.database import SessionLocal
+from app.models import AlertOutbox, Opportunity
+from app.services.alert_service import AlertService
+from app.services.alert_rules import AlertRulesEngine
+from app.core.config import settings
+from app.core.metrics import ALERT_DELIVERY_LAG
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AlertOutboxService:
+    """
+    Écriture, réclamation et confirmation des lignes de l'outbox.
+    """
+
+    def __init__(self, alert_service: AlertService, rules_engine: Optional[AlertRulesEngine] = None):
+        self.alert_service = alert_service
+        self.rules_engine = rules_engine
+        self.lease_seconds = settings.alert_outbox_lease_seconds
+        self.max_attempts = settings.alert_outbox_max_attempts
+
+    @staticmethod
+    def idempotency_key(listing_id: int, listing_price: float, chat_id: Optional[str] = None) -> str:
+        key = f"{listing_id}:{listing_price:.2f}"
+        return f"{chat_id}:{key}" if chat_id else key
+
+    def enqueue(self, db: Session, opportunities: List[Opportunity]) -> int:
+        """
+        Ajoute les alertes à l'outbox dans la transaction courante (sans commit).
+
+        Returns:
+            Nombre de lignes ajoutées (hors doublons d'idempotence)
+        """
+        if not opportunities:
+            return 0
+
+        # Ids et relations nécessaires à l'instantané
+        db.flush()
+
+        index = self.rules_engine.ensure_compiled(db) if self.rules_engine else None
+
+        now = datetime.utcnow()
+        rows = {}
+        for opp in opportunities:
+            snapshot = self.alert_service.snapshot(opp)
+            payload = json.dumps(snapshot)
+            # None: chat par défaut, puis les abonnés dont une règle correspond
+            chats = [None] + (self.rules_engine.match(snapshot, index) if index else [])
+            for chat_id in chats:
+                key = self.idempotency_key(opp.listing_id, opp.listing_price, chat_id)
+                rows.setdefault(key, {
+                    "opportunity_id": opp.id,
+                    "idempotency_key": key,
+                    "chat_id": chat_id,
+                    "payload": payload,
+                    "status": "pending",
+                    "attempts": 0,
+                    "created_at": now,
+                    "available_at": now,
+                })
+
+        existing = set(db.execute(
+            select(AlertOutbox.idempotency_key).where(AlertOutbox.idempotency_key.in_(list(rows)))
+        ).scalars())
+        new_rows = [row for key, row in rows.items() if key not in existing]
+
+        if new_rows:
+            db.execute(self._insert_ignore(db), new_rows)
+
+        return len(new_rows)
+
+    def claim(self, db: Session, limit: int) -> List[Dict]:
+        """
+        Réclame jusqu'à `limit` alertes disponibles en posant un bail.
+        Si le processus meurt avant confirmation, elles redeviennent
+        disponibles à l'expiration du bail, dans la limite de
+        `alert_outbox_max_attempts` réclamations: au-delà, elles sont
+        abandonnées ici, faute de passage par `mark_failed`.
+        """
+        now = datetime.utcnow()
+        exhausted = db.execute(
+            update(AlertOutbox)
+            .where(
+                AlertOutbox.status == "pending",
+                AlertOutbox.available_at <= now,
+                AlertOutbox.attempts >= self.max_attempts
+            )
+            .values(status="failed", last_error="Bail expiré sans confirmation d'envoi")
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if exhausted:
+            logger.error(f"{exhausted} alertes abandonnées après {self.max_attempts} essais sans confirmation")
+
+        query = select(AlertOutbox).where(
+            AlertOutbox.status == "pending",
+            AlertOutbox.available_at <= now,
+            AlertOutbox.attempts < self.max_attempts
+        ).order_by(AlertOutbox.id).limit(limit)
+
+        if db.get_bind().dialect.name == "postgresql":
+            # Plusieurs workers ne réclament pas les mêmes lignes
+            query = query.with_for_update(skip_locked=True)
+
+        rows = db.execute(query).scalars().all()
+
+        claimed = []
+        for row in rows:
+            row.attempts += 1
+            row.available_at = now + timedelta(seconds=self.lease_seconds)
+            claimed.append({
+                "id": row.id,
+                "chat_id": row.chat_id,
+                "attempts": row.attempts,
+                "snapshot": json.loads(row.payload),
+            })
+
+        db.commit()
+        return claimed
+
+    def mark_sent(self, db: Session, outbox_ids: List[int]) -> None:
+        """Confirme l'envoi et marque les opportunités comme alertées"""
+        now = datetime.utcnow()
+        for (created_at,) in db.query(AlertOutbox.created_at).filter(AlertOutbox.id.in_(outbox_ids)):
+            ALERT_DELIVERY_LAG.observe((now - created_at).total_seconds())
+        db.execute(
+            update(AlertOutbox)
+            .where(AlertOutbox.id.in_(outbox_ids))
+            .values(status="sent", sent_at=now, last_error=None)
+        )
+        db.execute(
+            update(Opportunity)
+            .where(Opportunity.id.in_(
+                select(AlertOutbox.opportunity_id).where(AlertOutbox.id.in_(outbox_ids))
+            ))
+            .values(alerted=True)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+    def mark_failed(self, db: Session, outbox_ids: List[int], error: str) -> None:
+        """
+        Replanifie avec backoff exponentiel, ou abandonne après
+        `alert_outbox_max_attempts` essais.
+        """
+        now = datetime.utcnow()
+        for row in db.query(AlertOutbox).filter(AlertOutbox.id.in_(outbox_ids)).all():
+            row.last_error = error[:500]
+            if row.attempts >= self.max_attempts:
+                row.status = "failed"
+                logger.error(f"Alerte {row.idempotency_key} abandonnée après {row.attempts} essais")
+            else:
+                row.available_at = now + timedelta(seconds=min(2 ** row.attempts * 5, 3600))
+        db.commit()
+
+    def get_stats(self, db: Session) -> Dict:
+        """
+        Métriques de l'outbox: volume par statut et retard (âge de la plus
+        ancienne alerte en attente).
+        """
+        counts = dict(db.query(AlertOutbox.status, func.count(AlertOutbox.id)).group_by(AlertOutbox.status).all())
+        oldest_pending = db.query(func.min(AlertOutbox.created_at)).filter(
+            AlertOutbox.status == "pending"
+        ).scalar()
+
+        lag_seconds = 0.0
+        if oldest_pending is not None:
+            lag_seconds = max(0.0, (datetime.utcnow() - oldest_pending).total_seconds())
+
+        return {
+            "pending": counts.get("pending", 0),
+            "sent": counts.get("sent", 0),
+            "failed": counts.get("failed", 0),
+            "lag_seconds": lag_seconds,
+        }
+
+    def _insert_ignore(self, db: Session):
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as pg_insert
+            return pg_insert(AlertOutbox).on_conflict_do_nothing(index_elements=["idempotency_key"])
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+            return sqlite_insert(AlertOutbox).on_conflict_do_nothing(index_elements=["idempotency_key"])
+        return insert(AlertOutbox)
+
+
+class OutboxWorker:
+    """
+    Tâche de fond qui vide l'outbox vers le dispatcher d'alertes.
+    """
+
+    def __init__(self, outbox: AlertOutboxService, dispatcher):
+        self.outbox = outbox
+        self.dispatcher = dispatcher
+        self.batch_size = settings.alert_outbox_batch_size
+        self.poll_interval = settings.alert_outbox_poll_interval
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Worker d'outbox des alertes démarré")
+
+    async def stop(self) -> None:
+        if not self.running:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def notify(self) -> None:
+        """Réveille le worker (nouvelles alertes commitées)"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                drained = await self.drain_once()
+            except Exception as e:
+                logger.error(f"Erreur lors du vidage de l'outbox: {e}")
+                drained = 0
+
+            # Lot plein: on enchaîne; sinon attente d'un réveil ou du prochain poll
+            if drained < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    async def drain_once(self) -> int:
+        """
+        Réclame un lot et le confie au dispatcher.
+
+        Returns:
+            Nombre d'alertes réclamées
+        """
+        free_slots = self.dispatcher.free_slots()
+        if free_slots <= 0:
+            return 0
+
+        claimed = await asyncio.to_thread(self._claim, min(self.batch_size, free_slots))
+        if claimed:
+            self.dispatcher.enqueue(self.dispatcher.jobs_from_outbox(claimed))
+        return len(claimed)
+
+    def _claim(self, limit: int) -> List[Dict]:
+        db = SessionLocal()
+        try:
+            return self.outbox.claim(db, limit)
+        finally:
+            db.close()
@@ -0,0 +1,171 @@
+"""
+Moteur de règles d'alerte par abonné.
+
+Les règles actives sont compilées en index (carte, nom, set, langue/grade):
+chaque règle est rangée sous son critère le plus sélectif. Une opportunité
+n'est comparée qu'aux règles des quelques entrées d'index qui la concernent
+(plus les règles sans critère d'identité), au lieu de toutes les règles.
+"""
+
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.models import AlertRule, Subscriber
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledRule:
+    """Règle figée (valeurs normalisées) pour l'évaluation rapide"""
+
+    __slots__ = (
+        "rule_id", "chat_id", "card_id", "card_name", "card_set",
+        "grade", "language", "min_net_profit", "max_price",
+    )
+
+    def __init__(self, rule: AlertRule, chat_id: str):
+        self.rule_id = rule.id
+        self.chat_id = chat_id
+        self.card_id = rule.card_id
+        self.card_name = rule.card_name.lower() if rule.card_name else None
+        self.card_set = rule.card_set.lower() if rule.card_set else None
+        self.grade = rule.psa_grade
+        self.language = rule.language.upper() if rule.language else None
+        self.min_net_profit = rule.min_net_profit
+        self.max_price = rule.max_price
+
+    def matches(self, card_id: int, name: str, card_set: str, grade: str, language: str,
+                net_profit: float, price: float) -> bool:
+        return (
+            (self.card_id is None or self.card_id == card_id)
+            and (self.card_name is None or self.card_name == name)
+            and (self.card_set is None or self.card_set == card_set)
+            and (self.grade is None or self.grade == grade)
+            and (self.language is None or self.language == language)
+            and (self.min_net_profit is None or net_profit >= self.min_net_profit)
+            and (self.max_price is None or price <= self.max_price)
+        )
+
+
+class RuleIndex:
+    """Règles rangées par critère le plus sélectif"""
+
+    def __init__(self):
+        self.by_card_id: Dict[int, List[CompiledRule]] = defaultdict(list)
+        self.by_name: Dict[str, List[CompiledRule]] = defaultdict(list)
+        self.by_set: Dict[str, List[CompiledRule]] = defaultdict(list)
+        self.by_language_grade: Dict[Tuple[str, str], List[CompiledRule]] = defaultdict(list)
+        self.by_language: Dict[str, List[CompiledRule]] = defaultdict(list)
+        self.by_grade: Dict[str, List[CompiledRule]] = defaultdict(list)
+        self.wildcard: List[CompiledRule] = []
+        self.size = 0
+
+    def add(self, rule: CompiledRule) -> None:
+        self.size += 1
+        if rule.card_id is not None:
+            self.by_card_id[rule.card_id].append(rule)
+        elif rule.card_name is not None:
+            self.by_name[rule.card_name].append(rule)
+        elif rule.card_set is not None:
+            self.by_set[rule.card_set].append(rule)
+        elif rule.language is not None and rule.grade is not None:
+            self.by_language_grade[(rule.language, rule.grade)].append(rule)
+        elif rule.language is not None:
+            self.by_language[rule.language].append(rule)
+        elif rule.grade is not None:
+            self.by_grade[rule.grade].append(rule)
+        else:
+            self.wildcard.append(rule)
+
+    def candidates(self, card_id: int, name: str, card_set: str, grade: str, language: str):
+        # dict.get évite de créer des entrées vides dans les defaultdict
+        yield from self.by_card_id.get(card_id, ())
+        yield from self.by_name.get(name, ())
+        yield from self.by_set.get(card_set, ())
+        yield from self.by_language_grade.get((language, grade), ())
+        yield from self.by_language.get(language, ())
+        yield from self.by_grade.get(grade, ())
+        yield from self.wildcard
+
+
+class AlertRulesEngine:
+    """
+    Associe une opportunité (instantané d'alerte) aux chats des abonnés
+    dont une règle correspond.
+
+    L'index est recompilé après une modification des règles (`invalidate`)
+    ou au plus tard après `alert_rules_refresh_seconds` (règles modifiées par
+    un autre processus).
+    """
+
+    def __init__(self, refresh_seconds: Optional[float] = None):
+        self.refresh_seconds = settings.alert_rules_refresh_seconds if refresh_seconds is None else refresh_seconds
+        self._index: Optional[RuleIndex] = None
+        self._compiled_at = 0.0
+
+    def invalidate(self) -> None:
+        self._index = None
+
+    def compile(self, db: Session) -> RuleIndex:
+        started = time.perf_counter()
+        rows = db.query(AlertRule, Subscriber.telegram_chat_id).join(
+            Subscriber, AlertRule.subscriber_id == Subscriber.id
+        ).filter(
+            AlertRule.is_active == True,
+            Subscriber.is_active == True
+        ).all()
+
+        index = RuleIndex()
+        for rule, chat_id in rows:
+            index.add(CompiledRule(rule, chat_id))
+
+        self._index = index
+        self._compiled_at = time.monotonic()
+        logger.info(f"Règles d'alerte compilées: {index.size} règles en {(time.perf_counter() - started) * 1000:.1f} ms")
+        return index
+
+    def ensure_compiled(self, db: Session) -> RuleIndex:
+        if self._index is None or time.monotonic() - self._compiled_at > self.refresh_seconds:
+            return self.compile(db)
+        return self._index
+
+    def match(self, snapshot: Dict, index: Optional[RuleIndex] = None) -> List[str]:
+        """
+        Chats des abonnés à alerter pour cette opportunité (sans doublon).
+        """
+        index = index or self._index
+        if index is None or index.size == 0:
+            return []
+
+        card_id = snapshot["card_id"]
+        name = (snapshot["card_name"] or "").lower()
+        card_set = (snapshot["card_set"] or "").lower()
+        grade = snapshot["psa_grade"] or "Raw"
+        language = (snapshot["language"] or "").upper()
+        net_profit = snapshot["estimated_net_profit"]
+        price = snapshot["listing_price"]
+
+        chats = {}
+        for rule in index.candidates(card_id, name, card_set, grade, language):
+            if rule.chat_id not in chats and rule.matches(
+                card_id, name, card_set, grade, language, net_profit, price
+            ):
+                chats[rule.chat_id] = rule.rule_id
+        return list(chats)
+
+    def get_stats(self) -> Dict:
+        index = self._index
+        if index is None:
+            return {"compiled": False}
+        return {
+            "compiled": True,
+            "rules": index.size,
+            "card_id_keys": len(index.by_card_id),
+            "name_keys": len(index.by_name),
+            "set_keys": len(index.by_set),
+            "wildcard_rules": len(index.wildcard),
+            "age_seconds": time.monotonic() - self._compiled_at,
+        }
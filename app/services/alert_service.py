@@ -1,10 +1,48 @@
-from typing import List
+from typing import Dict, List, Optional, Tuple, Union
 from app.models import Opportunity
 from app.core.config import settings
+import asyncio
+import importlib.util
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# Limite de taille d'un message Telegram
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+
+
+class TelegramRateLimiter:
+    """
+    Respecte les limites d'envoi de Telegram: un message par intervalle et
+    par chat, et un débit global maximum pour le bot.
+    """
+    
+    def __init__(self, per_chat_interval: float, global_rate: float):
+        self.per_chat_interval = per_chat_interval
+        self.global_interval = 1.0 / global_rate if global_rate > 0 else 0.0
+        self._next_chat_slot: Dict[str, float] = {}
+        self._next_global_slot = 0.0
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self, chat_id: str) -> None:
+        """Attend le prochain créneau d'envoi disponible pour ce chat"""
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_chat_slot.get(chat_id, 0.0), self._next_global_slot)
+            self._next_chat_slot[chat_id] = slot + self.per_chat_interval
+            self._next_global_slot = slot + self.global_interval
+        
+        delay = slot - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+    
+    def penalize(self, chat_id: str, retry_after: float) -> None:
+        """Repousse les envois vers ce chat après une réponse 429 (retry_after)"""
+        next_slot = time.monotonic() + retry_after
+        if next_slot > self._next_chat_slot.get(chat_id, 0.0):
+            self._next_chat_slot[chat_id] = next_slot
+
 
 class AlertService:
     """
@@ -14,14 +52,33 @@ class AlertService:
     
     def __init__(self):
         self.telegram_enabled = bool(settings.telegram_bot_token and settings.telegram_chat_id)
-        if self.telegram_enabled:
-            try:
-                from telegram import Bot
-                self.telegram_bot = Bot(token=settings.telegram_bot_token)
-                self.telegram_chat_id = settings.telegram_chat_id
-            except ImportError:
-                logger.warning("python-telegram-bot non disponible")
-                self.telegram_enabled = False
+        self.digest_threshold = settings.alert_digest_threshold
+        self.max_retries = settings.telegram_max_retries
+        self.rate_limiter = TelegramRateLimiter(
+            per_chat_interval=settings.telegram_per_chat_interval,
+            global_rate=settings.telegram_global_rate
+        )
+        self.telegram_chat_id = settings.telegram_chat_id
+        self._telegram_bot = None
+        # python-telegram-bot est lourd à importer: chargé au premier envoi
+        if self.telegram_enabled and importlib.util.find_spec("telegram") is None:
+            logger.warning("python-telegram-bot non disponible")
+            self.telegram_enabled = False
+    
+    @property
+    def telegram_bot(self):
+        """Bot Telegram (créé au premier envoi)"""
+        if self._telegram_bot is None:
+            from telegram import Bot
+            from telegram.request import HTTPXRequest
+            # Une connexion par worker d'envoi concurrent
+            request = HTTPXRequest(connection_pool_size=settings.alert_workers + 1)
+            bot_kwargs = {"token": settings.telegram_bot_token, "request": request}
+            if settings.telegram_api_base_url:
+                # Faux serveur Telegram local (voir scripts/fake_telegram_server.py)
+                bot_kwargs["base_url"] = f"{settings.telegram_api_base_url.rstrip('/')}/bot"
+            self._telegram_bot = Bot(**bot_kwargs)
+        return self._telegram_bot
     
     async def send_opportunity_alert(self, opportunity: Opportunity) -> None:
         """
@@ -44,46 +101,171 @@ class AlertService:
     async def send_batch_alerts(self, opportunities: List[Opportunity]) -> None:
         """
         Envoie des alertes pour plusieurs opportunités.
+        
+        Au-delà de `alert_digest_threshold` opportunités, elles sont regroupées
+        en messages de synthèse; les envois sont concurrents (sous les limites
+        de débit Telegram).
         """
-        for opp in opportunities:
-            await self.send_opportunity_alert(opp)
+        messages = self.build_messages(opportunities)
+        
+        for message in messages:
+            logger.info(f"🚨 ALERTE:\n{message}")
+        
+        if self.telegram_enabled:
+            await asyncio.gather(*(self.send_text(message) for message in messages))
     
-    def _format_opportunity_message(self, opportunity: Opportunity) -> str:
+    def build_messages(self, opportunities: List[Union[Opportunity, Dict]]) -> List[str]:
         """
-        Formate le message d'alerte pour une opportunité.
+        Formate les alertes: un message par opportunité, ou des messages de
+        synthèse si le lot dépasse le seuil de digest.
+        
+        Accepte des opportunités ou des instantanés (voir `snapshot`).
+        """
+        snapshots = [self.snapshot(opp) for opp in opportunities]
+        
+        if self.digest_threshold and len(snapshots) >= self.digest_threshold:
+            return self._format_digest_messages(snapshots)
+        
+        return [
+            f"🚨 *Opportunité d'Arbitrage*\n\n{self._format_opportunity_message(snap)}"
+            for snap in snapshots
+        ]
+    
+    def snapshot(self, opportunity: Union[Opportunity, Dict]) -> Dict:
         """
+        Copie les champs nécessaires aux alertes: le message peut être formaté
+        plus tard, hors de la session DB (file, outbox).
+        """
+        if isinstance(opportunity, dict):
+            return opportunity
+        
         card = opportunity.card
         listing = opportunity.listing
+        return {
+            "opportunity_id": opportunity.id,
+            "card_id": opportunity.card_id,
+            "listing_id": opportunity.listing_id,
+            "card_name": card.normalized_name,
+            "card_set": card.card_set,
+            "language": card.language,
+            "psa_grade": listing.psa_grade,
+            "listing_price": opportunity.listing_price,
+            "floor_price": opportunity.floor_price,
+            "discount_percentage": opportunity.discount_percentage,
+            "estimated_gross_profit": opportunity.estimated_gross_profit,
+            "estimated_net_profit": opportunity.estimated_net_profit,
+            "profit_margin": opportunity.profit_margin,
+            "listing_url": listing.listing_url,
+            "ebay_item_id": listing.ebay_item_id,
+        }
+    
+    async def send_text(self, text: str, chat_id: Optional[str] = None) -> bool:
+        """
+        Envoie un message Telegram en respectant les limites de débit.
+        
+        Les réponses 429 (RetryAfter) et les erreurs réseau sont réessayées
+        jusqu'à `telegram_max_retries` fois.
+        
+        Returns:
+            True si le message a été délivré
+        """
+        if not self.telegram_enabled:
+            return True
+        
+        from telegram.error import NetworkError, RetryAfter
+        
+        chat_id = chat_id or self.telegram_chat_id
+        
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire(chat_id)
+            try:
+                await self.telegram_bot.send_message(
+                    chat_id=chat_id,
+                    text=text,
+                    parse_mode="Markdown"
+                )
+                return True
+            except RetryAfter as e:
+                retry_after = e.retry_after
+                if hasattr(retry_after, "total_seconds"):
+                    retry_after = retry_after.total_seconds()
+                logger.warning(f"Telegram 429 pour le chat {chat_id}, nouvel essai dans {retry_after}s")
+                self.rate_limiter.penalize(chat_id, float(retry_after))
+            except NetworkError as e:
+                # NetworkError couvre aussi TimedOut: backoff exponentiel
+                logger.warning(f"Erreur réseau Telegram (essai {attempt + 1}): {e}")
+                await asyncio.sleep(min(2 ** attempt, 30))
+            except Exception as e:
+                logger.error(f"Erreur lors de l'envoi Telegram: {e}")
+                return False
+        
+        logger.error(f"Abandon de l'envoi Telegram au chat {chat_id} après {self.max_retries} essais")
+        return False
+    
+    def _format_opportunity_message(self, opportunity: Union[Opportunity, Dict]) -> str:
+        """
+        Formate le message d'alerte pour une opportunité.
+        """
+        snap = self.snapshot(opportunity)
         
         message = f"""
-📦 Carte: {card.normalized_name}
-   Set: {card.card_set or 'N/A'}
-   Grade: {listing.psa_grade or 'N/A'}
-   Langue: {card.language}
+📦 Carte: {snap['card_name']}
+   Set: {snap['card_set'] or 'N/A'}
+   Grade: {snap['psa_grade'] or 'N/A'}
+   Langue: {snap['language']}
 
-💰 Prix Listing: ${opportunity.listing_price:.2f}
-📊 Prix Plancher: ${opportunity.floor_price:.2f}
-💸 Réduction: {opportunity.discount_percentage:.1f}%
+💰 Prix Listing: ${snap['listing_price']:.2f}
+📊 Prix Plancher: ${snap['floor_price']:.2f}
+💸 Réduction: {snap['discount_percentage']:.1f}%
 
-💵 Profit Brut Estimé: ${opportunity.estimated_gross_profit:.2f}
-💵 Profit Net Estimé: ${opportunity.estimated_net_profit:.2f}
-📈 Marge: {opportunity.profit_margin:.1f}%
+💵 Profit Brut Estimé: ${snap['estimated_gross_profit']:.2f}
+💵 Profit Net Estimé: ${snap['estimated_net_profit']:.2f}
+📈 Marge: {snap['profit_margin']:.1f}%
 
-🔗 Listing: {listing.listing_url or f"eBay Item ID: {listing.ebay_item_id}"}
+🔗 Listing: {snap['listing_url'] or f"eBay Item ID: {snap['ebay_item_id']}"}
 """
         return message.strip()
     
+    def _format_digest_messages(self, snapshots: List[Dict]) -> List[str]:
+        """
+        Regroupe les opportunités (meilleure marge d'abord) en messages de
+        synthèse, découpés sous la limite de taille Telegram.
+        """
+        return [text for text, _ in self.digest_groups(snapshots)]
+
+    def digest_groups(self, snapshots: List[Dict]) -> List[Tuple[str, List[Dict]]]:
+        """
+        Messages de synthèse avec les instantanés couverts par chacun
+        (confirmation d'envoi message par message).
+        """
+        ranked = sorted(snapshots, key=lambda snap: snap['profit_margin'], reverse=True)
+        header = f"🚨 *{len(ranked)} Opportunités d'Arbitrage*\n"
+
+        groups = []
+        current = header
+        covered = []
+        for snap in ranked:
+            link = snap['listing_url'] or f"eBay Item ID: {snap['ebay_item_id']}"
+            line = (
+                f"\n📦 {snap['card_name']} ({snap['psa_grade'] or 'Raw'}, {snap['language']}) "
+                f"${snap['listing_price']:.2f} → ${snap['floor_price']:.2f} | "
+                f"net ${snap['estimated_net_profit']:.2f} ({snap['profit_margin']:.0f}%)\n"
+                f"🔗 {link}\n"
+            )
+            if len(current) + len(line) > TELEGRAM_MAX_MESSAGE_LENGTH:
+                groups.append((current.strip(), covered))
+                current = header
+                covered = []
+            current += line
+            covered.append(snap)
+
+        if covered:
+            groups.append((current.strip(), covered))
+        return groups
+    
     async def _send_telegram_message(self, message: str) -> None:
         """
         Envoie un message sur Telegram.
         """
-        try:
-            await self.telegram_bot.send_message(
-                chat_id=self.telegram_chat_id,
-                text=f"🚨 *Opportunité d'Arbitrage*\n\n{message}",
-                parse_mode="Markdown"
-            )
+        if await self.send_text(f"🚨 *Opportunité d'Arbitrage*\n\n{message}"):
             logger.info("Message Telegram envoyé")
-        except Exception as e:
-            logger.error(f"Erreur lors de l'envoi Telegram: {e}")
-
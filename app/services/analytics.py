@@ -0,0 +1,451 @@
+"""
+Moteur analytique DuckDB pour les agrégations du dashboard.
+
+Les widgets du dashboard (`/api/dashboard/*`) agrègent toute la table
+`sales`: en base transactionnelle (SQLite / PostgreSQL, stockage par
+lignes), le coût croît avec l'historique. Ce module maintient une copie en
+colonnes des seules colonnes utiles dans un fichier DuckDB
+(`analytics_db_path`) et y exécute les mêmes agrégations (scan vectorisé
+et parallèle: bien moins d'une seconde sur 10M de ventes, voir
+`scripts/benchmarks/analytics.py`).
+
+Copie incrémentale (`sync`, toutes les `analytics_sync_seconds`):
+- cartes et listings: lignes modifiées depuis le dernier `updated_at` copié
+  (avec recouvrement), remplacées dans la copie
+- ventes (jamais modifiées): lignes d'id supérieur au dernier id copié,
+  moins `ID_OVERLAP` (un commit concurrent peut porter un id inférieur),
+  les doublons étant ignorés
+- la carte canonique et la langue sont dénormalisées sur chaque vente: les
+  agrégations ne font aucune jointure sur les ventes; une fusion de cartes
+  re-pointe les ventes de la copie
+- copie initiale (copie vide): ventes de la base puis de l'archive Parquet
+  (`app.services.sales_archive`); les ventes archivées ensuite restent dans
+  la copie, qui garde tout l'historique
+
+Les fonctions de requête ont la signature de celles de
+`app.services.dashboard_stats`: les endpoints choisissent l'un ou l'autre
+(`analytics_enabled`, copie à jour depuis moins de
+`analytics_max_staleness` secondes, sinon lecture SQLAlchemy).
+
+DuckDB est optionnel (et importé au premier usage). Un seul processus peut
+ouvrir le fichier en écriture: avec plusieurs workers uvicorn, les autres
+restent sur SQLAlchemy.
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+from importlib.util import find_spec
+from typing import Dict, List, Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import Card, Sale, Listing, Opportunity
+import logging
+
+logger = logging.getLogger(__name__)
+
+DUCKDB_AVAILABLE = find_spec("duckdb") is not None and find_spec("pyarrow") is not None
+if not DUCKDB_AVAILABLE:
+    logger.info("Moteur analytique non disponible (duckdb ou pyarrow non installé)")
+
+# Commits concurrents: un id (ou updated_at) inférieur au dernier copié peut
+# devenir visible après la synchronisation précédente
+ID_OVERLAP = 10000
+WATERMARK_OVERLAP = timedelta(seconds=5)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cards (
+    id INTEGER,
+    normalized_name VARCHAR,
+    card_set VARCHAR,
+    language VARCHAR,
+    merged_into_id INTEGER,
+    updated_at TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS sales (
+    id BIGINT,
+    card_id INTEGER,
+    language VARCHAR,
+    price DOUBLE,
+    sold_date TIMESTAMP,
+    psa_grade VARCHAR
+);
+CREATE TABLE IF NOT EXISTS listings (
+    id BIGINT,
+    card_id INTEGER,
+    price DOUBLE,
+    is_active BOOLEAN,
+    updated_at TIMESTAMP
+);
+"""
+
+
+class AnalyticsStore:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.analytics_db_path
+        self.enabled = settings.analytics_enabled and DUCKDB_AVAILABLE
+        self.sync_seconds = settings.analytics_sync_seconds
+        self.max_staleness = settings.analytics_max_staleness
+        self.batch_size = settings.analytics_batch_size
+        self._connection = None
+        self._sync_lock = threading.Lock()
+        self._connect_lock = threading.Lock()
+        self._synced_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self.syncs = 0
+        self.rows_copied = {"cards": 0, "sales": 0, "listings": 0}
+        self.last_sync_seconds = 0.0
+        self.hits = 0
+        self.fallbacks = 0
+
+    async def start(self) -> None:
+        # Copie initiale en tâche de fond: les lectures passent par
+        # SQLAlchemy jusqu'à ce qu'elle soit terminée
+        if self.enabled:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.close()
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    @property
+    def age(self) -> Optional[float]:
+        """Secondes depuis la dernière synchronisation réussie (None: jamais)"""
+        return None if self._synced_at is None else time.monotonic() - self._synced_at
+
+    def is_fresh(self) -> bool:
+        """Copie utilisable pour les agrégations (sinon lecture SQLAlchemy, comptée)"""
+        if not self.enabled:
+            return False
+        age = self.age
+        fresh = age is not None and age <= self.max_staleness
+        if fresh:
+            self.hits += 1
+        else:
+            self.fallbacks += 1
+        return fresh
+
+    # =========================
+    # SYNCHRONISATION
+    # =========================
+    def sync(self, db: Session) -> Dict[str, int]:
+        """Copie les lignes nouvelles ou modifiées depuis la synchronisation précédente"""
+        with self._sync_lock:
+            started = time.perf_counter()
+            cursor = self._cursor()
+            # Une transaction: les watermarks sont lus dans la copie, une
+            # synchronisation interrompue ne doit pas en laisser une partie
+            cursor.begin()
+            try:
+                # Cartes d'abord: les fusions re-pointent les ventes déjà copiées
+                copied = {
+                    "cards": self._sync_cards(db, cursor),
+                    "sales": self._sync_sales(db, cursor),
+                    "listings": self._sync_listings(db, cursor),
+                }
+                cursor.commit()
+            except Exception:
+                cursor.rollback()
+                raise
+            finally:
+                cursor.close()
+            for table, count in copied.items():
+                self.rows_copied[table] += count
+            self.syncs += 1
+            self.last_sync_seconds = time.perf_counter() - started
+            self._synced_at = time.monotonic()
+            if any(copied.values()):
+                logger.info(
+                    f"Copie analytique: {copied['cards']} cartes, {copied['sales']} ventes, "
+                    f"{copied['listings']} listings en {self.last_sync_seconds:.2f}s"
+                )
+            return copied
+
+    def rebuild(self, db: Session) -> Dict[str, int]:
+        """Vide la copie et la recharge entièrement"""
+        with self._sync_lock:
+            cursor = self._cursor()
+            for table in ("cards", "sales", "listings"):
+                cursor.execute(f"DELETE FROM {table}")
+            cursor.close()
+            self._synced_at = None
+        return self.sync(db)
+
+    def _sync_cards(self, db: Session, cursor) -> int:
+        since = self._watermark(cursor, "cards")
+        stmt = select(
+            Card.id, Card.normalized_name, Card.card_set, Card.language,
+            Card.merged_into_id, Card.updated_at
+        ).order_by(Card.id)
+        if since is not None:
+            stmt = stmt.where(Card.updated_at >= since - WATERMARK_OVERLAP)
+
+        copied = 0
+        for batch in self._batches(db, stmt):
+            cursor.register("batch", batch)
+            cursor.execute("DELETE FROM cards WHERE id IN (SELECT id FROM batch)")
+            cursor.execute("INSERT INTO cards SELECT * FROM batch")
+            # Fiches fusionnées: leurs ventes passent sur la fiche canonique
+            cursor.execute(
+                "UPDATE sales SET card_id = batch.merged_into_id FROM batch "
+                "WHERE sales.card_id = batch.id AND batch.merged_into_id IS NOT NULL"
+            )
+            cursor.unregister("batch")
+            copied += batch.num_rows
+        return copied
+
+    def _sync_sales(self, db: Session, cursor) -> int:
+        last_id = cursor.execute("SELECT max(id) FROM sales").fetchone()[0]
+        # La langue (identité de la carte) et la fiche canonique sont
+        # résolues à la copie: les agrégations se font sur `sales` seule
+        canonical = Card.__table__.alias("canonical")
+        stmt = select(
+            Sale.id,
+            canonical.c.id.label("card_id"),
+            canonical.c.language,
+            Sale.price,
+            Sale.sold_date,
+            Sale.psa_grade,
+        ).join(
+            Card, Sale.card_id == Card.id
+        ).join(
+            canonical, canonical.c.id == func.coalesce(Card.merged_into_id, Card.id)
+        ).order_by(Sale.id)
+        if last_id is not None:
+            stmt = stmt.where(Sale.id > last_id - ID_OVERLAP)
+
+        copied = 0
+        for batch in self._batches(db, stmt):
+            cursor.register("batch", batch)
+            # Lignes du recouvrement déjà copiées ignorées (INSERT renvoie le nombre inséré)
+            copied += cursor.execute(
+                "INSERT INTO sales SELECT * FROM batch WHERE id NOT IN "
+                "(SELECT id FROM sales WHERE id >= (SELECT min(id) FROM batch))"
+            ).fetchone()[0]
+            cursor.unregister("batch")
+        if last_id is None:
+            copied += self._load_archive(cursor)
+        return copied
+
+    def _load_archive(self, cursor) -> int:
+        """Ventes de l'archive Parquet absentes de la copie (copie initiale)"""
+        from app.services.container import services
+
+        files = services.sales_archive.files()
+        if not files:
+            return 0
+        return cursor.execute(
+            """
+            INSERT INTO sales
+            SELECT DISTINCT archived.id, coalesce(cards.merged_into_id, cards.id), cards.language,
+                   archived.price, archived.sold_date, archived.psa_grade
+            FROM read_parquet($files) AS archived JOIN cards ON cards.id = archived.card_id
+            WHERE archived.id NOT IN (SELECT id FROM sales)
+            """,
+            {"files": files}
+        ).fetchone()[0]
+
+    def _sync_listings(self, db: Session, cursor) -> int:
+        since = self._watermark(cursor, "listings")
+        stmt = select(
+            Listing.id, Listing.card_id, Listing.price, Listing.is_active, Listing.updated_at
+        ).order_by(Listing.id)
+        if since is not None:
+            stmt = stmt.where(Listing.updated_at >= since - WATERMARK_OVERLAP)
+
+        copied = 0
+        for batch in self._batches(db, stmt):
+            cursor.register("batch", batch)
+            cursor.execute("DELETE FROM listings WHERE id IN (SELECT id FROM batch)")
+            cursor.execute("INSERT INTO listings SELECT * FROM batch")
+            cursor.unregister("batch")
+            copied += batch.num_rows
+        return copied
+
+    def _watermark(self, cursor, table: str) -> Optional[datetime]:
+        return cursor.execute(f"SELECT max(updated_at) FROM {table}").fetchone()[0]
+
+    def _batches(self, db: Session, stmt):
+        """Résultat de `stmt` par lots de `batch_size` lignes, en tables Arrow"""
+        import pyarrow as pa
+
+        result = db.execute(stmt.execution_options(yield_per=self.batch_size))
+        names = list(result.keys())
+        for rows in result.partitions():
+            columns = list(zip(*rows))
+            yield pa.table({name: list(values) for name, values in zip(names, columns)})
+
+    # =========================
+    # AGRÉGATIONS (signatures de dashboard_stats)
+    # =========================
+    def market_totals(self, db: Session, now: datetime) -> Dict:
+        """Compteurs du catalogue et volumes des ventes (un passage sur `sales`)"""
+        cursor = self._cursor()
+        try:
+            total_sales, total_volume, volume_24h, volume_7d, volume_30d, sales_24h = cursor.execute(
+                """
+                SELECT
+                    count(*),
+                    coalesce(sum(price), 0),
+                    coalesce(sum(price) FILTER (WHERE sold_date >= $day), 0),
+                    coalesce(sum(price) FILTER (WHERE sold_date >= $week), 0),
+                    coalesce(sum(price) FILTER (WHERE sold_date >= $month), 0),
+                    count(*) FILTER (WHERE sold_date >= $day)
+                FROM sales
+                """,
+                {
+                    "day": now - timedelta(days=1),
+                    "week": now - timedelta(days=7),
+                    "month": now - timedelta(days=30),
+                }
+            ).fetchone()
+            total_cards = cursor.execute("SELECT count(*) FROM cards WHERE merged_into_id IS NULL").fetchone()[0]
+            total_listings = cursor.execute("SELECT count(*) FROM listings WHERE is_active").fetchone()[0]
+        finally:
+            cursor.close()
+
+        return {
+            "total_cards": total_cards,
+            "total_listings": total_listings,
+            # Table chaude réduite et indexée: pas copiée
+            "total_opportunities": db.query(Opportunity).filter(Opportunity.is_active == True).count(),
+            "total_sales": total_sales,
+            "total_volume": float(total_volume),
+            "volume_24h": float(volume_24h),
+            "volume_7d": float(volume_7d),
+            "volume_30d": float(volume_30d),
+            "sales_24h": sales_24h,
+        }
+
+    def language_averages(self, db: Session) -> List[Dict]:
+        """Prix moyen et nombre de ventes par langue"""
+        rows = self._fetch(
+            "SELECT language, avg(price), count(*) FROM sales GROUP BY language ORDER BY language"
+        )
+        return [
+            {
+                "language": lang,
+                "average_price": float(avg or 0),
+                "sales_count": count
+            }
+            for lang, avg, count in rows
+        ]
+
+    def cards_by_sales(self, db: Session, since: datetime, limit: int) -> List[Dict]:
+        """Cartes les plus vendues depuis `since`, à égalité par id"""
+        rows = self._fetch(
+            """
+            WITH top AS (
+                SELECT card_id, count(*) AS sales_count, avg(price) AS average_price, max(price) AS max_price
+                FROM sales
+                WHERE sold_date >= $since
+                GROUP BY card_id
+                ORDER BY sales_count DESC, card_id
+                LIMIT $limit
+            )
+            SELECT top.card_id, cards.normalized_name, cards.card_set, cards.language,
+                   top.sales_count, top.average_price, top.max_price
+            FROM top JOIN cards ON cards.id = top.card_id
+            ORDER BY top.sales_count DESC, top.card_id
+            """,
+            {"since": since, "limit": limit}
+        )
+        return [
+            {
+                "card_id": card_id,
+                "card_name": name,
+                "card_set": card_set,
+                "language": language,
+                "sales_count": sales,
+                "average_price": float(avg or 0),
+                "max_price": float(max_price or 0),
+            }
+            for card_id, name, card_set, language, sales, avg, max_price in rows
+        ]
+
+    def price_points(self, db: Session, card_id: int, since: datetime) -> List[tuple]:
+        """Ventes (date, prix) d'une carte depuis `since`, par date"""
+        return self._fetch(
+            "SELECT sold_date, price FROM sales WHERE card_id = $card_id AND sold_date >= $since "
+            "ORDER BY sold_date, id",
+            {"card_id": card_id, "since": since}
+        )
+
+    def get_stats(self) -> Dict:
+        age = self.age
+        stats = {
+            "enabled": self.enabled,
+            "path": self.path,
+            "fresh": self.enabled and age is not None and age <= self.max_staleness,
+            "age_seconds": round(age, 3) if age is not None else None,
+            "max_staleness_seconds": self.max_staleness,
+            "syncs": self.syncs,
+            "rows_copied": dict(self.rows_copied),
+            "last_sync_seconds": round(self.last_sync_seconds, 4),
+            "hits": self.hits,
+            "fallbacks": self.fallbacks,
+        }
+        if self._connection is not None:
+            stats["rows"] = {
+                table: self._fetch(f"SELECT count(*) FROM {table}")[0][0]
+                for table in ("cards", "sales", "listings")
+            }
+        return stats
+
+    def _fetch(self, query: str, parameters: Optional[Dict] = None) -> List[tuple]:
+        cursor = self._cursor()
+        try:
+            return cursor.execute(query, parameters or {}).fetchall()
+        finally:
+            cursor.close()
+
+    def _cursor(self):
+        # Un curseur (connexion dupliquée) par appel: les requêtes des
+        # threads de l'API s'exécutent en parallèle de la synchronisation
+        return self._connect().cursor()
+
+    def _connect(self):
+        if self._connection is None:
+            with self._connect_lock:
+                if self._connection is None:
+                    import duckdb
+                    try:
+                        connection = duckdb.connect(self.path)
+                    except duckdb.IOException as e:
+                        # Fichier verrouillé par un autre processus (workers uvicorn)
+                        self.enabled = False
+                        logger.warning(f"Copie analytique indisponible, lecture SQLAlchemy: {e}")
+                        raise
+                    connection.execute(SCHEMA)
+                    self._connection = connection
+                    logger.info(f"Copie analytique ouverte: {self.path}")
+        return self._connection
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.to_thread(self._sync_safely)
+            await asyncio.sleep(self.sync_seconds)
+
+    def _sync_safely(self) -> None:
+        db = SessionLocal()
+        try:
+            self.sync(db)
+        except Exception as e:
+            # L'âge de la copie continue d'augmenter: lecture SQLAlchemy au-delà du seuil
+            logger.error(f"Copie analytique non synchronisée: {e}")
+        finally:
+            db.close()
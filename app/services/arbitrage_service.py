@@ -1,12 +1,23 @@
+from sqlalchemy import case, func, or_, select, update
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional
 from datetime import datetime
-from app.models import Card, Sale, Listing, Opportunity
+from app.models import Sale, Listing, Opportunity
 from app.services.ebay_service import eBayService
 from app.services.card_normalizer import CardNormalizer
+from app.services.card_registry import CardRegistry
 from app.services.floor_price_calculator import FloorPriceCalculator
+from app.services.change_events import ChangeSet, ChangeTracker, FloorCache
+from app.services.parallel_detection import METRIC_FIELDS, ParallelDetector, ShardResult
+from app.services.sales_archive import archived_item_ids
 from app.core.config import settings
+from app.core.metrics import (
+    DETECTION_DURATION, NORMALIZE_DURATION, OPPORTUNITIES, ROWS_INGESTED, STAGE_DURATION, timed
+)
+from app.core.tracing import tracer
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -19,10 +30,24 @@ class ArbitrageService:
     def __init__(self):
         self.ebay_service = eBayService()
         self.card_normalizer = CardNormalizer()
+        self.card_registry = CardRegistry()
         self.floor_calculator = FloorPriceCalculator()
         self.arbitrage_threshold = settings.arbitrage_threshold
         self.ebay_fee_rate = settings.ebay_fee_rate
         self.shipping_cost = settings.shipping_cost
+        
+        # Événements d'ingestion pour la détection incrémentale
+        self.changes = ChangeTracker()
+        self.floor_cache = FloorCache(ttl=settings.floor_cache_ttl)
+        # Détections exécutées hors de la boucle d'événements: une à la fois
+        self._detection_lock = threading.Lock()
+        
+        # Réconciliation complète en parallèle (si detection_workers > 1)
+        self.parallel_detector = ParallelDetector()
+        
+        # Opportunités clôturées / modifiées lors de la dernière détection
+        self.last_closed_ids: List[int] = []
+        self.last_updated_ids: List[int] = []
     
     async def fetch_and_store_sales(
         self,
@@ -41,62 +66,69 @@ class ArbitrageService:
         logger.info(f"Récupération des ventes pour: {search_query}")
         
         # Récupérer les ventes depuis eBay
-        ebay_sales = await self.ebay_service.search_completed_sales(
-            query=search_query,
-            days_back=days_back,
-            psa_grade=psa_grade,
-            language=language
-        )
+        with timed(STAGE_DURATION, stage="fetch_sales"), tracer.span("fetch_sales", query=search_query) as span:
+            ebay_sales = await self.ebay_service.search_completed_sales(
+                query=search_query,
+                days_back=days_back,
+                psa_grade=psa_grade,
+                language=language
+            )
+            span.set_attribute("items", len(ebay_sales))
         
-        added_count = 0
+        with timed(STAGE_DURATION, stage="ingest_sales"), tracer.span("ingest_sales", query=search_query) as span:
+            added_count = 0
+            added_groups = set()
+            # Ventes déjà déplacées dans l'archive: absentes de `sales`, à ne pas réinsérer
+            archived = archived_item_ids(db, [ebay_sale['ebay_item_id'] for ebay_sale in ebay_sales])
         
-        for ebay_sale in ebay_sales:
-            # Normaliser le nom de la carte
-            normalized_name = self.card_normalizer.normalize_card_name(ebay_sale['title'])
-            
-            # Extraire les métadonnées
-            psa_grade_extracted = self.ebay_service.extract_psa_grade(ebay_sale['title'])
-            language_extracted = self.ebay_service.extract_language(ebay_sale['title'])
-            card_set = self.card_normalizer.extract_card_set(ebay_sale['title'])
-            card_number = self.card_normalizer.extract_card_number(ebay_sale['title'])
-            
-            # Trouver ou créer la carte
-            card = db.query(Card).filter(
-                Card.normalized_name == normalized_name,
-                Card.language == language_extracted
-            ).first()
+            for ebay_sale in ebay_sales:
+                with timed(NORMALIZE_DURATION):
+                    # Normaliser le nom de la carte
+                    normalized_name = self.card_normalizer.normalize_card_name(ebay_sale['title'])
+                
+                    # Extraire les métadonnées
+                    psa_grade_extracted = self.ebay_service.extract_psa_grade(ebay_sale['title'])
+                    language_extracted = self.ebay_service.extract_language(ebay_sale['title'])
+                    card_set = self.card_normalizer.extract_card_set(ebay_sale['title'])
+                    card_number = self.card_normalizer.extract_card_number(ebay_sale['title'])
             
-            if not card:
-                card = Card(
-                    normalized_name=normalized_name,
+                # Trouver ou créer la carte (registre en mémoire)
+                card_id = self.card_registry.get_or_create(
+                    db,
+                    normalized_name,
+                    language_extracted,
                     raw_name=ebay_sale['title'],
                     card_set=card_set,
-                    card_number=card_number,
-                    language=language_extracted
+                    card_number=card_number
                 )
-                db.add(card)
-                db.flush()
             
-            # Vérifier si la vente existe déjà
-            existing_sale = db.query(Sale).filter(
-                Sale.ebay_item_id == ebay_sale['ebay_item_id']
-            ).first()
+                # Vérifier si la vente existe déjà
+                existing_sale = db.query(Sale).filter(
+                    Sale.ebay_item_id == ebay_sale['ebay_item_id']
+                ).first()
             
-            if not existing_sale:
-                sale = Sale(
-                    card_id=card.id,
-                    ebay_item_id=ebay_sale['ebay_item_id'],
-                    title=ebay_sale['title'],
-                    price=ebay_sale['price'],
-                    shipping_cost=ebay_sale.get('shipping_cost', 0.0),
-                    sold_date=ebay_sale['sold_date'],
-                    psa_grade=psa_grade_extracted or psa_grade,
-                    condition=ebay_sale.get('condition')
-                )
-                db.add(sale)
-                added_count += 1
+                if not existing_sale and ebay_sale['ebay_item_id'] not in archived:
+                    sale = Sale(
+                        card_id=card_id,
+                        ebay_item_id=ebay_sale['ebay_item_id'],
+                        title=ebay_sale['title'],
+                        price=ebay_sale['price'],
+                        shipping_cost=ebay_sale.get('shipping_cost', 0.0),
+                        sold_date=ebay_sale['sold_date'],
+                        psa_grade=psa_grade_extracted or psa_grade,
+                        condition=ebay_sale.get('condition')
+                    )
+                    db.add(sale)
+                    added_groups.add((card_id, sale.psa_grade))
+                    added_count += 1
+        
+            db.commit()
+            span.set_attribute("rows", added_count)
+        ROWS_INGESTED.inc(added_count, kind="sale")
+        
+        for card_id, grade in added_groups:
+            self.changes.sale_added(card_id, grade)
         
-        db.commit()
         logger.info(f"Ajouté {added_count} nouvelles ventes")
         
         return added_count
@@ -116,106 +148,323 @@ class ArbitrageService:
         """
         logger.info(f"Récupération des listings actifs pour: {search_query}")
         
-        ebay_listings = await self.ebay_service.search_active_listings(
-            query=search_query,
-            psa_grade=psa_grade,
-            language=language
-        )
+        with timed(STAGE_DURATION, stage="fetch_listings"), tracer.span("fetch_listings", query=search_query) as span:
+            ebay_listings = await self.ebay_service.search_active_listings(
+                query=search_query,
+                psa_grade=psa_grade,
+                language=language
+            )
+            span.set_attribute("items", len(ebay_listings))
         
-        updated_count = 0
+        with timed(STAGE_DURATION, stage="ingest_listings"), tracer.span("ingest_listings", query=search_query) as span:
+            updated_count = 0
+            changed_listings = []
         
-        for ebay_listing in ebay_listings:
-            # Normaliser le nom de la carte
-            normalized_name = self.card_normalizer.normalize_card_name(ebay_listing['title'])
-            
-            # Extraire les métadonnées
-            psa_grade_extracted = self.ebay_service.extract_psa_grade(ebay_listing['title'])
-            language_extracted = self.ebay_service.extract_language(ebay_listing['title'])
-            card_set = self.card_normalizer.extract_card_set(ebay_listing['title'])
-            card_number = self.card_normalizer.extract_card_number(ebay_listing['title'])
-            
-            # Trouver ou créer la carte
-            card = db.query(Card).filter(
-                Card.normalized_name == normalized_name,
-                Card.language == language_extracted
-            ).first()
+            for ebay_listing in ebay_listings:
+                with timed(NORMALIZE_DURATION):
+                    # Normaliser le nom de la carte
+                    normalized_name = self.card_normalizer.normalize_card_name(ebay_listing['title'])
+                
+                    # Extraire les métadonnées
+                    psa_grade_extracted = self.ebay_service.extract_psa_grade(ebay_listing['title'])
+                    language_extracted = self.ebay_service.extract_language(ebay_listing['title'])
+                    card_set = self.card_normalizer.extract_card_set(ebay_listing['title'])
+                    card_number = self.card_normalizer.extract_card_number(ebay_listing['title'])
             
-            if not card:
-                card = Card(
-                    normalized_name=normalized_name,
+                # Trouver ou créer la carte (registre en mémoire)
+                card_id = self.card_registry.get_or_create(
+                    db,
+                    normalized_name,
+                    language_extracted,
                     raw_name=ebay_listing['title'],
                     card_set=card_set,
-                    card_number=card_number,
-                    language=language_extracted
+                    card_number=card_number
                 )
-                db.add(card)
-                db.flush()
             
-            # Trouver ou créer le listing
-            listing = db.query(Listing).filter(
-                Listing.ebay_item_id == ebay_listing['ebay_item_id']
-            ).first()
+                # Trouver ou créer le listing
+                listing = db.query(Listing).filter(
+                    Listing.ebay_item_id == ebay_listing['ebay_item_id']
+                ).first()
             
-            if listing:
-                # Mettre à jour le listing existant
-                listing.price = ebay_listing['price']
-                listing.shipping_cost = ebay_listing.get('shipping_cost', 0.0)
-                listing.is_active = True
-                listing.updated_at = datetime.utcnow()
-            else:
-                # Créer un nouveau listing
-                listing = Listing(
-                    card_id=card.id,
-                    ebay_item_id=ebay_listing['ebay_item_id'],
-                    title=ebay_listing['title'],
-                    price=ebay_listing['price'],
-                    shipping_cost=ebay_listing.get('shipping_cost', 0.0),
-                    listing_url=ebay_listing.get('url'),
-                    psa_grade=psa_grade_extracted or psa_grade,
-                    condition=ebay_listing.get('condition'),
-                    is_active=True
-                )
-                db.add(listing)
+                if listing:
+                    # Mettre à jour le listing existant
+                    shipping_cost = ebay_listing.get('shipping_cost', 0.0)
+                    if (listing.price != ebay_listing['price'] or
+                            listing.shipping_cost != shipping_cost or not listing.is_active):
+                        changed_listings.append(listing)
+                    listing.price = ebay_listing['price']
+                    listing.shipping_cost = shipping_cost
+                    listing.is_active = True
+                    listing.updated_at = datetime.utcnow()
+                else:
+                    # Créer un nouveau listing
+                    listing = Listing(
+                        card_id=card_id,
+                        ebay_item_id=ebay_listing['ebay_item_id'],
+                        title=ebay_listing['title'],
+                        price=ebay_listing['price'],
+                        shipping_cost=ebay_listing.get('shipping_cost', 0.0),
+                        listing_url=ebay_listing.get('url'),
+                        psa_grade=psa_grade_extracted or psa_grade,
+                        condition=ebay_listing.get('condition'),
+                        is_active=True
+                    )
+                    db.add(listing)
+                    changed_listings.append(listing)
             
-            updated_count += 1
+                updated_count += 1
+        
+            db.commit()
+            span.set_attribute("rows", updated_count)
+        ROWS_INGESTED.inc(updated_count, kind="listing")
+        
+        for listing in changed_listings:
+            self.changes.listing_changed(listing.id)
         
-        db.commit()
         logger.info(f"Mis à jour {updated_count} listings")
         
         return updated_count
     
-    def detect_opportunities(self, db: Session) -> List[Opportunity]:
+    def detect_opportunities(
+        self,
+        db: Session,
+        incremental: bool = False,
+        before_commit: Optional[Callable[[Session, List[Opportunity]], None]] = None
+    ) -> List[Opportunity]:
         """
         Détecte les opportunités d'arbitrage en comparant les listings actifs
         avec les prix planchers calculés.
         
+        Args:
+            incremental: Ne réévaluer que les listings touchés par les
+                changements d'ingestion en attente (nouveaux listings, nouvelles
+                ventes d'une carte). Sinon, scan complet de réconciliation.
+            before_commit: Appelé avec les nouvelles opportunités avant le
+                commit, dans la même transaction (ex: outbox des alertes)
+        
         Returns:
             Liste des nouvelles opportunités créées
+        
+        Les opportunités actives du périmètre évalué qui ne sont plus
+        qualifiées sont clôturées en un seul UPDATE (voir
+        `_close_stale_opportunities`).
+        
+        Bloquant (base, processus de détection): appelé depuis un thread
+        par les routes et le scan.
         """
-        logger.info("Détection des opportunités d'arbitrage...")
+        with self._detection_lock:
+            return self._detect_opportunities(db, incremental, before_commit)
+    
+    def _detect_opportunities(
+        self,
+        db: Session,
+        incremental: bool,
+        before_commit: Optional[Callable[[Session, List[Opportunity]], None]]
+    ) -> List[Opportunity]:
+        changes = self.changes.drain()
+        pass_started = datetime.utcnow()
+        timer_started = time.perf_counter()
         
-        # Récupérer tous les listings actifs
-        active_listings = db.query(Listing).filter(
-            Listing.is_active == True
-        ).all()
+        parallel = not incremental and self.parallel_detector.enabled
+        self.last_updated_ids = []
         
-        new_opportunities = []
+        if incremental:
+            logger.info(f"Détection incrémentale des opportunités ({changes})...")
+            self.floor_cache.invalidate(changes)
+            listings = self._affected_listings(db, changes)
+        elif parallel:
+            logger.info("Détection des opportunités d'arbitrage (parallèle)...")
+            self.floor_cache.clear()
+            listings = []
+        else:
+            logger.info("Détection des opportunités d'arbitrage...")
+            # La réconciliation recalcule tous les planchers
+            self.floor_cache.clear()
+            listings = db.query(Listing).filter(
+                Listing.is_active == True
+            ).all()
+        
+        if parallel:
+            new_opportunities = self._apply_shard_results(db, self.parallel_detector.evaluate())
+        else:
+            new_opportunities = []
+            for listing in listings:
+                opportunity = self._evaluate_listing(db, listing)
+                if opportunity is not None:
+                    new_opportunities.append(opportunity)
+        
+        scope = [listing.id for listing in listings] if incremental else None
+        self.last_closed_ids = self._close_stale_opportunities(db, pass_started, scope)
+        
+        if before_commit is not None:
+            before_commit(db, new_opportunities)
+        
+        db.commit()
+        DETECTION_DURATION.observe(
+            time.perf_counter() - timer_started,
+            mode="incremental" if incremental else "parallel" if parallel else "full"
+        )
+        OPPORTUNITIES.inc(len(new_opportunities), event="created")
+        OPPORTUNITIES.inc(len(self.last_closed_ids), event="closed")
+        logger.info(
+            f"Détecté {len(new_opportunities)} nouvelles opportunités, "
+            f"{len(self.last_closed_ids)} clôturées"
+        )
+        
+        return new_opportunities
+    
+    def _close_stale_opportunities(
+        self,
+        db: Session,
+        pass_started: datetime,
+        listing_ids: Optional[List[int]] = None
+    ) -> List[int]:
+        """
+        Clôture en un seul UPDATE les opportunités actives qui n'ont pas été
+        confirmées par la passe de détection courante.
         
-        for listing in active_listings:
-            # Récupérer les ventes pour cette carte
-            sales_query = db.query(Sale).filter(
-                Sale.card_id == listing.card_id
+        Toute opportunité encore qualifiée a été mise à jour (updated_at >=
+        pass_started): les autres sont obsolètes. La raison est déduite en SQL:
+        - listing_ended: le listing n'est plus actif
+        - price_increased: le prix du listing a augmenté
+        - floor_dropped: le plancher a baissé (ou n'est plus calculable)
+        
+        Args:
+            listing_ids: Périmètre de la passe incrémentale (None = tout)
+        
+        Returns:
+            Ids des opportunités clôturées
+        """
+        # Les mises à jour en attente doivent être visibles par l'UPDATE
+        db.flush()
+        
+        listing_active = select(Listing.is_active).where(
+            Listing.id == Opportunity.listing_id
+        ).scalar_subquery()
+        listing_total = select(
+            Listing.price + func.coalesce(Listing.shipping_cost, 0.0)
+        ).where(
+            Listing.id == Opportunity.listing_id
+        ).scalar_subquery()
+        ended_listings = select(Listing.id).where(Listing.is_active == False)
+        
+        stmt = update(Opportunity).where(
+            Opportunity.is_active == True,
+            or_(Opportunity.updated_at.is_(None), Opportunity.updated_at < pass_started)
+        )
+        
+        if listing_ids is not None:
+            stmt = stmt.where(or_(
+                Opportunity.listing_id.in_(listing_ids),
+                Opportunity.listing_id.in_(ended_listings)
+            ))
+        
+        now = datetime.utcnow()
+        stmt = stmt.values(
+            is_active=False,
+            closed_at=now,
+            updated_at=now,
+            close_reason=case(
+                (func.coalesce(listing_active, False) == False, "listing_ended"),
+                (listing_total > Opportunity.listing_price, "price_increased"),
+                else_="floor_dropped"
             )
+        ).execution_options(synchronize_session=False)
+        
+        if db.get_bind().dialect.update_returning:
+            return list(db.execute(stmt.returning(Opportunity.id)).scalars())
+        
+        db.execute(stmt)
+        return []
+    
+    def _apply_shard_results(self, db: Session, results: List[ShardResult], batch_size: int = 1000) -> List[Opportunity]:
+        """
+        Écriture en lot des résultats de la détection parallèle: mise à jour
+        des opportunités actives existantes (par clé primaire), création des
+        nouvelles.
+        """
+        now = datetime.utcnow()
+        new_opportunities = []
+        
+        for start in range(0, len(results), batch_size):
+            batch = {listing_id: (card_id, values) for listing_id, card_id, values in results[start:start + batch_size]}
+            existing = {
+                row.listing_id: row
+                for row in db.execute(
+                    select(Opportunity.id, Opportunity.listing_id, *[getattr(Opportunity, field) for field in METRIC_FIELDS])
+                    .where(Opportunity.listing_id.in_(list(batch)), Opportunity.is_active == True)
+                )
+            }
             
-            # Filtrer par grade PSA si disponible
-            if listing.psa_grade:
-                sales_query = sales_query.filter(Sale.psa_grade == listing.psa_grade)
-            
-            sales = sales_query.all()
-            
-            if not sales:
-                continue
+            updates = []
+            for listing_id, (card_id, values) in batch.items():
+                metrics = dict(zip(METRIC_FIELDS, values))
+                row = existing.get(listing_id)
+                if row is None:
+                    new_opportunities.append(Opportunity(
+                        card_id=card_id,
+                        listing_id=listing_id,
+                        is_active=True,
+                        alerted=False,
+                        **metrics
+                    ))
+                    continue
+                if any(getattr(row, field) != value for field, value in metrics.items()):
+                    self.last_updated_ids.append(row.id)
+                updates.append({"id": row.id, "updated_at": now, **metrics})
             
+            if updates:
+                db.execute(update(Opportunity), updates)
+        
+        db.add_all(new_opportunities)
+        return new_opportunities
+    
+    def _affected_listings(self, db: Session, changes: ChangeSet) -> List[Listing]:
+        """
+        Listings actifs à réévaluer: les listings modifiés, et ceux des cartes
+        dont le plancher a pu changer.
+        """
+        if not changes:
+            return []
+        
+        conditions = []
+        if changes.listing_ids:
+            conditions.append(Listing.id.in_(changes.listing_ids))
+        if changes.sale_groups:
+            conditions.append(Listing.card_id.in_(changes.card_ids))
+        
+        candidates = db.query(Listing).filter(
+            Listing.is_active == True,
+            or_(*conditions)
+        ).order_by(Listing.id).all()
+        
+        return [
+            listing for listing in candidates
+            if listing.id in changes.listing_ids
+            or changes.affects_floor(listing.card_id, listing.psa_grade)
+        ]
+    
+    def _get_floor_price(self, db: Session, listing: Listing) -> Optional[float]:
+        """
+        Prix plancher pour (carte, grade) du listing, avec cache.
+        """
+        found, floor_price = self.floor_cache.get(listing.card_id, listing.psa_grade)
+        if found:
+            return floor_price
+        
+        # Récupérer les ventes pour cette carte
+        sales_query = db.query(Sale).filter(
+            Sale.card_id == listing.card_id
+        )
+        
+        # Filtrer par grade PSA si disponible
+        if listing.psa_grade:
+            sales_query = sales_query.filter(Sale.psa_grade == listing.psa_grade)
+        
+        sales = sales_query.all()
+        
+        floor_price = None
+        if sales:
             # Convertir en format dict pour le calculateur
             sales_data = [
                 {
@@ -233,67 +482,80 @@ class ArbitrageService:
                 psa_grade=listing.psa_grade,
                 language=listing.card.language
             )
-            
-            if not floor_price:
-                continue
-            
-            # Vérifier si c'est une opportunité (listing_price < threshold * floor_price)
-            listing_total = listing.price + listing.shipping_cost
-            
-            if listing_total < self.arbitrage_threshold * floor_price:
-                # Calculer le profit estimé
-                estimated_sale_price = floor_price
-                gross_profit = estimated_sale_price - listing_total
-                
-                # Frais eBay sur la vente
-                ebay_fees = estimated_sale_price * self.ebay_fee_rate
-                
-                # Coût de shipping pour la revente
-                resale_shipping = self.shipping_cost
-                
-                # Profit net
-                net_profit = gross_profit - ebay_fees - resale_shipping
-                
-                # Marge de profit (%)
-                profit_margin = (net_profit / listing_total * 100) if listing_total > 0 else 0
-                
-                # Pourcentage de réduction vs floor
-                discount_percentage = ((floor_price - listing_total) / floor_price * 100) if floor_price > 0 else 0
-                
-                # Vérifier si l'opportunité existe déjà
-                existing_opp = db.query(Opportunity).filter(
-                    Opportunity.listing_id == listing.id,
-                    Opportunity.is_active == True
-                ).first()
-                
-                if existing_opp:
-                    # Mettre à jour l'opportunité existante
-                    existing_opp.listing_price = listing_total
-                    existing_opp.floor_price = floor_price
-                    existing_opp.discount_percentage = discount_percentage
-                    existing_opp.estimated_gross_profit = gross_profit
-                    existing_opp.estimated_net_profit = net_profit
-                    existing_opp.profit_margin = profit_margin
-                    existing_opp.updated_at = datetime.utcnow()
-                else:
-                    # Créer une nouvelle opportunité
-                    opportunity = Opportunity(
-                        card_id=listing.card_id,
-                        listing_id=listing.id,
-                        listing_price=listing_total,
-                        floor_price=floor_price,
-                        discount_percentage=discount_percentage,
-                        estimated_gross_profit=gross_profit,
-                        estimated_net_profit=net_profit,
-                        profit_margin=profit_margin,
-                        is_active=True,
-                        alerted=False
-                    )
-                    db.add(opportunity)
-                    new_opportunities.append(opportunity)
         
-        db.commit()
-        logger.info(f"Détecté {len(new_opportunities)} nouvelles opportunités")
+        self.floor_cache.set(listing.card_id, listing.psa_grade, floor_price)
+        return floor_price
+    
+    def compute_opportunity_metrics(self, listing_total: float, floor_price: float) -> Optional[Dict]:
+        """
+        Calcule les métriques de profit si le listing est sous le seuil
+        (listing_price < threshold * floor_price), sinon None.
+        """
+        if listing_total >= self.arbitrage_threshold * floor_price:
+            return None
         
-        return new_opportunities
-
+        # Calculer le profit estimé
+        estimated_sale_price = floor_price
+        gross_profit = estimated_sale_price - listing_total
+        
+        # Frais eBay sur la vente
+        ebay_fees = estimated_sale_price * self.ebay_fee_rate
+        
+        # Coût de shipping pour la revente
+        resale_shipping = self.shipping_cost
+        
+        # Profit net
+        net_profit = gross_profit - ebay_fees - resale_shipping
+        
+        return {
+            'listing_price': listing_total,
+            'floor_price': floor_price,
+            # Pourcentage de réduction vs floor
+            'discount_percentage': ((floor_price - listing_total) / floor_price * 100) if floor_price > 0 else 0,
+            'estimated_gross_profit': gross_profit,
+            'estimated_net_profit': net_profit,
+            # Marge de profit (%)
+            'profit_margin': (net_profit / listing_total * 100) if listing_total > 0 else 0,
+        }
+    
+    def _evaluate_listing(self, db: Session, listing: Listing) -> Optional[Opportunity]:
+        """
+        Évalue un listing contre son prix plancher. Met à jour l'opportunité
+        active existante ou en crée une nouvelle (retournée).
+        """
+        floor_price = self._get_floor_price(db, listing)
+        
+        if not floor_price:
+            return None
+        
+        listing_total = listing.price + listing.shipping_cost
+        metrics = self.compute_opportunity_metrics(listing_total, floor_price)
+        
+        if metrics is None:
+            return None
+        
+        # Vérifier si l'opportunité existe déjà
+        existing_opp = db.query(Opportunity).filter(
+            Opportunity.listing_id == listing.id,
+            Opportunity.is_active == True
+        ).first()
+        
+        if existing_opp:
+            # Mettre à jour l'opportunité existante
+            if any(getattr(existing_opp, field) != value for field, value in metrics.items()):
+                self.last_updated_ids.append(existing_opp.id)
+            for field, value in metrics.items():
+                setattr(existing_opp, field, value)
+            existing_opp.updated_at = datetime.utcnow()
+            return None
+        
+        # Créer une nouvelle opportunité
+        opportunity = Opportunity(
+            card_id=listing.card_id,
+            listing_id=listing.id,
+            is_active=True,
+            alerted=False,
+            **metrics
+        )
+        db.add(opportunity)
+        return opportunity
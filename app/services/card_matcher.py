@@ -0,0 +1,329 @@
+"""
+Rapprochement des fiches de cartes en doublon.
+
+`normalize_card_name` ne garde que les trois premiers mots du titre:
+"Charizard Base Set 4/102" et "Charizard 4/102 Base" deviennent deux
+`Card` distinctes dont les ventes ne sont jamais regroupées.
+
+`CardMatcher` indexe les cartes par mots du titre (index inversé, listes
+d'ids compactes) avec, pour les mots inconnus, un index de trigrammes sur le
+vocabulaire (fautes de frappe: "charizrd" → "charizard"). Une recherche ne
+lit que les listes des mots les plus rares du titre, jamais toutes les
+cartes, puis vérifie chaque candidat:
+
+- même langue; set et numéro identiques quand les deux fiches les ont
+- similarité de Jaccard des mots, ou inclusion quand le numéro concorde
+  (le numéro est alors la preuve forte, "Base" ⊂ "Base Set")
+
+`CardMatchService.merge_duplicates` rattache les ventes, listings,
+opportunités et règles d'alerte des doublons à la carte canonique (la plus
+ancienne). Les doublons restent en base (`merged_into_id`): un processus dont
+le registre des cartes n'est pas encore rechargé peut y écrire, le job
+suivant rattache ces lignes à leur tour.
+"""
+
+import math
+import time
+from array import array
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+from sqlalchemy import case, select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models import AlertRule, Card, Listing, Opportunity, OpportunityHistory, Sale
+from app.services.card_normalizer import CardNormalizer
+from app.services.ebay_service import eBayService
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tables dont les lignes suivent la carte canonique
+CARD_REFERENCES = (Sale, Listing, Opportunity, OpportunityHistory, AlertRule)
+
+# Similarité minimum (trigrammes) pour corriger un mot inconnu du vocabulaire
+TYPO_SIMILARITY = 0.6
+
+
+def _trigrams(token: str) -> FrozenSet[str]:
+    padded = f" {token} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class CardMatcher:
+    """
+    Index en mémoire des cartes (ids entiers, mots du titre, set, numéro).
+
+    Args:
+        threshold: Similarité minimum d'un candidat (`card_match_threshold`
+            par défaut)
+    """
+
+    def __init__(self, threshold: Optional[float] = None):
+        self.threshold = settings.card_match_threshold if threshold is None else threshold
+        self._vocab: Dict[str, int] = {}
+        self._tokens: List[str] = []
+        self._postings: List[array] = []
+        self._trigrams: Dict[str, array] = defaultdict(lambda: array("i"))
+        # (langue, numéro, set) → cartes; sets connus par (langue, numéro)
+        self._numbers: Dict[Tuple[str, str, Optional[str]], array] = defaultdict(lambda: array("i"))
+        self._number_sets: Dict[Tuple[str, str], set] = defaultdict(set)
+        # card_id → (langue, ids des mots triés, set, numéro)
+        self._cards: Dict[int, Tuple[str, Tuple[int, ...], Optional[str], Optional[str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._cards)
+
+    def add(
+        self,
+        card_id: int,
+        tokens: Iterable[str],
+        language: str,
+        card_set: Optional[str] = None,
+        card_number: Optional[str] = None
+    ) -> None:
+        token_ids = tuple(sorted(self._token_id(token) for token in tokens))
+        self._cards[card_id] = (language, token_ids, card_set, card_number)
+        for token_id in token_ids:
+            self._postings[token_id].append(card_id)
+        if card_number:
+            self._numbers[(language, card_number, card_set)].append(card_id)
+            self._number_sets[(language, card_number)].add(card_set)
+
+    def remove(self, card_id: int) -> None:
+        """Les listes gardent l'id, ignoré à la vérification"""
+        self._cards.pop(card_id, None)
+
+    def candidates(
+        self,
+        tokens: Iterable[str],
+        language: str,
+        card_set: Optional[str] = None,
+        card_number: Optional[str] = None,
+        limit: int = 5
+    ) -> List[Tuple[int, float]]:
+        """
+        Cartes proches, de la plus similaire à la moins similaire.
+
+        Returns:
+            [(card_id, score)] avec score >= `threshold`
+        """
+        query = self._lookup(tokens)
+        if not query:
+            return []
+
+        # Jaccard >= t impose de partager au moins ceil(t·|q|) mots: un
+        # candidat a donc au moins un mot parmi les |q| - ceil(t·|q|) + 1
+        # mots de la requête, pris les plus rares pour lire peu d'ids
+        by_rarity = sorted(query, key=lambda token_id: len(self._postings[token_id]))
+        probe = len(query) - math.ceil(self.threshold * len(query)) + 1
+        seen = set()
+        for token_id in by_rarity[:max(probe, 1)]:
+            seen.update(self._postings[token_id])
+        # Inclusion (numéro identique): les cartes de même numéro et de set
+        # compatible (même set ou set inconnu d'un des deux côtés)
+        if card_number:
+            sets = (card_set, None) if card_set else self._number_sets.get((language, card_number), ())
+            for number_set in sets:
+                seen.update(self._numbers.get((language, card_number, number_set), ()))
+
+        scored = []
+        for card_id in seen:
+            card = self._cards.get(card_id)
+            if card is None:
+                continue
+            score = self._score(query, language, card_set, card_number, card)
+            if score >= self.threshold:
+                scored.append((card_id, round(score, 4)))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+    def _score(self, query: FrozenSet[int], language: str, card_set, card_number, card) -> float:
+        card_language, card_tokens, other_set, other_number = card
+        if card_language != language:
+            return 0.0
+        if card_set and other_set and card_set != other_set:
+            return 0.0
+        if card_number and other_number and card_number != other_number:
+            return 0.0
+        overlap = len(query.intersection(card_tokens))
+        if card_number and card_number == other_number:
+            return overlap / min(len(query), len(card_tokens))
+        return overlap / (len(query) + len(card_tokens) - overlap)
+
+    def _token_id(self, token: str) -> int:
+        token_id = self._vocab.get(token)
+        if token_id is None:
+            token_id = self._vocab[token] = len(self._tokens)
+            self._tokens.append(token)
+            self._postings.append(array("i"))
+            for trigram in _trigrams(token):
+                self._trigrams[trigram].append(token_id)
+        return token_id
+
+    def _lookup(self, tokens: Iterable[str]) -> FrozenSet[int]:
+        """Ids des mots de la requête; un mot inconnu est remplacé par le plus proche"""
+        token_ids = set()
+        for token in tokens:
+            token_id = self._vocab.get(token)
+            if token_id is None:
+                token_id = self._closest(token)
+            if token_id is not None:
+                token_ids.add(token_id)
+        return frozenset(token_ids)
+
+    def _closest(self, token: str) -> Optional[int]:
+        trigrams = _trigrams(token)
+        counts: Dict[int, int] = defaultdict(int)
+        for trigram in trigrams:
+            for token_id in self._trigrams.get(trigram, ()):
+                counts[token_id] += 1
+
+        best, best_score = None, TYPO_SIMILARITY
+        for token_id, shared in counts.items():
+            other = _trigrams(self._tokens[token_id])
+            score = shared / (len(trigrams) + len(other) - shared)
+            if score >= best_score:
+                best, best_score = token_id, score
+        return best
+
+
+class CardMatchService:
+    """
+    Index des cartes canoniques du processus (reconstruit toutes les
+    `card_match_index_ttl` secondes) et job de fusion des doublons.
+    """
+
+    def __init__(self, batch_size: int = 1000):
+        self.batch_size = batch_size
+        self.card_normalizer = CardNormalizer()
+        self.ebay_service = eBayService()
+        self._matcher: Optional[CardMatcher] = None
+        self._built_at = 0.0
+
+    def card_tokens(self, card_name: str) -> FrozenSet[str]:
+        return self.card_normalizer.extract_name_tokens(card_name)
+
+    def build(self, db: Session) -> CardMatcher:
+        """Index de toutes les cartes canoniques"""
+        started = time.perf_counter()
+        matcher = CardMatcher()
+        for card_id, raw_name, normalized_name, language, card_set, card_number in self._canonical_cards(db):
+            matcher.add(card_id, self.card_tokens(raw_name or normalized_name), language, card_set, card_number)
+        logger.info(f"Index de rapprochement: {len(matcher)} cartes en {time.perf_counter() - started:.1f}s")
+        return matcher
+
+    def get_matcher(self, db: Session) -> CardMatcher:
+        if self._matcher is None or time.monotonic() - self._built_at > settings.card_match_index_ttl:
+            self._matcher = self.build(db)
+            self._built_at = time.monotonic()
+        return self._matcher
+
+    def invalidate(self) -> None:
+        self._matcher = None
+
+    def match_title(self, db: Session, title: str, language: Optional[str] = None, limit: int = 5) -> Dict:
+        """Cartes existantes proches d'un titre eBay"""
+        matcher = self.get_matcher(db)
+        tokens = self.card_tokens(title)
+        language = (language or self.ebay_service.extract_language(title)).upper()
+        card_set = self.card_normalizer.extract_card_set(title)
+        card_number = self.card_normalizer.extract_card_number(title)
+
+        started = time.perf_counter()
+        candidates = matcher.candidates(tokens, language, card_set, card_number, limit=limit)
+        lookup_ms = (time.perf_counter() - started) * 1000
+
+        return {
+            "tokens": sorted(tokens),
+            "language": language,
+            "card_set": card_set,
+            "card_number": card_number,
+            "candidates": [{"card_id": card_id, "score": score} for card_id, score in candidates],
+            "lookup_ms": round(lookup_ms, 3),
+            "indexed_cards": len(matcher),
+        }
+
+    def find_duplicates(self, db: Session) -> Dict[int, int]:
+        """
+        Regroupe les cartes canoniques, de la plus ancienne à la plus récente:
+        une carte proche d'une carte déjà indexée en devient un doublon.
+
+        Returns:
+            {id du doublon: id de la carte canonique}
+        """
+        matcher = CardMatcher()
+        duplicates = {}
+        for card_id, raw_name, normalized_name, language, card_set, card_number in self._canonical_cards(db):
+            tokens = self.card_tokens(raw_name or normalized_name)
+            matches = matcher.candidates(tokens, language, card_set, card_number, limit=1)
+            if matches:
+                duplicates[card_id] = matches[0][0]
+            else:
+                matcher.add(card_id, tokens, language, card_set, card_number)
+        return duplicates
+
+    def merge_duplicates(self, db: Session, dry_run: bool = False) -> Dict:
+        """
+        Fusionne les doublons et rattache les lignes écrites depuis la
+        dernière fusion sur des fiches déjà fusionnées.
+
+        Returns:
+            Nombre de doublons, de groupes et de lignes rattachées par table
+        """
+        duplicates = self.find_duplicates(db)
+        stats = {
+            "duplicates": len(duplicates),
+            "groups": len(set(duplicates.values())),
+            "dry_run": dry_run,
+            "repointed": {model.__tablename__: 0 for model in CARD_REFERENCES},
+        }
+        if dry_run:
+            # Aperçu des premières fusions
+            stats["merges"] = [
+                {"card_id": card_id, "merged_into_id": canonical_id}
+                for card_id, canonical_id in sorted(duplicates.items())[:100]
+            ]
+            return stats
+
+        # Fiches déjà fusionnées (lignes écrites par un registre pas encore rechargé)
+        mapping = dict(db.execute(
+            select(Card.id, Card.merged_into_id).where(Card.merged_into_id.is_not(None))
+        ).all())
+        for card_id, canonical_id in list(mapping.items()):
+            mapping[card_id] = duplicates.get(canonical_id, canonical_id)
+        mapping.update(duplicates)
+
+        items = sorted(mapping.items())
+        for start in range(0, len(items), self.batch_size):
+            batch = dict(items[start:start + self.batch_size])
+            ids = list(batch)
+            for model in CARD_REFERENCES:
+                result = db.execute(
+                    update(model)
+                    .where(model.card_id.in_(ids))
+                    .values(card_id=case(batch, value=model.card_id))
+                    .execution_options(synchronize_session=False)
+                )
+                stats["repointed"][model.__tablename__] += result.rowcount
+            db.execute(
+                update(Card)
+                .where(Card.id.in_(ids))
+                .values(merged_into_id=case(batch, value=Card.id))
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+
+        logger.info(
+            f"Fusion des cartes: {stats['duplicates']} doublons dans {stats['groups']} cartes, "
+            f"{stats['repointed']['sales']} ventes rattachées"
+        )
+        self.invalidate()
+        return stats
+
+    def _canonical_cards(self, db: Session):
+        return db.execute(
+            select(
+                Card.id, Card.raw_name, Card.normalized_name,
+                Card.language, Card.card_set, Card.card_number
+            ).where(Card.merged_into_id.is_(None)).order_by(Card.id)
+        ).yield_per(10000)
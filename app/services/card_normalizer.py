@@ -1,10 +1,26 @@
 import re
-from typing import Optional
+from typing import FrozenSet, Optional
 from app.core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Mots communs des titres eBay, sans valeur pour identifier la carte
+EBAY_KEYWORDS = [
+    'pokemon', 'pokémon', 'card', 'trading card', 'tcg',
+    'authentic', 'original', 'mint', 'near mint', 'nm',
+    'psa', 'cgc', 'bgs', 'graded', 'slab',
+    'shipping', 'free shipping', 'fast shipping',
+    'rare', 'ultra rare', 'secret rare',
+    'first edition', '1st edition', '1st ed',
+    'shadowless', 'unlimited',
+    'japanese', 'jpn', 'jp', 'english', 'en',
+    'holo', 'holofoil', 'reverse holo',
+    'ebay', 'seller', 'auction', 'buy it now',
+]
+
+_GRADING_PATTERNS = (r'\bpsa\s*\d+\b', r'\bgrade\s*\d+\b')
+
 
 class CardNormalizer:
     """
@@ -50,20 +66,7 @@ class CardNormalizer:
         normalized = re.sub(r'\bgrade\s*\d+\b', '', normalized, flags=re.IGNORECASE)
         
         # Supprimer les mots communs eBay
-        ebay_keywords = [
-            'pokemon', 'pokémon', 'card', 'trading card', 'tcg',
-            'authentic', 'original', 'mint', 'near mint', 'nm',
-            'psa', 'cgc', 'bgs', 'graded', 'slab',
-            'shipping', 'free shipping', 'fast shipping',
-            'rare', 'ultra rare', 'secret rare',
-            'first edition', '1st edition', '1st ed',
-            'shadowless', 'unlimited',
-            'japanese', 'jpn', 'jp', 'english', 'en',
-            'holo', 'holofoil', 'reverse holo',
-            'ebay', 'seller', 'auction', 'buy it now',
-        ]
-        
-        for keyword in ebay_keywords:
+        for keyword in EBAY_KEYWORDS:
             normalized = re.sub(rf'\b{re.escape(keyword)}\b', '', normalized, flags=re.IGNORECASE)
         
         # Nettoyer les espaces multiples
@@ -82,6 +85,25 @@ class CardNormalizer:
         
         return normalized
     
+    def extract_name_tokens(self, title: str) -> FrozenSet[str]:
+        """
+        Mots du titre qui identifient la carte, sans troncature ni ordre.
+
+        Ex: "Charizard Base Set 4/102 PSA 9" et "Charizard 4/102 Base PSA 10"
+        donnent {"charizard", "base", "set"} et {"charizard", "base"}. Grades,
+        numéros et mots communs eBay sont ignorés.
+        """
+        text = title.lower()
+        for pattern in _GRADING_PATTERNS:
+            text = re.sub(pattern, ' ', text)
+        text = re.sub(r'\d+\s*/\s*\d+', ' ', text)
+        for keyword in EBAY_KEYWORDS:
+            text = re.sub(rf'\b{re.escape(keyword)}\b', ' ', text)
+        return frozenset(
+            token for token in re.findall(r"[a-zà-ÿ0-9']+", text)
+            if len(token) > 1 and not token.isdigit()
+        )
+    
     def _normalize_with_ai(self, title: str) -> str:
         """
         Normalisation avancée avec OpenAI GPT.
@@ -0,0 +1,182 @@
+"""
+Registre des cartes: (normalized_name, language) → card_id en mémoire.
+
+Chargé une fois par processus, il évite une requête `Card` par titre lors
+de l'ingestion. Une carte absente est créée par
+`INSERT ... ON CONFLICT DO NOTHING RETURNING id` sur l'index unique
+(normalized_name, language): deux scans concurrents qui créent la même
+carte obtiennent le même id au lieu de la dédoubler.
+
+Les cartes créées dans une transaction ne sont publiées dans le registre
+partagé qu'après le commit (et oubliées en cas de rollback): le registre
+ne contient jamais d'id qui n'existe pas en base.
+"""
+
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from sqlalchemy import event, func, insert, select, tuple_
+from sqlalchemy.orm import Session
+from app.models import Card
+import logging
+
+logger = logging.getLogger(__name__)
+
+CardKey = Tuple[str, str]
+
+class CardRegistry:
+    def __init__(self):
+        self._pending_key = f"card_registry_pending:{id(self)}"
+        self._ids: Dict[CardKey, int] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, db: Session) -> int:
+        """
+        Charge toutes les cartes (id, nom normalisé, langue). Une fiche
+        fusionnée résout vers sa carte canonique.
+        """
+        ids = {
+            (name, language): card_id
+            for card_id, name, language in db.execute(
+                select(func.coalesce(Card.merged_into_id, Card.id), Card.normalized_name, Card.language)
+            )
+        }
+        with self._lock:
+            self._ids = ids
+            self._loaded = True
+        logger.info(f"Registre des cartes chargé: {len(ids)} cartes")
+        return len(ids)
+
+    def ensure_loaded(self, db: Session) -> None:
+        if not self._loaded:
+            self.load(db)
+
+    def invalidate(self) -> None:
+        """Rechargement au prochain accès (ex: après une fusion de cartes)"""
+        with self._lock:
+            self._ids = {}
+            self._loaded = False
+
+    def get_or_create(
+        self,
+        db: Session,
+        normalized_name: str,
+        language: str,
+        raw_name: Optional[str] = None,
+        card_set: Optional[str] = None,
+        card_number: Optional[str] = None
+    ) -> int:
+        key = (normalized_name, language)
+        return self.resolve(db, {key: {
+            "raw_name": raw_name,
+            "card_set": card_set,
+            "card_number": card_number,
+        }})[key]
+
+    def resolve(self, db: Session, wanted: Dict[CardKey, Dict]) -> Dict[CardKey, int]:
+        """
+        Ids des cartes demandées, en créant les manquantes.
+
+        Args:
+            wanted: {(normalized_name, language): {"raw_name", "card_set", "card_number"}}
+
+        Returns:
+            {(normalized_name, language): card_id}
+        """
+        self.ensure_loaded(db)
+        pending = self._pending(db)
+
+        card_ids = {}
+        missing = []
+        for key in wanted:
+            card_id = self._ids.get(key) or pending.get(key)
+            if card_id is None:
+                missing.append(key)
+            else:
+                card_ids[key] = card_id
+        self.hits += len(card_ids)
+        self.misses += len(missing)
+
+        if missing:
+            created = self._insert_missing(db, {key: wanted[key] for key in missing})
+            pending.update(created)
+            card_ids.update(created)
+
+        return card_ids
+
+    def get_stats(self) -> Dict:
+        return {
+            "loaded": self._loaded,
+            "cards": len(self._ids),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _insert_missing(self, db: Session, missing: Dict[CardKey, Dict]) -> Dict[CardKey, int]:
+        now = datetime.utcnow()
+        rows = [
+            {
+                "normalized_name": name,
+                "language": language,
+                "raw_name": fields.get("raw_name"),
+                "card_set": fields.get("card_set"),
+                "card_number": fields.get("card_number"),
+                "created_at": now,
+                "updated_at": now,
+            }
+            for (name, language), fields in missing.items()
+        ]
+
+        created = {}
+        stmt = self._insert_ignore(db)
+        if stmt is not None:
+            result = db.execute(stmt.returning(Card.id, Card.normalized_name, Card.language), rows)
+            for card_id, name, language in result:
+                created[(name, language)] = card_id
+        else:
+            db.execute(insert(Card), rows)
+
+        # Cartes créées entre-temps par un autre scan (conflit ignoré)
+        remaining = [key for key in missing if key not in created]
+        if remaining:
+            for card_id, name, language in db.execute(
+                select(Card.id, Card.normalized_name, Card.language).where(
+                    tuple_(Card.normalized_name, Card.language).in_(remaining)
+                )
+            ):
+                created[(name, language)] = card_id
+        return created
+
+    def _insert_ignore(self, db: Session):
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as pg_insert
+            return pg_insert(Card).on_conflict_do_nothing(index_elements=["normalized_name", "language"])
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+            return sqlite_insert(Card).on_conflict_do_nothing(index_elements=["normalized_name", "language"])
+        return None
+
+    def _pending(self, db: Session) -> Dict[CardKey, int]:
+        """Cartes créées dans la transaction en cours de cette session"""
+        pending = db.info.get(self._pending_key)
+        if pending is None:
+            pending = db.info[self._pending_key] = {}
+            event.listen(db, "after_commit", self._publish)
+            event.listen(db, "after_rollback", self._discard)
+        return pending
+
+    def _publish(self, session: Session) -> None:
+        pending = session.info.get(self._pending_key)
+        if pending:
+            with self._lock:
+                self._ids.update(pending)
+            pending.clear()
+
+    def _discard(self, session: Session) -> None:
+        pending = session.info.get(self._pending_key)
+        if pending:
+            pending.clear()
@@ -0,0 +1,106 @@
+"""
+Événements de changement émis par l'ingestion, consommés par la détection
+incrémentale d'opportunités.
+"""
+
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+
+class ChangeSet:
+    """
+    Changements accumulés depuis la dernière détection.
+
+    - `listing_ids`: listings nouveaux ou modifiés (prix, shipping, réactivation)
+    - `sale_groups`: couples (card_id, psa_grade) ayant reçu de nouvelles ventes
+    """
+
+    def __init__(self):
+        self.listing_ids: Set[int] = set()
+        self.sale_groups: Set[Tuple[int, Optional[str]]] = set()
+
+    def __bool__(self) -> bool:
+        return bool(self.listing_ids or self.sale_groups)
+
+    def __repr__(self):
+        return f"<ChangeSet(listings={len(self.listing_ids)}, sale_groups={len(self.sale_groups)})>"
+
+    @property
+    def card_ids(self) -> Set[int]:
+        """Cartes dont le prix plancher a pu changer"""
+        return {card_id for card_id, _ in self.sale_groups}
+
+    def affects_floor(self, card_id: int, psa_grade: Optional[str]) -> bool:
+        """
+        Un listing sans grade utilise toutes les ventes de la carte; un listing
+        gradé n'utilise que les ventes du même grade.
+        """
+        if psa_grade is None:
+            return any(group_card == card_id for group_card, _ in self.sale_groups)
+        return (card_id, psa_grade) in self.sale_groups
+
+
+class ChangeTracker:
+    """
+    Collecte thread-safe des événements d'ingestion.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = ChangeSet()
+
+    def listing_changed(self, listing_id: int) -> None:
+        with self._lock:
+            self._pending.listing_ids.add(listing_id)
+
+    def sale_added(self, card_id: int, psa_grade: Optional[str]) -> None:
+        with self._lock:
+            self._pending.sale_groups.add((card_id, psa_grade))
+
+    def drain(self) -> ChangeSet:
+        """Retourne les changements en attente et repart de zéro"""
+        with self._lock:
+            changes, self._pending = self._pending, ChangeSet()
+        return changes
+
+
+class FloorCache:
+    """
+    Cache des prix planchers par (card_id, psa_grade).
+
+    Le plancher dépend de la date (pondération temporelle): les entrées
+    expirent après `ttl` secondes même sans nouvelle vente.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[int, Optional[str]], Tuple[Optional[float], float]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, card_id: int, psa_grade: Optional[str]) -> Tuple[bool, Optional[float]]:
+        """Retourne (trouvé, plancher); le plancher peut être None (pas assez de ventes)"""
+        with self._lock:
+            entry = self._entries.get((card_id, psa_grade))
+            if entry and time.monotonic() - entry[1] < self.ttl:
+                self.hits += 1
+                return True, entry[0]
+            self.misses += 1
+            return False, None
+
+    def set(self, card_id: int, psa_grade: Optional[str], floor_price: Optional[float]) -> None:
+        with self._lock:
+            self._entries[(card_id, psa_grade)] = (floor_price, time.monotonic())
+
+    def invalidate(self, changes: ChangeSet) -> None:
+        """Supprime les planchers impactés par de nouvelles ventes"""
+        with self._lock:
+            for card_id, psa_grade in changes.sale_groups:
+                self._entries.pop((card_id, psa_grade), None)
+                self._entries.pop((card_id, None), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,147 @@
+"""
+Conteneur des services de l'application, construits au premier usage.
+
+Importer l'application ne construit plus aucun service: chaque service (et
+le module qui le définit, avec ses dépendances lourdes: httpx, scraper,
+client Telegram...) est importé et créé au premier accès à
+`services.<nom>`. Le serveur répond donc plus tôt au démarrage (health
+check, premières requêtes de lecture) et un processus qui n'utilise qu'une
+partie de l'API ne paie que ce qu'il utilise.
+
+Le lifespan de l'application préchauffe `arbitrage_service` en tâche de fond
+après le démarrage (voir `app.main`), sans retarder le premier health check.
+
+Usage:
+    from app.services.container import services
+    services.arbitrage_service.detect_opportunities(db)
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def service(factory: Callable):
+    """Déclare un service: `factory(container)` est appelée au premier accès"""
+    name = factory.__name__
+
+    def getter(container: "ServiceContainer"):
+        return container.get(name, factory)
+
+    getter.__doc__ = factory.__doc__
+    return property(getter)
+
+
+class ServiceContainer:
+    def __init__(self):
+        # Réentrant: la construction d'un service accède à ses dépendances
+        self._lock = threading.RLock()
+        self._instances: Dict[str, object] = {}
+        self.build_seconds: Dict[str, float] = {}
+
+    def get(self, name: str, factory: Callable):
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                started = time.perf_counter()
+                instance = factory(self)
+                self._instances[name] = instance
+                self.build_seconds[name] = time.perf_counter() - started
+                logger.info(f"Service '{name}' construit en {self.build_seconds[name] * 1000:.0f} ms")
+        return instance
+
+    def is_built(self, name: str) -> bool:
+        return name in self._instances
+
+    def built(self) -> List[str]:
+        return list(self._instances)
+
+    # =========================
+    # SERVICES
+    # =========================
+    @service
+    def arbitrage_service(self):
+        from app.services.arbitrage_service import ArbitrageService
+        return ArbitrageService()
+
+    @service
+    def alert_service(self):
+        from app.services.alert_service import AlertService
+        return AlertService()
+
+    @service
+    def alert_rules(self):
+        from app.services.alert_rules import AlertRulesEngine
+        return AlertRulesEngine()
+
+    @service
+    def alert_outbox(self):
+        from app.services.alert_outbox import AlertOutboxService
+        return AlertOutboxService(self.alert_service, rules_engine=self.alert_rules)
+
+    @service
+    def alert_dispatcher(self):
+        from app.services.alert_dispatcher import AlertDispatcher
+        return AlertDispatcher(self.alert_service, outbox=self.alert_outbox)
+
+    @service
+    def outbox_worker(self):
+        from app.services.alert_outbox import OutboxWorker
+        return OutboxWorker(self.alert_outbox, self.alert_dispatcher)
+
+    @service
+    def opportunity_feed(self):
+        from app.services.opportunity_feed import OpportunityFeed
+        return OpportunityFeed()
+
+    @service
+    def opportunity_index(self):
+        from app.services.opportunity_index import OpportunityIndex
+        return OpportunityIndex()
+
+    @service
+    def price_movers(self):
+        from app.services.price_movers import PriceMovers
+        return PriceMovers()
+
+    @service
+    def analytics(self):
+        from app.services.analytics import AnalyticsStore
+        return AnalyticsStore()
+
+    @service
+    def sales_importer(self):
+        from app.services.sales_importer import SalesImporter
+        return SalesImporter(
+            changes=self.arbitrage_service.changes,
+            card_registry=self.arbitrage_service.card_registry
+        )
+
+    @service
+    def archive_service(self):
+        from app.services.opportunity_archive import OpportunityArchiveService
+        return OpportunityArchiveService()
+
+    @service
+    def sales_archive(self):
+        from app.services.sales_archive import SalesArchiveService
+        return SalesArchiveService()
+
+    @service
+    def scan_runner(self):
+        from app.services.scan_runs import ScanRunner
+        return ScanRunner(self.arbitrage_service)
+
+    @service
+    def card_match_service(self):
+        from app.services.card_matcher import CardMatchService
+        return CardMatchService()
+
+
+services = ServiceContainer()
@@ -0,0 +1,188 @@
+"""
+Agrégations des widgets du dashboard (statistiques, vue d'ensemble, cartes
+tendance, historique des prix).
+
+Les endpoints `/api/dashboard/*` et le bundle (`/api/dashboard/bundle`)
+partagent ces fonctions: un résultat intermédiaire (totaux des ventes,
+ventes par carte sur 7 jours) est calculé une fois et sert à plusieurs
+widgets.
+
+Lecture SQLAlchemy sur la base; `app.services.analytics` expose les mêmes
+fonctions sur la copie DuckDB. Les totaux et moyennes par langue incluent
+les ventes archivées (`archived_sales_totals`, voir
+`app.services.sales_archive`); les fenêtres 24h / 7j / 30j ne lisent que
+la table chaude, qui garde au moins `sales_archive_after_days` jours.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List
+from sqlalchemy import case, desc, func
+from sqlalchemy.orm import Session
+from app.models import Card, Sale, Listing, Opportunity
+from app.services.container import services
+from app.services.sales_archive import archived_totals
+
+TIMEFRAME_DAYS = {"24h": 1, "7d": 7, "30d": 30}
+TOP_MOVERS = 5
+
+
+def market_totals(db: Session, now: datetime) -> Dict:
+    """
+    Compteurs du catalogue et volumes des ventes (un seul passage sur
+    `sales` pour le total et les fenêtres 24h / 7j / 30j).
+    """
+    day_ago = now - timedelta(days=1)
+    week_ago = now - timedelta(days=7)
+    month_ago = now - timedelta(days=30)
+
+    def window_volume(since: datetime):
+        return func.coalesce(func.sum(case((Sale.sold_date >= since, Sale.price), else_=0)), 0)
+
+    total_sales, total_volume, volume_24h, volume_7d, volume_30d, sales_24h = db.query(
+        func.count(Sale.id),
+        func.coalesce(func.sum(Sale.price), 0),
+        window_volume(day_ago),
+        window_volume(week_ago),
+        window_volume(month_ago),
+        func.count(case((Sale.sold_date >= day_ago, Sale.id)))
+    ).one()
+    archived = archived_totals(db).values()
+
+    return {
+        "total_cards": db.query(Card).filter(Card.merged_into_id.is_(None)).count(),
+        "total_listings": db.query(Listing).filter(Listing.is_active == True).count(),
+        "total_opportunities": db.query(Opportunity).filter(Opportunity.is_active == True).count(),
+        "total_sales": total_sales + sum(count for count, _ in archived),
+        "total_volume": float(total_volume) + sum(volume for _, volume in archived),
+        "volume_24h": float(volume_24h),
+        "volume_7d": float(volume_7d),
+        "volume_30d": float(volume_30d),
+        "sales_24h": sales_24h,
+    }
+
+
+def language_averages(db: Session) -> List[Dict]:
+    """Prix moyen et nombre de ventes par langue (table chaude et archive)"""
+    rows = db.query(
+        Card.language,
+        func.count(Sale.id).label('sales_count'),
+        func.sum(Sale.price).label('total_price')
+    ).join(Sale).group_by(Card.language).all()
+    totals = {lang: (count, float(total or 0)) for lang, count, total in rows}
+    for lang, (count, total) in archived_totals(db).items():
+        hot_count, hot_total = totals.get(lang, (0, 0.0))
+        totals[lang] = (hot_count + count, hot_total + total)
+    return [
+        {
+            "language": lang,
+            "average_price": total / count if count else 0.0,
+            "sales_count": count
+        }
+        for lang, (count, total) in sorted(totals.items(), key=lambda item: (item[0] is None, item[0] or ""))
+    ]
+
+
+def cards_by_sales(db: Session, since: datetime, limit: int) -> List[Dict]:
+    """
+    Cartes les plus vendues depuis `since` (nombre, prix moyen et maximum),
+    à égalité par id: l'ordre est stable d'un appel à l'autre.
+    """
+    rows = db.query(
+        Card.id,
+        Card.normalized_name,
+        Card.card_set,
+        Card.language,
+        func.count(Sale.id).label('sales_count'),
+        func.avg(Sale.price).label('average_price'),
+        func.max(Sale.price).label('max_price')
+    ).join(Sale).filter(
+        Sale.sold_date >= since
+    ).group_by(
+        Card.id, Card.normalized_name, Card.card_set, Card.language
+    ).order_by(
+        desc('sales_count'), Card.id
+    ).limit(limit).all()
+    return [
+        {
+            "card_id": card_id,
+            "card_name": name,
+            "card_set": card_set,
+            "language": language,
+            "sales_count": sales,
+            "average_price": float(avg or 0),
+            "max_price": float(max_price or 0),
+        }
+        for card_id, name, card_set, language, sales, avg, max_price in rows
+    ]
+
+
+def price_points(db: Session, card_id: int, since: datetime) -> List[tuple]:
+    """
+    Ventes (date, prix) d'une carte depuis `since`, par date: table chaude
+    et, pour les mois archivés, fichiers Parquet de l'archive
+    """
+    hot = db.query(Sale.id, Sale.ebay_item_id, Sale.sold_date, Sale.price).filter(
+        Sale.card_id == card_id,
+        Sale.sold_date >= since
+    ).order_by(Sale.sold_date, Sale.id).all()
+    archived = services.sales_archive.price_points(db, card_id, since)
+    if not archived:
+        return [(sold_date, price) for _, _, sold_date, price in hot]
+
+    # Une vente peut être dans les deux tiers ou dans deux fichiers
+    # (archivage interrompu): dédoublonnée par ebay_item_id, table chaude d'abord
+    points = {item_id: (sale_id, sold_date, price) for sale_id, item_id, sold_date, price in archived}
+    points.update((item_id, (sale_id, sold_date, price)) for sale_id, item_id, sold_date, price in hot)
+    return [
+        (sold_date, price)
+        for _, sold_date, price in sorted(points.values(), key=lambda point: (point[1], point[0]))
+    ]
+
+
+def market_stats_payload(totals: Dict, by_language: List[Dict]) -> Dict:
+    """Réponse de `/dashboard/market-stats`"""
+    return {
+        "total_cards": totals["total_cards"],
+        "total_sales": totals["total_sales"],
+        "total_listings": totals["total_listings"],
+        "total_volume": totals["total_volume"],
+        "volume_24h": totals["volume_24h"],
+        "volume_7d": totals["volume_7d"],
+        "volume_30d": totals["volume_30d"],
+        "average_by_language": by_language,
+    }
+
+
+def market_overview_payload(totals: Dict, leaderboard: Dict[str, List[Dict]]) -> Dict:
+    """
+    Réponse de `/dashboard/market-overview`: top movers (plus fortes
+    variations de prix 24h, voir `app.services.price_movers`), hausses et
+    baisses
+    """
+    return {
+        "total_cards": totals["total_cards"],
+        "total_opportunities": totals["total_opportunities"],
+        "total_volume_24h": totals["volume_24h"],
+        "sales_24h": totals["sales_24h"],
+        **leaderboard,
+    }
+
+
+def trending_payload(timeframe: str, cards: List[Dict]) -> Dict:
+    """Réponse de `/dashboard/trending-cards`"""
+    return {
+        "timeframe": timeframe,
+        "cards": [
+            {
+                "card_id": card["card_id"],
+                "card_name": card["card_name"],
+                "card_set": card["card_set"] or "Unknown",
+                "language": card["language"],
+                "sales_count": card["sales_count"],
+                "average_price": card["average_price"],
+                "max_price": card["max_price"],
+                "image_url": f"https://via.placeholder.com/64x80"
+            }
+            for card in cards
+        ]
+    }
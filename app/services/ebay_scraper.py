@@ -11,13 +11,22 @@ Service de scraping eBay (à utiliser avec précaution).
 """
 
 import httpx
-from typing import List, Dict, Optional
+import importlib.util
+from typing import TYPE_CHECKING, List, Dict, Optional
 from datetime import datetime
-from bs4 import BeautifulSoup
 import re
-import time
 import logging
 from app.core.config import settings
+from app.core.metrics import PARSE_DURATION, UPSTREAM_ERRORS, UPSTREAM_LATENCY, timed
+from app.core.rate_limit import RateBudgetExceeded, scraping_budget
+from app.core.tracing import tracer
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+# BeautifulSoup est importé au premier parsing; sans lui le scraper est indisponible
+if importlib.util.find_spec("bs4") is None:
+    raise ImportError("beautifulsoup4 non installé")
 
 logger = logging.getLogger(__name__)
 
@@ -38,16 +47,17 @@ class eBayScraper:
             "Accept-Encoding": "gzip, deflate",
             "Connection": "keep-alive",
         }
-        self.delay_between_requests = 2.0  # Secondes entre chaque requête
-        self.last_request_time = 0
     
-    def _rate_limit(self):
-        """Respecter un délai entre les requêtes pour éviter le rate limiting"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.delay_between_requests:
-            time.sleep(self.delay_between_requests - time_since_last)
-        self.last_request_time = time.time()
+    async def _rate_limit(self):
+        """
+        Attend un emplacement dans le budget global de requêtes (partagé par
+        toutes les instances, et tous les processus avec Redis).
+        
+        Raises:
+            RateBudgetExceeded: Budget épuisé au-delà de `scraping_budget_max_wait`
+        """
+        with tracer.span("rate_limit"):
+            await scraping_budget().acquire()
     
     async def scrape_completed_listings(
         self,
@@ -62,7 +72,7 @@ class eBayScraper:
         ⚠️ Cette méthode peut être bloquée par eBay. Utilisez l'API Finding en priorité.
         """
         try:
-            self._rate_limit()
+            await self._rate_limit()
             
             # Construire l'URL de recherche pour les ventes complétées
             # eBay utilise des paramètres spécifiques pour les ventes complétées
@@ -91,47 +101,54 @@ class eBayScraper:
                 timeout=30.0,
                 follow_redirects=True
             ) as client:
-                response = await client.get(
-                    f"{self.base_url}/sch/i.html",
-                    params=params
-                )
-                response.raise_for_status()
+                with timed(UPSTREAM_LATENCY, upstream="scraper"), tracer.span("http", upstream="scraper"):
+                    response = await client.get(
+                        f"{self.base_url}/sch/i.html",
+                        params=params
+                    )
+                    response.raise_for_status()
                 
                 # Parser le HTML
-                soup = BeautifulSoup(response.text, "html.parser")
+                with timed(PARSE_DURATION, source="html"), tracer.span("parse", source="html"):
+                    from bs4 import BeautifulSoup
+                    soup = BeautifulSoup(response.text, "html.parser")
                 
-                # Extraire les listings
-                listings = []
-                # eBay utilise plusieurs classes possibles pour les items
-                items = soup.find_all("li", class_=re.compile(r"s-item"))
+                    # Extraire les listings
+                    listings = []
+                    # eBay utilise plusieurs classes possibles pour les items
+                    items = soup.find_all("li", class_=re.compile(r"s-item"))
                 
-                # Si pas d'items trouvés, essayer d'autres sélecteurs
-                if not items:
-                    items = soup.find_all("div", class_=re.compile(r"s-item"))
+                    # Si pas d'items trouvés, essayer d'autres sélecteurs
+                    if not items:
+                        items = soup.find_all("div", class_=re.compile(r"s-item"))
                 
-                logger.info(f"Trouvé {len(items)} items dans la page")
+                    logger.info(f"Trouvé {len(items)} items dans la page")
                 
-                for item in items[:max_results]:
-                    try:
-                        listing_data = self._parse_listing_item(item)
-                        if listing_data:
-                            # Filtrer par date si nécessaire
-                            if days_back:
-                                sold_date = listing_data.get("sold_date")
-                                if sold_date:
-                                    days_ago = (datetime.now() - sold_date).days
-                                    if days_ago > days_back:
-                                        continue
+                    for item in items[:max_results]:
+                        try:
+                            listing_data = self._parse_listing_item(item)
+                            if listing_data:
+                                # Filtrer par date si nécessaire
+                                if days_back:
+                                    sold_date = listing_data.get("sold_date")
+                                    if sold_date:
+                                        days_ago = (datetime.now() - sold_date).days
+                                        if days_ago > days_back:
+                                            continue
                             
-                            listings.append(listing_data)
-                    except Exception as e:
-                        logger.warning(f"Erreur lors du parsing d'un item: {e}")
-                        continue
+                                listings.append(listing_data)
+                        except Exception as e:
+                            logger.warning(f"Erreur lors du parsing d'un item: {e}")
+                            continue
                 
                 logger.info(f"Scrapé {len(listings)} ventes complétées pour '{search_query}'")
                 return listings
                 
+        except RateBudgetExceeded:
+            # Pas une erreur de scraping: l'appelant reporte la recherche
+            raise
         except Exception as e:
+            UPSTREAM_ERRORS.inc(upstream="scraper")
             logger.error(f"Erreur lors du scraping eBay: {e}")
             return []
     
@@ -242,7 +259,7 @@ class eBayScraper:
         Utile pour récupérer des informations non disponibles via l'API.
         """
         try:
-            self._rate_limit()
+            await self._rate_limit()
             
             url = f"{self.base_url}/itm/{item_id}"
             
@@ -251,10 +268,13 @@ class eBayScraper:
                 timeout=30.0,
                 follow_redirects=True
             ) as client:
-                response = await client.get(url)
-                response.raise_for_status()
+                with timed(UPSTREAM_LATENCY, upstream="scraper_item"), tracer.span("http", upstream="scraper_item"):
+                    response = await client.get(url)
+                    response.raise_for_status()
                 
-                soup = BeautifulSoup(response.text, "html.parser")
+                with timed(PARSE_DURATION, source="html_item"), tracer.span("parse", source="html_item"):
+                    from bs4 import BeautifulSoup
+                    soup = BeautifulSoup(response.text, "html.parser")
                 
                 # Extraire les détails spécifiques
                 details = {
@@ -270,18 +290,21 @@ class eBayScraper:
                 
                 return details
                 
+        except RateBudgetExceeded:
+            raise
         except Exception as e:
+            UPSTREAM_ERRORS.inc(upstream="scraper_item")
             logger.error(f"Erreur lors du scraping des détails: {e}")
             return None
     
-    def _extract_title(self, soup: BeautifulSoup) -> str:
+    def _extract_title(self, soup: "BeautifulSoup") -> str:
         """Extrait le titre depuis la page de détails"""
         title_elem = soup.find("h1", {"id": "x-item-title-label"})
         if not title_elem:
             title_elem = soup.find("h1", class_="x-item-title-label")
         return title_elem.get_text(strip=True) if title_elem else ""
     
-    def _extract_current_price(self, soup: BeautifulSoup) -> float:
+    def _extract_current_price(self, soup: "BeautifulSoup") -> float:
         """Extrait le prix actuel"""
         price_elem = soup.find("span", {"id": "prcIsum"})
         if not price_elem:
@@ -290,28 +313,28 @@ class eBayScraper:
             return self._extract_price(price_elem.get_text())
         return 0.0
     
-    def _extract_condition(self, soup: BeautifulSoup) -> Optional[str]:
+    def _extract_condition(self, soup: "BeautifulSoup") -> Optional[str]:
         """Extrait la condition"""
         condition_elem = soup.find("div", {"id": "vi-condition"})
         if condition_elem:
             return condition_elem.get_text(strip=True)
         return None
     
-    def _extract_seller(self, soup: BeautifulSoup) -> Optional[str]:
+    def _extract_seller(self, soup: "BeautifulSoup") -> Optional[str]:
         """Extrait le nom du vendeur"""
         seller_elem = soup.find("span", {"id": "mbgLink"})
         if seller_elem:
             return seller_elem.get_text(strip=True)
         return None
     
-    def _extract_description(self, soup: BeautifulSoup) -> str:
+    def _extract_description(self, soup: "BeautifulSoup") -> str:
         """Extrait la description"""
         desc_elem = soup.find("div", {"id": "viTabs_0_is"})
         if desc_elem:
             return desc_elem.get_text(strip=True)
         return ""
     
-    def _extract_images(self, soup: BeautifulSoup) -> List[str]:
+    def _extract_images(self, soup: "BeautifulSoup") -> List[str]:
         """Extrait les URLs des images"""
         images = []
         img_elems = soup.find_all("img", {"id": re.compile(r"icImg")})
@@ -321,7 +344,7 @@ class eBayScraper:
                 images.append(src)
         return images
     
-    def _extract_shipping_info(self, soup: BeautifulSoup) -> Dict:
+    def _extract_shipping_info(self, soup: "BeautifulSoup") -> Dict:
         """Extrait les informations de shipping"""
         shipping = {
             "cost": 0.0,
@@ -2,6 +2,9 @@ import httpx
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 from app.core.config import settings
+from app.core.metrics import PARSE_DURATION, UPSTREAM_ERRORS, UPSTREAM_LATENCY, timed
+from app.core.rate_limit import RateBudgetExceeded
+from app.core.tracing import add_event, tracer
 import logging
 import re
 
@@ -130,33 +133,39 @@ class eBayService:
                 params["keywords"] = f"{query} {psa_grade}"
             
             async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(self.base_url_finding, params=params)
-                response.raise_for_status()
-                data = response.json()
+                with timed(UPSTREAM_LATENCY, upstream="finding"), tracer.span("http", upstream="finding"):
+                    response = await client.get(self.base_url_finding, params=params)
+                    response.raise_for_status()
                 
                 # Parser la réponse de l'API Finding
-                items = []
-                if "findCompletedItemsResponse" in data:
-                    search_result = data["findCompletedItemsResponse"][0].get("searchResult", [{}])[0]
-                    if "item" in search_result:
-                        for item in search_result["item"]:
-                            items.append(self._parse_completed_item(item))
+                with timed(PARSE_DURATION, source="finding_json"), tracer.span("parse", source="finding_json"):
+                    data = response.json()
+                    items = []
+                    if "findCompletedItemsResponse" in data:
+                        search_result = data["findCompletedItemsResponse"][0].get("searchResult", [{}])[0]
+                        if "item" in search_result:
+                            for item in search_result["item"]:
+                                items.append(self._parse_completed_item(item))
                 
                 logger.info(f"Récupéré {len(items)} ventes complétées pour '{query}'")
                 return items
                 
         except Exception as e:
+            UPSTREAM_ERRORS.inc(upstream="finding")
             logger.error(f"Erreur lors de la recherche de ventes complétées: {e}")
             
             # Fallback sur scraping si disponible et activé
             if self.scraper and self.use_scraper_fallback:
                 logger.warning("Utilisation du scraper comme fallback (non recommandé)")
+                add_event("retry", reason="scraper_fallback")
                 try:
                     return await self.scraper.scrape_completed_listings(
                         query=query,
                         days_back=days_back,
                         max_results=limit
                     )
+                except RateBudgetExceeded:
+                    raise
                 except Exception as scrape_error:
                     logger.error(f"Erreur lors du scraping: {scrape_error}")
             
@@ -243,34 +252,40 @@ class eBayService:
                 params["keywords"] = f"{query} {psa_grade}"
             
             async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(self.base_url_finding, params=params)
-                response.raise_for_status()
-                data = response.json()
+                with timed(UPSTREAM_LATENCY, upstream="finding"), tracer.span("http", upstream="finding"):
+                    response = await client.get(self.base_url_finding, params=params)
+                    response.raise_for_status()
                 
-                items = []
-                if "findItemsAdvancedResponse" in data:
-                    response_data = data["findItemsAdvancedResponse"][0]
-                    if "searchResult" in response_data and len(response_data["searchResult"]) > 0:
-                        search_result = response_data["searchResult"][0]
-                        if "item" in search_result:
-                            # L'API peut retourner un seul item ou une liste
-                            item_list = search_result["item"]
-                            if not isinstance(item_list, list):
-                                item_list = [item_list]
-                            for item in item_list:
-                                items.append(self._parse_active_item(item))
+                with timed(PARSE_DURATION, source="finding_json"), tracer.span("parse", source="finding_json"):
+                    data = response.json()
+                    items = []
+                    if "findItemsAdvancedResponse" in data:
+                        response_data = data["findItemsAdvancedResponse"][0]
+                        if "searchResult" in response_data and len(response_data["searchResult"]) > 0:
+                            search_result = response_data["searchResult"][0]
+                            if "item" in search_result:
+                                # L'API peut retourner un seul item ou une liste
+                                item_list = search_result["item"]
+                                if not isinstance(item_list, list):
+                                    item_list = [item_list]
+                                for item in item_list:
+                                    items.append(self._parse_active_item(item))
                 
                 logger.info(f"Récupéré {len(items)} listings actifs pour '{query}'")
                 return items
                 
         except Exception as e:
+            UPSTREAM_ERRORS.inc(upstream="finding")
             logger.error(f"Erreur lors de la recherche de listings actifs: {e}")
             
             # Fallback sur scraping si disponible
             if self.scraper and self.use_scraper_fallback:
                 logger.warning("Utilisation du scraper comme fallback")
+                add_event("retry", reason="scraper_fallback")
                 try:
                     return await self._scrape_active_listings(query, limit)
+                except RateBudgetExceeded:
+                    raise
                 except Exception as scrape_error:
                     logger.error(f"Erreur lors du scraping: {scrape_error}")
             
@@ -285,7 +300,7 @@ class eBayService:
         
         # Scraper la page de recherche normale (pas les ventes complétées)
         try:
-            scraper._rate_limit()
+            await scraper._rate_limit()
             
             params = {
                 "_nkw": query,
@@ -299,30 +314,36 @@ class eBayService:
                 timeout=30.0,
                 follow_redirects=True
             ) as client:
-                response = await client.get(
-                    f"{scraper.base_url}/sch/i.html",
-                    params=params
-                )
-                response.raise_for_status()
+                with timed(UPSTREAM_LATENCY, upstream="scraper"), tracer.span("http", upstream="scraper"):
+                    response = await client.get(
+                        f"{scraper.base_url}/sch/i.html",
+                        params=params
+                    )
+                    response.raise_for_status()
                 
                 from bs4 import BeautifulSoup
-                soup = BeautifulSoup(response.text, "html.parser")
-                
-                listings = []
-                items = soup.find_all("li", class_=re.compile(r"s-item"))
-                
-                if not items:
-                    items = soup.find_all("div", class_=re.compile(r"s-item"))
-                
-                for item in items[:limit]:
-                    listing_data = scraper._parse_listing_item(item)
-                    if listing_data:
-                        # Pour les listings actifs, pas de sold_date
-                        listing_data.pop("sold_date", None)
-                        listings.append(listing_data)
+                with timed(PARSE_DURATION, source="html"), tracer.span("parse", source="html"):
+                    soup = BeautifulSoup(response.text, "html.parser")
+                    
+                    listings = []
+                    items = soup.find_all("li", class_=re.compile(r"s-item"))
+                    
+                    if not items:
+                        items = soup.find_all("div", class_=re.compile(r"s-item"))
+                    
+                    for item in items[:limit]:
+                        listing_data = scraper._parse_listing_item(item)
+                        if listing_data:
+                            # Pour les listings actifs, pas de sold_date
+                            listing_data.pop("sold_date", None)
+                            listings.append(listing_data)
                 
                 return listings
+        except RateBudgetExceeded:
+            # Budget épuisé: remonté à l'appelant (ni erreur de scraping ni liste vide)
+            raise
         except Exception as e:
+            UPSTREAM_ERRORS.inc(upstream="scraper")
             logger.error(f"Erreur lors du scraping des listings actifs: {e}")
             return []
     
@@ -0,0 +1,357 @@
+"""
+Export en masse des ventes et opportunités (NDJSON, CSV, Arrow IPC, Parquet).
+
+Les lignes sont lues par paquets avec un curseur serveur (`yield_per`) et
+sérialisées paquet par paquet: la mémoire utilisée reste constante quelle
+que soit la taille de la table.
+
+Ventes: la table chaude seule par défaut; avec l'archive
+(`archived_sale_chunks`), les ventes archivées (mois par mois, rattachées à
+leur carte actuelle) précèdent celles de la table chaude.
+"""
+
+import csv
+import importlib.util
+import io
+import itertools
+import json
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+from sqlalchemy import select
+from app.core.database import SessionLocal
+from app.models import Card, Sale, Listing, Opportunity
+from app.services.sales_archive import merged_card_ids
+import logging
+
+logger = logging.getLogger(__name__)
+
+# pyarrow est optionnel: seuls les formats Arrow/Parquet en dépendent.
+# Importé au premier export Arrow/Parquet (lent à importer, inutile au démarrage)
+ARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+if not ARROW_AVAILABLE:
+    logger.info("Export Arrow/Parquet non disponible (pyarrow non installé)")
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+SALE_COLUMNS = [
+    ("id", "int"),
+    ("card_id", "int"),
+    ("card_name", "str"),
+    ("language", "str"),
+    ("ebay_item_id", "str"),
+    ("title", "str"),
+    ("price", "float"),
+    ("shipping_cost", "float"),
+    ("sold_date", "datetime"),
+    ("psa_grade", "str"),
+    ("condition", "str"),
+]
+
+OPPORTUNITY_COLUMNS = [
+    ("id", "int"),
+    ("card_id", "int"),
+    ("card_name", "str"),
+    ("language", "str"),
+    ("listing_id", "int"),
+    ("psa_grade", "str"),
+    ("listing_price", "float"),
+    ("floor_price", "float"),
+    ("discount_percentage", "float"),
+    ("estimated_gross_profit", "float"),
+    ("estimated_net_profit", "float"),
+    ("profit_margin", "float"),
+    ("is_active", "bool"),
+    ("close_reason", "str"),
+    ("created_at", "datetime"),
+    ("closed_at", "datetime"),
+]
+
+
+class ExportService:
+    """
+    Construit les requêtes d'export et les sérialise en flux d'octets.
+    """
+
+    def __init__(self, chunk_size: int = 5000):
+        self.chunk_size = chunk_size
+
+    def sales_statement(
+        self,
+        card_id: Optional[int] = None,
+        psa_grade: Optional[str] = None,
+        language: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ):
+        """Requête Core (sans hydratation ORM) pour l'export des ventes"""
+        stmt = select(
+            Sale.id,
+            Sale.card_id,
+            Card.normalized_name.label("card_name"),
+            Card.language,
+            Sale.ebay_item_id,
+            Sale.title,
+            Sale.price,
+            Sale.shipping_cost,
+            Sale.sold_date,
+            Sale.psa_grade,
+            Sale.condition,
+        ).join(Card, Sale.card_id == Card.id)
+
+        if card_id is not None:
+            stmt = stmt.where(Sale.card_id == card_id)
+        if psa_grade:
+            stmt = stmt.where(Sale.psa_grade == psa_grade)
+        if language:
+            stmt = stmt.where(Card.language == language.upper())
+        if date_from:
+            stmt = stmt.where(Sale.sold_date >= date_from)
+        if date_to:
+            stmt = stmt.where(Sale.sold_date < date_to)
+
+        return stmt.order_by(Sale.id)
+
+    def archived_sale_chunks(
+        self,
+        card_id: Optional[int] = None,
+        psa_grade: Optional[str] = None,
+        language: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> Iterator[List[Dict]]:
+        """
+        Ventes archivées aux colonnes de `sales_statement`, par paquets.
+        Le `card_id` est celui de la carte actuelle (fiches fusionnées
+        résolues), comme dans la table chaude.
+        """
+        from app.services.container import services
+
+        db = SessionLocal()
+        try:
+            card_ids = merged_card_ids(db, card_id) if card_id is not None else None
+            cards: Dict[int, tuple] = {}
+            for rows in services.sales_archive.iter_sales(
+                db, card_ids=card_ids, psa_grade=psa_grade,
+                date_from=date_from, date_to=date_to, batch_size=self.chunk_size
+            ):
+                _load_canonical_cards(db, {row["card_id"] for row in rows}, cards)
+                chunk = []
+                for row in rows:
+                    canonical_id, card_name, card_language = cards[row["card_id"]]
+                    if language and card_language != language.upper():
+                        continue
+                    chunk.append({
+                        "id": row["id"],
+                        "card_id": canonical_id,
+                        "card_name": card_name,
+                        "language": card_language,
+                        "ebay_item_id": row["ebay_item_id"],
+                        "title": row["title"],
+                        "price": row["price"],
+                        "shipping_cost": row["shipping_cost"],
+                        "sold_date": row["sold_date"],
+                        "psa_grade": row["psa_grade"],
+                        "condition": row["condition"],
+                    })
+                if chunk:
+                    yield chunk
+        finally:
+            db.close()
+
+    def opportunities_statement(
+        self,
+        card_id: Optional[int] = None,
+        psa_grade: Optional[str] = None,
+        language: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        active_only: bool = False
+    ):
+        """Requête Core pour l'export des opportunités"""
+        stmt = select(
+            Opportunity.id,
+            Opportunity.card_id,
+            Card.normalized_name.label("card_name"),
+            Card.language,
+            Opportunity.listing_id,
+            Listing.psa_grade,
+            Opportunity.listing_price,
+            Opportunity.floor_price,
+            Opportunity.discount_percentage,
+            Opportunity.estimated_gross_profit,
+            Opportunity.estimated_net_profit,
+            Opportunity.profit_margin,
+            Opportunity.is_active,
+            Opportunity.close_reason,
+            Opportunity.created_at,
+            Opportunity.closed_at,
+        ).join(
+            Card, Opportunity.card_id == Card.id
+        ).join(
+            Listing, Opportunity.listing_id == Listing.id
+        )
+
+        if card_id is not None:
+            stmt = stmt.where(Opportunity.card_id == card_id)
+        if psa_grade:
+            stmt = stmt.where(Listing.psa_grade == psa_grade)
+        if language:
+            stmt = stmt.where(Card.language == language.upper())
+        if date_from:
+            stmt = stmt.where(Opportunity.created_at >= date_from)
+        if date_to:
+            stmt = stmt.where(Opportunity.created_at < date_to)
+        if active_only:
+            stmt = stmt.where(Opportunity.is_active == True)
+
+        return stmt.order_by(Opportunity.id)
+
+    def iter_chunks(self, stmt) -> Iterator[List[Dict]]:
+        """
+        Itère sur le résultat par paquets de `chunk_size` lignes.
+
+        Utilise sa propre session: le flux survit à la fin du handler HTTP.
+        """
+        db = SessionLocal()
+        try:
+            result = db.execute(stmt.execution_options(yield_per=self.chunk_size))
+            for partition in result.mappings().partitions():
+                yield [dict(row) for row in partition]
+        finally:
+            db.close()
+
+    def stream(
+        self,
+        stmt,
+        columns: List[tuple],
+        export_format: str,
+        before: Optional[Iterator[List[Dict]]] = None
+    ) -> Iterator[bytes]:
+        """
+        Sérialise la requête dans le format demandé, précédée des paquets
+        `before` s'ils sont fournis (ex: ventes archivées).
+        """
+        chunks = self.iter_chunks(stmt)
+        if before is not None:
+            chunks = itertools.chain(before, chunks)
+
+        if export_format == "ndjson":
+            return self._stream_ndjson(chunks)
+        if export_format == "csv":
+            return self._stream_csv(chunks, columns)
+        if export_format == "arrow":
+            return self._stream_arrow(chunks, columns)
+        if export_format == "parquet":
+            return self._stream_parquet(chunks, columns)
+        raise ValueError(f"Format d'export inconnu: {export_format}")
+
+    def _stream_ndjson(self, chunks: Iterator[List[Dict]]) -> Iterator[bytes]:
+        for rows in chunks:
+            lines = [json.dumps(row, default=_json_default) for row in rows]
+            yield ("\n".join(lines) + "\n").encode()
+
+    def _stream_csv(self, chunks: Iterator[List[Dict]], columns: List[tuple]) -> Iterator[bytes]:
+        names = [name for name, _ in columns]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+
+        for rows in chunks:
+            for row in rows:
+                writer.writerow([
+                    row[name].isoformat() if isinstance(row[name], datetime) else row[name]
+                    for name in names
+                ])
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+
+        # En-tête seul si aucune ligne
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+
+    def _stream_arrow(self, chunks: Iterator[List[Dict]], columns: List[tuple]) -> Iterator[bytes]:
+        import pyarrow as pa
+        schema = _arrow_schema(columns)
+        sink = _ChunkSink()
+        with pa.ipc.new_stream(sink, schema) as writer:
+            for rows in chunks:
+                writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=schema))
+                yield sink.drain()
+        yield sink.drain()
+
+    def _stream_parquet(self, chunks: Iterator[List[Dict]], columns: List[tuple]) -> Iterator[bytes]:
+        # Un row group par paquet: le footer est écrit à la fermeture
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        schema = _arrow_schema(columns)
+        sink = _ChunkSink()
+        with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+            for rows in chunks:
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                yield sink.drain()
+        yield sink.drain()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Fichier en écriture seule dont on vide le contenu après chaque paquet"""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _load_canonical_cards(db, card_ids, cards: Dict[int, tuple]) -> None:
+    """Complète `cards` {id: (id de la carte actuelle, nom, langue)} en suivant les fusions"""
+    missing = [card_id for card_id in card_ids if card_id not in cards]
+    if not missing:
+        return
+    rows = {
+        card_id: (merged_into_id, name, language)
+        for card_id, merged_into_id, name, language in db.execute(
+            select(Card.id, Card.merged_into_id, Card.normalized_name, Card.language).where(Card.id.in_(missing))
+        )
+    }
+    targets = {merged_into_id for merged_into_id, _, _ in rows.values() if merged_into_id is not None}
+    _load_canonical_cards(db, targets, cards)
+    for card_id, (merged_into_id, name, language) in rows.items():
+        cards[card_id] = cards[merged_into_id] if merged_into_id is not None else (card_id, name, language)
+
+
+def _arrow_schema(columns: List[tuple]):
+    import pyarrow as pa
+    arrow_types = {
+        "int": pa.int64(),
+        "str": pa.string(),
+        "float": pa.float64(),
+        "bool": pa.bool_(),
+        "datetime": pa.timestamp("us"),
+    }
+    return pa.schema([(name, arrow_types[kind]) for name, kind in columns])
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
@@ -0,0 +1,110 @@
+"""
+Archivage des opportunités clôturées vers `opportunities_history`.
+
+La table `opportunities` ne garde que les opportunités actives et celles
+clôturées récemment: toutes les requêtes (API, dashboard, détection) filtrent
+sur `is_active`, une table chaude réduite garde ces index petits.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy import DateTime, delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+from app.models import Opportunity, OpportunityHistory
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Colonnes copiées telles quelles (closed_at et archived_at sont calculées)
+COPIED_COLUMNS = [
+    "id", "card_id", "listing_id", "listing_price", "floor_price",
+    "discount_percentage", "estimated_gross_profit", "estimated_net_profit",
+    "profit_margin", "alerted", "close_reason", "created_at",
+]
+
+
+class OpportunityArchiveService:
+    """
+    Déplace les opportunités clôturées vers l'historique et purge
+    l'historique ancien.
+    """
+
+    def __init__(self, batch_size: int = 5000):
+        self.batch_size = batch_size
+
+    def archive_closed(self, db: Session, older_than_days: Optional[int] = None) -> int:
+        """
+        Archive les opportunités clôturées depuis plus de `older_than_days`.
+
+        Chaque lot est copié (INSERT ... SELECT) puis supprimé dans la même
+        transaction.
+
+        Returns:
+            Nombre d'opportunités archivées
+        """
+        if older_than_days is None:
+            older_than_days = settings.opportunity_archive_after_days
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+
+        # Les anciennes lignes inactives n'ont pas de closed_at
+        closed_since = func.coalesce(Opportunity.closed_at, Opportunity.updated_at)
+        archived = 0
+
+        while True:
+            ids = list(db.execute(
+                select(Opportunity.id).where(
+                    Opportunity.is_active == False,
+                    closed_since < cutoff
+                ).order_by(Opportunity.id).limit(self.batch_size)
+            ).scalars())
+
+            if not ids:
+                break
+
+            now = datetime.utcnow()
+            source = select(
+                *[getattr(Opportunity, column) for column in COPIED_COLUMNS],
+                func.coalesce(Opportunity.closed_at, Opportunity.updated_at),
+                literal(now, DateTime),
+            ).where(Opportunity.id.in_(ids))
+
+            db.execute(
+                insert(OpportunityHistory).from_select(
+                    COPIED_COLUMNS + ["closed_at", "archived_at"], source
+                )
+            )
+            db.execute(delete(Opportunity).where(Opportunity.id.in_(ids)))
+            db.commit()
+
+            archived += len(ids)
+
+        logger.info(f"Archivé {archived} opportunités clôturées")
+        return archived
+
+    def purge_history(self, db: Session, older_than_days: Optional[int] = None) -> int:
+        """
+        Supprime l'historique archivé depuis plus de `older_than_days`.
+
+        Returns:
+            Nombre de lignes supprimées
+        """
+        if older_than_days is None:
+            older_than_days = settings.opportunity_history_retention_days
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+
+        result = db.execute(
+            delete(OpportunityHistory).where(OpportunityHistory.archived_at < cutoff)
+        )
+        db.commit()
+
+        logger.info(f"Purgé {result.rowcount} opportunités de l'historique")
+        return result.rowcount
+
+    def get_stats(self, db: Session) -> Dict:
+        """Taille de la table chaude et de l'historique"""
+        return {
+            "active": db.query(Opportunity).filter(Opportunity.is_active == True).count(),
+            "closed": db.query(Opportunity).filter(Opportunity.is_active == False).count(),
+            "archived": db.query(OpportunityHistory).count(),
+        }
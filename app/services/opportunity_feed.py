@@ -0,0 +1,350 @@
+"""
+Flux temps réel des opportunités (pub/sub en mémoire).
+
+La détection publie les opportunités créées, modifiées et clôturées; chaque
+client SSE / WebSocket abonné reçoit celles qui passent ses filtres (ROI
+minimum, langue, grade). Le flux garde en mémoire les opportunités actives:
+un nouveau client reçoit un instantané initial sans requête en base.
+
+Un client trop lent (file pleine) est déconnecté plutôt que de ralentir les
+autres; il se reconnecte et reçoit un nouvel instantané.
+
+Les détections des autres processus (workers de scan) ne passent pas par
+`publish_detection`: un rattrapage périodique (`feed_refresh_seconds`)
+relit les opportunités modifiées (`updated_at`) et publie les différences
+avec les opportunités actives en mémoire.
+"""
+
+import asyncio
+import itertools
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
+from app.core.database import SessionLocal
+from app.models import Opportunity, Sale
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Écritures concurrentes: un commit peut porter un updated_at antérieur au
+# début du rattrapage précédent
+WATERMARK_OVERLAP = timedelta(seconds=5)
+# Champs recalculés à chaque lecture: leur seule variation n'est pas une mise à jour
+_VOLATILE_FIELDS = ("volume_30d", "trending")
+
+
+def opportunity_payload(opportunity: Opportunity, volume_30d: int) -> Dict:
+    """Représentation d'une opportunité pour le dashboard (hot opportunities)"""
+    return {
+        "id": opportunity.id,
+        "card_name": opportunity.card.normalized_name,
+        "card_set": opportunity.card.card_set or "Unknown",
+        "language": opportunity.card.language,
+        "grade": opportunity.listing.psa_grade or "Raw",
+        "floor_price": opportunity.floor_price,
+        "listing_price": opportunity.listing_price,
+        "profit_margin": opportunity.profit_margin,
+        "estimated_net_profit": opportunity.estimated_net_profit,
+        "volume_30d": volume_30d,
+        "ebay_url": opportunity.listing.listing_url or f"https://ebay.com/itm/{opportunity.listing.ebay_item_id}",
+        "image_url": f"https://i.ebayimg.com/images/g/{opportunity.listing.ebay_item_id}/s-l500.jpg",
+        "trending": volume_30d > 10
+    }
+
+
+def volumes_30d(db: Session, card_ids: Iterable[int]) -> Dict[int, int]:
+    """Nombre de ventes sur 30 jours par carte (une seule requête groupée)"""
+    card_ids = list(set(card_ids))
+    if not card_ids:
+        return {}
+    month_ago = datetime.utcnow() - timedelta(days=30)
+    return dict(
+        db.query(Sale.card_id, func.count(Sale.id)).filter(
+            Sale.card_id.in_(card_ids),
+            Sale.sold_date >= month_ago
+        ).group_by(Sale.card_id).all()
+    )
+
+
+class FeedFilters:
+    """Filtres côté serveur d'un abonné"""
+
+    def __init__(self, min_roi: float = 0.0, language: Optional[str] = None, grade: Optional[str] = None):
+        self.min_roi = min_roi
+        self.language = language.upper() if language else None
+        self.grade = grade
+
+    def matches(self, payload: Dict) -> bool:
+        if payload["profit_margin"] < self.min_roi:
+            return False
+        if self.language and payload["language"] != self.language:
+            return False
+        if self.grade and payload["grade"] != self.grade:
+            return False
+        return True
+
+
+class FeedSubscription:
+    """File d'événements d'un client connecté"""
+
+    def __init__(self, filters: FeedFilters, queue_size: int):
+        self.filters = filters
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+        self.overflowed = False
+
+    def close(self) -> None:
+        """Termine l'abonnement et réveille le client en attente"""
+        self.closed = True
+        try:
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+    async def next_event(self, timeout: float) -> Optional[Dict]:
+        """Prochain événement, ou None après `timeout` secondes (heartbeat) ou à la fermeture"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class OpportunityFeed:
+    """
+    Diffusion des événements de détection vers les abonnés.
+
+    Les abonnements et la diffusion vivent dans la boucle asyncio de
+    l'application; `publish` peut être appelé depuis un autre thread.
+    """
+
+    def __init__(self):
+        self.queue_size = settings.feed_client_queue_size
+        self.heartbeat_seconds = settings.feed_heartbeat_seconds
+        self.refresh_seconds = settings.feed_refresh_seconds
+        self._subscribers: List[FeedSubscription] = []
+        self._active: Dict[int, Dict] = {}
+        self._sequence = itertools.count(1)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._watermark: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.disconnected_slow = 0
+        self.refreshes = 0
+
+    async def start(self) -> None:
+        """Charge les opportunités actives (une fois) et active la diffusion"""
+        self._loop = asyncio.get_running_loop()
+        watermark = datetime.utcnow()
+        active = await asyncio.to_thread(self._load_active)
+        with self._lock:
+            self._active = {payload["id"]: payload for payload in active}
+        self._watermark = watermark
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Flux d'opportunités démarré ({len(active)} opportunités actives)")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = None
+        for subscription in self._subscribers:
+            subscription.close()
+        self._subscribers.clear()
+
+    def subscribe(self, filters: FeedFilters) -> FeedSubscription:
+        subscription = FeedSubscription(filters, self.queue_size)
+        self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: FeedSubscription) -> None:
+        if subscription in self._subscribers:
+            self._subscribers.remove(subscription)
+
+    def snapshot(self, filters: FeedFilters, limit: int) -> List[Dict]:
+        """Opportunités actives qui passent les filtres (meilleur ROI d'abord)"""
+        with self._lock:
+            matching = [payload for payload in self._active.values() if filters.matches(payload)]
+        matching.sort(key=lambda payload: payload["profit_margin"], reverse=True)
+        return matching[:limit]
+
+    def publish_detection(
+        self,
+        db: Session,
+        created_ids: List[int],
+        updated_ids: List[int],
+        closed_ids: List[int]
+    ) -> int:
+        """
+        Publie le résultat d'une passe de détection (après commit).
+        Une requête pour toutes les opportunités touchées, quel que soit le
+        nombre de clients.
+
+        Returns:
+            Nombre d'événements publiés
+        """
+        if self._loop is None:
+            return 0
+
+        ids = set(created_ids) | set(updated_ids) | set(closed_ids)
+        if not ids:
+            return 0
+
+        opportunities = db.query(Opportunity).options(
+            joinedload(Opportunity.card),
+            joinedload(Opportunity.listing)
+        ).filter(Opportunity.id.in_(ids)).all()
+        volumes = volumes_30d(db, [opp.card_id for opp in opportunities])
+
+        created, updated = set(created_ids), set(updated_ids)
+        events = []
+        for opp in opportunities:
+            payload = opportunity_payload(opp, volumes.get(opp.card_id, 0))
+            if not opp.is_active:
+                events.append({"type": "closed", "data": dict(payload, close_reason=opp.close_reason)})
+            elif opp.id in created:
+                events.append({"type": "created", "data": payload})
+            elif opp.id in updated:
+                events.append({"type": "updated", "data": payload})
+
+        self.publish(events)
+        return len(events)
+
+    def refresh(self, db: Session) -> int:
+        """
+        Publie les opportunités créées, modifiées ou clôturées par d'autres
+        processus depuis le dernier rattrapage (comparées aux opportunités
+        actives en mémoire: celles déjà publiées par ce processus ne sont
+        pas répétées).
+
+        Returns:
+            Nombre d'événements publiés
+        """
+        if self._loop is None or self._watermark is None:
+            return 0
+
+        watermark = datetime.utcnow()
+        changed = db.query(Opportunity).options(
+            joinedload(Opportunity.card),
+            joinedload(Opportunity.listing)
+        ).filter(Opportunity.updated_at >= self._watermark - WATERMARK_OVERLAP).all()
+        volumes = volumes_30d(db, [opp.card_id for opp in changed if opp.is_active])
+
+        with self._lock:
+            known = {opp.id: self._active.get(opp.id) for opp in changed}
+        events = []
+        for opp in changed:
+            previous = known[opp.id]
+            payload = opportunity_payload(opp, volumes.get(opp.card_id, 0))
+            if not opp.is_active:
+                if previous is not None:
+                    events.append({"type": "closed", "data": dict(payload, close_reason=opp.close_reason)})
+            elif previous is None:
+                events.append({"type": "created", "data": payload})
+            elif _changed(previous, payload):
+                events.append({"type": "updated", "data": payload})
+
+        self._watermark = watermark
+        self.refreshes += 1
+        self.publish(events)
+        return len(events)
+
+    def publish(self, events: List[Dict]) -> None:
+        """Diffuse des événements (thread-safe, sans bloquer l'appelant)"""
+        if self._loop is None or not events:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is self._loop:
+            self._fan_out(events)
+        else:
+            self._loop.call_soon_threadsafe(self._fan_out, events)
+
+    def get_stats(self) -> Dict:
+        return {
+            "running": self._loop is not None,
+            "subscribers": len(self._subscribers),
+            "active_opportunities": len(self._active),
+            "published": self.published,
+            "disconnected_slow": self.disconnected_slow,
+            "refreshes": self.refreshes,
+        }
+
+    def _fan_out(self, events: List[Dict]) -> None:
+        with self._lock:
+            for event in events:
+                payload = event["data"]
+                event["previous"] = self._active.get(payload["id"])
+                if event["type"] == "closed":
+                    self._active.pop(payload["id"], None)
+                else:
+                    self._active[payload["id"]] = payload
+
+        for event in events:
+            previous = event.pop("previous")
+            event["id"] = next(self._sequence)
+            self.published += 1
+            # Une opportunité qui sort des filtres d'un client est clôturée pour lui
+            filtered_out = {"type": "closed", "id": event["id"], "data": dict(event["data"], close_reason="filtered")}
+
+            for subscription in list(self._subscribers):
+                if subscription.closed:
+                    continue
+                if subscription.filters.matches(event["data"]):
+                    message = event
+                elif event["type"] == "updated" and previous and subscription.filters.matches(previous):
+                    message = filtered_out
+                else:
+                    continue
+                try:
+                    subscription.queue.put_nowait(message)
+                except asyncio.QueueFull:
+                    # Client trop lent: déconnecté, il recevra un instantané à la reconnexion
+                    subscription.overflowed = True
+                    subscription.closed = True
+                    self.disconnected_slow += 1
+                    self.unsubscribe(subscription)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            await asyncio.to_thread(self._refresh_safely)
+
+    def _refresh_safely(self) -> None:
+        db = SessionLocal()
+        try:
+            self.refresh(db)
+        except Exception as e:
+            logger.error(f"Flux d'opportunités non rattrapé: {e}")
+        finally:
+            db.close()
+
+    def _load_active(self) -> List[Dict]:
+        db = SessionLocal()
+        try:
+            opportunities = db.query(Opportunity).options(
+                joinedload(Opportunity.card),
+                joinedload(Opportunity.listing)
+            ).filter(Opportunity.is_active == True).all()
+            volumes = volumes_30d(db, [opp.card_id for opp in opportunities])
+            return [opportunity_payload(opp, volumes.get(opp.card_id, 0)) for opp in opportunities]
+        finally:
+            db.close()
+
+
+def _changed(previous: Dict, payload: Dict) -> bool:
+    return any(
+        previous.get(field) != value
+        for field, value in payload.items()
+        if field not in _VOLATILE_FIELDS
+    )
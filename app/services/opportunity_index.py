@@ -0,0 +1,293 @@
+"""
+Index en mémoire des opportunités actives pour les lectures de l'API.
+
+`/api/opportunities` et `/api/dashboard/hot-opportunities` demandent les N
+meilleures opportunités (marge décroissante), éventuellement filtrées par
+langue, grade ou carte. L'index garde les opportunités actives dans des
+listes triées par (marge, id) décroissants: une globale et une par langue,
+par grade et par carte. Une requête parcourt la plus petite liste
+applicable et s'arrête après N résultats ou sous la marge minimum.
+
+Fraîcheur:
+- après chaque détection du processus, rattrapage immédiat des
+  opportunités modifiées (`updated_at` >= dernier rattrapage)
+- rattrapage périodique (`opportunity_index_refresh_seconds`) pour les
+  écritures des autres processus (workers de scan, jobs)
+- reconstruction complète (`opportunity_index_rebuild_seconds`): volumes
+  30j, fusions de cartes, suppressions
+- au-delà de `opportunity_index_max_staleness` secondes sans rattrapage
+  réussi, les endpoints repassent par la base
+
+L'âge de l'index est renvoyé dans l'en-tête `X-Index-Age` et exposé dans
+`/metrics` et `/api/opportunities/index`.
+"""
+
+import asyncio
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session, joinedload
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import Opportunity
+from app.services.opportunity_feed import opportunity_payload, volumes_30d
+import logging
+
+logger = logging.getLogger(__name__)
+
+INDEX_AGE_HEADER = "X-Index-Age"
+
+# Écritures concurrentes: un commit peut porter un updated_at antérieur au
+# début du rattrapage précédent
+WATERMARK_OVERLAP = timedelta(seconds=5)
+
+# Champs de `OpportunityResponse`
+API_FIELDS = (
+    "id", "card_id", "listing_id", "listing_price", "floor_price",
+    "discount_percentage", "estimated_gross_profit", "estimated_net_profit",
+    "profit_margin", "is_active", "alerted", "closed_at", "close_reason",
+    "created_at", "updated_at",
+)
+
+SortKey = Tuple[float, int]
+
+
+class IndexedOpportunity:
+    __slots__ = ("key", "card_id", "language", "grade", "api", "payload")
+
+    def __init__(self, opportunity: Opportunity, volume_30d: int):
+        self.key: SortKey = (-opportunity.profit_margin, -opportunity.id)
+        self.card_id = opportunity.card_id
+        self.payload = opportunity_payload(opportunity, volume_30d)
+        self.language = self.payload["language"]
+        self.grade = self.payload["grade"]
+        self.api = {field: getattr(opportunity, field) for field in API_FIELDS}
+
+    @property
+    def profit_margin(self) -> float:
+        return -self.key[0]
+
+
+class OpportunityIndex:
+    def __init__(self):
+        self.refresh_seconds = settings.opportunity_index_refresh_seconds
+        self.rebuild_seconds = settings.opportunity_index_rebuild_seconds
+        self.max_staleness = settings.opportunity_index_max_staleness
+        self._lock = threading.Lock()
+        self._entries: Dict[int, IndexedOpportunity] = {}
+        self._sorted: List[SortKey] = []
+        self._by_language: Dict[str, List[SortKey]] = {}
+        self._by_grade: Dict[str, List[SortKey]] = {}
+        self._by_card: Dict[int, List[SortKey]] = {}
+        self._watermark: Optional[datetime] = None
+        self._fresh_at: Optional[float] = None
+        self._rebuilt_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self.rebuilds = 0
+        self.refreshes = 0
+        self.hits = 0
+        self.fallbacks = 0
+        self.last_rebuild_seconds = 0.0
+
+    async def start(self) -> None:
+        # Première construction en tâche de fond: le démarrage n'attend pas,
+        # les lectures passent par la base jusqu'à ce qu'elle soit prête
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def age(self) -> Optional[float]:
+        """Secondes depuis le dernier rattrapage réussi (None: jamais construit)"""
+        return None if self._fresh_at is None else time.monotonic() - self._fresh_at
+
+    def is_fresh(self) -> bool:
+        """Index utilisable (sinon la lecture repasse par la base, comptée)"""
+        age = self.age
+        fresh = age is not None and age <= self.max_staleness
+        if not fresh:
+            self.fallbacks += 1
+        return fresh
+
+    def rebuild(self, db: Session) -> int:
+        """Recharge toutes les opportunités actives"""
+        started = time.perf_counter()
+        watermark = datetime.utcnow()
+        opportunities = self._query(db).filter(Opportunity.is_active == True).all()
+        volumes = volumes_30d(db, [opp.card_id for opp in opportunities])
+        entries = {opp.id: IndexedOpportunity(opp, volumes.get(opp.card_id, 0)) for opp in opportunities}
+
+        sorted_keys = sorted(entry.key for entry in entries.values())
+        by_language: Dict[str, List[SortKey]] = {}
+        by_grade: Dict[str, List[SortKey]] = {}
+        by_card: Dict[int, List[SortKey]] = {}
+        for key in sorted_keys:
+            entry = entries[-key[1]]
+            by_language.setdefault(entry.language, []).append(key)
+            by_grade.setdefault(entry.grade, []).append(key)
+            by_card.setdefault(entry.card_id, []).append(key)
+
+        with self._lock:
+            self._entries = entries
+            self._sorted = sorted_keys
+            self._by_language, self._by_grade, self._by_card = by_language, by_grade, by_card
+            self._watermark = watermark
+            self._fresh_at = self._rebuilt_at = time.monotonic()
+        self.rebuilds += 1
+        self.last_rebuild_seconds = time.perf_counter() - started
+        logger.info(f"Index des opportunités reconstruit: {len(entries)} actives en {self.last_rebuild_seconds:.2f}s")
+        return len(entries)
+
+    def refresh(self, db: Session) -> int:
+        """
+        Rattrape les opportunités créées, modifiées ou clôturées depuis le
+        dernier rattrapage (reconstruction complète si jamais construit).
+
+        Returns:
+            Nombre d'opportunités relues
+        """
+        if self._watermark is None:
+            return self.rebuild(db)
+
+        watermark = datetime.utcnow()
+        changed = self._query(db).filter(
+            Opportunity.updated_at >= self._watermark - WATERMARK_OVERLAP
+        ).all()
+        active = [opp for opp in changed if opp.is_active]
+        volumes = volumes_30d(db, [opp.card_id for opp in active])
+
+        with self._lock:
+            for opp in changed:
+                self._remove(opp.id)
+            for opp in active:
+                self._add(IndexedOpportunity(opp, volumes.get(opp.card_id, 0)))
+            self._watermark = watermark
+            self._fresh_at = time.monotonic()
+        self.refreshes += 1
+        return len(changed)
+
+    def refresh_after_detection(self, db: Session) -> None:
+        """Rattrapage immédiat après une détection du processus (sans échouer la requête)"""
+        try:
+            self.refresh(db)
+        except Exception as e:
+            logger.error(f"Index des opportunités non rafraîchi après détection: {e}")
+
+    def top(
+        self,
+        limit: int,
+        min_margin: Optional[float] = None,
+        language: Optional[str] = None,
+        grade: Optional[str] = None,
+        card_id: Optional[int] = None,
+        after: Optional[SortKey] = None
+    ) -> List[IndexedOpportunity]:
+        """
+        Meilleures opportunités (marge puis id décroissants) qui passent les
+        filtres, à partir de la position `after` (pagination keyset).
+        """
+        language = language.upper() if language else None
+        with self._lock:
+            candidates = [self._sorted]
+            if language is not None:
+                candidates.append(self._by_language.get(language, []))
+            if grade is not None:
+                candidates.append(self._by_grade.get(grade, []))
+            if card_id is not None:
+                candidates.append(self._by_card.get(card_id, []))
+            keys = min(candidates, key=len)
+
+            start = bisect_right(keys, after) if after is not None else 0
+            results = []
+            for position in range(start, len(keys)):
+                key = keys[position]
+                if min_margin is not None and -key[0] < min_margin:
+                    break
+                entry = self._entries[-key[1]]
+                if language is not None and entry.language != language:
+                    continue
+                if grade is not None and entry.grade != grade:
+                    continue
+                if card_id is not None and entry.card_id != card_id:
+                    continue
+                results.append(entry)
+                if len(results) >= limit:
+                    break
+        self.hits += 1
+        return results
+
+    def get_stats(self) -> Dict:
+        age = self.age
+        return {
+            "active": len(self._entries),
+            "fresh": age is not None and age <= self.max_staleness,
+            "age_seconds": round(age, 3) if age is not None else None,
+            "max_staleness_seconds": self.max_staleness,
+            "watermark": self._watermark.isoformat() if self._watermark else None,
+            "rebuilds": self.rebuilds,
+            "refreshes": self.refreshes,
+            "last_rebuild_seconds": round(self.last_rebuild_seconds, 4),
+            "hits": self.hits,
+            "fallbacks": self.fallbacks,
+        }
+
+    def _query(self, db: Session):
+        return db.query(Opportunity).options(
+            joinedload(Opportunity.card),
+            joinedload(Opportunity.listing)
+        )
+
+    def _add(self, entry: IndexedOpportunity) -> None:
+        self._entries[-entry.key[1]] = entry
+        insort(self._sorted, entry.key)
+        insort(self._by_language.setdefault(entry.language, []), entry.key)
+        insort(self._by_grade.setdefault(entry.grade, []), entry.key)
+        insort(self._by_card.setdefault(entry.card_id, []), entry.key)
+
+    def _remove(self, opportunity_id: int) -> None:
+        entry = self._entries.pop(opportunity_id, None)
+        if entry is None:
+            return
+        _discard(self._sorted, entry.key)
+        _discard(self._by_language[entry.language], entry.key)
+        _discard(self._by_grade[entry.grade], entry.key)
+        _discard(self._by_card[entry.card_id], entry.key)
+        if not self._by_card[entry.card_id]:
+            del self._by_card[entry.card_id]
+
+    async def _run(self) -> None:
+        while True:
+            rebuild = self._rebuilt_at is None or time.monotonic() - self._rebuilt_at >= self.rebuild_seconds
+            await asyncio.to_thread(self._rebuild_safely if rebuild else self._refresh_safely)
+            await asyncio.sleep(self.refresh_seconds)
+
+    def _rebuild_safely(self) -> None:
+        self._with_session(self.rebuild)
+
+    def _refresh_safely(self) -> None:
+        self._with_session(self.refresh)
+
+    def _with_session(self, operation) -> None:
+        db = SessionLocal()
+        try:
+            operation(db)
+        except Exception as e:
+            # L'âge de l'index continue d'augmenter: repli sur la base au-delà du seuil
+            logger.error(f"Index des opportunités non rafraîchi: {e}")
+        finally:
+            db.close()
+
+
+def _discard(keys: List[SortKey], key: SortKey) -> None:
+    position = bisect_left(keys, key)
+    if position < len(keys) and keys[position] == key:
+        del keys[position]
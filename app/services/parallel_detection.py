@@ -0,0 +1,198 @@
+"""
+Détection complète en parallèle, par shards de cartes.
+
+Les listings actifs sont répartis par `card_id % shards`: toutes les ventes
+et tous les listings d'une carte sont dans le même shard, chaque plancher
+n'est donc calculé qu'une fois. Chaque shard est évalué dans un processus
+du pool (ni GIL ni session partagés), carte par carte en paquets de
+`detection_chunk_cards`: la mémoire d'un worker est bornée par un paquet
+(ventes lues en flux avec `yield_per`), pas par la taille du shard.
+
+Les workers ne font que lire: ils renvoient des résultats compacts
+(listing, carte, métriques) et le processus principal fait une seule
+écriture en lot (mises à jour par clé primaire + insertions).
+
+Plus de shards que de workers: un shard lent (cartes très vendues)
+n'immobilise pas les autres workers.
+"""
+
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import Card, Listing, Sale
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Ordre des métriques dans les résultats des workers
+METRIC_FIELDS = (
+    "listing_price", "floor_price", "discount_percentage",
+    "estimated_gross_profit", "estimated_net_profit", "profit_margin",
+)
+
+# (listing_id, card_id, métriques dans l'ordre de METRIC_FIELDS)
+ShardResult = Tuple[int, int, Tuple[float, ...]]
+
+_worker_service = None
+
+
+def _service():
+    """ArbitrageService du processus worker (seuils et frais de la configuration)"""
+    global _worker_service
+    if _worker_service is None:
+        from app.services.arbitrage_service import ArbitrageService
+        _worker_service = ArbitrageService()
+    return _worker_service
+
+
+def evaluate_shard(shard: int, shards: int, chunk_cards: int) -> Dict:
+    """
+    Évalue les listings actifs des cartes du shard (exécuté dans un worker).
+
+    Returns:
+        `{"shard", "cards", "listings", "seconds", "results": [ShardResult]}`
+    """
+    started = time.perf_counter()
+    service = _service()
+    db = SessionLocal()
+    try:
+        card_ids = list(db.execute(
+            select(Listing.card_id).where(
+                Listing.is_active == True,
+                Listing.card_id % shards == shard
+            ).distinct().order_by(Listing.card_id)
+        ).scalars())
+
+        results: List[ShardResult] = []
+        listings = 0
+        for start in range(0, len(card_ids), chunk_cards):
+            listings += _evaluate_cards(db, service, card_ids[start:start + chunk_cards], results)
+
+        return {
+            "shard": shard,
+            "cards": len(card_ids),
+            "listings": listings,
+            "seconds": time.perf_counter() - started,
+            "results": results,
+        }
+    finally:
+        db.close()
+
+
+def _evaluate_cards(db, service, card_ids: List[int], results: List[ShardResult]) -> int:
+    languages = dict(db.execute(select(Card.id, Card.language).where(Card.id.in_(card_ids))).all())
+
+    sales: Dict[int, List[Dict]] = {card_id: [] for card_id in card_ids}
+    rows = db.execute(
+        select(Sale.card_id, Sale.price, Sale.sold_date, Sale.psa_grade)
+        .where(Sale.card_id.in_(card_ids))
+        .execution_options(yield_per=10000)
+    )
+    for card_id, price, sold_date, psa_grade in rows:
+        sales[card_id].append({
+            "price": price,
+            "sold_date": sold_date,
+            "psa_grade": psa_grade,
+            "language": languages.get(card_id),
+        })
+
+    listings = db.execute(
+        select(Listing.id, Listing.card_id, Listing.price, Listing.shipping_cost, Listing.psa_grade)
+        .where(Listing.is_active == True, Listing.card_id.in_(card_ids))
+    ).all()
+
+    # Même calcul que `ArbitrageService._get_floor_price`, un plancher par (carte, grade)
+    floors: Dict[Tuple[int, Optional[str]], Optional[float]] = {}
+    for listing_id, card_id, price, shipping_cost, psa_grade in listings:
+        key = (card_id, psa_grade)
+        if key not in floors:
+            card_sales = sales[card_id]
+            if psa_grade:
+                card_sales = [sale for sale in card_sales if sale["psa_grade"] == psa_grade]
+            floors[key] = service.floor_calculator.calculate_floor_price(
+                card_sales,
+                psa_grade=psa_grade,
+                language=languages.get(card_id)
+            ) if card_sales else None
+
+        floor_price = floors[key]
+        if not floor_price:
+            continue
+        metrics = service.compute_opportunity_metrics(price + (shipping_cost or 0.0), floor_price)
+        if metrics is not None:
+            results.append((listing_id, card_id, tuple(metrics[field] for field in METRIC_FIELDS)))
+
+    return len(listings)
+
+
+class ParallelDetector:
+    """
+    Pool de processus de détection (créé au premier usage, réutilisé).
+
+    Args:
+        workers: Processus du pool (`detection_workers`)
+        shards: Nombre de shards (`detection_shards`, 4 par worker si 0)
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        shards: Optional[int] = None,
+        chunk_cards: Optional[int] = None
+    ):
+        self.workers = settings.detection_workers if workers is None else workers
+        self.shards = (shards or settings.detection_shards) or self.workers * 4
+        self.chunk_cards = chunk_cards or settings.detection_chunk_cards
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.last_stats: Dict = {}
+
+    @property
+    def enabled(self) -> bool:
+        # Une base SQLite en mémoire n'est pas partageable entre processus
+        return self.workers > 1 and ":memory:" not in settings.database_url
+
+    def evaluate(self) -> List[ShardResult]:
+        """Évalue tous les shards et renvoie les opportunités qualifiées"""
+        started = time.perf_counter()
+        if self._pool is None:
+            # spawn: le processus principal a des threads (serveur, workers d'alertes)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+
+        futures = [
+            self._pool.submit(evaluate_shard, shard, self.shards, self.chunk_cards)
+            for shard in range(self.shards)
+        ]
+        results: List[ShardResult] = []
+        shard_seconds = []
+        listings = 0
+        for future in futures:
+            shard = future.result()
+            results.extend(shard["results"])
+            shard_seconds.append(shard["seconds"])
+            listings += shard["listings"]
+
+        self.last_stats = {
+            "workers": self.workers,
+            "shards": self.shards,
+            "listings": listings,
+            "qualified": len(results),
+            "seconds": round(time.perf_counter() - started, 4),
+            "slowest_shard_seconds": round(max(shard_seconds, default=0.0), 4),
+        }
+        logger.info(
+            f"Détection parallèle: {listings} listings en {self.shards} shards "
+            f"({self.workers} workers), {len(results)} qualifiés en {self.last_stats['seconds']:.2f}s"
+        )
+        return results
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
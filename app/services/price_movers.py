@@ -0,0 +1,363 @@
+"""
+Classement en mémoire des plus fortes variations de prix (top movers).
+
+Variation d'une carte: médiane des ventes des dernières 24h comparée à la
+médiane des 7 jours précédents, en %. Chaque fenêtre doit compter au moins
+`price_movers_min_sales` ventes, sinon la carte n'est pas classée.
+
+État maintenu au fil des ventes ingérées:
+- par carte (fiche canonique), ses ventes des 8 derniers jours triées par
+  date; une vente arrivée ne réévalue que sa carte
+- `_transitions`: tas des prochains instants où une vente d'une carte
+  change de fenêtre (24h → 7 jours précédents, sortie des 7 jours, sortie
+  des 8 jours); seules les cartes concernées sont réévaluées quand le temps
+  passe
+- `_gainers` / `_losers`: tas (hausses, baisses) à suppression paresseuse:
+  chaque réévaluation pousse une entrée versionnée, les entrées périmées
+  sont écartées à la lecture. Lire les K premiers coûte O(K log n) au lieu
+  d'un GROUP BY sur une semaine de ventes
+
+Fraîcheur (comme l'index des opportunités):
+- rattrapage immédiat après une ingestion du processus (`/fetch-sales`,
+  `/import-sales`)
+- rattrapage périodique des ventes d'id supérieur au dernier lu
+  (`price_movers_refresh_seconds`), pour les écritures des autres processus
+- reconstruction complète (`price_movers_rebuild_seconds`): fusions de
+  cartes, suppressions
+- au-delà de `price_movers_max_staleness` secondes sans rattrapage réussi,
+  le dashboard recalcule le classement depuis la base
+"""
+
+import asyncio
+import heapq
+import statistics
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import Card, Sale
+import logging
+
+logger = logging.getLogger(__name__)
+
+RECENT_WINDOW = timedelta(hours=24)
+VOLUME_WINDOW = timedelta(days=7)
+# 24h + les 7 jours précédents
+HISTORY_WINDOW = RECENT_WINDOW + VOLUME_WINDOW
+
+# Commits concurrents: un id inférieur au dernier lu peut devenir visible
+# après le rattrapage précédent
+ID_OVERLAP = 1000
+
+SaleEntry = Tuple[datetime, int, float]  # (date, id, prix)
+
+
+class CardWindow:
+    __slots__ = ("card_name", "sales", "next_transition")
+
+    def __init__(self, card_name: str):
+        self.card_name = card_name
+        self.sales: List[SaleEntry] = []
+        self.next_transition: Optional[datetime] = None
+
+
+class PriceMovers:
+    def __init__(self):
+        self.min_sales = settings.price_movers_min_sales
+        self.refresh_seconds = settings.price_movers_refresh_seconds
+        self.rebuild_seconds = settings.price_movers_rebuild_seconds
+        self.max_staleness = settings.price_movers_max_staleness
+        self._lock = threading.Lock()
+        self._reset()
+        self._fresh_at: Optional[float] = None
+        self._rebuilt_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self.rebuilds = 0
+        self.refreshes = 0
+        self.evaluations = 0
+        self.hits = 0
+        self.fallbacks = 0
+        self.last_rebuild_seconds = 0.0
+
+    def _reset(self) -> None:
+        self._windows: Dict[int, CardWindow] = {}
+        self._seen: Dict[int, int] = {}  # id de vente → carte
+        self._movers: Dict[int, Tuple[int, Dict]] = {}  # carte → (version, entrée)
+        self._gainers: List[Tuple[float, int, int]] = []  # (-variation, carte, version)
+        self._losers: List[Tuple[float, int, int]] = []  # (variation, carte, version)
+        self._transitions: List[Tuple[datetime, int]] = []
+        self._version = 0
+        self._watermark: Optional[int] = None
+
+    async def start(self) -> None:
+        # Première construction en tâche de fond: le dashboard recalcule
+        # depuis la base jusqu'à ce qu'elle soit prête
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def age(self) -> Optional[float]:
+        """Secondes depuis le dernier rattrapage réussi (None: jamais construit)"""
+        return None if self._fresh_at is None else time.monotonic() - self._fresh_at
+
+    def is_fresh(self) -> bool:
+        """Classement utilisable (sinon recalcul depuis la base, compté)"""
+        age = self.age
+        fresh = age is not None and age <= self.max_staleness
+        if fresh:
+            self.hits += 1
+        else:
+            self.fallbacks += 1
+        return fresh
+
+    # =========================
+    # CONSTRUCTION ET RATTRAPAGE
+    # =========================
+    def rebuild(self, db: Session, now: Optional[datetime] = None) -> int:
+        """Recharge les ventes des 8 derniers jours; retourne le nombre de ventes lues"""
+        started = time.perf_counter()
+        now = now or datetime.utcnow()
+        watermark = db.query(func.max(Sale.id)).scalar()
+        rows = db.execute(self._query().where(Sale.sold_date >= now - HISTORY_WINDOW)).all()
+        with self._lock:
+            self._reset()
+            self._watermark = watermark or 0
+            self._ingest(rows, now)
+            self._fresh_at = time.monotonic()
+        self._rebuilt_at = time.monotonic()
+        self.rebuilds += 1
+        self.last_rebuild_seconds = time.perf_counter() - started
+        logger.info(
+            f"Top movers reconstruits: {len(rows)} ventes, {len(self._movers)} cartes classées "
+            f"en {self.last_rebuild_seconds:.2f}s"
+        )
+        return len(rows)
+
+    def refresh(self, db: Session, now: Optional[datetime] = None) -> int:
+        """
+        Ajoute les ventes ingérées depuis le dernier rattrapage et fait
+        glisser les fenêtres (reconstruction complète si jamais construit).
+
+        Returns:
+            Nombre de ventes lues
+        """
+        if self._watermark is None:
+            return self.rebuild(db, now)
+
+        now = now or datetime.utcnow()
+        watermark = db.query(func.max(Sale.id)).scalar() or 0
+        rows = db.execute(self._query().where(
+            Sale.id > self._watermark - ID_OVERLAP,
+            Sale.id <= watermark,
+            Sale.sold_date >= now - HISTORY_WINDOW
+        )).all()
+        with self._lock:
+            self._ingest(rows, now)
+            self._advance(now)
+            self._watermark = max(self._watermark, watermark)
+            self._fresh_at = time.monotonic()
+        self.refreshes += 1
+        return len(rows)
+
+    def refresh_after_ingest(self, db: Session) -> None:
+        """Rattrapage immédiat après une ingestion de ventes du processus (sans échouer la requête)"""
+        try:
+            self.refresh(db)
+        except Exception as e:
+            logger.error(f"Top movers non rafraîchis après ingestion: {e}")
+
+    def _query(self):
+        # Ventes rattachées à la fiche canonique (fiches fusionnées)
+        canonical = Card.__table__.alias("canonical")
+        return select(
+            Sale.id, canonical.c.id, canonical.c.normalized_name, Sale.price, Sale.sold_date
+        ).join(
+            Card, Sale.card_id == Card.id
+        ).join(
+            canonical, canonical.c.id == func.coalesce(Card.merged_into_id, Card.id)
+        )
+
+    def _ingest(self, rows, now: datetime) -> None:
+        touched = set()
+        oldest = now - HISTORY_WINDOW
+        for sale_id, card_id, card_name, price, sold_date in rows:
+            if sale_id in self._seen or sold_date < oldest:
+                continue
+            window = self._windows.get(card_id)
+            if window is None:
+                window = self._windows[card_id] = CardWindow(card_name)
+            insort(window.sales, (sold_date, sale_id, price))
+            self._seen[sale_id] = card_id
+            touched.add(card_id)
+        for card_id in touched:
+            self._evaluate(card_id, now)
+        self._compact()
+
+    def _advance(self, now: datetime) -> None:
+        """Réévalue les cartes dont une vente a changé de fenêtre depuis le dernier passage"""
+        due = set()
+        while self._transitions and self._transitions[0][0] <= now:
+            at, card_id = heapq.heappop(self._transitions)
+            window = self._windows.get(card_id)
+            # Entrée périmée: la carte a été réévaluée depuis
+            if window is not None and window.next_transition == at:
+                due.add(card_id)
+        for card_id in due:
+            self._evaluate(card_id, now)
+        self._compact()
+
+    def _evaluate(self, card_id: int, now: datetime) -> None:
+        self.evaluations += 1
+        window = self._windows[card_id]
+        sales = window.sales
+        expired = bisect_left(sales, (now - HISTORY_WINDOW,))
+        for _, sale_id, _ in sales[:expired]:
+            del self._seen[sale_id]
+        del sales[:expired]
+        if not sales:
+            del self._windows[card_id]
+            self._movers.pop(card_id, None)
+            return
+
+        recent_start = bisect_left(sales, (now - RECENT_WINDOW,))
+        volume_start = bisect_left(sales, (now - VOLUME_WINDOW,))
+        recent = [price for _, _, price in sales[recent_start:]]
+        prior = [price for _, _, price in sales[:recent_start]]
+
+        # Prochain changement de fenêtre d'une vente de la carte
+        transitions = [sales[0][0] + HISTORY_WINDOW]
+        if volume_start < len(sales):
+            transitions.append(sales[volume_start][0] + VOLUME_WINDOW)
+        if recent_start < len(sales):
+            transitions.append(sales[recent_start][0] + RECENT_WINDOW)
+        window.next_transition = min(transitions)
+        heapq.heappush(self._transitions, (window.next_transition, card_id))
+
+        if len(recent) < self.min_sales or len(prior) < self.min_sales:
+            self._movers.pop(card_id, None)
+            return
+        current_price = statistics.median(recent)
+        previous_price = statistics.median(prior)
+        change = round((current_price / previous_price - 1) * 100, 2) if previous_price else 0.0
+
+        self._version += 1
+        self._movers[card_id] = (self._version, {
+            "card_id": card_id,
+            "card_name": window.card_name,
+            "current_price": current_price,
+            "change_24h": change,
+            "volume_7d": len(sales) - volume_start,
+            "trend": "up" if change > 0 else "down",
+        })
+        if change > 0:
+            heapq.heappush(self._gainers, (-change, card_id, self._version))
+        elif change < 0:
+            heapq.heappush(self._losers, (change, card_id, self._version))
+
+    def _compact(self) -> None:
+        # Entrées périmées accumulées: tas reconstruits depuis les entrées courantes
+        limit = 2 * len(self._movers) + 64
+        if len(self._gainers) > limit or len(self._losers) > limit:
+            self._gainers = [(-entry["change_24h"], card_id, version)
+                             for card_id, (version, entry) in self._movers.items() if entry["change_24h"] > 0]
+            self._losers = [(entry["change_24h"], card_id, version)
+                            for card_id, (version, entry) in self._movers.items() if entry["change_24h"] < 0]
+            heapq.heapify(self._gainers)
+            heapq.heapify(self._losers)
+        if len(self._transitions) > 2 * len(self._windows) + 64:
+            self._transitions = [
+                (window.next_transition, card_id) for card_id, window in self._windows.items()
+            ]
+            heapq.heapify(self._transitions)
+
+    # =========================
+    # LECTURE
+    # =========================
+    def top(self, limit: int, losers: bool = False) -> List[Dict]:
+        """Plus fortes hausses (ou baisses) de prix, de la plus forte à la plus faible"""
+        with self._lock:
+            return self._top(self._losers if losers else self._gainers, limit)
+
+    def leaderboard(self, limit: int) -> Dict[str, List[Dict]]:
+        """
+        `limit` plus fortes hausses, baisses et variations (en valeur
+        absolue, hausses et baisses confondues)
+        """
+        with self._lock:
+            gainers = self._top(self._gainers, limit)
+            losers = self._top(self._losers, limit)
+        movers = sorted(gainers + losers, key=lambda entry: (-abs(entry["change_24h"]), entry["card_id"]))
+        return {"top_movers": movers[:limit], "top_gainers": gainers, "top_losers": losers}
+
+    def _top(self, heap: List[Tuple[float, int, int]], limit: int) -> List[Dict]:
+        # Dépile jusqu'à `limit` entrées à jour; les périmées sont abandonnées,
+        # les autres remises dans le tas
+        valid = []
+        while heap and len(valid) < limit:
+            item = heapq.heappop(heap)
+            current = self._movers.get(item[1])
+            if current is not None and current[0] == item[2]:
+                valid.append(item)
+        for item in valid:
+            heapq.heappush(heap, item)
+        return [dict(self._movers[card_id][1]) for _, card_id, _ in valid]
+
+    def get_stats(self) -> Dict:
+        age = self.age
+        return {
+            "cards": len(self._windows),
+            "ranked": len(self._movers),
+            "sales": len(self._seen),
+            "fresh": age is not None and age <= self.max_staleness,
+            "age_seconds": round(age, 3) if age is not None else None,
+            "max_staleness_seconds": self.max_staleness,
+            "watermark": self._watermark,
+            "rebuilds": self.rebuilds,
+            "refreshes": self.refreshes,
+            "evaluations": self.evaluations,
+            "last_rebuild_seconds": round(self.last_rebuild_seconds, 4),
+            "hits": self.hits,
+            "fallbacks": self.fallbacks,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            rebuild = self._rebuilt_at is None or time.monotonic() - self._rebuilt_at >= self.rebuild_seconds
+            await asyncio.to_thread(self._rebuild_safely if rebuild else self._refresh_safely)
+            await asyncio.sleep(self.refresh_seconds)
+
+    def _rebuild_safely(self) -> None:
+        self._with_session(self.rebuild)
+
+    def _refresh_safely(self) -> None:
+        self._with_session(self.refresh)
+
+    def _with_session(self, operation) -> None:
+        db = SessionLocal()
+        try:
+            operation(db)
+        except Exception as e:
+            # L'âge du classement continue d'augmenter: recalcul depuis la base au-delà du seuil
+            logger.error(f"Top movers non rafraîchis: {e}")
+        finally:
+            db.close()
+
+
+def compute_leaderboard(db: Session, limit: int, now: Optional[datetime] = None) -> Dict[str, List[Dict]]:
+    """Classement recalculé depuis la base (classement en mémoire pas encore prêt ou en retard)"""
+    movers = PriceMovers()
+    movers.rebuild(db, now)
+    return movers.leaderboard(limit)
@@ -0,0 +1,455 @@
+"""
+Archivage des ventes anciennes en fichiers Parquet partitionnés par mois.
+
+La table `sales` ne garde que la fenêtre chaude: les ventes des mois
+entièrement plus anciens que `sales_archive_after_days` jours sont
+déplacées dans `sales_archive_dir/month=AAAA-MM/part-*.parquet`
+(compression `sales_archive_compression`, triées par carte puis date: les
+statistiques des row groups écartent les autres cartes à la lecture). Les
+index de `sales` restent petits et l'ingestion rapide quand l'historique
+grandit.
+
+Ventes jamais archivées, quel que soit leur âge: les
+`max_sales_for_floor` plus récentes de chaque carte et de chaque (carte,
+grade), seules utilisées par le calcul du prix plancher.
+
+Lecture (`price_points`): partitions des mois demandés seulement, fichiers
+ouverts en mémoire mappée. Un fichier est écrit (renommage atomique) avant
+la suppression des lignes en base: après une interruption entre les deux,
+une vente peut exister dans les deux tiers ou dans deux fichiers, les
+lectures dédoublonnent par `ebay_item_id`.
+
+Chaque vente archivée est enregistrée dans `archived_sales` dans la même
+transaction que sa suppression: l'ingestion eBay et l'import ne la
+réinsèrent pas (`archived_item_ids`). `archived_sales_totals` garde le
+nombre et la somme des prix archivés par mois et par langue: les totaux du
+dashboard incluent l'archive sans lire les fichiers (`archived_totals`).
+`reindex` reconstruit les deux tables depuis les fichiers.
+
+Les ventes archivées gardent leur `card_id` d'origine: les lectures
+incluent toutes les fiches fusionnées, directement ou non, dans la carte
+demandée (`merged_card_ids`).
+
+Rétention: `purge` supprime les partitions de plus de
+`sales_archive_retention_months` mois (0: conservées indéfiniment) et
+leurs totaux; les `ebay_item_id` restent réservés.
+"""
+
+import os
+import shutil
+import time
+from datetime import datetime, timedelta
+from importlib.util import find_spec
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models import ArchivedSale, ArchivedSalesTotal, Card, Sale
+import logging
+
+logger = logging.getLogger(__name__)
+
+ARROW_AVAILABLE = find_spec("pyarrow") is not None
+if not ARROW_AVAILABLE:
+    logger.info("Archivage des ventes non disponible (pyarrow non installé)")
+
+# Toutes les colonnes de `sales`: l'archive garde l'enregistrement complet
+ARCHIVED_COLUMNS = [
+    "id", "card_id", "ebay_item_id", "title", "price", "shipping_cost",
+    "sold_date", "psa_grade", "condition", "created_at",
+]
+PARTITION_PREFIX = "month="
+DELETE_CHUNK = 1000
+
+
+class SalesArchiveService:
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or settings.sales_archive_dir
+        self.after_days = settings.sales_archive_after_days
+        self.retention_months = settings.sales_archive_retention_months
+        self.compression = settings.sales_archive_compression
+        self.row_group_size = settings.sales_archive_row_group_size
+
+    # =========================
+    # ARCHIVAGE
+    # =========================
+    def archive(self, db: Session, older_than_days: Optional[int] = None) -> int:
+        """
+        Déplace les ventes plus anciennes que l'horizon vers l'archive, un
+        mois à la fois (du plus ancien au plus récent). Retourne le nombre
+        de ventes archivées.
+        """
+        if not ARROW_AVAILABLE:
+            raise RuntimeError("pyarrow est requis pour archiver les ventes")
+
+        days = self.after_days if older_than_days is None else older_than_days
+        # Mois complets seulement: un fichier par mois et par passage
+        cutoff = _month_start(datetime.utcnow() - timedelta(days=days))
+        oldest = db.query(func.min(Sale.sold_date)).filter(Sale.sold_date < cutoff).scalar()
+        if oldest is None:
+            return 0
+
+        archived = 0
+        month = _month_start(oldest)
+        while month < cutoff:
+            next_month = _next_month(month)
+            archived += self._archive_month(db, month, next_month)
+            month = next_month
+
+        logger.info(f"{archived} ventes de plus de {days} jours archivées dans {self.directory}")
+        return archived
+
+    def _archive_month(self, db: Session, start: datetime, end: datetime) -> int:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        started = time.perf_counter()
+        keep = settings.max_sales_for_floor
+        order = (Sale.sold_date.desc(), Sale.id.desc())
+        # Le rang d'une vente ne dépend que des ventes plus récentes: la
+        # fenêtre peut se limiter aux ventes depuis le début du mois
+        ranked = select(
+            *[Sale.__table__.c[name] for name in ARCHIVED_COLUMNS],
+            func.row_number().over(partition_by=Sale.card_id, order_by=order).label("card_rank"),
+            func.row_number().over(partition_by=(Sale.card_id, Sale.psa_grade), order_by=order).label("grade_rank"),
+        ).where(Sale.sold_date >= start).subquery()
+        stmt = select(
+            *[ranked.c[name] for name in ARCHIVED_COLUMNS]
+        ).where(
+            ranked.c.sold_date < end,
+            ranked.c.card_rank > keep,
+            ranked.c.grade_rank > keep,
+        ).order_by(ranked.c.card_id, ranked.c.sold_date, ranked.c.id)
+
+        partition = os.path.join(self.directory, f"{PARTITION_PREFIX}{start:%Y-%m}")
+        path = os.path.join(partition, f"part-{datetime.utcnow():%Y%m%dT%H%M%S%f}.parquet")
+        temporary = path + ".tmp"
+        schema = archive_schema()
+        ids: List[int] = []
+        item_ids: List[str] = []
+        writer = None
+        try:
+            result = db.execute(stmt.execution_options(yield_per=self.row_group_size))
+            for rows in result.partitions():
+                if writer is None:
+                    os.makedirs(partition, exist_ok=True)
+                    writer = pq.ParquetWriter(temporary, schema, compression=self.compression)
+                columns = list(zip(*rows))
+                writer.write_table(pa.table(
+                    [pa.array(values, type=schema.field(name).type) for name, values in zip(ARCHIVED_COLUMNS, columns)],
+                    schema=schema
+                ), row_group_size=self.row_group_size)
+                ids.extend(columns[0])
+                item_ids.extend(columns[2])
+        except Exception:
+            if writer is not None:
+                writer.close()
+                os.remove(temporary)
+            raise
+        if writer is None:
+            return 0
+        writer.close()
+        os.replace(temporary, path)
+
+        # Fichier complet sur disque: les lignes peuvent quitter la table
+        # chaude, leurs ebay_item_id restent réservés (même transaction)
+        month = f"{start:%Y-%m}"
+        totals: Dict[Optional[str], List] = {}
+        try:
+            for offset in range(0, len(ids), DELETE_CHUNK):
+                chunk = slice(offset, offset + DELETE_CHUNK)
+                for language, count, price in db.execute(
+                    select(Card.language, func.count(Sale.id), func.sum(Sale.price))
+                    .join(Card, Sale.card_id == Card.id)
+                    .where(Sale.id.in_(ids[chunk]))
+                    .group_by(Card.language)
+                ):
+                    total = totals.setdefault(language, [0, 0.0])
+                    total[0] += count
+                    total[1] += price or 0.0
+                db.execute(delete(Sale).where(Sale.id.in_(ids[chunk])))
+                db.execute(insert(ArchivedSale), [
+                    {"ebay_item_id": item_id, "sale_id": sale_id, "month": month}
+                    for sale_id, item_id in zip(ids[chunk], item_ids[chunk])
+                ])
+            _add_totals(db, month, totals)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        logger.info(
+            f"Ventes {start:%Y-%m}: {len(ids)} archivées dans {path} "
+            f"en {time.perf_counter() - started:.2f}s"
+        )
+        return len(ids)
+
+    def purge(self, db: Session, now: Optional[datetime] = None) -> int:
+        """Supprime les partitions au-delà de la rétention; retourne le nombre de mois supprimés"""
+        if self.retention_months <= 0:
+            return 0
+        oldest_kept = _month_start(now or datetime.utcnow())
+        for _ in range(self.retention_months):
+            oldest_kept = _previous_month(oldest_kept)
+        purged = 0
+        for month, partition in self._partitions():
+            if month < oldest_kept:
+                # Totaux d'abord: une partition sans totaux sous-compte, l'inverse compterait des ventes disparues
+                db.execute(delete(ArchivedSalesTotal).where(ArchivedSalesTotal.month == f"{month:%Y-%m}"))
+                db.commit()
+                shutil.rmtree(partition)
+                purged += 1
+        if purged:
+            logger.info(f"{purged} mois de ventes archivées purgés (avant {oldest_kept:%Y-%m})")
+        return purged
+
+    def reindex(self, db: Session) -> int:
+        """
+        Reconstruit `archived_sales` et `archived_sales_totals` depuis les
+        fichiers (archive écrite avant ces tables). Les ventes encore
+        présentes dans la table chaude (archivage interrompu) sont ignorées.
+        Retourne le nombre de ventes archivées indexées.
+        """
+        import pyarrow.parquet as pq
+
+        languages = dict(db.execute(select(Card.id, Card.language)).all())
+        db.execute(delete(ArchivedSale))
+        db.execute(delete(ArchivedSalesTotal))
+        indexed = 0
+        for month, partition in self._partitions():
+            name = f"{month:%Y-%m}"
+            # Une vente peut être dans deux fichiers du même mois
+            sales: Dict[str, Tuple[int, int, float]] = {}
+            for path in self._partition_files(partition):
+                table = pq.read_table(path, columns=["ebay_item_id", "id", "card_id", "price"], memory_map=True)
+                for item_id, sale_id, card_id, price in zip(*(column.to_pylist() for column in table.columns)):
+                    sales.setdefault(item_id, (sale_id, card_id, price))
+            item_ids = list(sales)
+            for offset in range(0, len(item_ids), DELETE_CHUNK):
+                hot = set(db.execute(
+                    select(Sale.ebay_item_id).where(Sale.ebay_item_id.in_(item_ids[offset:offset + DELETE_CHUNK]))
+                ).scalars())
+                for item_id in hot:
+                    del sales[item_id]
+
+            totals: Dict[Optional[str], List] = {}
+            for sale_id, card_id, price in sales.values():
+                total = totals.setdefault(languages.get(card_id), [0, 0.0])
+                total[0] += 1
+                total[1] += price
+            rows = [{"ebay_item_id": item_id, "sale_id": sale[0], "month": name} for item_id, sale in sales.items()]
+            for offset in range(0, len(rows), DELETE_CHUNK):
+                db.execute(insert(ArchivedSale), rows[offset:offset + DELETE_CHUNK])
+            _add_totals(db, name, totals)
+            indexed += len(rows)
+        db.commit()
+        logger.info(f"Index de l'archive reconstruit: {indexed} ventes")
+        return indexed
+
+    # =========================
+    # LECTURE
+    # =========================
+    def price_points(self, db: Session, card_id: int, since: datetime) -> List[Tuple[int, str, datetime, float]]:
+        """Ventes archivées (id, ebay_item_id, date, prix) d'une carte et de ses fiches fusionnées depuis `since`"""
+        files = self.files(since=since)
+        if not files:
+            return []
+        import pyarrow.parquet as pq
+
+        card_ids = merged_card_ids(db, card_id)
+        columns = ["id", "ebay_item_id", "sold_date", "price"]
+        points = []
+        for path in files:
+            table = pq.read_table(
+                path,
+                columns=columns,
+                filters=[("card_id", "in", card_ids), ("sold_date", ">=", since)],
+                memory_map=True,
+            )
+            points.extend(zip(*(table.column(name).to_pylist() for name in columns)))
+        return points
+
+    def iter_sales(
+        self,
+        db: Session,
+        card_ids: Optional[List[int]] = None,
+        psa_grade: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        batch_size: int = 5000
+    ) -> Iterator[List[Dict]]:
+        """
+        Ventes archivées (colonnes de `sales`) par paquets, mois par mois,
+        lues en flux (`pyarrow.dataset`). Dédoublonnées par `ebay_item_id`
+        dans le mois et contre la table chaude (archivage interrompu).
+        """
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+
+        first_month = _month_start(date_from) if date_from is not None else None
+        conditions = []
+        if card_ids is not None:
+            conditions.append(pc.field("card_id").isin(card_ids))
+        if psa_grade:
+            conditions.append(pc.field("psa_grade") == psa_grade)
+        if date_from is not None:
+            conditions.append(pc.field("sold_date") >= date_from)
+        if date_to is not None:
+            conditions.append(pc.field("sold_date") < date_to)
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+
+        for month, partition in self._partitions():
+            if first_month is not None and month < first_month:
+                continue
+            if date_to is not None and month >= date_to:
+                break
+            files = self._partition_files(partition)
+            if not files:
+                continue
+            seen: Set[str] = set()
+            dataset = ds.dataset(files, schema=archive_schema(), format="parquet")
+            for batch in dataset.to_batches(filter=expression, batch_size=batch_size):
+                rows = [row for row in batch.to_pylist() if row["ebay_item_id"] not in seen]
+                if not rows:
+                    continue
+                hot = set(db.execute(
+                    select(Sale.ebay_item_id).where(Sale.ebay_item_id.in_([row["ebay_item_id"] for row in rows]))
+                ).scalars())
+                seen.update(row["ebay_item_id"] for row in rows)
+                rows = [row for row in rows if row["ebay_item_id"] not in hot]
+                if rows:
+                    yield rows
+
+    def files(self, since: Optional[datetime] = None) -> List[str]:
+        """Fichiers des partitions du mois de `since` et suivants (tous sans `since`)"""
+        first_month = _month_start(since) if since is not None else None
+        return [
+            path
+            for month, partition in self._partitions()
+            if first_month is None or month >= first_month
+            for path in self._partition_files(partition)
+        ]
+
+    def get_stats(self) -> Dict:
+        stats = {"directory": self.directory, "months": 0, "files": 0, "rows": 0, "bytes": 0, "oldest_month": None}
+        files = self.files()
+        if not files:
+            return stats
+        import pyarrow.parquet as pq
+
+        months = [month for month, _ in self._partitions()]
+        stats.update({
+            "months": len(months),
+            "files": len(files),
+            "rows": sum(pq.ParquetFile(path).metadata.num_rows for path in files),
+            "bytes": sum(os.path.getsize(path) for path in files),
+            "oldest_month": f"{months[0]:%Y-%m}",
+        })
+        return stats
+
+    @staticmethod
+    def _partition_files(partition: str) -> List[str]:
+        return [
+            os.path.join(partition, name)
+            for name in sorted(os.listdir(partition))
+            if name.endswith(".parquet")
+        ]
+
+    def _partitions(self) -> Iterator[Tuple[datetime, str]]:
+        """(mois, répertoire) des partitions, du plus ancien au plus récent"""
+        if not os.path.isdir(self.directory):
+            return
+        for name in sorted(os.listdir(self.directory)):
+            if not name.startswith(PARTITION_PREFIX):
+                continue
+            try:
+                month = datetime.strptime(name[len(PARTITION_PREFIX):], "%Y-%m")
+            except ValueError:
+                continue
+            yield month, os.path.join(self.directory, name)
+
+
+def archived_item_ids(db: Session, item_ids: Iterable[str]) -> Set[str]:
+    """`ebay_item_id` de `item_ids` déjà archivés (ventes à ne pas réinsérer)"""
+    item_ids = list(item_ids)
+    if not item_ids:
+        return set()
+    return set(db.execute(
+        select(ArchivedSale.ebay_item_id).where(ArchivedSale.ebay_item_id.in_(item_ids))
+    ).scalars())
+
+
+def archived_totals(db: Session) -> Dict[Optional[str], Tuple[int, float]]:
+    """{langue: (nombre, somme des prix)} des ventes archivées"""
+    return {
+        language: (count, float(total))
+        for language, count, total in db.execute(
+            select(
+                ArchivedSalesTotal.language,
+                func.sum(ArchivedSalesTotal.sales_count),
+                func.sum(ArchivedSalesTotal.total_price)
+            ).group_by(ArchivedSalesTotal.language)
+        )
+    }
+
+
+def _add_totals(db: Session, month: str, totals: Dict[Optional[str], List]) -> None:
+    for language, (count, price) in totals.items():
+        row = db.execute(
+            select(ArchivedSalesTotal).where(
+                ArchivedSalesTotal.month == month,
+                ArchivedSalesTotal.language.is_(None) if language is None else ArchivedSalesTotal.language == language
+            )
+        ).scalar_one_or_none()
+        if row is None:
+            db.add(ArchivedSalesTotal(month=month, language=language, sales_count=count, total_price=price))
+        else:
+            row.sales_count += count
+            row.total_price += price
+    db.flush()
+
+
+def merged_card_ids(db: Session, card_id: int) -> List[int]:
+    """La carte et toutes les fiches fusionnées dans elle, directement ou en chaîne"""
+    card_ids = [card_id]
+    frontier = [card_id]
+    while frontier:
+        frontier = [
+            merged_id for merged_id in db.execute(
+                select(Card.id).where(Card.merged_into_id.in_(frontier))
+            ).scalars()
+            if merged_id not in card_ids
+        ]
+        card_ids.extend(frontier)
+    return card_ids
+
+
+def archive_schema():
+    """Schéma Arrow des fichiers d'archive (colonnes de `sales`)"""
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.int64()),
+        ("card_id", pa.int64()),
+        ("ebay_item_id", pa.string()),
+        ("title", pa.string()),
+        ("price", pa.float64()),
+        ("shipping_cost", pa.float64()),
+        ("sold_date", pa.timestamp("us")),
+        ("psa_grade", pa.string()),
+        ("condition", pa.string()),
+        ("created_at", pa.timestamp("us")),
+    ])
+
+
+def _month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def _next_month(month: datetime) -> datetime:
+    return datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _previous_month(month: datetime) -> datetime:
+    return datetime(month.year - (month.month == 1), (month.month - 2) % 12 + 1, 1)
@@ -0,0 +1,290 @@
+"""
+Import en masse de ventes historiques depuis des fichiers CSV ou NDJSON.
+
+Le fichier est lu par paquets (jamais chargé entièrement en mémoire). Pour
+chaque paquet:
+1. Parsing des titres (nom normalisé, grade PSA, langue, set, numéro)
+2. Déduplication sur `ebay_item_id` (dans le paquet, contre la DB et contre
+   les ventes archivées)
+3. Résolution des cartes (registre en mémoire), création des cartes manquantes
+4. Insertion: COPY sur PostgreSQL, `executemany` sur SQLite
+"""
+
+import csv
+import io
+import json
+import time
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional, TextIO
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from app.models import Sale
+from app.services.card_normalizer import CardNormalizer
+from app.services.card_registry import CardRegistry
+from app.services.change_events import ChangeTracker
+from app.services.ebay_service import eBayService
+from app.services.sales_archive import archived_item_ids
+import logging
+
+logger = logging.getLogger(__name__)
+
+SALE_IMPORT_COLUMNS = [
+    "card_id", "ebay_item_id", "title", "price", "shipping_cost",
+    "sold_date", "psa_grade", "condition", "created_at",
+]
+
+
+class SalesImporter:
+    """
+    Charge des fichiers de ventes par paquets avec rapport de débit.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 5000,
+        changes: Optional[ChangeTracker] = None,
+        card_registry: Optional[CardRegistry] = None
+    ):
+        self.chunk_size = chunk_size
+        # Optionnel: signaler les nouvelles ventes à la détection incrémentale
+        self.changes = changes
+        # Partagé avec l'ingestion eBay quand il est fourni
+        self.card_registry = card_registry or CardRegistry()
+        self.card_normalizer = CardNormalizer()
+        self.ebay_service = eBayService()
+
+    def import_file(
+        self,
+        db: Session,
+        stream: TextIO,
+        file_format: str = "csv",
+        on_progress: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """
+        Importe un flux texte CSV ou NDJSON.
+
+        Args:
+            db: Session SQLAlchemy (un commit par paquet)
+            stream: Fichier texte ouvert
+            file_format: "csv" ou "ndjson"
+            on_progress: Callback appelé après chaque paquet avec les stats
+
+        Returns:
+            Statistiques d'import (lignes lues, insérées, doublons, débit...)
+        """
+        if file_format == "csv":
+            records = csv.DictReader(stream)
+        elif file_format == "ndjson":
+            records = (_parse_json_line(line) for line in stream if line.strip())
+        else:
+            raise ValueError(f"Format d'import inconnu: {file_format}")
+
+        stats = {
+            "rows_read": 0,
+            "rows_inserted": 0,
+            "duplicates": 0,
+            "invalid": 0,
+            "cards_created": 0,
+            "chunks": 0,
+            "elapsed_seconds": 0.0,
+            "rows_per_second": 0.0,
+        }
+        started = time.perf_counter()
+
+        for chunk in _chunked(records, self.chunk_size):
+            self._import_chunk(db, chunk, stats)
+            stats["chunks"] += 1
+            stats["elapsed_seconds"] = time.perf_counter() - started
+            stats["rows_per_second"] = stats["rows_read"] / stats["elapsed_seconds"] if stats["elapsed_seconds"] else 0.0
+
+            logger.info(
+                f"Import: {stats['rows_read']} lignes lues, {stats['rows_inserted']} insérées "
+                f"({stats['rows_per_second']:.0f} lignes/s)"
+            )
+            if on_progress:
+                on_progress(dict(stats))
+
+        return stats
+
+    def _import_chunk(self, db: Session, chunk: List[Dict], stats: Dict) -> None:
+        stats["rows_read"] += len(chunk)
+
+        # 1. Parsing + déduplication dans le paquet
+        parsed: Dict[str, Dict] = {}
+        for record in chunk:
+            row = self._parse_record(record)
+            if row is None:
+                stats["invalid"] += 1
+            elif row["ebay_item_id"] in parsed:
+                stats["duplicates"] += 1
+            else:
+                parsed[row["ebay_item_id"]] = row
+
+        if not parsed:
+            return
+
+        # 2. Déduplication contre les ventes déjà en base ou archivées
+        existing = set(db.execute(
+            select(Sale.ebay_item_id).where(Sale.ebay_item_id.in_(list(parsed)))
+        ).scalars())
+        existing |= archived_item_ids(db, parsed)
+        stats["duplicates"] += len(existing)
+        rows = [row for item_id, row in parsed.items() if item_id not in existing]
+
+        if not rows:
+            return
+
+        # 3. Résolution des cartes en lot
+        card_ids = self._resolve_cards(db, rows, stats)
+
+        now = datetime.utcnow()
+        sales = [
+            {
+                "card_id": card_ids[(row["normalized_name"], row["language"])],
+                "ebay_item_id": row["ebay_item_id"],
+                "title": row["title"],
+                "price": row["price"],
+                "shipping_cost": row["shipping_cost"],
+                "sold_date": row["sold_date"],
+                "psa_grade": row["psa_grade"],
+                "condition": row["condition"],
+                "created_at": now,
+            }
+            for row in rows
+        ]
+
+        # 4. Insertion
+        if db.get_bind().dialect.name == "postgresql":
+            inserted = self._copy_postgres(db, sales)
+        else:
+            inserted = self._executemany(db, sales)
+
+        db.commit()
+        stats["rows_inserted"] += inserted
+
+        if self.changes is not None:
+            for card_id, psa_grade in {(sale["card_id"], sale["psa_grade"]) for sale in sales}:
+                self.changes.sale_added(card_id, psa_grade)
+        stats["duplicates"] += len(sales) - inserted
+
+    def _parse_record(self, record: Dict) -> Optional[Dict]:
+        """Valide une ligne brute et applique le parseur de titres"""
+        if not isinstance(record, dict):
+            # Ligne NDJSON illisible ou qui n'est pas un objet
+            return None
+        try:
+            item_id = str(record.get("ebay_item_id") or "").strip()
+            title = (record.get("title") or "").strip()
+            if not item_id or not title:
+                return None
+
+            sold_date = record.get("sold_date")
+            if not isinstance(sold_date, datetime):
+                sold_date = _parse_datetime(str(sold_date))
+
+            language = record.get("language") or self.ebay_service.extract_language(title)
+
+            return {
+                "ebay_item_id": item_id,
+                "title": title,
+                "price": float(record["price"]),
+                "shipping_cost": float(record.get("shipping_cost") or 0.0),
+                "sold_date": sold_date,
+                "psa_grade": record.get("psa_grade") or self.ebay_service.extract_psa_grade(title),
+                "condition": record.get("condition") or None,
+                "normalized_name": self.card_normalizer.normalize_card_name(title),
+                "language": language.upper(),
+                "card_set": self.card_normalizer.extract_card_set(title),
+                "card_number": self.card_normalizer.extract_card_number(title),
+            }
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return None
+
+    def _resolve_cards(self, db: Session, rows: List[Dict], stats: Dict) -> Dict[tuple, int]:
+        """
+        Retourne {(normalized_name, language): card_id}, en créant les cartes manquantes.
+        """
+        wanted = {}
+        for row in rows:
+            wanted.setdefault((row["normalized_name"], row["language"]), {
+                "raw_name": row["title"],
+                "card_set": row["card_set"],
+                "card_number": row["card_number"],
+            })
+
+        misses = self.card_registry.misses
+        card_ids = self.card_registry.resolve(db, wanted)
+        stats["cards_created"] += self.card_registry.misses - misses
+
+        return card_ids
+
+    def _executemany(self, db: Session, sales: List[Dict]) -> int:
+        """Insertion `executemany` (SQLite et autres bases)"""
+        stmt = insert(Sale.__table__)
+        if db.get_bind().dialect.name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+            stmt = sqlite_insert(Sale.__table__).on_conflict_do_nothing(index_elements=["ebay_item_id"])
+        result = db.execute(stmt, sales)
+        return result.rowcount if result.rowcount is not None and result.rowcount >= 0 else len(sales)
+
+    def _copy_postgres(self, db: Session, sales: List[Dict]) -> int:
+        """
+        COPY dans une table temporaire puis INSERT ... ON CONFLICT DO NOTHING
+        (une vente insérée entre-temps par un scan ne fait pas échouer le paquet).
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for sale in sales:
+            writer.writerow([
+                sale[column].isoformat() if isinstance(sale[column], datetime) else sale[column]
+                for column in SALE_IMPORT_COLUMNS
+            ])
+        buffer.seek(0)
+
+        columns = ", ".join(SALE_IMPORT_COLUMNS)
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS sales_import_staging ("
+                "card_id integer, ebay_item_id varchar, title varchar, price double precision, "
+                "shipping_cost double precision, sold_date timestamp, psa_grade varchar, "
+                "condition varchar, created_at timestamp) ON COMMIT DELETE ROWS"
+            )
+            cursor.copy_expert(f"COPY sales_import_staging ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+            cursor.execute(
+                f"INSERT INTO sales ({columns}) SELECT {columns} FROM sales_import_staging "
+                f"ON CONFLICT (ebay_item_id) DO NOTHING"
+            )
+            return cursor.rowcount
+        finally:
+            cursor.close()
+
+
+def _chunked(records: Iterator[Dict], size: int) -> Iterator[List[Dict]]:
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _parse_json_line(line: str) -> Optional[object]:
+    """Ligne NDJSON décodée, ou None si elle n'est pas du JSON valide (comptée invalide)"""
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def _parse_datetime(value: str) -> datetime:
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        from dateutil import parser
+        parsed = parser.parse(value)
+    # Les dates sont stockées en UTC naïf
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
@@ -0,0 +1,170 @@
+"""
+File de scans distribuée (Redis), consommée par les workers
+(`python -m app.worker`, voir Procfile).
+
+Une tâche = une requête de scan. Structures Redis (préfixe `queue:<nom>`):
+
+- `:tasks`    hash id → tâche JSON
+- `:attempts` hash id → nombre de réservations
+- `:pending`  liste des tâches prêtes
+- `:leases`   ensemble trié id → fin du bail (tâches en cours)
+- `:delayed`  ensemble trié id → date de nouvel essai (backoff)
+- `:dead`     liste des tâches abandonnées après `max_attempts`
+
+La réservation est atomique (script Lua): elle remet d'abord en tête de
+file les tâches dont le bail a expiré (worker arrêté ou bloqué) et celles
+dont le backoff est écoulé. Sémantique at-least-once: une tâche non
+confirmée (`ack`) avant la fin de son bail est redistribuée.
+"""
+
+import json
+import time
+import uuid
+from typing import Dict, List, Optional
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# KEYS: pending, leases, delayed, tasks, attempts, dead
+# ARGV: maintenant, durée du bail, essais maximum
+_RESERVE = """
+local now = tonumber(ARGV[1])
+local lease = tonumber(ARGV[2])
+local max_attempts = tonumber(ARGV[3])
+
+local ready = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now)
+for _, id in ipairs(ready) do
+    redis.call('ZREM', KEYS[3], id)
+    redis.call('RPUSH', KEYS[1], id)
+end
+
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)
+for _, id in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], id)
+    local attempts = tonumber(redis.call('HGET', KEYS[5], id) or '0')
+    if attempts >= max_attempts then
+        redis.call('LPUSH', KEYS[6], id)
+    else
+        redis.call('RPUSH', KEYS[1], id)
+    end
+end
+
+local id = redis.call('RPOP', KEYS[1])
+if not id then
+    return nil
+end
+local payload = redis.call('HGET', KEYS[4], id)
+if not payload then
+    return nil
+end
+redis.call('ZADD', KEYS[2], now + lease, id)
+local attempts = redis.call('HINCRBY', KEYS[5], id, 1)
+return {id, payload, tostring(attempts)}
+"""
+
+
+class ScanQueue:
+    """
+    Args:
+        redis_client: Client Redis (`decode_responses=True`)
+        name: Nom de la file (plusieurs files indépendantes possibles)
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        name: Optional[str] = None,
+        visibility_timeout: Optional[float] = None,
+        max_attempts: Optional[int] = None
+    ):
+        self.redis = redis_client
+        self.name = name or settings.scan_queue_name
+        self.visibility_timeout = visibility_timeout or settings.scan_queue_visibility_seconds
+        self.max_attempts = max_attempts or settings.scan_queue_max_attempts
+        prefix = f"queue:{self.name}"
+        self.pending_key = f"{prefix}:pending"
+        self.leases_key = f"{prefix}:leases"
+        self.delayed_key = f"{prefix}:delayed"
+        self.tasks_key = f"{prefix}:tasks"
+        self.attempts_key = f"{prefix}:attempts"
+        self.dead_key = f"{prefix}:dead"
+        self._reserve = redis_client.register_script(_RESERVE)
+
+    def enqueue(self, tasks: List[Dict]) -> List[str]:
+        """Ajoute des tâches (une par requête de scan) et renvoie leurs identifiants"""
+        ids = []
+        pipe = self.redis.pipeline(transaction=True)
+        for task in tasks:
+            task_id = uuid.uuid4().hex
+            pipe.hset(self.tasks_key, task_id, json.dumps(task))
+            pipe.lpush(self.pending_key, task_id)
+            ids.append(task_id)
+        pipe.execute()
+        return ids
+
+    def reserve(self) -> Optional[Dict]:
+        """
+        Réserve la prochaine tâche pour `visibility_timeout` secondes.
+
+        Returns:
+            `{"id", "task", "attempts"}` ou None si la file est vide
+        """
+        result = self._reserve(
+            keys=[
+                self.pending_key, self.leases_key, self.delayed_key,
+                self.tasks_key, self.attempts_key, self.dead_key,
+            ],
+            args=[time.time(), self.visibility_timeout, self.max_attempts]
+        )
+        if not result:
+            return None
+        task_id, payload, attempts = result
+        return {"id": task_id, "task": json.loads(payload), "attempts": int(attempts)}
+
+    def extend(self, task_id: str) -> None:
+        """Prolonge le bail d'une tâche longue"""
+        self.redis.zadd(self.leases_key, {task_id: time.time() + self.visibility_timeout}, xx=True)
+
+    def ack(self, task_id: str) -> None:
+        """Tâche terminée: supprimée de la file"""
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zrem(self.leases_key, task_id)
+        pipe.hdel(self.tasks_key, task_id)
+        pipe.hdel(self.attempts_key, task_id)
+        pipe.execute()
+
+    def fail(self, task_id: str, attempts: int, error: str) -> None:
+        """Nouvel essai avec backoff exponentiel, ou abandon après `max_attempts`"""
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zrem(self.leases_key, task_id)
+        if attempts >= self.max_attempts:
+            logger.error(f"Tâche {task_id} abandonnée après {attempts} essais: {error}")
+            pipe.lpush(self.dead_key, task_id)
+        else:
+            delay = min(2 ** attempts * 5, 600)
+            pipe.zadd(self.delayed_key, {task_id: time.time() + delay})
+        pipe.execute()
+
+    def delay(self, task_id: str, seconds: float) -> None:
+        """Nouvel essai dans `seconds` secondes, sans compter cette réservation comme un essai"""
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zrem(self.leases_key, task_id)
+        pipe.hincrby(self.attempts_key, task_id, -1)
+        pipe.zadd(self.delayed_key, {task_id: time.time() + seconds})
+        pipe.execute()
+
+    def get_stats(self) -> Dict:
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.llen(self.pending_key)
+        pipe.zcard(self.leases_key)
+        pipe.zcard(self.delayed_key)
+        pipe.llen(self.dead_key)
+        pending, in_progress, delayed, dead = pipe.execute()
+        return {
+            "queue": self.name,
+            "pending": pending,
+            "in_progress": in_progress,
+            "delayed": delayed,
+            "dead": dead,
+        }
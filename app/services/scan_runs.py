@@ -0,0 +1,240 @@
+"""
+Exécution tracée des scans et compte rendu persistant (`scan_runs`).
+
+`ScanRunner` enchaîne, pour chaque requête de la liste, fetch → parse →
+ingest (ventes puis listings), puis une détection et l'écriture des
+alertes. Chaque étape est un span (voir `app.core.tracing`); `ScanRecorder`
+agrège les spans terminés en durées par étape et par requête, volumes,
+reprises HTTP et erreurs par catégorie.
+
+Une requête en erreur n'interrompt pas le scan: elle est comptée et le
+scan se termine en `partial`.
+"""
+
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import json
+from sqlalchemy.orm import Session
+from app.core.tracing import Span, tracer
+from app.models import Opportunity, ScanRun
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Spans agrégés en durées d'étape
+STAGES = (
+    "fetch_sales", "ingest_sales", "fetch_listings", "ingest_listings",
+    "rate_limit", "http", "parse", "detect", "alert",
+)
+
+
+class QueryStats:
+    def __init__(self, query: str):
+        self.query = query
+        self.duration = 0.0
+        self.stages: Dict[str, float] = defaultdict(float)
+        self.sales_fetched = 0
+        self.listings_fetched = 0
+        self.sales_added = 0
+        self.listings_updated = 0
+        self.http_requests = 0
+        self.http_retries = 0
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def to_dict(self) -> Dict:
+        return {
+            "query": self.query,
+            "duration_seconds": round(self.duration, 4),
+            "stages": {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            "sales_fetched": self.sales_fetched,
+            "listings_fetched": self.listings_fetched,
+            "sales_added": self.sales_added,
+            "listings_updated": self.listings_updated,
+            "http_requests": self.http_requests,
+            "http_retries": self.http_retries,
+            "errors": dict(self.errors),
+        }
+
+
+class ScanRecorder:
+    """Processeur de spans: agrège un scan par requête et par étape"""
+
+    def __init__(self):
+        self.queries: Dict[str, QueryStats] = {}
+        self.stages: Dict[str, float] = defaultdict(float)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.http_retries = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def on_end(self, span: Span) -> None:
+        query_span = span.ancestor("query")
+        stats = self._stats(query_span) if query_span is not None else None
+
+        if span.name in STAGES:
+            self.stages[span.name] += span.duration
+            if stats is not None:
+                stats.stages[span.name] += span.duration
+
+        retries = sum(1 for event in span.events if event["name"] == "retry")
+        category = span.attributes.get("error.category")
+        self.http_retries += retries
+        if category:
+            self.errors[category] += 1
+
+        if span.name == "detect":
+            self.cache_hits += span.attributes.get("cache.hits", 0)
+            self.cache_misses += span.attributes.get("cache.misses", 0)
+
+        if stats is None:
+            return
+        stats.http_retries += retries
+        if category:
+            stats.errors[category] += 1
+        if span.name == "query":
+            stats.duration = span.duration
+        elif span.name == "http":
+            stats.http_requests += 1
+        elif span.name == "fetch_sales":
+            stats.sales_fetched += span.attributes.get("items", 0)
+        elif span.name == "fetch_listings":
+            stats.listings_fetched += span.attributes.get("items", 0)
+        elif span.name == "ingest_sales":
+            stats.sales_added += span.attributes.get("rows", 0)
+        elif span.name == "ingest_listings":
+            stats.listings_updated += span.attributes.get("rows", 0)
+
+    def _stats(self, query_span: Span) -> QueryStats:
+        stats = self.queries.get(query_span.span_id)
+        if stats is None:
+            stats = self.queries[query_span.span_id] = QueryStats(query_span.attributes.get("query", ""))
+        return stats
+
+
+class ScanRunner:
+    """
+    Scan d'une liste de requêtes (une ou une watchlist entière), enregistré
+    dans `scan_runs`.
+    """
+
+    def __init__(self, arbitrage_service):
+        self.arbitrage_service = arbitrage_service
+
+    async def run(
+        self,
+        db: Session,
+        queries: List[Dict],
+        incremental: bool = True,
+        before_commit: Optional[Callable[[Session, List[Opportunity]], None]] = None
+    ) -> Tuple[ScanRun, List[Opportunity]]:
+        """
+        Args:
+            queries: `{"search_query", "psa_grade", "language", "days_back"}`
+            before_commit: Voir `ArbitrageService.detect_opportunities`
+                (tracé comme étape `alert`)
+
+        Returns:
+            Le compte rendu du scan et les nouvelles opportunités
+        """
+        recorder = ScanRecorder()
+        failed_queries = 0
+
+        with tracer.processor(recorder), tracer.span(
+            "scan", queries=len(queries), incremental=incremental
+        ) as root:
+            scan_run = ScanRun(
+                trace_id=root.trace_id,
+                status="running",
+                incremental=incremental,
+                queries_count=len(queries)
+            )
+            db.add(scan_run)
+            db.commit()
+
+            try:
+                for query in queries:
+                    if not await self._run_query(db, query):
+                        failed_queries += 1
+
+                opportunities = await self._detect(db, incremental, before_commit)
+            except Exception:
+                db.rollback()
+                self._finish(db, scan_run, root, recorder, status="failed")
+                raise
+
+            scan_run.opportunities_found = len(opportunities)
+            scan_run.opportunities_closed = len(self.arbitrage_service.last_closed_ids)
+            status = "partial" if failed_queries or recorder.errors else "success"
+            self._finish(db, scan_run, root, recorder, status=status)
+
+        return scan_run, opportunities
+
+    async def _run_query(self, db: Session, query: Dict) -> bool:
+        search_query = query["search_query"]
+        with tracer.span("query", query=search_query) as span:
+            try:
+                await self.arbitrage_service.fetch_and_store_sales(
+                    db=db,
+                    search_query=search_query,
+                    psa_grade=query.get("psa_grade"),
+                    language=query.get("language", "EN"),
+                    days_back=query.get("days_back", 30)
+                )
+                await self.arbitrage_service.fetch_and_store_listings(
+                    db=db,
+                    search_query=search_query,
+                    psa_grade=query.get("psa_grade"),
+                    language=query.get("language", "EN")
+                )
+                return True
+            except Exception as e:
+                db.rollback()
+                span.record_exception(e)
+                logger.error(f"Scan de '{search_query}' en erreur: {e}")
+                return False
+
+    async def _detect(self, db: Session, incremental: bool, before_commit) -> List[Opportunity]:
+        floor_cache = self.arbitrage_service.floor_cache
+        hits, misses = floor_cache.hits, floor_cache.misses
+
+        def traced_before_commit(session: Session, opportunities: List[Opportunity]) -> None:
+            with tracer.span("alert", opportunities=len(opportunities)):
+                before_commit(session, opportunities)
+
+        with tracer.span("detect", incremental=incremental) as span:
+            # Hors de la boucle d'événements (le contexte de trace suit le thread)
+            opportunities = await asyncio.to_thread(
+                self.arbitrage_service.detect_opportunities,
+                db,
+                incremental=incremental,
+                before_commit=traced_before_commit if before_commit is not None else None
+            )
+            span.set_attribute("cache.hits", floor_cache.hits - hits)
+            span.set_attribute("cache.misses", floor_cache.misses - misses)
+            span.set_attribute("opportunities", len(opportunities))
+        return opportunities
+
+    def _finish(self, db: Session, scan_run: ScanRun, root: Span, recorder: ScanRecorder, status: str) -> None:
+        queries = sorted(recorder.queries.values(), key=lambda stats: stats.duration, reverse=True)
+
+        scan_run.status = status
+        scan_run.sales_added = sum(stats.sales_added for stats in queries)
+        scan_run.listings_updated = sum(stats.listings_updated for stats in queries)
+        scan_run.cache_hits = recorder.cache_hits
+        scan_run.cache_misses = recorder.cache_misses
+        scan_run.http_retries = recorder.http_retries
+        scan_run.error_count = sum(recorder.errors.values())
+        scan_run.stages_json = json.dumps({name: round(seconds, 4) for name, seconds in recorder.stages.items()})
+        scan_run.errors_json = json.dumps(dict(recorder.errors))
+        # Requêtes les plus lentes d'abord
+        scan_run.queries_json = json.dumps([stats.to_dict() for stats in queries])
+        scan_run.finished_at = datetime.utcnow()
+        scan_run.duration_seconds = round(root.duration, 4)
+        db.commit()
+
+        logger.info(
+            f"Scan {scan_run.id} ({status}): {scan_run.queries_count} requêtes en "
+            f"{scan_run.duration_seconds:.1f}s, {scan_run.error_count} erreurs"
+        )
@@ -0,0 +1,136 @@
+"""
+Worker de scan: consomme la file Redis des requêtes de scan (voir
+`app.services.scan_queue`). Autant de processus que voulu, sur une ou
+plusieurs machines, partagent la file et le budget de requêtes eBay.
+
+Chaque tâche est un scan d'une requête (ventes, listings, détection
+incrémentale) enregistré dans `scan_runs`; les alertes sont écrites dans
+l'outbox et envoyées par le processus web, dont le flux temps réel
+rattrape les opportunités écrites par le worker. Une tâche n'est confirmée
+que si son scan se termine en `success`. Les requêtes eBay consomment le
+budget global partagé via Redis (voir `app.core.rate_limit`): une tâche
+refusée par le budget est reportée sans consommer d'essai.
+
+Usage:
+    python -m app.worker
+    python -m app.worker --concurrency 2
+"""
+
+import argparse
+import asyncio
+import json
+import signal
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.redis_client import get_redis
+from app.services.alert_outbox import AlertOutboxService
+from app.services.alert_rules import AlertRulesEngine
+from app.services.alert_service import AlertService
+from app.services.arbitrage_service import ArbitrageService
+from app.services.scan_queue import ScanQueue
+from app.services.scan_runs import ScanRunner
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ScanWorker:
+    def __init__(self, queue: ScanQueue, concurrency: int = 1):
+        self.queue = queue
+        self.concurrency = concurrency
+        self.poll_interval = settings.scan_worker_poll_interval
+        self.rate_limited_delay = settings.scan_worker_rate_limited_delay
+        self.arbitrage_service = ArbitrageService()
+        self.scan_runner = ScanRunner(self.arbitrage_service)
+        self.alert_outbox = AlertOutboxService(AlertService(), rules_engine=AlertRulesEngine())
+        self._stopping = asyncio.Event()
+        self.processed = 0
+        self.failed = 0
+        self.delayed = 0
+
+    def stop(self) -> None:
+        """Arrêt propre: les tâches en cours se terminent"""
+        self._stopping.set()
+
+    async def run(self) -> None:
+        logger.info(f"Worker de scan démarré ({self.concurrency} tâches, file '{self.queue.name}')")
+        await asyncio.gather(*(self._consume() for _ in range(self.concurrency)))
+        logger.info(
+            f"Worker arrêté: {self.processed} tâches traitées, {self.failed} en erreur, "
+            f"{self.delayed} reportées"
+        )
+
+    async def _consume(self) -> None:
+        while not self._stopping.is_set():
+            reserved = self.queue.reserve()
+            if reserved is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._process(reserved)
+
+    async def _process(self, reserved) -> None:
+        task_id, task = reserved["id"], reserved["task"]
+        heartbeat = asyncio.create_task(self._extend_lease(task_id))
+        db = SessionLocal()
+        try:
+            scan_run, _ = await self.scan_runner.run(
+                db,
+                [task],
+                incremental=True,
+                before_commit=self.alert_outbox.enqueue
+            )
+            if json.loads(scan_run.errors_json or "{}").get("rate_limited"):
+                # Budget de requêtes épuisé: rien d'anormal, la tâche repasse plus tard
+                self.delayed += 1
+                logger.warning(
+                    f"Tâche {task_id} ('{task['search_query']}'): budget de requêtes épuisé, "
+                    f"reportée de {self.rate_limited_delay:.0f}s"
+                )
+                self.queue.delay(task_id, self.rate_limited_delay)
+                return
+            if scan_run.status != "success":
+                raise RuntimeError(f"scan {scan_run.id} {scan_run.status} ({scan_run.errors_json})")
+            self.queue.ack(task_id)
+            self.processed += 1
+            logger.info(f"Tâche {task_id} ('{task['search_query']}'): scan {scan_run.id} {scan_run.status}")
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Tâche {task_id} en erreur (essai {reserved['attempts']}): {e}")
+            self.queue.fail(task_id, reserved["attempts"], str(e))
+        finally:
+            heartbeat.cancel()
+            db.close()
+
+    async def _extend_lease(self, task_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.queue.visibility_timeout / 3)
+            self.queue.extend(task_id)
+
+
+async def _main(concurrency: int) -> None:
+    redis_client = get_redis()
+    if redis_client is None:
+        raise SystemExit("REDIS_URL non configuré: le worker de scan a besoin de Redis")
+
+    worker = ScanWorker(ScanQueue(redis_client), concurrency=concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    await worker.run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de scan (file Redis)")
+    parser.add_argument("--concurrency", type=int, default=settings.scan_worker_concurrency,
+                        help="Tâches traitées en parallèle par ce processus")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    asyncio.run(_main(args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Job d'archivage des opportunités clôturées (à lancer en cron).
+
+Usage:
+    python scripts/archive_opportunities.py
+    python scripts/archive_opportunities.py --older-than-days 3 --purge
+"""
+import argparse
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.core.database import SessionLocal
+from app.services.opportunity_archive import OpportunityArchiveService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archivage des opportunités clôturées")
+    parser.add_argument("--older-than-days", type=int, default=None,
+                        help="Âge minimum de clôture (défaut: OPPORTUNITY_ARCHIVE_AFTER_DAYS)")
+    parser.add_argument("--purge", action="store_true",
+                        help="Purger aussi l'historique au-delà de OPPORTUNITY_HISTORY_RETENTION_DAYS")
+    args = parser.parse_args()
+
+    service = OpportunityArchiveService()
+    db = SessionLocal()
+
+    try:
+        archived = service.archive_closed(db, older_than_days=args.older_than_days)
+        print(f"📦 {archived} opportunités archivées")
+
+        if args.purge:
+            purged = service.purge_history(db)
+            print(f"🗑️  {purged} opportunités purgées de l'historique")
+
+        stats = service.get_stats(db)
+        print(f"✅ Table chaude: {stats['active']} actives, {stats['closed']} clôturées | Historique: {stats['archived']}")
+    except Exception as e:
+        print(f"❌ Erreur : {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
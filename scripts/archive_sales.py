@@ -0,0 +1,56 @@
+"""
+Job d'archivage des ventes anciennes en Parquet partitionné par mois (à
+lancer en cron, par exemple une fois par jour).
+
+Usage:
+    python scripts/archive_sales.py
+    python scripts/archive_sales.py --older-than-days 365 --purge
+    python scripts/archive_sales.py --reindex  # archive écrite avant les tables archived_sales*
+"""
+import argparse
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.core.database import SessionLocal
+from app.services.sales_archive import SalesArchiveService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archivage des ventes anciennes (Parquet)")
+    parser.add_argument("--older-than-days", type=int, default=None,
+                        help="Horizon de la table chaude (défaut: SALES_ARCHIVE_AFTER_DAYS)")
+    parser.add_argument("--purge", action="store_true",
+                        help="Supprimer aussi les partitions au-delà de SALES_ARCHIVE_RETENTION_MONTHS")
+    parser.add_argument("--reindex", action="store_true",
+                        help="Reconstruire les ventes réservées et les totaux de l'archive depuis les fichiers")
+    args = parser.parse_args()
+
+    service = SalesArchiveService()
+    db = SessionLocal()
+
+    try:
+        if args.reindex:
+            indexed = service.reindex(db)
+            print(f"🗂️  {indexed} ventes archivées indexées")
+
+        archived = service.archive(db, older_than_days=args.older_than_days)
+        print(f"📦 {archived} ventes archivées")
+
+        if args.purge:
+            purged = service.purge(db)
+            print(f"🗑️  {purged} mois purgés de l'archive")
+
+        stats = service.get_stats()
+        print(f"✅ Archive {stats['directory']}: {stats['rows']} ventes, {stats['months']} mois, "
+              f"{stats['files']} fichiers, {stats['bytes'] / 1e6:.1f} Mo")
+    except Exception as e:
+        print(f"❌ Erreur : {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""
+Benchmarks du pipeline de scan (données synthétiques, fixtures eBay,
+serveur local). Voir `scripts/benchmarks/run.py`.
+"""
@@ -0,0 +1,192 @@
+"""
+Benchmark des agrégations du dashboard sur la copie analytique DuckDB.
+
+- génère `--sales` ventes synthétiques (10M par défaut) directement dans une
+  copie DuckDB temporaire (sans passer par la base: seul le temps des
+  requêtes est mesuré)
+- mesure chaque agrégation de `app.services.analytics` (médiane de
+  `--repeat` exécutions)
+- mesure la copie incrémentale de `--sync-sales` ventes nouvelles depuis
+  une base SQLite temporaire
+
+Le script échoue (code 1) si une agrégation dépasse `--max-ms`.
+
+Usage:
+    python -m scripts.benchmarks.analytics
+    python -m scripts.benchmarks.analytics --sales 10000000 --cards 100000 --max-ms 1000 --output analytics.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def median_ms(repeat: int, func) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return round(statistics.median(samples) * 1000, 2)
+
+
+def generate(cursor, sales: int, cards: int, now: datetime) -> None:
+    """Cartes, ventes sur 2 ans et listings synthétiques, générés par DuckDB"""
+    cursor.execute(
+        """
+        INSERT INTO cards
+        SELECT i, 'Card ' || i, 'Base Set', CASE i % 3 WHEN 0 THEN 'EN' WHEN 1 THEN 'JP' ELSE 'FR' END,
+               NULL, $now
+        FROM range(1, $cards + 1) t(i)
+        """,
+        {"cards": cards, "now": now}
+    )
+    cursor.execute(
+        """
+        INSERT INTO sales
+        SELECT i, card_id, CASE card_id % 3 WHEN 0 THEN 'EN' WHEN 1 THEN 'JP' ELSE 'FR' END,
+               round(5 + random() * 900, 2),
+               $now - to_seconds(CAST(floor(random() * 730 * 86400) AS BIGINT)),
+               CASE WHEN random() < 0.3 THEN 'PSA 10' END
+        FROM (SELECT i, 1 + CAST(floor(random() * $cards) AS INTEGER) AS card_id FROM range(1, $sales + 1) t(i))
+        ORDER BY i
+        """,
+        {"sales": sales, "cards": cards, "now": now}
+    )
+    cursor.execute(
+        """
+        INSERT INTO listings
+        SELECT i, 1 + i % $cards, round(5 + random() * 900, 2), random() < 0.8, $now
+        FROM range(1, $cards * 5 + 1) t(i)
+        """,
+        {"cards": cards, "now": now}
+    )
+
+
+def seed_new_sales(db, rows: int, cards: int, seed: int) -> None:
+    from app.models import Card, Sale
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    db.bulk_insert_mappings(Card, [
+        {"id": i, "normalized_name": f"Card {i}", "raw_name": f"Card {i}", "language": "EN"}
+        for i in range(1, cards + 1)
+    ])
+    db.bulk_insert_mappings(Sale, [
+        {
+            "card_id": rng.randint(1, cards),
+            "ebay_item_id": f"S{i}",
+            "title": f"Card {i}",
+            "price": round(rng.uniform(5, 900), 2),
+            "sold_date": now - timedelta(minutes=rng.randint(0, 60 * 24 * 30)),
+            "created_at": now,
+        }
+        for i in range(rows)
+    ])
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des agrégations du dashboard (DuckDB)")
+    parser.add_argument("--sales", type=int, default=10_000_000)
+    parser.add_argument("--cards", type=int, default=100_000)
+    parser.add_argument("--sync-sales", type=int, default=100_000, help="Ventes copiées depuis la base (0: pas de mesure)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--max-ms", type=float, default=None, help="Durée maximum d'une agrégation (médiane, ms)")
+    parser.add_argument("--output", default=None, help="Fichier JSON de résultats (défaut: stdout)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="ebay-analytics-")
+    # Avant tout import de l'application: la configuration lit l'environnement
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    logging.basicConfig(level=logging.ERROR)
+
+    from app.core.database import Base, SessionLocal, engine
+    from app.services.analytics import DUCKDB_AVAILABLE, AnalyticsStore
+
+    if not DUCKDB_AVAILABLE:
+        sys.exit("❌ duckdb et pyarrow sont requis")
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    store = AnalyticsStore(path=os.path.join(workdir, "bench.duckdb"))
+    now = datetime.utcnow()
+
+    started = time.perf_counter()
+    cursor = store._cursor()
+    cursor.execute(f"SELECT setseed({random.Random(args.seed).random()})")
+    generate(cursor, args.sales, args.cards, now)
+    cursor.close()
+    generate_seconds = time.perf_counter() - started
+    print(f"🧪 {args.sales} ventes générées en {generate_seconds:.1f}s", file=sys.stderr)
+
+    queries = {
+        "market_totals": lambda: store.market_totals(db, now),
+        "language_averages": lambda: store.language_averages(db),
+        "cards_by_sales_7d": lambda: store.cards_by_sales(db, now - timedelta(days=7), 10),
+        "cards_by_sales_30d": lambda: store.cards_by_sales(db, now - timedelta(days=30), 50),
+        "price_points_365d": lambda: store.price_points(db, 1, now - timedelta(days=365)),
+    }
+    for func in queries.values():
+        func()  # Premier appel hors mesure (cache disque chaud)
+    latencies = {name: median_ms(args.repeat, func) for name, func in queries.items()}
+
+    sync = None
+    if args.sync_sales:
+        seed_new_sales(db, args.sync_sales, min(args.cards, 1000), args.seed)
+        store.rebuild(db)  # Ventes de la base à la suite des ventes générées: repartir d'une copie vide
+        sync = {
+            "rows": args.sync_sales,
+            "seconds": round(store.last_sync_seconds, 3),
+            "rows_per_second": round(args.sync_sales / store.last_sync_seconds),
+        }
+        started = time.perf_counter()
+        store.sync(db)
+        sync["incremental_noop_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    db.close()
+    store.close()
+
+    results = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "sales": args.sales,
+        "cards": args.cards,
+        "generate_seconds": round(generate_seconds, 1),
+        "latency_ms": latencies,
+        "sync": sync,
+    }
+
+    for name, ms in latencies.items():
+        print(f"⏱️  {name:<20} {ms:>8} ms", file=sys.stderr)
+    if sync:
+        print(f"   copie: {sync['rows_per_second']} ventes/s", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        print(f"✅ Résultats écrits dans {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+    slow = [name for name, ms in latencies.items() if args.max_ms is not None and ms > args.max_ms]
+    if slow:
+        print(f"🔻 au-delà de {args.max_ms:.0f} ms: {', '.join(slow)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Vérification d'équivalence: détection incrémentale contre scan complet.
+
+Sur un jeu synthétique ingéré dans une base SQLite temporaire, chaque tour:
+1. modifie la base par le chemin d'ingestion réel (nouvelles ventes d'une
+   partie des cartes, listings repricés, nouveaux listings)
+2. lance `detect_opportunities(incremental=True)` et relève les
+   opportunités actives
+3. lance le scan complet de réconciliation sur le même état et relève de
+   nouveau les opportunités actives
+
+Les deux relevés doivent être identiques (mêmes listings, mêmes métriques):
+une opportunité créée, clôturée ou modifiée par le scan complet est un
+changement manqué par la détection incrémentale. Le script échoue (code 1)
+à la première différence.
+
+Usage:
+    python -m scripts.benchmarks.detection_equivalence
+    python -m scripts.benchmarks.detection_equivalence --cards 200 --rounds 10 --changed-ratio 0.1
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+METRIC_FIELDS = (
+    "listing_price", "floor_price", "discount_percentage",
+    "estimated_gross_profit", "estimated_net_profit", "profit_margin",
+)
+
+
+def snapshot(db) -> dict:
+    """{listing_id: métriques arrondies} des opportunités actives"""
+    from app.models import Opportunity
+
+    db.expire_all()
+    return {
+        opp.listing_id: tuple(round(getattr(opp, field), 6) for field in METRIC_FIELDS)
+        for opp in db.query(Opportunity).filter(Opportunity.is_active == True)
+    }
+
+
+def mutate(batches: list, rng: random.Random, changed_ratio: float, round_number: int) -> list:
+    """Lots d'ingestion du tour: ventes nouvelles, listings repricés et nouveaux"""
+    changed = rng.sample(batches, max(1, int(len(batches) * changed_ratio)))
+    now = datetime.utcnow().replace(microsecond=0)
+    round_batches = []
+    for batch in changed:
+        sales = []
+        for index, sale in enumerate(rng.sample(batch["sales"], min(3, len(batch["sales"])))):
+            sales.append({
+                **sale,
+                "ebay_item_id": f"R{round_number}-S{index}-{sale['ebay_item_id']}",
+                "price": round(sale["price"] * rng.uniform(0.7, 1.4), 2),
+                "sold_date": now - timedelta(hours=rng.randint(0, 48)),
+            })
+        listings = [
+            {**listing, "price": round(listing["price"] * rng.uniform(0.5, 1.3), 2)}
+            for listing in batch["listings"]
+        ]
+        if batch["listings"] and rng.random() < 0.5:
+            template = rng.choice(batch["listings"])
+            listings.append({
+                **template,
+                "ebay_item_id": f"R{round_number}-L-{template['ebay_item_id']}",
+                "price": round(template["price"] * rng.uniform(0.4, 0.9), 2),
+            })
+        batch["listings"] = listings
+        round_batches.append({"query": batch["query"], "sales": sales, "listings": listings})
+    return round_batches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Équivalence détection incrémentale / scan complet")
+    parser.add_argument("--cards", type=int, default=100)
+    parser.add_argument("--sales-per-card", type=int, default=15)
+    parser.add_argument("--listings-per-card", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--changed-ratio", type=float, default=0.1,
+                        help="Part des cartes modifiées à chaque tour")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Fichier JSON de résultats (défaut: stdout)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="ebay-equivalence-")
+    # Avant tout import de l'application: la configuration lit l'environnement
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'equivalence.db')}"
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    logging.basicConfig(level=logging.ERROR)
+
+    from app.core.database import Base, SessionLocal, engine
+    from app.services.arbitrage_service import ArbitrageService
+    from scripts.benchmarks.run import bench_ingest
+    from scripts.benchmarks.synthetic import SyntheticDataset
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    dataset = SyntheticDataset(
+        cards=args.cards,
+        sales_per_card=args.sales_per_card,
+        listings_per_card=args.listings_per_card,
+        seed=args.seed
+    )
+    batches = list(dataset.iter_batches())
+    arbitrage_service = ArbitrageService()
+    rng = random.Random(args.seed)
+
+    # État initial: ingestion complète puis réconciliation
+    bench_ingest(arbitrage_service, db, batches)
+    arbitrage_service.detect_opportunities(db)
+    arbitrage_service.changes.drain()
+
+    rounds = []
+    failed = False
+    try:
+        for round_number in range(1, args.rounds + 1):
+            # Ingestion par le même chemin qu'un scan: les changements sont enregistrés par l'ingestion
+            round_batches = mutate(batches, rng, args.changed_ratio, round_number)
+            bench_ingest(arbitrage_service, db, round_batches)
+            arbitrage_service.detect_opportunities(db, incremental=True)
+            incremental = snapshot(db)
+            arbitrage_service.detect_opportunities(db)
+            full = snapshot(db)
+
+            missing = sorted(set(full) - set(incremental))
+            extra = sorted(set(incremental) - set(full))
+            different = sorted(
+                listing_id for listing_id in set(full) & set(incremental)
+                if full[listing_id] != incremental[listing_id]
+            )
+            identical = not (missing or extra or different)
+            rounds.append({
+                "round": round_number,
+                "cards_changed": len(round_batches),
+                "active_opportunities": len(full),
+                "identical": identical,
+                "missing_listing_ids": missing[:20],
+                "extra_listing_ids": extra[:20],
+                "different_listing_ids": different[:20],
+            })
+            marker = "✅" if identical else "❌"
+            print(f"{marker} tour {round_number}: {len(incremental)} opportunités (incrémental) / "
+                  f"{len(full)} (complet)", file=sys.stderr)
+            if not identical:
+                failed = True
+                break
+    finally:
+        db.close()
+
+    results = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "database": engine.dialect.name,
+        },
+        "dataset": dataset.describe(),
+        "changed_ratio": args.changed_ratio,
+        "rounds": rounds,
+        "identical": not failed,
+    }
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        print(f"✅ Résultats écrits dans {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+    if failed:
+        sys.exit("❌ La détection incrémentale diffère du scan complet")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,509 @@
+"""
+Benchmark du pipeline de scan: débit et latence de chaque étape.
+
+Étapes mesurées:
+- fetch: requêtes HTTP vers le serveur eBay local (fixtures)
+- parse_html / parse_json: parsing des pages de recherche et de l'API Finding
+- normalize: normalisation des titres (nom, set, numéro, grade, langue)
+- ingest: écriture des ventes et listings (ArbitrageService)
+- floor: calcul des prix planchers (carte, grade)
+- detection / detection_incremental: passes de détection
+- detection_parallel: détection complète par shards (`--detection-workers`)
+- alerting: outbox (règles des abonnés), formatage et envoi (sans réseau)
+
+Les résultats sont écrits en JSON pour suivre les régressions d'une version
+à l'autre (`--baseline` compare avec un résultat précédent).
+
+Usage:
+    python -m scripts.benchmarks.run --output bench.json
+    python -m scripts.benchmarks.run --cards 1000 --sales-per-card 30 --baseline bench.json
+
+Par défaut, la base est un fichier SQLite temporaire. Avec --database-url,
+la base doit être vide (ou --reset pour la vider).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+STAGES = [
+    "fetch", "parse_html", "parse_json", "normalize", "ingest",
+    "floor", "detection", "detection_parallel", "detection_incremental", "alerting",
+]
+
+
+class StageTimer:
+    """Échantillons de latence d'une étape et nombre d'éléments traités"""
+
+    def __init__(self, unit: str):
+        self.unit = unit
+        self.samples = []
+        self.items = 0
+        self.extra = {}
+
+    @contextmanager
+    def measure(self, items: int = 1):
+        started = time.perf_counter()
+        yield
+        self.samples.append(time.perf_counter() - started)
+        self.items += items
+
+    def result(self) -> dict:
+        total = sum(self.samples)
+        ordered = sorted(self.samples)
+
+        def percentile(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return round(ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000, 3)
+
+        return {
+            "unit": self.unit,
+            "calls": len(ordered),
+            "items": self.items,
+            "total_seconds": round(total, 6),
+            "items_per_second": round(self.items / total, 1) if total else None,
+            "latency_ms": {
+                "p50": percentile(50),
+                "p95": percentile(95),
+                "p99": percentile(99),
+                "max": percentile(100),
+            },
+            **self.extra,
+        }
+
+
+# =========================
+# Étapes
+# =========================
+
+async def bench_fetch(base_url: str, requests: int) -> StageTimer:
+    import httpx
+    from app.services.ebay_scraper import eBayScraper
+
+    timer = StageTimer("request")
+    headers = eBayScraper().headers
+    async with httpx.AsyncClient(headers=headers, timeout=30.0) as client:
+        for index in range(requests):
+            params = {"_nkw": "charizard", "LH_Sold": "1" if index % 2 else "0"}
+            with timer.measure():
+                response = await client.get(f"{base_url}/sch/i.html", params=params)
+                response.raise_for_status()
+                timer.extra["bytes"] = timer.extra.get("bytes", 0) + len(response.content)
+    return timer
+
+
+def bench_parse_html(fixtures_dir: str, iterations: int) -> StageTimer:
+    import re
+    from bs4 import BeautifulSoup
+    from app.services.ebay_scraper import eBayScraper
+
+    scraper = eBayScraper()
+    pages = []
+    for name in ("search_sold.html", "search_active.html"):
+        with open(os.path.join(fixtures_dir, name), encoding="utf-8") as f:
+            pages.append(f.read())
+
+    timer = StageTimer("page")
+    for index in range(iterations):
+        html = pages[index % len(pages)]
+        items = []
+        started = time.perf_counter()
+        soup = BeautifulSoup(html, "html.parser")
+        for element in soup.find_all("li", class_=re.compile(r"s-item")):
+            parsed = scraper._parse_listing_item(element)
+            if parsed:
+                items.append(parsed)
+        timer.samples.append(time.perf_counter() - started)
+        timer.items += len(items)
+    return timer
+
+
+def bench_parse_json(fixtures_dir: str, iterations: int) -> StageTimer:
+    from app.services.ebay_service import eBayService
+
+    service = eBayService()
+    with open(os.path.join(fixtures_dir, "finding_completed.json"), encoding="utf-8") as f:
+        raw = f.read()
+
+    timer = StageTimer("response")
+    for _ in range(iterations):
+        started = time.perf_counter()
+        data = json.loads(raw)
+        search_result = data["findCompletedItemsResponse"][0].get("searchResult", [{}])[0]
+        items = [service._parse_completed_item(item) for item in search_result.get("item", [])]
+        timer.samples.append(time.perf_counter() - started)
+        timer.items += len(items)
+    return timer
+
+
+def bench_normalize(titles) -> StageTimer:
+    from app.services.card_normalizer import CardNormalizer
+    from app.services.ebay_service import eBayService
+
+    normalizer = CardNormalizer()
+    service = eBayService()
+    timer = StageTimer("title")
+    for title in titles:
+        with timer.measure():
+            normalizer.normalize_card_name(title)
+            normalizer.extract_card_set(title)
+            normalizer.extract_card_number(title)
+            service.extract_psa_grade(title)
+            service.extract_language(title)
+    return timer
+
+
+def bench_ingest(arbitrage_service, db, batches) -> StageTimer:
+    """Un appel par carte: ventes puis listings (lots de la même requête)"""
+    from app.services.ebay_service import eBayService
+
+    class DatasetEbayService(eBayService):
+        """Source eBay alimentée par le jeu synthétique (sans réseau)"""
+
+        def __init__(self, batches_by_query):
+            super().__init__()
+            self.batches_by_query = batches_by_query
+
+        async def search_completed_sales(self, query, **kwargs):
+            return self.batches_by_query[query]["sales"]
+
+        async def search_active_listings(self, query, **kwargs):
+            return self.batches_by_query[query]["listings"]
+
+    batches_by_query = {batch["query"]: batch for batch in batches}
+    arbitrage_service.ebay_service = DatasetEbayService(batches_by_query)
+
+    timer = StageTimer("card")
+    rows = 0
+
+    async def ingest_all():
+        nonlocal rows
+        for query, batch in batches_by_query.items():
+            items = len(batch["sales"]) + len(batch["listings"])
+            with timer.measure(items):
+                await arbitrage_service.fetch_and_store_sales(db=db, search_query=query)
+                await arbitrage_service.fetch_and_store_listings(db=db, search_query=query)
+            rows += items
+
+    asyncio.run(ingest_all())
+    timer.extra["rows"] = rows
+    return timer
+
+
+def bench_floor(arbitrage_service, db) -> StageTimer:
+    from app.models import Listing
+
+    # Un listing représentatif par groupe (carte, grade)
+    groups = {}
+    for listing in db.query(Listing).filter(Listing.is_active == True).all():
+        groups.setdefault((listing.card_id, listing.psa_grade), listing)
+
+    arbitrage_service.floor_cache.clear()
+    timer = StageTimer("group")
+    found = 0
+    for listing in groups.values():
+        with timer.measure():
+            floor_price = arbitrage_service._get_floor_price(db, listing)
+        found += floor_price is not None
+    timer.extra["groups_with_floor"] = found
+    return timer
+
+
+def bench_detection(arbitrage_service, db) -> StageTimer:
+    from app.models import Listing
+
+    timer = StageTimer("listing")
+    arbitrage_service.changes.drain()
+    listings = db.query(Listing).filter(Listing.is_active == True).count()
+    with timer.measure(listings):
+        created = arbitrage_service.detect_opportunities(db)
+    timer.extra["opportunities_created"] = len(created)
+    return timer
+
+
+def bench_detection_parallel(arbitrage_service, db, workers: int) -> StageTimer:
+    from app.models import Listing
+    from app.services.parallel_detection import ParallelDetector
+
+    timer = StageTimer("listing")
+    arbitrage_service.changes.drain()
+    detector = arbitrage_service.parallel_detector = ParallelDetector(workers=workers)
+    listings = db.query(Listing).filter(Listing.is_active == True).count()
+    try:
+        # Démarrage du pool (spawn) hors mesure
+        detector.evaluate()
+        with timer.measure(listings):
+            created = arbitrage_service.detect_opportunities(db)
+    finally:
+        detector.shutdown()
+        arbitrage_service.parallel_detector = ParallelDetector(workers=0)
+    timer.extra["opportunities_created"] = len(created)
+    timer.extra.update(detector.last_stats)
+    return timer
+
+
+def bench_detection_incremental(arbitrage_service, db, changed_ratio: float, seed: int) -> StageTimer:
+    from app.models import Listing
+
+    rng = random.Random(seed)
+    listings = db.query(Listing).filter(Listing.is_active == True).all()
+    changed = rng.sample(listings, max(1, int(len(listings) * changed_ratio)))
+    for listing in changed:
+        listing.price = round(listing.price * rng.uniform(0.6, 1.2), 2)
+    db.commit()
+    for listing in changed:
+        arbitrage_service.changes.listing_changed(listing.id)
+
+    timer = StageTimer("listing")
+    with timer.measure(len(changed)):
+        created = arbitrage_service.detect_opportunities(db, incremental=True)
+    timer.extra["opportunities_created"] = len(created)
+    timer.extra["opportunities_closed"] = len(arbitrage_service.last_closed_ids)
+    return timer
+
+
+def bench_alerting(db, subscribers: int, rules_per_subscriber: int, seed: int) -> StageTimer:
+    from app.models import AlertRule, Card, Opportunity, Subscriber
+    from app.services.alert_dispatcher import AlertDispatcher
+    from app.services.alert_outbox import AlertOutboxService
+    from app.services.alert_rules import AlertRulesEngine
+    from app.services.alert_service import AlertService
+
+    rng = random.Random(seed)
+    cards = db.query(Card).all()
+    for index in range(subscribers):
+        subscriber = Subscriber(name=f"bench-{index}", telegram_chat_id=str(900000 + index))
+        db.add(subscriber)
+        db.flush()
+        for _ in range(rules_per_subscriber):
+            card = rng.choice(cards)
+            kind = rng.random()
+            db.add(AlertRule(
+                subscriber_id=subscriber.id,
+                card_id=card.id if kind < 0.5 else None,
+                card_set=card.card_set if 0.5 <= kind < 0.8 else None,
+                language=card.language if kind >= 0.8 else None,
+                min_net_profit=rng.choice([None, 10.0, 50.0]),
+            ))
+    db.commit()
+
+    alert_service = AlertService()
+    # Mesure du pipeline d'alerte, pas du réseau Telegram
+    alert_service.telegram_enabled = False
+    engine = AlertRulesEngine()
+    outbox = AlertOutboxService(alert_service, rules_engine=engine)
+    dispatcher = AlertDispatcher(alert_service, outbox=outbox)
+
+    opportunities = db.query(Opportunity).filter(Opportunity.is_active == True).all()
+    timer = StageTimer("alert")
+
+    started = time.perf_counter()
+    engine.compile(db)
+    timer.extra["rules_compile_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+    # Débit exprimé en alertes (lignes d'outbox: opportunité x destinataire)
+    with timer.measure(0):
+        rows = outbox.enqueue(db, opportunities)
+        db.commit()
+    timer.items = rows
+    timer.extra["opportunities"] = len(opportunities)
+
+    async def deliver_all():
+        messages = 0
+        while True:
+            claimed = outbox.claim(db, 100)
+            if not claimed:
+                return messages
+            with timer.measure(0):
+                for job in dispatcher.jobs_from_outbox(claimed):
+                    await alert_service.send_text(job.text, chat_id=job.chat_id)
+                    outbox.mark_sent(db, job.outbox_ids)
+                    messages += 1
+
+    timer.extra["messages"] = asyncio.run(deliver_all())
+    return timer
+
+
+# =========================
+# Exécution
+# =========================
+
+def _start_stub_server(fixtures_dir: str, port: int, latency: float) -> str:
+    import uvicorn
+    from scripts.benchmarks import stub_server
+
+    app = stub_server.configure(fixtures_dir, latency)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    for _ in range(100):
+        if server.started:
+            break
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(__file__), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> dict:
+    """
+    Variation du débit par étape (%) par rapport à un résultat précédent;
+    une baisse au-delà de `threshold` % est signalée comme régression.
+    """
+    comparison = {}
+    for stage, current in results["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if not previous or not previous.get("items_per_second") or not current.get("items_per_second"):
+            continue
+        change = (current["items_per_second"] / previous["items_per_second"] - 1) * 100
+        comparison[stage] = {
+            "baseline_items_per_second": previous["items_per_second"],
+            "change_percent": round(change, 1),
+            "regression": change < -threshold,
+        }
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du pipeline de scan")
+    parser.add_argument("--cards", type=int, default=200)
+    parser.add_argument("--sales-per-card", type=int, default=20)
+    parser.add_argument("--listings-per-card", type=int, default=3)
+    parser.add_argument("--title-noise", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--fetch-requests", type=int, default=50)
+    parser.add_argument("--parse-iterations", type=int, default=20)
+    parser.add_argument("--changed-ratio", type=float, default=0.05,
+                        help="Part des listings modifiés avant la détection incrémentale")
+    parser.add_argument("--detection-workers", type=int, default=os.cpu_count() or 2,
+                        help="Processus de l'étape detection_parallel")
+    parser.add_argument("--subscribers", type=int, default=100)
+    parser.add_argument("--rules-per-subscriber", type=int, default=5)
+    parser.add_argument("--stages", default=",".join(STAGES),
+                        help="Étapes à exécuter (séparées par des virgules)")
+    parser.add_argument("--fixtures-dir", default=None)
+    parser.add_argument("--stub-port", type=int, default=8082)
+    parser.add_argument("--stub-latency", type=float, default=0.0,
+                        help="Latence simulée du serveur eBay local (secondes)")
+    parser.add_argument("--database-url", default=None,
+                        help="Base de benchmark (défaut: SQLite temporaire)")
+    parser.add_argument("--reset", action="store_true", help="Vider la base avant le benchmark")
+    parser.add_argument("--output", default=None, help="Fichier JSON de résultats (défaut: stdout)")
+    parser.add_argument("--baseline", default=None, help="Résultats précédents à comparer")
+    parser.add_argument("--regression-threshold", type=float, default=10.0,
+                        help="Baisse de débit (%%) signalée comme régression")
+    args = parser.parse_args()
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Étapes inconnues: {', '.join(sorted(unknown))}")
+
+    workdir = tempfile.mkdtemp(prefix="ebay-bench-")
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    # Avant tout import de l'application: la configuration lit l'environnement
+    os.environ["DATABASE_URL"] = database_url
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    logging.basicConfig(level=logging.ERROR)
+
+    from app.core.database import Base, SessionLocal, engine
+    from app.models import Card
+    from app.services.arbitrage_service import ArbitrageService
+    from scripts.benchmarks.synthetic import FIXTURES_DIR, SyntheticDataset
+
+    fixtures_dir = args.fixtures_dir or FIXTURES_DIR
+
+    if args.reset:
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    db = SessionLocal()
+    if "ingest" in stages and db.query(Card).count():
+        db.close()
+        sys.exit("❌ La base de benchmark n'est pas vide (utilisez --reset ou une autre --database-url)")
+
+    dataset = SyntheticDataset(
+        cards=args.cards,
+        sales_per_card=args.sales_per_card,
+        listings_per_card=args.listings_per_card,
+        title_noise=args.title_noise,
+        seed=args.seed
+    )
+    batches = list(dataset.iter_batches())
+    arbitrage_service = ArbitrageService()
+
+    results = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": engine.dialect.name,
+        },
+        "dataset": dataset.describe(),
+        "stages": {},
+    }
+
+    def run_stage(name, func, *func_args):
+        if name not in stages:
+            return
+        print(f"⏱️  {name}...", file=sys.stderr)
+        results["stages"][name] = func(*func_args).result()
+
+    try:
+        if "fetch" in stages:
+            base_url = _start_stub_server(fixtures_dir, args.stub_port, args.stub_latency)
+            run_stage("fetch", lambda: asyncio.run(bench_fetch(base_url, args.fetch_requests)))
+        run_stage("parse_html", bench_parse_html, fixtures_dir, args.parse_iterations)
+        run_stage("parse_json", bench_parse_json, fixtures_dir, args.parse_iterations)
+        titles = [item["title"] for batch in batches for item in batch["sales"] + batch["listings"]]
+        run_stage("normalize", bench_normalize, titles)
+        run_stage("ingest", bench_ingest, arbitrage_service, db, batches)
+        run_stage("floor", bench_floor, arbitrage_service, db)
+        run_stage("detection", bench_detection, arbitrage_service, db)
+        run_stage("detection_parallel", bench_detection_parallel, arbitrage_service, db, args.detection_workers)
+        run_stage("detection_incremental", bench_detection_incremental,
+                  arbitrage_service, db, args.changed_ratio, args.seed)
+        run_stage("alerting", bench_alerting, db, args.subscribers, args.rules_per_subscriber, args.seed)
+    finally:
+        db.close()
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            results["comparison"] = compare(results, json.load(f), args.regression_threshold)
+        for stage, delta in results["comparison"].items():
+            marker = "🔻" if delta["regression"] else "  "
+            print(f"{marker} {stage:<24} {delta['change_percent']:+.1f}%", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        print(f"✅ Résultats écrits dans {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+    if any(delta["regression"] for delta in results.get("comparison", {}).values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Benchmark de la sérialisation des réponses de liste (10k lignes par défaut).
+
+Compare, par ligne:
+- le chemin historique: objets ORM → validation du `response_model`
+  Pydantic → `json.dumps` (ce que fait FastAPI avec `JSONResponse`)
+- le chemin actuel: colonnes en lecture seule (lignes SQL) → dict → orjson
+  (`app.core.responses`)
+
+et mesure les octets transmis (brut, gzip, brotli) et le coût de la
+compression, puis la requête complète `GET /api/sales` selon
+`Accept-Encoding` (middleware de compression compris).
+
+Usage:
+    python -m scripts.benchmarks.serialization
+    python -m scripts.benchmarks.serialization --rows 10000 --repeat 5 --output serialization.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime, timedelta
+
+
+def best_of(repeat: int, func):
+    """(meilleur temps en secondes, résultat du dernier appel)"""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - started)
+    return min(samples), result
+
+
+def per_row_us(seconds: float, rows: int) -> float:
+    return round(seconds / rows * 1e6, 3)
+
+
+def seed_sales(db, rows: int, seed: int) -> None:
+    from app.models import Card, Sale
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    cards = [Card(normalized_name=f"Card {i}", raw_name=f"Card {i}", card_set="Base Set",
+                  card_number=str(i), language=rng.choice(["EN", "JP", "FR"])) for i in range(max(1, rows // 50))]
+    db.add_all(cards)
+    db.flush()
+    db.bulk_insert_mappings(Sale, [
+        {
+            "card_id": rng.choice(cards).id,
+            "ebay_item_id": f"S{i}",
+            "title": f"Pokemon Card {i % 500} Base Set Holo {rng.choice(['PSA 10', 'PSA 9', 'NM'])}",
+            "price": round(rng.uniform(5, 900), 2),
+            "shipping_cost": rng.choice([0.0, 3.5, 5.0]),
+            "sold_date": now - timedelta(minutes=rng.randint(0, 60 * 24 * 90)),
+            "psa_grade": rng.choice(["PSA 10", "PSA 9", None]),
+            "condition": rng.choice(["Near Mint", None]),
+            "created_at": now,
+        }
+        for i in range(rows)
+    ])
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la sérialisation des réponses de liste")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Fichier JSON de résultats (défaut: stdout)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="ebay-serialization-")
+    # Avant tout import de l'application: la configuration lit l'environnement
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    logging.basicConfig(level=logging.ERROR)
+
+    import orjson
+    from typing import List
+    from fastapi.testclient import TestClient
+    from pydantic import TypeAdapter
+    from app.core.compression import BROTLI_AVAILABLE
+    from app.core.config import settings
+    from app.core.database import Base, SessionLocal, engine
+    from app.core.responses import response_columns, rows_as_dicts
+    from app.main import app
+    from app.models import Sale
+    from app.schemas import SaleResponse
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    seed_sales(db, args.rows, args.seed)
+    rows = args.rows
+    adapter = TypeAdapter(List[SaleResponse])
+
+    def query_orm():
+        db.expunge_all()
+        return db.query(Sale).order_by(Sale.sold_date.desc(), Sale.id.desc()).limit(rows).all()
+
+    def query_rows():
+        return db.query(*response_columns(Sale, SaleResponse)).order_by(
+            Sale.sold_date.desc(), Sale.id.desc()
+        ).limit(rows).all()
+
+    orm_seconds, objects = best_of(args.repeat, query_orm)
+    rows_seconds, sql_rows = best_of(args.repeat, query_rows)
+
+    # Même rendu que `fastapi.responses.JSONResponse`
+    def serialize_pydantic():
+        content = adapter.dump_python(adapter.validate_python(objects, from_attributes=True), mode="json")
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+    def serialize_orjson():
+        return orjson.dumps(rows_as_dicts(sql_rows), option=orjson.OPT_NON_STR_KEYS)
+
+    pydantic_seconds, pydantic_body = best_of(args.repeat, serialize_pydantic)
+    orjson_seconds, body = best_of(args.repeat, serialize_orjson)
+    if json.loads(pydantic_body) != json.loads(body):
+        sys.exit("❌ Les deux chemins ne produisent pas le même JSON")
+
+    compression = {"raw": {"bytes": len(body)}}
+    gzip_seconds, gzipped = best_of(args.repeat, lambda: _gzip(body, settings.compression_gzip_level))
+    compression["gzip"] = {"bytes": len(gzipped), "us_per_row": per_row_us(gzip_seconds, rows)}
+    if BROTLI_AVAILABLE:
+        import brotli
+        brotli_seconds, compressed = best_of(args.repeat, lambda: brotli.compress(body, quality=settings.compression_brotli_quality))
+        compression["br"] = {"bytes": len(compressed), "us_per_row": per_row_us(brotli_seconds, rows)}
+
+    http = {}
+    with TestClient(app) as client:
+        for encoding in ["identity", "gzip"] + (["br"] if BROTLI_AVAILABLE else []):
+            samples = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                response = client.get(f"/api/sales?limit={rows}", headers={"Accept-Encoding": encoding})
+                samples.append(time.perf_counter() - started)
+            http[encoding] = {
+                "bytes_on_wire": int(response.headers.get("content-length", len(response.content))),
+                "content_encoding": response.headers.get("content-encoding"),
+                "latency_ms": {"best": round(min(samples) * 1000, 2), "median": round(statistics.median(samples) * 1000, 2)},
+            }
+    db.close()
+
+    results = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": engine.dialect.name,
+        },
+        "rows": rows,
+        "per_row_us": {
+            "query_orm": per_row_us(orm_seconds, rows),
+            "query_rows": per_row_us(rows_seconds, rows),
+            "serialize_pydantic_json": per_row_us(pydantic_seconds, rows),
+            "serialize_orjson": per_row_us(orjson_seconds, rows),
+            "total_before": per_row_us(orm_seconds + pydantic_seconds, rows),
+            "total_after": per_row_us(rows_seconds + orjson_seconds, rows),
+        },
+        "compression": compression,
+        "http": http,
+    }
+
+    per_row = results["per_row_us"]
+    print(f"⏱️  {rows} lignes: {per_row['total_before']} µs/ligne → {per_row['total_after']} µs/ligne", file=sys.stderr)
+    for encoding, stats in http.items():
+        print(f"   {encoding:<9} {stats['bytes_on_wire']:>10} octets  {stats['latency_ms']['median']:>8} ms", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        print(f"✅ Résultats écrits dans {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+def _gzip(data: bytes, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+if __name__ == "__main__":
+    main()
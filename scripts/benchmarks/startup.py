@@ -0,0 +1,149 @@
+"""
+Benchmark du démarrage: temps d'import de l'application (`python -X importtime`).
+
+Chaque mesure importe `app.main` dans un nouveau processus et lit le temps
+cumulé rapporté par `-X importtime` (médiane de `--runs` mesures). Le
+script échoue (code 1) si:
+- le temps d'import dépasse `--max-ms`
+- il augmente de plus de `--regression-threshold` % par rapport à `--baseline`
+- un module lourd qui doit rester paresseux (`LAZY_MODULES`) est importé
+  au démarrage: cette vérification ne dépend pas de la machine
+
+Usage:
+    python -m scripts.benchmarks.startup --output startup.json
+    python -m scripts.benchmarks.startup --baseline startup.json
+    python -m scripts.benchmarks.startup --max-ms 1500 --runs 7
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Importés au premier usage (services, exports, scraper, alertes): leur
+# présence au démarrage est une régression
+LAZY_MODULES = [
+    "httpx", "bs4", "openai", "telegram", "redis", "pyarrow", "duckdb",
+    "app.services.arbitrage_service", "app.services.ebay_service", "app.services.ebay_scraper",
+]
+
+
+def parse_importtime(stderr: str) -> dict:
+    """{module: (self_us, cumulative_us)} à partir de la sortie de -X importtime"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure_import(module: str, env: dict) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        sys.exit(f"❌ Import de {module} en erreur:\n{completed.stderr[-2000:]}")
+    return parse_importtime(completed.stderr)
+
+
+def top_packages(modules: dict, limit: int) -> list:
+    """Paquets de premier niveau les plus coûteux (temps propre cumulé)"""
+    packages = {}
+    for name, (self_us, _) in modules.items():
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+    ordered = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return [{"package": package, "ms": round(us / 1000, 1)} for package, us in ordered]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du temps d'import de l'application")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="Temps d'import maximum (médiane, ms)")
+    parser.add_argument("--output", default=None, help="Fichier JSON de résultats (défaut: stdout)")
+    parser.add_argument("--baseline", default=None, help="Résultats précédents à comparer")
+    parser.add_argument("--regression-threshold", type=float, default=20.0,
+                        help="Hausse du temps d'import (%%) signalée comme régression")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    # Aucune connexion n'est ouverte à l'import, mais la configuration doit être valide
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='ebay-startup-'), 'startup.db')}")
+
+    # Premier import hors mesure: fichiers .pyc compilés et cache disque chaud
+    measure_import(args.module, env)
+    samples = []
+    modules = {}
+    for _ in range(args.runs):
+        modules = measure_import(args.module, env)
+        samples.append(modules[args.module][1] / 1000)
+
+    loaded_lazy = sorted(
+        name for name in modules
+        if any(name == lazy or name.startswith(lazy + ".") for lazy in LAZY_MODULES)
+    )
+    results = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "module": args.module,
+        "runs": args.runs,
+        "import_ms": {
+            "median": round(statistics.median(samples), 1),
+            "min": round(min(samples), 1),
+            "max": round(max(samples), 1),
+        },
+        "modules_imported": len(modules),
+        "top_packages": top_packages(modules, 10),
+        "lazy_modules_imported": loaded_lazy,
+    }
+
+    failures = []
+    median = results["import_ms"]["median"]
+    print(f"⏱️  import {args.module}: {median:.0f} ms (médiane de {args.runs})", file=sys.stderr)
+    if loaded_lazy:
+        failures.append(f"modules importés au démarrage: {', '.join(loaded_lazy)}")
+    if args.max_ms is not None and median > args.max_ms:
+        failures.append(f"{median:.0f} ms > {args.max_ms:.0f} ms")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            previous = json.load(f)["import_ms"]["median"]
+        change = (median / previous - 1) * 100
+        results["comparison"] = {
+            "baseline_median_ms": previous,
+            "change_percent": round(change, 1),
+            "regression": change > args.regression_threshold,
+        }
+        print(f"   baseline {previous:.0f} ms ({change:+.1f}%)", file=sys.stderr)
+        if results["comparison"]["regression"]:
+            failures.append(f"+{change:.1f}% par rapport à {args.baseline}")
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        print(f"✅ Résultats écrits dans {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+    if failures:
+        for failure in failures:
+            print(f"🔻 {failure}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
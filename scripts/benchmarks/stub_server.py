@@ -0,0 +1,83 @@
+"""
+Serveur eBay local servant les fixtures enregistrées (benchmarks hors ligne).
+
+Routes:
+- GET /sch/i.html: page de recherche (ventes complétées si LH_Sold=1)
+- GET /services/search/FindingService/v1: réponse JSON de l'API Finding
+- GET /stats: nombre de requêtes servies
+
+Usage:
+    python -m scripts.benchmarks.stub_server --port 8082
+
+Puis pointer le scraper dessus (`eBayScraper.base_url`).
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, Response
+
+from scripts.benchmarks.synthetic import FIXTURES_DIR
+
+app = FastAPI(title="eBay Stub Server")
+
+state = {
+    "fixtures_dir": FIXTURES_DIR,
+    "latency": 0.0,
+    "requests": 0,
+    "cache": {},
+}
+
+
+def _fixture(name: str) -> str:
+    if name not in state["cache"]:
+        with open(os.path.join(state["fixtures_dir"], name), encoding="utf-8") as f:
+            state["cache"][name] = f.read()
+    return state["cache"][name]
+
+
+async def _simulate_latency() -> None:
+    state["requests"] += 1
+    if state["latency"]:
+        await asyncio.sleep(state["latency"])
+
+
+@app.get("/sch/i.html")
+async def search(request: Request):
+    await _simulate_latency()
+    sold = request.query_params.get("LH_Sold") == "1"
+    return HTMLResponse(_fixture("search_sold.html" if sold else "search_active.html"))
+
+
+@app.get("/services/search/FindingService/v1")
+async def finding():
+    await _simulate_latency()
+    return Response(_fixture("finding_completed.json"), media_type="application/json")
+
+
+@app.get("/stats")
+async def stats():
+    return {"requests": state["requests"], "latency": state["latency"], "time": time.time()}
+
+
+def configure(fixtures_dir: str = FIXTURES_DIR, latency: float = 0.0) -> FastAPI:
+    state["fixtures_dir"] = fixtures_dir
+    state["latency"] = latency
+    state["cache"].clear()
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serveur eBay local (fixtures)")
+    parser.add_argument("--port", type=int, default=8082)
+    parser.add_argument("--fixtures-dir", default=FIXTURES_DIR)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Latence simulée par requête (secondes)")
+    args = parser.parse_args()
+
+    configure(args.fixtures_dir, args.latency)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
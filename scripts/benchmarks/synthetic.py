@@ -0,0 +1,289 @@
+"""
+Génération de jeux de données synthétiques réalistes pour les benchmarks.
+
+Les titres imitent ceux d'eBay: mots-clés de grading, de langue, d'état,
+casse aléatoire et bruit (emojis, "L@@K", numéro de carte). Le générateur est
+déterministe pour une graine donnée.
+
+Régénérer les fixtures (pages de recherche HTML, réponse JSON de l'API
+Finding) servies par `stub_server.py`:
+    python -m scripts.benchmarks.synthetic --write-fixtures
+"""
+import argparse
+import json
+import os
+import random
+from datetime import datetime, timedelta
+from html import escape
+from typing import Dict, Iterator, List
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+POKEMON = [
+    "Charizard", "Blastoise", "Venusaur", "Pikachu", "Mewtwo", "Mew", "Gengar",
+    "Alakazam", "Gyarados", "Dragonite", "Lugia", "Ho-Oh", "Umbreon", "Espeon",
+    "Rayquaza", "Gardevoir", "Lucario", "Garchomp", "Greninja", "Sylveon",
+    "Eevee", "Snorlax", "Machamp", "Arcanine", "Ninetales", "Typhlosion",
+    "Feraligatr", "Meganium", "Tyranitar", "Scizor", "Blaziken", "Sceptile",
+    "Swampert", "Absol", "Darkrai", "Giratina", "Zekrom", "Reshiram",
+    "Kyogre", "Groudon", "Celebi", "Jirachi", "Latias", "Latios", "Suicune",
+    "Entei", "Raikou", "Mimikyu", "Zacian", "Zamazenta",
+]
+
+SETS = [
+    ("Base Set", 102), ("Jungle", 64), ("Fossil", 62), ("Team Rocket", 83),
+    ("Neo Genesis", 111), ("Skyridge", 144), ("Evolutions", 108),
+    ("Hidden Fates", 69), ("Evolving Skies", 203), ("Celebrations", 25),
+    ("Lost Origin", 196), ("Silver Tempest", 195), ("Obsidian Flames", 197),
+    ("Paldea Evolved", 193), ("Brilliant Stars", 172), ("Astral Radiance", 189),
+    ("Fusion Strike", 264), ("Chilling Reign", 198), ("Vivid Voltage", 185),
+    ("Cosmic Eclipse", 236), ("Unified Minds", 236), ("Lost Thunder", 214),
+    ("Ancient Origins", 98), ("Flashfire", 106),
+]
+
+GRADES = ["PSA 10", "PSA 9", "PSA 8", None]
+GRADE_WEIGHTS = [0.35, 0.3, 0.15, 0.2]
+
+# Mots supprimés par CardNormalizer (n'altèrent pas l'identité de la carte)
+STRIPPED_NOISE = ["Holo", "Rare", "Mint", "NM", "Pokemon", "TCG", "Graded", "Authentic", "1st Edition"]
+# Bruit conservé dans le titre, placé après le nom de la carte
+TRAILING_NOISE = ["🔥", "L@@K", "Investment", "Gem", "Beautiful", "Centered", "Slab"]
+
+CONDITIONS = ["Graded", "Ungraded", "Near Mint or Better", "Lightly Played"]
+
+
+class SyntheticDataset:
+    """
+    Cartes, ventes et listings synthétiques.
+
+    Args:
+        cards: Nombre de cartes distinctes
+        sales_per_card: Ventes complétées par carte (sur `days_back` jours)
+        listings_per_card: Listings actifs par carte
+        title_noise: Probabilité d'ajouter du bruit à chaque position du titre (0-1)
+        jp_ratio: Part des cartes japonaises
+    """
+
+    def __init__(
+        self,
+        cards: int = 200,
+        sales_per_card: int = 20,
+        listings_per_card: int = 3,
+        title_noise: float = 0.3,
+        jp_ratio: float = 0.25,
+        days_back: int = 30,
+        seed: int = 42
+    ):
+        self.sales_per_card = sales_per_card
+        self.listings_per_card = listings_per_card
+        self.title_noise = title_noise
+        self.days_back = days_back
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._next_item_id = 100000000000
+        self.now = datetime.utcnow().replace(microsecond=0)
+
+        combinations = [(name, card_set) for card_set in SETS for name in POKEMON]
+        if cards > len(combinations):
+            raise ValueError(f"Au plus {len(combinations)} cartes synthétiques distinctes")
+        self._rng.shuffle(combinations)
+
+        self.cards: List[Dict] = []
+        for name, (card_set, set_size) in combinations[:cards]:
+            self.cards.append({
+                "name": name,
+                "set": card_set,
+                "number": str(self._rng.randint(1, set_size)),
+                "set_size": set_size,
+                "language": "JP" if self._rng.random() < jp_ratio else "EN",
+                # Prix de référence par grade (log-normal: quelques cartes très chères)
+                "base_price": round(self._rng.lognormvariate(4.5, 1.0) + 10, 2),
+            })
+
+    def describe(self) -> Dict:
+        return {
+            "cards": len(self.cards),
+            "sales_per_card": self.sales_per_card,
+            "listings_per_card": self.listings_per_card,
+            "title_noise": self.title_noise,
+            "seed": self.seed,
+        }
+
+    def query_for(self, card: Dict) -> str:
+        """Requête de recherche d'une carte (clé des lots d'ingestion)"""
+        return f"{card['name']} {card['set']}"
+
+    def title(self, card: Dict, grade) -> str:
+        rng = self._rng
+        parts = []
+        if rng.random() < self.title_noise:
+            parts.append(rng.choice(["Pokemon", "Pokémon", "TCG"]))
+        parts += [card["name"], card["set"]]
+        if rng.random() < 0.7:
+            parts.append(f"{card['number']}/{card['set_size']}")
+        if card["language"] == "JP":
+            parts.append(rng.choice(["Japanese", "JP", "JPN"]))
+        if grade:
+            parts.append(grade if rng.random() > self.title_noise else grade.replace(" ", ""))
+        for noise in (STRIPPED_NOISE, TRAILING_NOISE):
+            if rng.random() < self.title_noise:
+                parts.append(rng.choice(noise))
+
+        title = " ".join(parts)
+        if rng.random() < self.title_noise / 2:
+            title = title.upper()
+        return title
+
+    def _price(self, card: Dict, grade, low: float, high: float) -> float:
+        multiplier = {"PSA 10": 3.0, "PSA 9": 1.5, "PSA 8": 1.0, None: 0.6}[grade]
+        return round(card["base_price"] * multiplier * self._rng.uniform(low, high), 2)
+
+    def _item_id(self) -> str:
+        self._next_item_id += self._rng.randint(1, 50)
+        return str(self._next_item_id)
+
+    def _grade(self):
+        return self._rng.choices(GRADES, weights=GRADE_WEIGHTS)[0]
+
+    def sales_for(self, card: Dict) -> List[Dict]:
+        """Ventes complétées d'une carte, au format de `eBayScraper`"""
+        sales = []
+        for _ in range(self.sales_per_card):
+            grade = self._grade()
+            item_id = self._item_id()
+            sales.append({
+                "ebay_item_id": item_id,
+                "title": self.title(card, grade),
+                "price": self._price(card, grade, 0.85, 1.15),
+                "sold_date": self.now - timedelta(
+                    days=self._rng.randint(0, self.days_back - 1),
+                    minutes=self._rng.randint(0, 1439)
+                ),
+                "url": f"https://www.ebay.com/itm/{item_id}",
+                "condition": self._rng.choice(CONDITIONS),
+                "shipping_cost": self._rng.choice([0.0, 0.0, 3.99, 5.0]),
+            })
+        return sales
+
+    def listings_for(self, card: Dict) -> List[Dict]:
+        """
+        Listings actifs d'une carte: la plupart proches du marché, quelques-uns
+        nettement sous le plancher (opportunités).
+        """
+        listings = []
+        for _ in range(self.listings_per_card):
+            grade = self._grade()
+            item_id = self._item_id()
+            bargain = self._rng.random() < 0.15
+            listings.append({
+                "ebay_item_id": item_id,
+                "title": self.title(card, grade),
+                "price": self._price(card, grade, 0.45, 0.7) if bargain else self._price(card, grade, 0.9, 1.4),
+                "url": f"https://www.ebay.com/itm/{item_id}",
+                "condition": self._rng.choice(CONDITIONS),
+                "shipping_cost": self._rng.choice([0.0, 3.99, 5.0]),
+            })
+        return listings
+
+    def iter_batches(self) -> Iterator[Dict]:
+        """Un lot par carte: requête, ventes et listings"""
+        for card in self.cards:
+            yield {
+                "query": self.query_for(card),
+                "card": card,
+                "sales": self.sales_for(card),
+                "listings": self.listings_for(card),
+            }
+
+
+def render_search_page(items: List[Dict], sold: bool) -> str:
+    """Page de résultats de recherche eBay (structure lue par `eBayScraper`)"""
+    rows = []
+    for item in items:
+        ended = ""
+        if sold:
+            ended = f'<span class="s-item__ended-date">Sold {item["sold_date"]:%b %d, %Y}</span>'
+        rows.append(
+            '<li class="s-item s-item__pl-on-bottom">'
+            '<div class="s-item__wrapper clearfix">'
+            '<div class="s-item__image-section"><div class="s-item__image">'
+            f'<img class="s-item__image-img" src="https://i.ebayimg.com/thumbs/images/g/{item["ebay_item_id"]}/s-l225.jpg" alt="">'
+            '</div></div>'
+            '<div class="s-item__info clearfix">'
+            f'<a class="s-item__link" href="{item["url"]}?hash=item{item["ebay_item_id"]}">'
+            f'<h3 class="s-item__title">{escape(item["title"])}</h3></a>'
+            f'<div class="s-item__subtitle"><span class="SECONDARY_INFO">{escape(item["condition"])}</span></div>'
+            '<div class="s-item__details clearfix">'
+            f'<span class="s-item__price">${item["price"]:,.2f}</span>'
+            f'<span class="s-item__shipping s-item__logisticsCost">+${item["shipping_cost"]:.2f} shipping</span>'
+            f'{ended}'
+            '</div></div></div></li>'
+        )
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>eBay</title></head><body>"
+        "<div id=\"srp-river-results\"><ul class=\"srp-results srp-list clearfix\">"
+        + "".join(rows)
+        + "</ul></div></body></html>"
+    )
+
+
+def render_finding_response(sales: List[Dict]) -> Dict:
+    """Réponse JSON de findCompletedItems (API Finding)"""
+    items = []
+    for sale in sales:
+        items.append({
+            "itemId": [sale["ebay_item_id"]],
+            "title": [sale["title"]],
+            "viewItemURL": [sale["url"]],
+            "sellingStatus": [{
+                "currentPrice": [{"@currencyId": "USD", "__value__": f"{sale['price']:.2f}"}],
+                "sellingState": ["EndedWithSales"],
+            }],
+            "listingInfo": [{"endTime": [sale["sold_date"].strftime("%Y-%m-%dT%H:%M:%S.000Z")]}],
+            "shippingInfo": [{"shippingServiceCost": [{"@currencyId": "USD", "__value__": f"{sale['shipping_cost']:.2f}"}]}],
+            "condition": [{"conditionDisplayName": [sale["condition"]]}],
+        })
+    return {
+        "findCompletedItemsResponse": [{
+            "ack": ["Success"],
+            "searchResult": [{"@count": str(len(items)), "item": items}],
+        }]
+    }
+
+
+def write_fixtures(directory: str = FIXTURES_DIR, items: int = 100, seed: int = 42) -> List[str]:
+    """Écrit les fixtures (une page de `items` résultats chacune)"""
+    dataset = SyntheticDataset(cards=items, sales_per_card=1, listings_per_card=1, seed=seed)
+    sales = [dataset.sales_for(card)[0] for card in dataset.cards]
+    listings = [dataset.listings_for(card)[0] for card in dataset.cards]
+
+    os.makedirs(directory, exist_ok=True)
+    paths = {
+        "search_sold.html": render_search_page(sales, sold=True),
+        "search_active.html": render_search_page(listings, sold=False),
+        "finding_completed.json": json.dumps(render_finding_response(sales)),
+    }
+    written = []
+    for name, content in paths.items():
+        path = os.path.join(directory, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        written.append(path)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Jeux de données synthétiques pour les benchmarks")
+    parser.add_argument("--write-fixtures", action="store_true", help="Régénérer les fixtures HTML/JSON")
+    parser.add_argument("--items", type=int, default=100, help="Résultats par page de fixture")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.write_fixtures:
+        for path in write_fixtures(items=args.items, seed=args.seed):
+            print(f"📝 {path}")
+    else:
+        sample = SyntheticDataset(cards=5, sales_per_card=2, listings_per_card=1, seed=args.seed)
+        for batch in sample.iter_batches():
+            for sale in batch["sales"]:
+                print(f"{sale['price']:>9.2f}  {sale['title']}")
@@ -0,0 +1,106 @@
+"""
+Faux serveur de l'API Bot Telegram pour tester les alertes hors ligne.
+
+Simule la limite d'un message par seconde et par chat (réponse 429 avec
+`retry_after`, comme l'API réelle) et garde les messages reçus en mémoire.
+
+Usage:
+    python scripts/fake_telegram_server.py --port 8081
+
+Puis lancer l'API avec:
+    TELEGRAM_BOT_TOKEN=test TELEGRAM_CHAT_ID=42 \\
+    TELEGRAM_API_BASE_URL=http://localhost:8081 uvicorn app.main:app
+
+Messages reçus: GET http://localhost:8081/messages
+"""
+import argparse
+import json
+import time
+from urllib.parse import parse_qs
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="Fake Telegram Bot API")
+
+state = {
+    "messages": [],
+    "last_message_at": {},
+    "rate_limited": 0,
+    "chat_interval": 1.0,
+}
+
+
+async def _read_parameters(request: Request) -> dict:
+    body = await request.body()
+    if not body:
+        return dict(request.query_params)
+    if request.headers.get("content-type", "").startswith("application/json"):
+        return json.loads(body)
+    return {key: values[0] for key, values in parse_qs(body.decode()).items()}
+
+
+@app.api_route("/bot{token}/{method}", methods=["GET", "POST"])
+async def bot_method(token: str, method: str, request: Request):
+    parameters = await _read_parameters(request)
+
+    if method == "getMe":
+        return {"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"}}
+
+    if method != "sendMessage":
+        return JSONResponse(
+            status_code=404,
+            content={"ok": False, "error_code": 404, "description": "Not Found: method not found"}
+        )
+
+    chat_id = str(parameters.get("chat_id"))
+    now = time.monotonic()
+    last = state["last_message_at"].get(chat_id)
+    if last is not None and now - last < state["chat_interval"]:
+        state["rate_limited"] += 1
+        retry_after = max(1, round(state["chat_interval"] - (now - last)))
+        return JSONResponse(
+            status_code=429,
+            content={
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {retry_after}",
+                "parameters": {"retry_after": retry_after},
+            }
+        )
+
+    state["last_message_at"][chat_id] = now
+    message = {
+        "message_id": len(state["messages"]) + 1,
+        "date": int(time.time()),
+        "chat": {"id": int(chat_id) if chat_id.lstrip("-").isdigit() else 0, "type": "private"},
+        "text": parameters.get("text", ""),
+    }
+    state["messages"].append(message)
+    return {"ok": True, "result": message}
+
+
+@app.get("/messages")
+async def get_messages():
+    return {"count": len(state["messages"]), "rate_limited": state["rate_limited"], "messages": state["messages"]}
+
+
+@app.delete("/messages")
+async def clear_messages():
+    state["messages"].clear()
+    state["last_message_at"].clear()
+    state["rate_limited"] = 0
+    return {"ok": True}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Faux serveur Telegram Bot API")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--chat-interval", type=float, default=1.0,
+                        help="Intervalle minimum entre deux messages d'un chat avant 429")
+    args = parser.parse_args()
+
+    state["chat_interval"] = args.chat_interval
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
@@ -0,0 +1,72 @@
+"""
+Import en masse de ventes historiques depuis des fichiers CSV / NDJSON.
+
+Usage:
+    python scripts/import_sales.py ventes_2023.csv ventes_2024.ndjson.gz
+    python scripts/import_sales.py --chunk-size 20000 dump.csv
+
+Colonnes attendues: ebay_item_id, title, price, sold_date
+Colonnes optionnelles: shipping_cost, psa_grade, condition, language
+"""
+import argparse
+import gzip
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.core.database import SessionLocal
+from app.services.sales_importer import SalesImporter
+
+
+def detect_format(path: str) -> str:
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "csv"
+
+
+def open_text(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def print_progress(stats: dict):
+    print(
+        f"  {stats['rows_read']:>10} lues | {stats['rows_inserted']:>10} insérées | "
+        f"{stats['duplicates']:>8} doublons | {stats['invalid']:>6} invalides | "
+        f"{stats['rows_per_second']:>8.0f} lignes/s",
+        flush=True
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import en masse de ventes historiques")
+    parser.add_argument("files", nargs="+", help="Fichiers CSV ou NDJSON (éventuellement .gz)")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Forcer le format (sinon selon l'extension)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Lignes par paquet")
+    args = parser.parse_args()
+
+    importer = SalesImporter(chunk_size=args.chunk_size)
+    db = SessionLocal()
+
+    try:
+        for path in args.files:
+            file_format = args.format or detect_format(path)
+            print(f"📥 Import de {path} ({file_format})...")
+            with open_text(path) as stream:
+                stats = importer.import_file(db, stream, file_format, on_progress=print_progress)
+            print(
+                f"✅ {stats['rows_inserted']} ventes insérées, {stats['cards_created']} cartes créées "
+                f"en {stats['elapsed_seconds']:.1f}s ({stats['rows_per_second']:.0f} lignes/s)\n"
+            )
+    except Exception as e:
+        print(f"❌ Erreur : {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
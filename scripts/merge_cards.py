@@ -0,0 +1,48 @@
+"""
+Job de fusion des fiches de cartes en doublon (à lancer en cron).
+
+Les processus en cours rechargent leur registre des cartes au redémarrage;
+d'ici là, les lignes qu'ils écrivent sur une fiche fusionnée sont
+rattachées par le passage suivant.
+
+Usage:
+    python scripts/merge_cards.py --dry-run
+    python scripts/merge_cards.py
+"""
+import argparse
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.core.database import SessionLocal
+from app.services.card_matcher import CardMatchService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fusion des cartes en doublon")
+    parser.add_argument("--dry-run", action="store_true", help="Lister les fusions sans rien modifier")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Doublons fusionnés par transaction")
+    args = parser.parse_args()
+
+    service = CardMatchService(batch_size=args.batch_size)
+    db = SessionLocal()
+
+    try:
+        stats = service.merge_duplicates(db, dry_run=args.dry_run)
+        print(f"🔎 {stats['duplicates']} doublons dans {stats['groups']} cartes")
+        if args.dry_run:
+            for merge in stats["merges"]:
+                print(f"   {merge['card_id']} → {merge['merged_into_id']}")
+        else:
+            repointed = ", ".join(f"{table}: {count}" for table, count in stats["repointed"].items())
+            print(f"✅ Lignes rattachées | {repointed}")
+    except Exception as e:
+        print(f"❌ Erreur : {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
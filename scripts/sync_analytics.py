@@ -0,0 +1,49 @@
+"""
+Copie analytique DuckDB: synchronisation ou reconstruction hors du serveur
+(copie initiale d'un gros historique avant d'activer ANALYTICS_ENABLED).
+
+Le fichier DuckDB ne s'ouvre que dans un processus à la fois: arrêter le
+serveur (ou lancer ce script avant de l'activer).
+
+Usage:
+    python scripts/sync_analytics.py
+    python scripts/sync_analytics.py --rebuild
+"""
+import argparse
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.core.database import SessionLocal
+from app.services.analytics import DUCKDB_AVAILABLE, AnalyticsStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synchronisation de la copie analytique DuckDB")
+    parser.add_argument("--rebuild", action="store_true", help="Vider la copie et tout recopier")
+    parser.add_argument("--path", default=None, help="Fichier DuckDB (défaut: ANALYTICS_DB_PATH)")
+    args = parser.parse_args()
+
+    if not DUCKDB_AVAILABLE:
+        print("❌ duckdb et pyarrow sont requis")
+        sys.exit(1)
+
+    store = AnalyticsStore(path=args.path)
+    db = SessionLocal()
+
+    try:
+        copied = store.rebuild(db) if args.rebuild else store.sync(db)
+        print(f"📦 {copied['cards']} cartes, {copied['sales']} ventes, {copied['listings']} listings copiés "
+              f"en {store.last_sync_seconds:.1f}s")
+        rows = store.get_stats()["rows"]
+        print(f"✅ Copie {store.path}: {rows['cards']} cartes, {rows['sales']} ventes, {rows['listings']} listings")
+    except Exception as e:
+        print(f"❌ Erreur : {e}")
+        raise
+    finally:
+        db.close()
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
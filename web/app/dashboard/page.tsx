@@ -3,26 +3,36 @@
 import { useEffect, useState } from "react";
 import { RefreshCw, TrendingUp, TrendingDown, DollarSign, Activity, Target } from "lucide-react";
 import { Button } from "@/components/ui/button";
-import MarketOverview from "./MarketOverview";
+import MarketOverview, { MarketStatsData } from "./MarketOverview";
 import HotOpportunities from "./HotOpportunities";
-import TrendingCards from "./TrendingCards";
+import TrendingCards, { TrendingCard } from "./TrendingCards";
 import StatCard from "./StatCard";
 import { MarketStats } from "@/types";
 
 const FASTAPI_BACKEND_URL = process.env.NEXT_PUBLIC_FASTAPI_URL || "http://localhost:8000";
 
+// Réponse de /api/dashboard/bundle (tous les widgets en une requête)
+interface DashboardBundle {
+  market_stats: MarketStatsData;
+  market_overview: MarketStats;
+  trending_cards: { timeframe: string; cards: TrendingCard[] };
+}
+
 export default function DashboardPage() {
   const [marketStats, setMarketStats] = useState<MarketStats | null>(null);
+  const [bundle, setBundle] = useState<DashboardBundle | null>(null);
   const [loading, setLoading] = useState(true);
   const [lastRefresh, setLastRefresh] = useState<Date>(new Date());
 
   const fetchMarketData = async () => {
     setLoading(true);
     try {
-      const res = await fetch(`${FASTAPI_BACKEND_URL}/api/dashboard/market-overview`);
+      // "no-cache": revalidation par ETag, 304 sans corps si rien n'a changé
+      const res = await fetch(`${FASTAPI_BACKEND_URL}/api/dashboard/bundle`, { cache: "no-cache" });
       if (res.ok) {
-        const data = await res.json();
-        setMarketStats(data);
+        const data: DashboardBundle = await res.json();
+        setBundle(data);
+        setMarketStats(data.market_overview);
       } else {
         setMarketStats(getMockMarketStats());
       }
@@ -67,10 +77,10 @@ export default function DashboardPage() {
       </div>
 
       <div className="container mx-auto px-4 py-8">
-        <MarketOverview stats={marketStats!} />
+        <MarketOverview stats={bundle?.market_stats} />
         <div className="grid grid-cols-1 lg:grid-cols-2 gap-8 mt-8">
           <HotOpportunities />
-          <TrendingCards />
+          <TrendingCards initialCards={bundle?.trending_cards.cards} />
         </div>
       </div>
     </div>
@@ -1,11 +1,13 @@
 "use client";
 
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import { Flame, ExternalLink, TrendingUp } from "lucide-react";
 import { Button } from "@/components/ui/button";
 import Image from "next/image";
 
 const FASTAPI_BACKEND_URL = process.env.NEXT_PUBLIC_FASTAPI_URL || "http://localhost:8000";
+const LIMIT = 10;
+const MIN_ROI = 15;
 
 interface Opportunity {
   id: number;
@@ -26,29 +28,74 @@ interface Opportunity {
 export default function HotOpportunities() {
   const [opportunities, setOpportunities] = useState<Opportunity[]>([]);
   const [loading, setLoading] = useState(true);
+  const shown = useRef<Opportunity[]>([]);
 
   useEffect(() => {
-    const fetchOpportunities = async () => {
+    shown.current = opportunities;
+  }, [opportunities]);
+
+  useEffect(() => {
+    // Flux SSE: instantané initial puis opportunités créées / modifiées / clôturées
+    const source = new EventSource(
+      `${FASTAPI_BACKEND_URL}/api/stream/opportunities?limit=${LIMIT}&min_roi=${MIN_ROI}`
+    );
+
+    const ranked = (list: Opportunity[]) =>
+      list.sort((a, b) => b.profit_margin - a.profit_margin).slice(0, LIMIT);
+
+    const upsert = (event: MessageEvent) => {
+      const opportunity: Opportunity = JSON.parse(event.data);
+      setOpportunities((current) =>
+        ranked([opportunity, ...current.filter((opp) => opp.id !== opportunity.id)])
+      );
+    };
+
+    // Une clôture libère une place: la suivante du classement n'est pas dans le flux
+    const backfill = async () => {
       try {
         const response = await fetch(
-          `${FASTAPI_BACKEND_URL}/api/dashboard/hot-opportunities?limit=10&min_roi=15`
+          `${FASTAPI_BACKEND_URL}/api/dashboard/hot-opportunities?limit=${LIMIT}&min_roi=${MIN_ROI}`
         );
-        
-        if (response.ok) {
-          const data = await response.json();
-          setOpportunities(data);
-        } else {
-          setOpportunities(getMockOpportunities());
-        }
+        if (!response.ok) return;
+        const top: Opportunity[] = await response.json();
+        // Les événements reçus pendant la requête sont plus récents que la réponse
+        setOpportunities((current) => {
+          const known = new Set(current.map((opp) => opp.id));
+          return ranked([...current, ...top.filter((opp) => !known.has(opp.id))]);
+        });
       } catch (error) {
-        console.error("Erreur hot opportunities:", error);
+        console.error("Erreur complément hot opportunities:", error);
+      }
+    };
+
+    let received = false;
+
+    source.addEventListener("snapshot", (event) => {
+      received = true;
+      setOpportunities(JSON.parse((event as MessageEvent).data));
+      setLoading(false);
+    });
+    source.addEventListener("created", (event) => upsert(event as MessageEvent));
+    source.addEventListener("updated", (event) => upsert(event as MessageEvent));
+    source.addEventListener("closed", (event) => {
+      const closed: Opportunity = JSON.parse((event as MessageEvent).data);
+      const listed = shown.current;
+      setOpportunities((list) => list.filter((opp) => opp.id !== closed.id));
+      if (listed.length === LIMIT && listed.some((opp) => opp.id === closed.id)) {
+        backfill();
+      }
+    });
+
+    source.onerror = () => {
+      // EventSource se reconnecte seul; données de démo si le backend est injoignable
+      if (!received) {
+        console.error("Erreur flux hot opportunities");
         setOpportunities(getMockOpportunities());
-      } finally {
         setLoading(false);
       }
     };
 
-    fetchOpportunities();
+    return () => source.close();
   }, []);
 
   return (
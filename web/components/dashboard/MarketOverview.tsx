@@ -6,7 +6,7 @@ import { PieChart, Pie, Cell, ResponsiveContainer, Legend, Tooltip } from "recha
 
 const FASTAPI_BACKEND_URL = process.env.NEXT_PUBLIC_FASTAPI_URL || "http://localhost:8000";
 
-interface MarketStatsData {
+export interface MarketStatsData {
   total_cards: number;
   total_sales: number;
   total_listings: number;
@@ -21,11 +21,22 @@ interface MarketStatsData {
   }>;
 }
 
-export default function MarketOverview() {
-  const [stats, setStats] = useState<MarketStatsData | null>(null);
-  const [loading, setLoading] = useState(true);
+interface MarketOverviewProps {
+  // Fournies par le bundle du dashboard; sinon chargées par le composant
+  stats?: MarketStatsData;
+}
+
+export default function MarketOverview({ stats: bundleStats }: MarketOverviewProps) {
+  const [stats, setStats] = useState<MarketStatsData | null>(bundleStats ?? null);
+  const [loading, setLoading] = useState(!bundleStats);
 
   useEffect(() => {
+    if (bundleStats) {
+      setStats(bundleStats);
+      setLoading(false);
+      return;
+    }
+
     const fetchMarketStats = async () => {
       try {
         const response = await fetch(`${FASTAPI_BACKEND_URL}/api/dashboard/market-stats`);
@@ -45,7 +56,7 @@ export default function MarketOverview() {
     };
 
     fetchMarketStats();
-  }, []);
+  }, [bundleStats]);
 
   if (loading) {
     return (
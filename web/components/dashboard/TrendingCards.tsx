@@ -14,7 +14,7 @@ import Image from "next/image";
 
 const FASTAPI_BACKEND_URL = process.env.NEXT_PUBLIC_FASTAPI_URL || "http://localhost:8000";
 
-interface TrendingCard {
+export interface TrendingCard {
   card_id: number;
   card_name: string;
   card_set: string;
@@ -27,12 +27,23 @@ interface TrendingCard {
 
 type Timeframe = "24h" | "7d" | "30d";
 
-export default function TrendingCards() {
-  const [cards, setCards] = useState<TrendingCard[]>([]);
+interface TrendingCardsProps {
+  // Cartes 7j du bundle du dashboard; les autres périodes sont chargées à la demande
+  initialCards?: TrendingCard[];
+}
+
+export default function TrendingCards({ initialCards }: TrendingCardsProps) {
+  const [cards, setCards] = useState<TrendingCard[]>(initialCards ?? []);
   const [timeframe, setTimeframe] = useState<Timeframe>("7d");
-  const [loading, setLoading] = useState(true);
+  const [loading, setLoading] = useState(!initialCards);
 
   useEffect(() => {
+    if (timeframe === "7d" && initialCards) {
+      setCards(initialCards);
+      setLoading(false);
+      return;
+    }
+
     const fetchTrendingCards = async () => {
       setLoading(true);
       try {
@@ -55,7 +66,7 @@ export default function TrendingCards() {
     };
 
     fetchTrendingCards();
-  }, [timeframe]);
+  }, [timeframe, initialCards]);
 
   return (
     <div className="bg-card border border-border rounded-lg p-6">